@@ -140,6 +140,9 @@ cache_placement
  * args
     * For all:
        * network_cache: overall network cache (in number of entries) as fraction of content catalogue
+       * bytes: if True, network_cache is a fraction of the total size of the content catalogue
+         and cache sizes are expressed in the unit of content sizes, as required by the
+         size-aware cache policies (optional, default: False). The workload must provide content sizes.
     * For CONSOLIDATED
        * spread: The fraction of top centrality nodes on which caches are deployed (optional, default: 0.5)
 
@@ -176,9 +179,44 @@ cache_policy
     * NULL  -> No cache
     * RAND  -> Random eviction
     * FIFO  -> First In First Out
+    * TINY_LFU -> TinyLFU admission on top of another eviction policy
+    * ARC   -> Adaptive Replacement Cache
+    * LIRS  -> Low Inter-reference Recency Set
+    * S3_FIFO   -> Simple, Scalable caching with three Static FIFO queues
+    * CLOCK_PRO -> CLOCK-Pro
+    * SIZE_LRU  -> LRU for contents of different sizes
+    * SIZE_FIFO -> FIFO for contents of different sizes
+    * GDSF  -> Greedy Dual Size Frequency
  * args:
     * For SLRU:
        * segments: int, optional, default=2. Number of segments
+    * For TINY_LFU:
+       * policy: str, optional, default='LRU'. The eviction policy. MIN,
+         NULL and CLOCK_PRO are not supported
+       * policy_attr: dict, optional. The arguments of the eviction policy
+       * window: int, optional, default=10*cache size. Number of requests
+         after which frequencies are halved
+    * For LIRS:
+       * hir_ratio: float, optional, default=0.01. Fraction of the cache
+         reserved to HIR items
+    * For S3_FIFO:
+       * small_ratio: float, optional, default=0.1. Fraction of the cache
+         reserved to the small queue
+    * For GDSF:
+       * cost: str, optional, default='UNIT'. Cost of retrieving a content:
+         'UNIT' maximizes the hit ratio and 'SIZE' the byte hit ratio
+ * args common to all policies, wrapping caches of the policy:
+    * admission: str or dict, optional. Admission policy, either its name
+      or a dict with its name and args:
+       * K_HITS -> Insert contents only at their k-th request. Args:
+          * k: int, optional, default=2
+          * memory: int, optional. Number of contents whose requests are
+            counted. If not specified, requests of all contents are counted
+       * RAND -> Insert contents with a given probability. Args:
+          * p: float. Insertion probability
+          * seed: optional. Seed of the random number generator
+    * ttl: float, optional. Time after which cached contents expire, in the
+      time unit of the timestamps of the workload events
 
 
 desc
@@ -215,15 +253,100 @@ PARALLEL_EXECUTION = True
 # This option is ignored if PARALLEL_EXECUTION = False
 N_PROCESSES = cpu_count()
 
+# Number of experiments run by each process before it is replaced by a new
+# one, which releases all memory it used, including scenarios it cached.
+# Uncomment to limit the growth of memory used by processes.
+# MAX_TASKS_PER_CHILD = 10
+
+# Backend executing experiments. SERIAL runs them in this process, POOL in
+# N_PROCESSES processes of this machine and BROKER in worker processes which
+# may run on other machines and connect to BROKER_ADDRESS, authenticating with
+# BROKER_AUTHKEY. Workers are started with:
+#   icarus worker --address HOST:PORT --authkey KEY
+# and must run the same version of Icarus. Shared workloads are regenerated by
+# workers on other machines. If not set, POOL is used if PARALLEL_EXECUTION
+# is True and SERIAL otherwise.
+# EXECUTION_BACKEND = 'BROKER'
+# BROKER_ADDRESS = ('0.0.0.0', 50000)
+# BROKER_AUTHKEY = 'change-me'
+
+# File where the durations of experiments are recorded. When running
+# experiments in parallel, those which took longest in previous campaigns are
+# started first. Durations are also used to estimate the remaining time of a
+# campaign.
+JOB_DURATIONS_FILE = 'durations.json'
+
 # Format in which results are saved.
 # Result readers and writers are located in module ./icarus/results/readwrite.py
 # Currently only PICKLE is supported
 RESULTS_FORMAT = 'PICKLE'
 
+# Number of events read at once from workloads supporting it. Reading events
+# in chunks is faster and generates the same events, but the random numbers of
+# a whole chunk of events are drawn before those of the strategy and cache
+# policies serving them. Results of strategies and cache policies drawing
+# random numbers (e.g. PROB_CACHE, RAND_BERNOULLI, RAND_CHOICE or RAND) are
+# therefore different from those obtained reading events one by one, which is
+# the default. Uncomment to read events in chunks.
+# EVENT_CHUNK_SIZE = 10000
+
+# If True, warmup requests are executed by only updating the state of caches,
+# without any bookkeeping needed by data collectors, for strategies supporting
+# it. This makes warmup faster and does not change results.
+FAST_WARMUP = True
+
+# If True, the events of each distinct workload are generated once before
+# running experiments and stored in memory-mapped files read by all experiments
+# using it. Strategies are then compared on the same sequence of requests, even
+# if they draw random numbers (common random numbers). Only workloads with
+# numeric contents, of scenarios seeded as required for their reuse (see
+# below), are shared.
+SHARE_WORKLOADS = True
+
+# Number of scenarios (topology, workload, cache and content placement and
+# shortest paths) kept in memory by each process and reused by all experiments
+# run on them. Only scenarios whose topology, workload and placements are
+# seeded when they accept a seed are reused.
+SCENARIO_CACHE_SIZE = 4
+
+# Directory where scenarios are also stored, so that they are reused across
+# processes and campaigns. Stored scenarios are not invalidated if the
+# resource files they are built from change. Uncomment to enable.
+# SCENARIO_CACHE_DIR = 'scenarios'
+
+# Directory where the states of caches at the end of the warmup are stored, so
+# that experiments with the same warmup restore them instead of simulating it.
+# Only experiments with a seeded workload, a strategy not drawing random
+# numbers and a non-randomized cache policy are checkpointed.
+# Uncomment to enable.
+# WARMUP_CHECKPOINT_DIR = 'checkpoints'
+
+# If True, the performance of the simulator is measured in each experiment and
+# stored in its results under the INSTRUMENTATION key: time taken to build the
+# topology, the workload, the cache and content placement, the shortest paths
+# and the network model and to execute the warmup and the measured phase,
+# events executed per second and peak memory (resident set size) of the process
+INSTRUMENTATION = False
+
+# If True, instrumented experiments are also profiled with cProfile and the
+# functions with the highest cumulative time are reported in their results
+INSTRUMENTATION_PROFILE = False
+
 # Number of times each experiment is replicated
 # This is necessary for extracting confidence interval of selected metrics
 N_REPLICATIONS = 3
 
+# Metrics, as paths in the results tree, whose confidence intervals determine
+# the number of replications of each experiment. If specified, replications
+# of each experiment are added, after the first N_REPLICATIONS, until the
+# confidence intervals of all these metrics are narrower than
+# ADAPTIVE_REPLICATION_CI_WIDTH or MAX_REPLICATIONS replications are run.
+# Uncomment to enable.
+# ADAPTIVE_REPLICATION_METRICS = [('CACHE_HIT_RATIO', 'MEAN')]
+ADAPTIVE_REPLICATION_CI_WIDTH = 0.01
+ADAPTIVE_REPLICATION_CONFIDENCE = 0.95
+MAX_REPLICATIONS = 20
+
 # List of metrics to be measured in the experiments
 # The implementation of data collectors are located in ./icaurs/execution/collectors.py
 # Remove collectors not needed
@@ -306,6 +429,12 @@ default['workload'] = {'name':       'STATIONARY',
 default['cache_placement']['name'] = 'UNIFORM'
 default['content_placement']['name'] = 'UNIFORM'
 default['cache_policy']['name'] = CACHE_POLICY
+# Compute shortest paths on demand, only from the nodes actually queried,
+# instead of computing all-pair shortest paths upfront. This reduces setup
+# time and memory on large topologies. The number of single-source shortest
+# path trees kept in memory can be bounded with path_cache_size.
+# default['netconf']['lazy_paths'] = True
+# default['netconf']['path_cache_size'] = 1000
 
 # Create experiments multiplexing all desired parameters
 for alpha in ALPHA:
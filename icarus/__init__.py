@@ -28,6 +28,7 @@ __modules_to_register = [
      'icarus.scenarios.contentplacement',
      'icarus.scenarios.cacheplacement',
      'icarus.scenarios.workload',
+     'icarus.backends',
                          ]
 
 for m in __modules_to_register:
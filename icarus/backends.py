@@ -0,0 +1,400 @@
+"""Backends executing the experiments scheduled by the orchestrator.
+
+The orchestrator submits jobs, i.e. calls of a function with given arguments,
+to an execution backend, which runs them and reports their outcome through
+callbacks. The following backends are available:
+
+ * SERIAL: runs jobs in the calling process, one at a time;
+ * POOL: runs jobs in a pool of processes on the local machine;
+ * BROKER: distributes jobs over TCP to worker processes, which can run on
+   other machines and are started with the ``icarus worker`` command.
+"""
+import sys
+import socket
+import time
+import logging
+import threading
+import traceback
+import multiprocessing as mp
+from multiprocessing.connection import Listener, Client
+from multiprocessing.util import register_after_fork
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from icarus.registry import register_execution_backend
+
+
+__all__ = [
+    'ExecutionBackend',
+    'SerialBackend',
+    'PoolBackend',
+    'BrokerBackend',
+    'run_worker',
+    'run_workers',
+           ]
+
+
+logger = logging.getLogger('backend')
+
+
+class ExecutionBackend(object):
+    """Base class for all execution backends.
+
+    Jobs are submitted with `submit`. When a job finishes, its callback is
+    called with the value returned by the job or, if the job could not be
+    run, its error callback is called with the error. Callbacks may be called
+    from threads other than the one submitting jobs.
+    """
+
+    def __init__(self, settings):
+        """Constructor
+
+        Parameters
+        ----------
+        settings : Settings
+            The settings of the simulator
+        """
+        self.settings = settings
+
+    @property
+    def n_workers(self):
+        """The number of jobs that can run concurrently"""
+        return 1
+
+    def submit(self, function, args, callback, error_callback):
+        """Submit a job
+
+        Parameters
+        ----------
+        function : callable
+            The function run by the job. It must be picklable by reference,
+            i.e. defined at the top level of a module.
+        args : tuple
+            The arguments of the function. They must be picklable.
+        callback : callable
+            Function called with the value returned by the job
+        error_callback : callable
+            Function called with the error preventing the job from completing
+        """
+        raise NotImplementedError('This method must be implemented')
+
+    def close(self):
+        """Declare that no more jobs will be submitted. Workers stop after
+        completing the jobs already submitted.
+        """
+        pass
+
+    def terminate(self):
+        """Stop all workers immediately, without completing submitted jobs"""
+        pass
+
+    def join(self):
+        """Wait for all workers to stop. It must be called after `close` or
+        `terminate`.
+        """
+        pass
+
+
+@register_execution_backend('SERIAL')
+class SerialBackend(ExecutionBackend):
+    """Backend running jobs in the calling process as soon as they are
+    submitted.
+    """
+
+    def __init__(self, settings):
+        super(SerialBackend, self).__init__(settings)
+        self._terminated = False
+
+    def submit(self, function, args, callback, error_callback):
+        if self._terminated:
+            return
+        try:
+            value = function(*args)
+        except Exception as e:
+            error_callback(e)
+        else:
+            callback(value)
+
+    def terminate(self):
+        self._terminated = True
+
+
+@register_execution_backend('POOL')
+class PoolBackend(ExecutionBackend):
+    """Backend running jobs in a pool of processes on the local machine.
+
+    The number of processes is set by the *N_PROCESSES* setting and the number
+    of jobs run by each process before being replaced by the
+    *MAX_TASKS_PER_CHILD* setting.
+    """
+
+    def __init__(self, settings):
+        super(PoolBackend, self).__init__(settings)
+        self.n_processes = settings.N_PROCESSES \
+                           if 'N_PROCESSES' in settings else mp.cpu_count()
+        max_tasks = settings.MAX_TASKS_PER_CHILD \
+                    if 'MAX_TASKS_PER_CHILD' in settings else None
+        self.pool = mp.Pool(self.n_processes, maxtasksperchild=max_tasks)
+
+    @property
+    def n_workers(self):
+        return min(mp.cpu_count(), self.n_processes)
+
+    def submit(self, function, args, callback, error_callback):
+        # Starting from Python 3.2, multiprocessing.Pool.apply_async
+        # accepts a new error_callback argument that is a callable for
+        # returning a message when uncaught errors are thrown.
+        # The following lines ensure compatibility with Python < 3.2
+        callbacks = {'callback': callback}
+        if sys.version_info > (3, 2):
+            callbacks['error_callback'] = error_callback
+        self.pool.apply_async(function, args, **callbacks)
+
+    def close(self):
+        self.pool.close()
+
+    def terminate(self):
+        self.pool.terminate()
+
+    def join(self):
+        self.pool.join()
+
+
+def _authkey(key):
+    """Return an authentication key as bytes"""
+    return key.encode('utf-8') if not isinstance(key, bytes) else key
+
+
+@register_execution_backend('BROKER')
+class BrokerBackend(ExecutionBackend):
+    """Backend distributing jobs to worker processes connecting to it over
+    TCP, possibly from other machines.
+
+    The broker listens on the address set by the *BROKER_ADDRESS* setting, as
+    a (host, port) tuple, and only accepts workers authenticating with the key
+    of the *BROKER_AUTHKEY* setting. Workers are started with `run_worker` or
+    with the ``icarus worker`` command. Each worker runs one job at a time and
+    jobs of workers disconnecting before completing them are submitted again
+    to other workers. Workers can connect and disconnect at any time.
+
+    Jobs and their results are exchanged as pickles, hence workers must run
+    the same version of the simulator as the broker and the broker must only
+    be reachable by trusted hosts.
+    """
+
+    def __init__(self, settings):
+        super(BrokerBackend, self).__init__(settings)
+        if 'BROKER_AUTHKEY' not in settings:
+            raise ValueError('BROKER_AUTHKEY setting is required by the '
+                             'BROKER execution backend')
+        self.authkey = _authkey(settings.BROKER_AUTHKEY)
+        address = tuple(settings.BROKER_ADDRESS) \
+                  if 'BROKER_ADDRESS' in settings else ('localhost', 0)
+        self.listener = Listener(address, authkey=self.authkey)
+        # The actual address, which includes the port if chosen by the OS
+        self.address = self.listener.address
+        self._jobs = queue.Queue()
+        # Notified whenever a job finishes or the backend is terminated
+        self._done = threading.Condition()
+        self._n_pending = 0
+        self._n_connected = 0
+        self._closed = False
+        self._terminated = False
+        self._stopping = False
+        # Processes forked from this one, such as local workers, must not keep
+        # the socket open, otherwise workers connecting after the broker
+        # stopped would wait for it forever
+        register_after_fork(self, BrokerBackend._close_after_fork)
+        self._acceptor = threading.Thread(target=self._accept)
+        self._acceptor.daemon = True
+        self._acceptor.start()
+        logger.info('Broker listening on %s:%d', *self.address)
+
+    @property
+    def n_workers(self):
+        return max(1, self._n_connected)
+
+    def _close_after_fork(self):
+        """Close the socket listening for connections in a forked process"""
+        self.listener.close()
+
+    def submit(self, function, args, callback, error_callback):
+        with self._done:
+            self._n_pending += 1
+        self._jobs.put((function, args, callback, error_callback))
+
+    def _accept(self):
+        """Accept connections of workers and serve each in a new thread"""
+        while True:
+            try:
+                conn = self.listener.accept()
+            except Exception as e:
+                if self._stopping:
+                    break
+                logger.warning('Rejected worker connection: %s', e)
+                continue
+            if self._stopping:
+                conn.close()
+                break
+            handler = threading.Thread(target=self._serve, args=(conn,))
+            handler.daemon = True
+            handler.start()
+
+    def _next_job(self):
+        """Return the next job to run or *None* if all jobs are completed"""
+        while not self._terminated:
+            try:
+                return self._jobs.get(timeout=0.5)
+            except queue.Empty:
+                # Jobs running on other workers may still be submitted again
+                if self._closed and self._n_pending == 0:
+                    return None
+        return None
+
+    def _serve(self, conn):
+        """Send jobs to a worker and receive their outcome until all jobs are
+        completed or the worker disconnects
+        """
+        with self._done:
+            self._n_connected += 1
+        try:
+            while True:
+                job = self._next_job()
+                if job is None:
+                    if not self._terminated:
+                        conn.send(('STOP',))
+                    break
+                function, args, callback, error_callback = job
+                try:
+                    conn.send(('JOB', function, args))
+                    status, value = conn.recv()
+                except (EOFError, IOError, OSError) as e:
+                    logger.warning('Worker disconnected: %s. Submitting its '
+                                   'job again', e)
+                    self._jobs.put(job)
+                    break
+                if self._terminated:
+                    break
+                try:
+                    if status == 'RESULT':
+                        callback(value)
+                    else:
+                        error_callback(value)
+                finally:
+                    with self._done:
+                        self._n_pending -= 1
+                        self._done.notify_all()
+        except (EOFError, IOError, OSError):
+            pass
+        finally:
+            with self._done:
+                self._n_connected -= 1
+            conn.close()
+
+    def close(self):
+        self._closed = True
+
+    def terminate(self):
+        with self._done:
+            self._terminated = True
+            self._done.notify_all()
+
+    def join(self):
+        with self._done:
+            while self._n_pending > 0 and not self._terminated:
+                self._done.wait()
+        if self._stopping:
+            return
+        self._stopping = True
+        # Wake up the thread waiting for connections. The connection is not
+        # authenticated, so that it does not block if the thread already
+        # stopped after accepting a late worker
+        host, port = self.address
+        if host in ('0.0.0.0', ''):
+            host = 'localhost'
+        try:
+            socket.create_connection((host, port)).close()
+        except (IOError, OSError):
+            pass
+        self._acceptor.join()
+        self.listener.close()
+
+
+def run_worker(address, authkey, retry=0):
+    """Run a worker executing the jobs of a broker until the broker has no
+    more jobs
+
+    Parameters
+    ----------
+    address : tuple
+        The (host, port) address of the broker
+    authkey : str
+        The authentication key of the broker
+    retry : float, optional
+        Time in seconds during which connection to the broker is attempted
+        again if it is not yet listening
+
+    Returns
+    -------
+    n_jobs : int
+        The number of jobs executed
+    """
+    deadline = time.time() + retry
+    while True:
+        try:
+            conn = Client(tuple(address), authkey=_authkey(authkey))
+            break
+        except (IOError, OSError):
+            if time.time() >= deadline:
+                raise
+            time.sleep(1)
+    n_jobs = 0
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, IOError, OSError):
+                break
+            if message[0] != 'JOB':
+                break
+            _, function, args = message
+            try:
+                outcome = ('RESULT', function(*args))
+            except Exception:
+                outcome = ('ERROR', traceback.format_exc())
+            try:
+                conn.send(outcome)
+            except (IOError, OSError):
+                break
+            n_jobs += 1
+    finally:
+        conn.close()
+    return n_jobs
+
+
+def run_workers(address, authkey, n_processes=None, retry=0):
+    """Run several workers in separate processes, until the broker has no
+    more jobs
+
+    Parameters
+    ----------
+    address : tuple
+        The (host, port) address of the broker
+    authkey : str
+        The authentication key of the broker
+    n_processes : int, optional
+        The number of workers. If not specified, one worker per CPU is run.
+    retry : float, optional
+        Time in seconds during which connection to the broker is attempted
+        again if it is not yet listening
+    """
+    n_processes = n_processes or mp.cpu_count()
+    workers = [mp.Process(target=run_worker, args=(address, authkey, retry))
+               for _ in range(n_processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
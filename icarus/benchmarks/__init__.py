@@ -0,0 +1,5 @@
+"""This package contains benchmarks measuring the running time of performance
+critical components of the simulator.
+"""
+from .routing import *
+from .suite import *
@@ -0,0 +1,197 @@
+"""Benchmarks of the computation and update of shortest paths
+
+This module compares the time taken to update shortest paths after link
+failures and recoveries incrementally with the time taken to recompute all
+shortest paths from scratch, as well as the throughput of shortest path
+queries of route tables with that of a dict-of-dicts of paths.
+
+It can be run from the command line, e.g.::
+
+    $ python -m icarus.benchmarks.routing
+"""
+from __future__ import division
+import json
+import random
+import time
+
+import networkx as nx
+
+from icarus.registry import TOPOLOGY_FACTORY
+from icarus.execution.network import symmetrify_paths
+from icarus.execution.routing import RouteTable, LazyRouteTable
+
+
+__all__ = [
+    'BENCHMARK_TOPOLOGIES',
+    'bench_route_table_update',
+    'bench_shortest_path',
+          ]
+
+
+# Topologies used by default, as (name, parameters) tuples
+BENCHMARK_TOPOLOGIES = [
+    ('GEANT', {}),
+    ('TISCALI', {}),
+    ('ROCKET_FUEL', {'asn': 1221}),
+                       ]
+
+
+def _expand_all(table):
+    """Compute all shortest path trees of a lazy route table"""
+    for r in range(len(table.nodes)):
+        table._tree(r)
+
+
+def bench_route_table_update(topology, n_failures=20, seed=None):
+    """Measure the time taken to update shortest paths after link failures and
+    recoveries, both incrementally and by recomputing all paths
+
+    Each failure removes a random link from the topology and is followed by
+    the recovery of the same link. After each event, the paths of the
+    incrementally updated route table are checked against those of the
+    recomputed one.
+
+    Parameters
+    ----------
+    topology : fnss.Topology
+        The topology. It is modified during the benchmark and restored at the
+        end of it.
+    n_failures : int, optional
+        The number of link failures
+    seed : any hashable type, optional
+        The seed of the random generator selecting the links to fail
+
+    Returns
+    -------
+    results : dict
+        Dictionary with the mean time (in seconds) taken per event by full
+        recomputation ('full'), by incremental update of a compiled route
+        table ('incremental') and of a lazy route table whose trees have all
+        been computed ('lazy'), as well as the mean fraction of trees updated
+        per event ('updated_fraction')
+    """
+    rand = random.Random(seed)
+    links = sorted(topology.edges(), key=repr)
+    n = topology.number_of_nodes()
+    table = RouteTable(topology)
+    lazy = LazyRouteTable(topology)
+    t_full = t_incr = t_lazy = 0.0
+    n_updated = 0
+    n_events = 0
+    for u, v in rand.sample(links, min(n_failures, len(links))):
+        attr = topology.edge[u][v]
+        for removed in (True, False):
+            if removed:
+                topology.remove_edge(u, v)
+                change = {'removed_links': [(u, v)]}
+            else:
+                topology.add_edge(u, v, **attr)
+                change = {'added_links': [(u, v)]}
+            start = time.time()
+            expected = RouteTable(topology)
+            t_full += time.time() - start
+            start = time.time()
+            n_updated += table.update(**change)
+            t_incr += time.time() - start
+            # Expand all trees so that only the update and the recomputation
+            # of the discarded trees are measured
+            _expand_all(lazy)
+            start = time.time()
+            lazy.update(**change)
+            _expand_all(lazy)
+            t_lazy += time.time() - start
+            for x, y in ((rand.choice(lazy.nodes), rand.choice(lazy.nodes))
+                         for _ in range(n)):
+                if y in expected[x]:
+                    if not expected.path(x, y) == table.path(x, y) == \
+                           lazy.path(x, y):
+                        raise AssertionError('Path mismatch (%s, %s)' % (x, y))
+            n_events += 1
+    n_events = max(n_events, 1)
+    return {'nodes': n,
+            'links': len(links),
+            'events': n_events,
+            'full': t_full / n_events,
+            'incremental': t_incr / n_events,
+            'lazy': t_lazy / n_events,
+            'updated_fraction': n_updated / (n_events * n)}
+
+
+def bench_shortest_path(topology, n_queries=200000, seed=None, repeat=3):
+    """Measure the throughput of shortest path queries of route tables and of
+    the dict-of-dicts of paths returned by `symmetrify_paths`
+
+    All tables serve the same sequence of queries between random pairs of
+    nodes twice, and return the same paths. The first pass over the queries
+    of route tables also includes the decoding and memoization of the paths
+    queried for the first time, while the second pass measures the
+    throughput of a simulation in steady state.
+
+    Parameters
+    ----------
+    topology : fnss.Topology
+        The topology
+    n_queries : int, optional
+        The number of queries
+    seed : any hashable type, optional
+        The seed of the random generator selecting the pairs of nodes
+    repeat : int, optional
+        The number of repetitions, of which the best is reported. Each
+        repetition starts from newly built tables.
+
+    Returns
+    -------
+    results : dict
+        Dictionary with the best number of queries per second served in the
+        second pass by the dict-of-dicts ('dict'), by a compiled route table
+        ('compiled') and by a lazy route table ('lazy'), and in the first pass
+        by the route tables ('compiled_first' and 'lazy_first')
+    """
+    rand = random.Random(seed)
+    nodes = list(topology.nodes())
+    pairs = [(rand.choice(nodes), rand.choice(nodes))
+             for _ in range(n_queries)]
+    shortest_path = symmetrify_paths(nx.all_pairs_dijkstra_path(topology))
+    # Only connected pairs are queried
+    pairs = [(s, t) for s, t in pairs if t in shortest_path[s]]
+    builders = [('dict', lambda: shortest_path),
+                ('compiled', lambda: RouteTable(topology)),
+                ('lazy', lambda: LazyRouteTable(topology))]
+    results = {}
+    for name, build in builders:
+        best = [float('inf'), float('inf')]
+        for _ in range(repeat):
+            table = build()
+            path = (lambda s, t: table[s][t]) if name == 'dict' \
+                   else table.path
+            for i in range(2):
+                start = time.time()
+                for s, t in pairs:
+                    path(s, t)
+                best[i] = min(best[i], time.time() - start)
+        for s, t in pairs[:len(nodes)]:
+            if path(s, t) != shortest_path[s][t]:
+                raise AssertionError('Path mismatch (%s, %s)' % (s, t))
+        throughput = [len(pairs) / t if t > 0 else float('inf') for t in best]
+        results[name] = throughput[1]
+        if name != 'dict':
+            results[name + '_first'] = throughput[0]
+    return results
+
+
+def main(n_failures=20, seed=0):
+    """Run the benchmarks on all default topologies and print results in JSON
+    format
+    """
+    results = {}
+    for name, params in BENCHMARK_TOPOLOGIES:
+        topology = TOPOLOGY_FACTORY[name](**params)
+        results[name] = {
+            'update': bench_route_table_update(topology, n_failures, seed),
+            'shortest_path': bench_shortest_path(topology, seed=seed),
+                         }
+    print(json.dumps(results, indent=4, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,721 @@
+"""Benchmark suite of the simulator
+
+This module measures the throughput of the main components of the simulator in
+six areas:
+
+ * cache policies: all registered cache policies serving Zipf-distributed
+   request streams over catalogues of several sizes;
+ * cache wrappers: the overhead of admission policies and TTL expiration
+   wrapping a cache policy, compared with the bare policy;
+ * trace-driven: cache policies compared with LRU on experiments driven by
+   request traces, in terms of both throughput and hit ratio;
+ * strategies: all registered strategies executing experiments on fixed
+   topologies;
+ * workloads: the rate at which workloads generate events;
+ * end-to-end: complete experiments of reference configuration files.
+
+All benchmarks are seeded, so that they always execute the same events, and
+report the best of several repetitions. Results are plain dictionaries which
+can be saved in JSON format and compared with those of a previous run to
+detect performance regressions.
+
+The suite is run by the ``icarus bench`` command.
+"""
+from __future__ import division
+import copy
+import itertools
+import os
+import platform
+import random
+import shutil
+import tempfile
+import timeit
+
+import numpy as np
+
+import icarus
+from icarus.execution import exec_experiment, SimulationClock
+from icarus.models.cache import Cache, build_cache
+from icarus.orchestration import build_scenario, run_scenario
+from icarus.registry import CACHE_POLICY, STRATEGY, TOPOLOGY_FACTORY, \
+                            WORKLOAD
+from icarus.tools import TruncatedZipfDist
+from icarus.util import Settings, Tree
+
+
+__all__ = [
+    'SUITES',
+    'BENCHMARK_CATALOGUE_SIZES',
+    'BENCHMARK_STRATEGY_TOPOLOGIES',
+    'BENCHMARK_TRACE_POLICIES',
+    'BENCHMARK_CACHE_WRAPPERS',
+    'REFERENCE_CONFIGS',
+    'bench_cache_policy',
+    'bench_cache_wrapper',
+    'bench_trace_driven',
+    'write_synthetic_trace',
+    'bench_strategy',
+    'bench_workload',
+    'bench_config',
+    'run_suite',
+    'compare',
+          ]
+
+
+# Areas covered by the suite
+SUITES = ['cache_policy', 'cache_wrapper', 'trace_driven', 'strategy',
+          'workload', 'end_to_end']
+
+# Number of contents of the request streams served by cache policies
+BENCHMARK_CATALOGUE_SIZES = [10**3, 10**4, 10**5]
+
+# Topologies on which strategies are run, as (name, parameters) tuples
+BENCHMARK_STRATEGY_TOPOLOGIES = [
+    ('WIDE', {}),
+    ('GARR', {}),
+                                 ]
+
+# Cache policies compared on trace-driven experiments. The first one is the
+# reference policy.
+BENCHMARK_TRACE_POLICIES = ['LRU', 'ARC', 'LIRS', 'S3_FIFO', 'CLOCK_PRO']
+
+# Cache policies wrapped with admission policies and TTL expiration, as
+# (name, descriptor) tuples. TTLs are expressed in number of requests.
+BENCHMARK_CACHE_WRAPPERS = [
+    ('K_HITS', {'name': 'LRU', 'admission': 'K_HITS'}),
+    ('RAND', {'name': 'LRU', 'admission': {'name': 'RAND', 'p': 0.5}}),
+    ('TTL', {'name': 'LRU', 'ttl': 1000}),
+    ('K_HITS_TTL', {'name': 'LRU', 'admission': 'K_HITS', 'ttl': 1000}),
+                            ]
+
+# Strategies which cannot be run on some of the benchmark topologies
+UNSUPPORTED_STRATEGIES = {
+    'GARR': ['NRR'],
+                          }
+
+# Parameters required by strategies, as (strategy parameters, cache placement)
+# tuples. Strategies not listed here are run with no parameters and uniform
+# cache placement.
+STRATEGY_PARAMS = {
+    'HASHROUTING': ({'routing': 'SYMM'}, None),
+    'HR_CLUSTER': ({'intra_routing': 'SYMM'},
+                   {'name': 'CLUSTERED_HASHROUTING', 'n_clusters': 2,
+                    'policy': 'node_const'}),
+    'HR_EDGE_CACHE': ({'routing': 'SYMM', 'edge_cache_ratio': 0.25}, None),
+    'HR_ON_PATH': ({'routing': 'SYMM', 'on_path_cache_ratio': 0.25}, None),
+    'NRR': ({'metacaching': 'LCE'}, None),
+    'PARTITION': ({}, {'name': 'OPTIMAL_MEDIAN', 'n_cache_nodes': 4,
+                       'hit_ratio': 0.5}),
+                   }
+
+# Reference configuration files run end-to-end, if available
+REFERENCE_CONFIGS = [
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(
+        icarus.__file__))), 'examples', 'btp_test', 'config.py'),
+                     ]
+
+
+def _best_time(function, repeat):
+    """Return the minimum time taken by *repeat* executions of a function and
+    the value returned by the last one
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        value = function()
+        best = min(best, timeit.default_timer() - start)
+    return best, value
+
+
+def _zipf_requests(n_contents, n_requests, alpha, seed):
+    """Return a list of requests for contents 1 to *n_contents* drawn from a
+    Zipf distribution
+    """
+    cdf = TruncatedZipfDist(alpha, n_contents).cdf
+    rand = np.random.RandomState(seed)
+    return (np.searchsorted(cdf, rand.random_sample(n_requests)) + 1).tolist()
+
+
+def bench_cache_policy(name, n_contents, cache_ratio=0.01, n_requests=10**5,
+                       alpha=0.8, seed=0, repeat=3):
+    """Measure the throughput of a cache policy serving a stream of requests
+    drawn from a Zipf distribution
+
+    Each request looks up the content in the cache and inserts it on a miss.
+
+    Parameters
+    ----------
+    name : str
+        The name of the cache policy
+    n_contents : int
+        The number of contents
+    cache_ratio : float, optional
+        The size of the cache as a fraction of the contents
+    n_requests : int, optional
+        The number of requests
+    alpha : float, optional
+        The Zipf exponent
+    seed : int, optional
+        The seed of the random generators
+    repeat : int, optional
+        The number of repetitions
+
+    Returns
+    -------
+    results : dict
+        Dictionary with the best throughput ('events_per_second') and the hit
+        ratio ('hit_ratio')
+    """
+    maxlen = max(1, int(n_contents * cache_ratio))
+    requests = _zipf_requests(n_contents, n_requests, alpha, seed)
+    # Belady's MIN needs to know the sequence of requests in advance
+    kwargs = {'trace': requests} if name == 'MIN' else {}
+
+    def serve():
+        random.seed(seed)
+        cache = CACHE_POLICY[name](maxlen, **kwargs)
+        get, put = cache.get, cache.put
+        hits = 0
+        for content in requests:
+            if get(content):
+                hits += 1
+            else:
+                put(content)
+        return hits
+
+    duration, hits = _best_time(serve, repeat)
+    return {'events_per_second': n_requests / duration,
+            'hit_ratio': hits / n_requests}
+
+
+def bench_cache_wrapper(cache_policy, n_contents, cache_ratio=0.01,
+                        n_requests=10**5, alpha=0.8, seed=0, repeat=3):
+    """Measure the overhead of wrapping a cache policy with an admission
+    policy and/or TTL expiration
+
+    The wrapped cache and the bare policy serve the same stream of requests
+    drawn from a Zipf distribution. Each request looks up the content in the
+    cache and inserts it on a miss. Time is the index of the request.
+
+    Parameters
+    ----------
+    cache_policy : dict
+        The descriptor of the wrapped cache, as accepted by `build_cache`
+    n_contents : int
+        The number of contents
+    cache_ratio : float, optional
+        The size of the cache as a fraction of the contents
+    n_requests : int, optional
+        The number of requests
+    alpha : float, optional
+        The Zipf exponent
+    seed : int, optional
+        The seed of the random generators
+    repeat : int, optional
+        The number of repetitions
+
+    Returns
+    -------
+    results : dict
+        Dictionary with the best throughput of the wrapped cache
+        ('events_per_second') and of the bare policy
+        ('bare_events_per_second'), the hit ratio of the wrapped cache
+        ('hit_ratio') and the time added by the wrappers to each request in
+        nanoseconds ('overhead_ns'), which is negative if wrappers save more
+        work, e.g. by admitting fewer items, than they add
+    """
+    maxlen = max(1, int(n_contents * cache_ratio))
+    requests = _zipf_requests(n_contents, n_requests, alpha, seed)
+    bare_policy = {k: v for k, v in cache_policy.items()
+                   if k not in ('admission', 'ttl')}
+    clock = SimulationClock()
+
+    def serve(policy):
+        random.seed(seed)
+        cache = build_cache(policy, maxlen, clock)
+        get, put = cache.get, cache.put
+        hits = 0
+        for time, content in enumerate(requests):
+            clock.time = time
+            if get(content):
+                hits += 1
+            else:
+                put(content)
+        return hits
+
+    bare_duration, _ = _best_time(lambda: serve(bare_policy), repeat)
+    duration, hits = _best_time(lambda: serve(cache_policy), repeat)
+    return {'events_per_second': n_requests / duration,
+            'bare_events_per_second': n_requests / bare_duration,
+            'hit_ratio': hits / n_requests,
+            'overhead_ns': 1e9 * (duration - bare_duration) / n_requests}
+
+
+def write_synthetic_trace(reqs_file, contents_file, n_contents, n_requests,
+                          alpha=0.8, scan_length=None, scan_period=10, seed=0):
+    """Write a synthetic request trace in the format read by the
+    *TRACE_DRIVEN* workload
+
+    Requests are drawn from a Zipf distribution, except that periodically a
+    sequence of requests is replaced by a scan, i.e. requests for contents
+    requested only once. Scans evict popular contents from caches managed by
+    recency-based policies like LRU, but not from scan-resistant ones.
+
+    Parameters
+    ----------
+    reqs_file : str
+        The path of the requests file
+    contents_file : str
+        The path of the contents file
+    n_contents : int
+        The number of contents of the Zipf distribution
+    n_requests : int
+        The number of requests
+    alpha : float, optional
+        The Zipf exponent
+    scan_length : int, optional
+        The number of requests of each scan. If not specified, it is a tenth
+        of the number of contents. If 0, the trace has no scans.
+    scan_period : int, optional
+        The number of requests between the start of two consecutive scans, as
+        a multiple of the scan length
+    seed : int, optional
+        The seed of the random generator
+
+    Returns
+    -------
+    n_contents : int
+        The number of distinct contents of the trace, i.e. the number of
+        lines of the contents file, including scanned contents
+    """
+    if scan_length is None:
+        scan_length = max(1, n_contents // 10)
+    cdf = TruncatedZipfDist(alpha, n_contents).cdf
+    rand = np.random.RandomState(seed)
+    requests = np.searchsorted(cdf, rand.random_sample(n_requests)) + 1
+    n_scanned = 0
+    if scan_length > 0:
+        for start in range(scan_length, n_requests,
+                           scan_length * scan_period):
+            end = min(start + scan_length, n_requests)
+            requests[start:end] = np.arange(
+                n_contents + n_scanned + 1,
+                n_contents + n_scanned + 1 + end - start)
+            n_scanned += end - start
+    with open(reqs_file, 'w') as f:
+        f.writelines('%d\n' % content for content in requests)
+    with open(contents_file, 'w') as f:
+        f.writelines('%d\n' % content
+                     for content in range(1, n_contents + n_scanned + 1))
+    return n_contents + n_scanned
+
+
+def bench_trace_driven(name, reqs_file=None, contents_file=None,
+                       n_contents=10**4, n_warmup=10**4, n_measured=4 * 10**4,
+                       topology=('TREE', {'k': 2, 'h': 3}), network_cache=0.05,
+                       strategy='LCE', chunk_size=10000, seed=0, repeat=3):
+    """Measure the throughput and the hit ratio of a cache policy on an
+    experiment driven by a request trace, i.e. using the *TRACE_DRIVEN*
+    workload
+
+    If no trace is specified, a synthetic trace of Zipf-distributed requests
+    interleaved with scans is used, see `write_synthetic_trace`. Only the
+    execution of the experiment is measured, not the construction of the
+    scenario.
+
+    Parameters
+    ----------
+    name : str
+        The name of the cache policy
+    reqs_file : str, optional
+        The path of the requests file of the trace
+    contents_file : str, optional
+        The path of the contents file of the trace. It is required if the
+        requests file is specified.
+    n_contents : int, optional
+        The number of contents of the trace, i.e. the number of lines of the
+        contents file. If the trace is synthetic, it is the number of contents
+        of the Zipf distribution.
+    n_warmup : int, optional
+        The number of warmup requests
+    n_measured : int, optional
+        The number of measured requests
+    topology : tuple, optional
+        The name and the parameters of the topology
+    network_cache : float, optional
+        The size of the caches of the network as a fraction of the contents
+    strategy : str, optional
+        The name of the strategy
+    chunk_size : int, optional
+        The number of events read at once from the workload
+    seed : int, optional
+        The seed of the random generators
+    repeat : int, optional
+        The number of repetitions
+
+    Returns
+    -------
+    results : dict
+        Dictionary with the best throughput ('events_per_second') and the
+        cache hit ratio ('hit_ratio')
+    """
+    tmp_dir = None
+    if reqs_file is None:
+        tmp_dir = tempfile.mkdtemp()
+        reqs_file = os.path.join(tmp_dir, 'requests.txt')
+        contents_file = os.path.join(tmp_dir, 'contents.txt')
+        n_contents = write_synthetic_trace(reqs_file, contents_file,
+                                           n_contents, n_warmup + n_measured,
+                                           seed=seed)
+    elif contents_file is None:
+        raise ValueError('contents_file is required with reqs_file')
+    try:
+        params = Tree()
+        params['topology'] = dict(topology[1], name=topology[0])
+        params['workload'] = {'name': 'TRACE_DRIVEN', 'reqs_file': reqs_file,
+                              'contents_file': contents_file,
+                              'n_contents': n_contents, 'n_warmup': n_warmup,
+                              'n_measured': n_measured}
+        params['cache_placement'] = {'name': 'UNIFORM',
+                                     'network_cache': network_cache}
+        params['content_placement'] = {'name': 'UNIFORM', 'seed': seed}
+        params['netconf'] = {}
+        random.seed(seed)
+        scenario = build_scenario(params)
+
+        def run():
+            scenario.restore_random_state()
+            return exec_experiment(type(scenario.topology)(scenario.topology),
+                                   scenario.workload, {}, {'name': strategy},
+                                   {'name': name}, {'CACHE_HIT_RATIO': {}},
+                                   chunk_size=chunk_size,
+                                   route_table=scenario.route_table)
+
+        duration, results = _best_time(run, repeat)
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir)
+    return {'events_per_second': (n_warmup + n_measured) / duration,
+            'hit_ratio': results['CACHE_HIT_RATIO']['MEAN']}
+
+
+def _scenario_params(topology, strategy, n_contents, n_warmup, n_measured,
+                     seed):
+    """Return the parameters of the scenario on which a strategy is run"""
+    strategy_params, cache_placement = STRATEGY_PARAMS.get(strategy, ({}, None))
+    params = Tree()
+    params['topology'] = dict(topology[1], name=topology[0])
+    params['workload'] = {'name': 'STATIONARY', 'n_contents': n_contents,
+                          'alpha': 0.8, 'n_warmup': n_warmup,
+                          'n_measured': n_measured, 'seed': seed}
+    params['cache_placement'] = dict(cache_placement or {'name': 'UNIFORM'},
+                                     network_cache=0.05)
+    params['content_placement'] = {'name': 'UNIFORM', 'seed': seed}
+    params['strategy'] = dict(strategy_params, name=strategy)
+    params['netconf'] = {}
+    return params
+
+
+def bench_strategy(name, topology, n_contents=10**4, n_warmup=10**4,
+                   n_measured=2 * 10**4, chunk_size=10000, fast_warmup=True,
+                   seed=0, repeat=3):
+    """Measure the throughput of a strategy executing an experiment
+
+    Only the execution of the experiment is measured, not the construction
+    of the scenario.
+
+    Parameters
+    ----------
+    name : str
+        The name of the strategy
+    topology : tuple
+        The name and the parameters of the topology
+    n_contents : int, optional
+        The number of contents
+    n_warmup : int, optional
+        The number of warmup requests
+    n_measured : int, optional
+        The number of measured requests
+    chunk_size : int, optional
+        The number of events read at once from the workload
+    fast_warmup : bool, optional
+        Whether the warmup is executed in fast mode, if the strategy supports
+        it
+    seed : int, optional
+        The seed of the random generators
+    repeat : int, optional
+        The number of repetitions
+
+    Returns
+    -------
+    results : dict
+        Dictionary with the best throughput ('events_per_second') and the
+        cache hit ratio ('hit_ratio')
+    """
+    params = _scenario_params(topology, name, n_contents, n_warmup,
+                              n_measured, seed)
+    scenario = build_scenario(params)
+
+    def run():
+        scenario.restore_random_state()
+        return exec_experiment(type(scenario.topology)(scenario.topology),
+                               scenario.workload, {}, params['strategy'],
+                               {'name': 'LRU'}, {'CACHE_HIT_RATIO': {}},
+                               chunk_size=chunk_size, fast_warmup=fast_warmup
+                               and STRATEGY[name].supports_warmup,
+                               route_table=scenario.route_table)
+
+    duration, results = _best_time(run, repeat)
+    return {'events_per_second': (n_warmup + n_measured) / duration,
+            'hit_ratio': results['CACHE_HIT_RATIO']['MEAN']}
+
+
+def bench_workload(name='STATIONARY', chunk_size=None, n_events=10**5,
+                   n_contents=10**5, seed=0, repeat=3, **params):
+    """Measure the rate at which a workload generates events
+
+    Only the generation of events is measured, not the construction of the
+    workload.
+
+    Parameters
+    ----------
+    name : str, optional
+        The name of the workload
+    chunk_size : int, optional
+        If specified, events are read in chunks of this size. Otherwise they
+        are read one by one.
+    n_events : int, optional
+        The number of events generated
+    n_contents : int, optional
+        The number of contents
+    seed : int, optional
+        The seed of the workload
+    repeat : int, optional
+        The number of repetitions
+    **params
+        Other parameters of the workload
+
+    Returns
+    -------
+    results : dict
+        Dictionary with the best throughput ('events_per_second')
+    """
+    topology = TOPOLOGY_FACTORY['TREE'](k=2, h=5)
+    params = dict({'alpha': 0.8, 'n_warmup': 0, 'n_measured': n_events},
+                  **params)
+
+    def generate():
+        workload = WORKLOAD[name](topology, n_contents=n_contents, seed=seed,
+                                  **params)
+        start = timeit.default_timer()
+        if chunk_size is None:
+            for _ in itertools.islice(workload, n_events):
+                pass
+        else:
+            for _ in workload.chunks(chunk_size):
+                pass
+        return timeit.default_timer() - start
+
+    duration = min(generate() for _ in range(repeat))
+    return {'events_per_second': n_events / duration}
+
+
+def bench_config(path, scale=1.0, seed=0):
+    """Run end-to-end all experiments of a configuration file, once each and
+    in a single process
+
+    Workloads and content placements are seeded if not already, so that
+    experiments are reproducible.
+
+    Parameters
+    ----------
+    path : str
+        The path of the configuration file
+    scale : float, optional
+        Factor by which the numbers of warmup and measured requests of the
+        experiments are scaled
+    seed : int, optional
+        The seed used for unseeded workloads and content placements
+
+    Returns
+    -------
+    results : dict
+        Dictionary keyed by the description of the experiments, whose values
+        are dictionaries with the wall-clock duration of the experiment
+        ('duration'), the throughput of its simulation ('events_per_second')
+        and the time taken by each phase ('timings'), as measured by its
+        instrumentation
+    """
+    settings = Settings()
+    settings.read_from(path)
+    settings.INSTRUMENTATION = True
+    settings.INSTRUMENTATION_PROFILE = False
+    results = {}
+    experiments = list(settings.EXPERIMENT_QUEUE)
+    for i, experiment in enumerate(experiments):
+        params = copy.deepcopy(experiment)
+        for name in ('workload', 'content_placement'):
+            params[name].setdefault('seed', seed)
+        for name in ('n_warmup', 'n_measured'):
+            if name in params['workload']:
+                params['workload'][name] = \
+                    max(1, int(params['workload'][name] * scale))
+        outcome = run_scenario(settings, params, i + 1, len(experiments))
+        if outcome is None:
+            raise RuntimeError('Experiment %s failed'
+                               % params.get('desc', i + 1))
+        _, exp_results, duration = outcome
+        instrumentation = exp_results['INSTRUMENTATION']
+        n_events = sum(instrumentation['EVENTS'].values())
+        sim_time = sum(instrumentation['TIMINGS'].get(phase, 0)
+                       for phase in ('WARMUP', 'MEASURED'))
+        results[params.get('desc', str(i + 1))] = {
+            'duration': duration,
+            'events_per_second': n_events / sim_time if sim_time > 0 else 0,
+            'timings': dict(instrumentation['TIMINGS'])}
+    return results
+
+
+def run_suite(suites=None, configs=None, scale=1.0, repeat=3, seed=0,
+              traces=None):
+    """Run the benchmark suite
+
+    Parameters
+    ----------
+    suites : list, optional
+        The areas to benchmark, among those listed in `SUITES`. If not
+        specified, all areas are benchmarked.
+    traces : list, optional
+        The request traces on which trace-driven benchmarks are run, as
+        (requests file, contents file, number of contents) tuples. If not
+        specified, a synthetic trace is used.
+    configs : list, optional
+        The configuration files run end-to-end. If not specified, the
+        available `REFERENCE_CONFIGS` are run.
+    scale : float, optional
+        Factor by which the number of events of all benchmarks is scaled
+    repeat : int, optional
+        The number of repetitions of each benchmark
+    seed : int, optional
+        The seed of all benchmarks
+
+    Returns
+    -------
+    results : dict
+        Dictionary keyed by area whose values are nested dictionaries of
+        results. The 'meta' key stores the parameters of the run and
+        information about the platform.
+    """
+    suites = SUITES if suites is None else suites
+    for suite in suites:
+        if suite not in SUITES:
+            raise ValueError('No benchmark suite named %s' % suite)
+    results = {'meta': {'icarus': icarus.__version__,
+                        'python': platform.python_version(),
+                        'numpy': np.__version__,
+                        'platform': platform.platform(),
+                        'scale': scale,
+                        'repeat': repeat,
+                        'seed': seed}}
+    n_requests = max(1, int(10**5 * scale))
+    if 'cache_policy' in suites:
+        results['cache_policy'] = {
+            name: {str(n_contents): bench_cache_policy(
+                       name, n_contents, n_requests=n_requests, seed=seed,
+                       repeat=repeat)
+                   for n_contents in BENCHMARK_CATALOGUE_SIZES}
+            for name, policy in sorted(CACHE_POLICY.items())
+            # Cache systems are made of other caches
+            if isinstance(policy, type) and issubclass(policy, Cache)}
+    if 'cache_wrapper' in suites:
+        results['cache_wrapper'] = {
+            name: {str(n_contents): bench_cache_wrapper(
+                       cache_policy, n_contents, n_requests=n_requests,
+                       seed=seed, repeat=repeat)
+                   for n_contents in BENCHMARK_CATALOGUE_SIZES}
+            for name, cache_policy in BENCHMARK_CACHE_WRAPPERS}
+    if 'trace_driven' in suites:
+        n_events = max(2, int(5 * 10**4 * scale))
+        trace_params = {'n_warmup': n_events // 5,
+                        'n_measured': n_events - n_events // 5,
+                        'seed': seed, 'repeat': repeat}
+        if traces is None:
+            results['trace_driven'] = {'synthetic': {
+                name: bench_trace_driven(name, **trace_params)
+                for name in BENCHMARK_TRACE_POLICIES}}
+        else:
+            results['trace_driven'] = {
+                os.path.basename(reqs_file): {
+                    name: bench_trace_driven(name, reqs_file, contents_file,
+                                             n_contents, **trace_params)
+                    for name in BENCHMARK_TRACE_POLICIES}
+                for reqs_file, contents_file, n_contents in traces}
+    if 'strategy' in suites:
+        results['strategy'] = {
+            topology[0]: {name: bench_strategy(
+                              name, topology, n_warmup=n_requests // 10,
+                              n_measured=n_requests // 5, seed=seed,
+                              repeat=repeat)
+                          for name in sorted(STRATEGY) if name not in
+                          UNSUPPORTED_STRATEGIES.get(topology[0], [])}
+            for topology in BENCHMARK_STRATEGY_TOPOLOGIES}
+    if 'workload' in suites:
+        results['workload'] = {
+            'STATIONARY': {mode: bench_workload('STATIONARY', chunk_size,
+                                                n_requests, seed=seed,
+                                                repeat=repeat)
+                           for mode, chunk_size in (('events', None),
+                                                    ('chunks', 10000))}}
+    if 'end_to_end' in suites:
+        if configs is None:
+            configs = [path for path in REFERENCE_CONFIGS
+                       if os.path.isfile(path)]
+        results['end_to_end'] = {
+            os.path.relpath(path): bench_config(path, scale, seed)
+            for path in configs}
+    return results
+
+
+def compare(results, baseline, tolerance=0.2, metric='events_per_second'):
+    """Compare benchmark results with a baseline
+
+    Parameters
+    ----------
+    results : dict
+        The results of the benchmark suite
+    baseline : dict
+        The results of a previous run of the benchmark suite, with the same
+        scale
+    tolerance : float, optional
+        The relative decrease of throughput tolerated
+    metric : str, optional
+        The throughput metric compared
+
+    Returns
+    -------
+    regressions : list
+        List of (benchmark, baseline throughput, throughput) tuples of all
+        benchmarks present in both results whose throughput decreased by
+        more than the tolerance, where the benchmark is identified by the
+        slash-separated keys leading to it
+    """
+    if not 0 <= tolerance < 1:
+        raise ValueError('tolerance must be in [0, 1)')
+    if results.get('meta', {}).get('scale') != \
+            baseline.get('meta', {}).get('scale'):
+        raise ValueError('Results and baseline have different scale')
+    regressions = []
+
+    def visit(current, expected, path):
+        if metric in current and metric in expected:
+            if current[metric] < expected[metric] * (1 - tolerance):
+                regressions.append(('/'.join(path), expected[metric],
+                                    current[metric]))
+            return
+        for key in sorted(set(current) & set(expected)):
+            if isinstance(current[key], dict) and \
+                    isinstance(expected[key], dict):
+                visit(current[key], expected[key], path + [key])
+
+    visit(results, baseline, [])
+    return regressions
@@ -0,0 +1,34 @@
+from __future__ import division
+import unittest
+
+import fnss
+
+from icarus.benchmarks.routing import bench_route_table_update, \
+                                      bench_shortest_path
+
+
+class TestBenchRouteTableUpdate(unittest.TestCase):
+
+    def test_bench(self):
+        topology = fnss.ring_topology(10)
+        topology.add_edge(0, 5)
+        edges = set(map(frozenset, topology.edges()))
+        results = bench_route_table_update(topology, n_failures=5, seed=1)
+        self.assertEqual(10, results['events'])
+        self.assertEqual(11, results['links'])
+        self.assertGreaterEqual(results['updated_fraction'], 0)
+        self.assertLessEqual(results['updated_fraction'], 1)
+        self.assertEqual(edges, set(map(frozenset, topology.edges())))
+
+
+class TestBenchShortestPath(unittest.TestCase):
+
+    def test_bench(self):
+        topology = fnss.ring_topology(10)
+        topology.add_edge(0, 5)
+        results = bench_shortest_path(topology, n_queries=100, seed=1,
+                                      repeat=1)
+        self.assertEqual({'dict', 'compiled', 'lazy', 'compiled_first',
+                          'lazy_first'}, set(results))
+        for throughput in results.values():
+            self.assertGreater(throughput, 0)
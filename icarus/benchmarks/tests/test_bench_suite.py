@@ -0,0 +1,141 @@
+from __future__ import division
+import os
+import shutil
+import tempfile
+import unittest
+
+from icarus.benchmarks.suite import bench_cache_policy, bench_cache_wrapper, \
+                                    bench_strategy, \
+                                    bench_workload, bench_config, \
+                                    bench_trace_driven, write_synthetic_trace, \
+                                    run_suite, compare
+
+
+CONFIG = """
+from collections import deque
+from icarus.util import Tree
+
+EVENT_CHUNK_SIZE = 100
+DATA_COLLECTORS = ['CACHE_HIT_RATIO']
+EXPERIMENT_QUEUE = deque()
+for strategy in ('LCE', 'LCD'):
+    experiment = Tree()
+    experiment['topology'] = {'name': 'TREE', 'k': 2, 'h': 3}
+    experiment['workload'] = {'name': 'STATIONARY', 'n_contents': 100,
+                              'alpha': 0.8, 'n_warmup': 100,
+                              'n_measured': 200}
+    experiment['cache_placement'] = {'name': 'UNIFORM', 'network_cache': 0.1}
+    experiment['content_placement'] = {'name': 'UNIFORM'}
+    experiment['cache_policy'] = {'name': 'LRU'}
+    experiment['strategy'] = {'name': strategy}
+    experiment['desc'] = strategy
+    EXPERIMENT_QUEUE.append(experiment)
+"""
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_bench_cache_policy(self):
+        results = bench_cache_policy('LRU', 1000, n_requests=1000, repeat=1)
+        self.assertGreater(results['events_per_second'], 0)
+        self.assertEqual(results['hit_ratio'], bench_cache_policy(
+                            'LRU', 1000, n_requests=1000, repeat=1)['hit_ratio'])
+        self.assertGreater(bench_cache_policy('LRU', 1000, n_requests=1000,
+                                              cache_ratio=0.1,
+                                              repeat=1)['hit_ratio'],
+                           results['hit_ratio'])
+
+    def test_bench_cache_wrapper(self):
+        results = bench_cache_wrapper({'name': 'LRU', 'admission': 'K_HITS',
+                                       'ttl': 100}, 1000, cache_ratio=0.1,
+                                      n_requests=2000, repeat=1)
+        self.assertGreater(results['events_per_second'], 0)
+        self.assertGreater(results['bare_events_per_second'], 0)
+        self.assertIn('overhead_ns', results)
+        self.assertLess(results['hit_ratio'], bench_cache_policy(
+                            'LRU', 1000, cache_ratio=0.1, n_requests=2000,
+                            repeat=1)['hit_ratio'])
+
+    def test_bench_strategy(self):
+        results = [bench_strategy('LCE', ('TREE', {'k': 2, 'h': 3}),
+                                  n_contents=100, n_warmup=100,
+                                  n_measured=100, chunk_size=30, repeat=2)
+                   for _ in range(2)]
+        self.assertGreater(results[0]['events_per_second'], 0)
+        self.assertEqual(results[0]['hit_ratio'], results[1]['hit_ratio'])
+
+    def test_bench_trace_driven(self):
+        lru, arc = [bench_trace_driven(name, n_contents=100, n_warmup=500,
+                                       n_measured=2000, repeat=1)
+                    for name in ('LRU', 'ARC')]
+        self.assertGreater(lru['events_per_second'], 0)
+        self.assertGreater(arc['hit_ratio'], lru['hit_ratio'])
+
+    def test_write_synthetic_trace(self):
+        path = tempfile.mkdtemp()
+        try:
+            reqs_file = os.path.join(path, 'requests.txt')
+            contents_file = os.path.join(path, 'contents.txt')
+            n_contents = write_synthetic_trace(reqs_file, contents_file, 100,
+                                               1000, scan_length=10)
+            with open(reqs_file) as f:
+                requests = [int(line) for line in f]
+            with open(contents_file) as f:
+                contents = [int(line) for line in f]
+            results = bench_trace_driven('LRU', reqs_file, contents_file,
+                                         n_contents, n_warmup=100,
+                                         n_measured=900, repeat=1)
+        finally:
+            shutil.rmtree(path)
+        self.assertEqual(1000, len(requests))
+        # 10 scans of 10 contents requested once
+        self.assertEqual(200, n_contents)
+        self.assertEqual(list(range(1, 201)), contents)
+        self.assertEqual(set(contents), set(requests) | set(range(1, 101)))
+        self.assertGreater(results['hit_ratio'], 0)
+
+    def test_bench_workload(self):
+        for chunk_size in (None, 100):
+            results = bench_workload(chunk_size=chunk_size, n_events=1000,
+                                     n_contents=100, repeat=1)
+            self.assertGreater(results['events_per_second'], 0)
+
+    def test_bench_config(self):
+        path = tempfile.mkdtemp()
+        try:
+            config = os.path.join(path, 'config.py')
+            with open(config, 'w') as f:
+                f.write(CONFIG)
+            results = bench_config(config, scale=0.5)
+        finally:
+            shutil.rmtree(path)
+        self.assertEqual(['LCD', 'LCE'], sorted(results))
+        self.assertIn('MEASURED', results['LCE']['timings'])
+        self.assertGreater(results['LCE']['events_per_second'], 0)
+
+    def test_invalid_suite(self):
+        self.assertRaises(ValueError, run_suite, ['invalid'])
+
+
+class TestCompare(unittest.TestCase):
+
+    def results(self, lru, lce, scale=1.0):
+        return {'meta': {'scale': scale},
+                'cache_policy': {'LRU': {'1000': {'events_per_second': lru,
+                                                  'hit_ratio': 0.5}}},
+                'strategy': {'WIDE': {'LCE': {'events_per_second': lce}}}}
+
+    def test_compare(self):
+        baseline = self.results(100, 100)
+        self.assertEqual([], compare(self.results(95, 120), baseline, 0.1))
+        self.assertEqual([('cache_policy/LRU/1000', 100, 85)],
+                         compare(self.results(85, 120), baseline, 0.1))
+
+    def test_missing_benchmark(self):
+        baseline = self.results(100, 100)
+        del baseline['strategy']
+        self.assertEqual([], compare(self.results(100, 10), baseline))
+
+    def test_different_scale(self):
+        self.assertRaises(ValueError, compare, self.results(1, 1, 0.1),
+                          self.results(1, 1))
@@ -1,5 +1,8 @@
 """This package contains the code for the execution of a single experiment.
 """
+from .routing import *
 from .network import *
 from .collectors import *
+from .checkpoint import *
+from .instrumentation import *
 from .engine import *
@@ -0,0 +1,134 @@
+"""Checkpoints of warm network states.
+
+Experiments differing only in the measured phase of the workload or in the
+data collectors used go through the same warmup. This module provides a
+content-addressed on-disk store of the states of the network caches at the
+end of the warmup, so that the warmup of an experiment can be replaced by
+restoring the state reached by a previous experiment.
+"""
+import os
+import random
+import hashlib
+import logging
+import tempfile
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+
+__all__ = [
+    'CheckpointStore',
+    'warmup_key',
+           ]
+
+
+logger = logging.getLogger('checkpoint')
+
+
+class CheckpointStore(object):
+    """Content-addressed on-disk store of warm network states.
+
+    Each state is stored in a separate file named after its key. Files are
+    written atomically, so that a store can be shared by concurrent processes.
+    """
+
+    def __init__(self, path):
+        """Constructor
+
+        Parameters
+        ----------
+        path : str
+            The directory where states are stored. It is created if it does
+            not exist.
+        """
+        self.path = path
+        if not os.path.isdir(path):
+            try:
+                os.makedirs(path)
+            except OSError:
+                # Created in the meantime by a concurrent process
+                if not os.path.isdir(path):
+                    raise
+
+    def _file(self, key):
+        return os.path.join(self.path, '%s.pickle' % key)
+
+    def __contains__(self, key):
+        return os.path.isfile(self._file(key))
+
+    def get(self, key):
+        """Return the state stored under a given key
+
+        Parameters
+        ----------
+        key : str
+            The key of the state
+
+        Returns
+        -------
+        state : object
+            The state or *None* if there is no readable state for the key
+        """
+        try:
+            with open(self._file(key), 'rb') as f:
+                return pickle.load(f)
+        except (IOError, OSError):
+            return None
+        except Exception:
+            logger.warning('Checkpoint %s is corrupted and is ignored', key)
+            return None
+
+    def put(self, key, state):
+        """Store a state under a given key, replacing any previous state
+
+        Parameters
+        ----------
+        key : str
+            The key of the state
+        state : object
+            The state. It must be picklable.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp_path, self._file(key))
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+
+def warmup_key(scenario_key, model, chunk_size=None):
+    """Return the key identifying the warm state of a network model.
+
+    The key combines the digest of the parameters of the scenario with a
+    fingerprint of the network model built from them and of the state of the
+    random number generator at the beginning of the experiment. This way,
+    scenarios built with unseeded random choices are never matched to states
+    reached by other experiments.
+
+    Parameters
+    ----------
+    scenario_key : str
+        Digest of all the parameters determining the warmup of the experiment
+    model : NetworkModel
+        The network model before the beginning of the warmup
+    chunk_size : int, optional
+        The number of events read at once from the workload, which determines
+        how random numbers are drawn
+
+    Returns
+    -------
+    key : str
+        The key of the warm state
+    """
+    h = hashlib.sha1()
+    for item in (scenario_key, chunk_size, random.getstate(),
+                 sorted(repr(e) for e in model.topology.edges_iter()),
+                 sorted((repr(v), c.maxlen) for v, c in model.cache.items()),
+                 sorted((repr(k), repr(v))
+                        for k, v in model.content_source.items())):
+        h.update(repr(item).encode('utf-8'))
+    return h.hexdigest()
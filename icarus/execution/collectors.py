@@ -21,6 +21,7 @@ __all__ = [
     'DataCollector',
     'CollectorProxy',
     'CacheHitRatioCollector',
+    'CacheRequestCollector',
     'LinkLoadCollector',
     'LatencyCollector',
     'EvictionCollector',
@@ -239,6 +240,14 @@ class CollectorProxy(DataCollector):
 @register_data_collector('LINK_LOAD')
 class LinkLoadCollector(DataCollector):
     """Data collector measuring the link load
+
+    Contents whose size is provided by the workload weigh on links according
+    to their size, the others according to the average content size.
+
+    All content hops of a session are charged at the size of the content
+    requested in the session. This is an approximation for strategies
+    forwarding other contents within the same session, e.g. TEST, which
+    forwards evicted contents one hop upstream.
     """
 
     def __init__(self, view, req_size=150, content_size=1500):
@@ -251,15 +260,17 @@ class LinkLoadCollector(DataCollector):
         req_size : int
             Average size (in bytes) of a request
         content_size : int
-            Average size (in byte) of a content
+            Average size (in byte) of a content, used for contents whose size
+            is unknown
         """
         self.view = view
         self.req_count = collections.defaultdict(int)
-        self.cont_count = collections.defaultdict(int)
+        self.cont_bytes = collections.defaultdict(int)
         if req_size <= 0 or content_size <= 0:
             raise ValueError('req_size and content_size must be positive')
         self.req_size = req_size
         self.content_size = content_size
+        self.curr_size = content_size
         self.t_start = -1
         self.t_end = 1
 
@@ -268,6 +279,8 @@ class LinkLoadCollector(DataCollector):
         if self.t_start < 0:
             self.t_start = timestamp
         self.t_end = timestamp
+        size = self.view.content_size(content)
+        self.curr_size = size if size is not None else self.content_size
 
     @inheritdoc(DataCollector)
     def request_hop(self, u, v, main_path=True):
@@ -275,14 +288,14 @@ class LinkLoadCollector(DataCollector):
 
     @inheritdoc(DataCollector)
     def content_hop(self, u, v, main_path=True):
-        self.cont_count[(u, v)] += 1
+        self.cont_bytes[(u, v)] += self.curr_size
 
     @inheritdoc(DataCollector)
     def results(self):
         duration = self.t_end - self.t_start
-        used_links = set(self.req_count.keys()).union(set(self.cont_count.keys()))
+        used_links = set(self.req_count.keys()).union(set(self.cont_bytes.keys()))
         link_loads = dict((link, (self.req_size * self.req_count[link] +
-                                  self.content_size * self.cont_count[link]) / duration)
+                                  self.cont_bytes[link]) / duration)
                           for link in used_links)
         link_loads_int = dict((link, load)
                               for link, load in link_loads.items()
@@ -467,6 +480,9 @@ class UtilizationCollector(DataCollector):
 class CacheHitRatioCollector(DataCollector):
     """Collector measuring the cache hit ratio, i.e. the portion of content
     requests served by a cache.
+
+    If the workload provides content sizes, the byte hit ratio, i.e. the
+    portion of bytes served by a cache, is also measured.
     """
 
     def __init__(self, view, off_path_hits=False, per_node=True, content_hits=False):
@@ -490,6 +506,9 @@ class CacheHitRatioCollector(DataCollector):
         self.sess_count = 0
         self.cache_hits = 0
         self.serv_hits = 0
+        self.curr_size = None
+        self.cache_hit_bytes = 0
+        self.serv_hit_bytes = 0
         if off_path_hits:
             self.off_path_hit_count = 0
         if per_node:
@@ -503,6 +522,7 @@ class CacheHitRatioCollector(DataCollector):
     @inheritdoc(DataCollector)
     def start_session(self, timestamp, receiver, content):
         self.sess_count += 1
+        self.curr_size = self.view.content_size(content)
         if self.off_path_hits:
             source = self.view.content_source(content)
             self.curr_path = self.view.shortest_path(receiver, source)
@@ -512,6 +532,8 @@ class CacheHitRatioCollector(DataCollector):
     @inheritdoc(DataCollector)
     def cache_hit(self, node):
         self.cache_hits += 1
+        if self.curr_size is not None:
+            self.cache_hit_bytes += self.curr_size
         if self.off_path_hits and node not in self.curr_path:
             self.off_path_hit_count += 1
         if self.cont_hits:
@@ -522,6 +544,8 @@ class CacheHitRatioCollector(DataCollector):
     @inheritdoc(DataCollector)
     def server_hit(self, node):
         self.serv_hits += 1
+        if self.curr_size is not None:
+            self.serv_hit_bytes += self.curr_size
         if self.cont_hits:
             self.cont_serv_hits[self.curr_cont] += 1
         if self.per_node:
@@ -532,6 +556,9 @@ class CacheHitRatioCollector(DataCollector):
         n_sess = self.cache_hits + self.serv_hits
         hit_ratio = self.cache_hits / n_sess
         results = Tree(**{'MEAN': hit_ratio})
+        n_bytes = self.cache_hit_bytes + self.serv_hit_bytes
+        if n_bytes > 0:
+            results['MEAN_BYTE'] = self.cache_hit_bytes / n_bytes
         if self.off_path_hits:
             results['MEAN_OFF_PATH'] = self.off_path_hit_count / n_sess
             results['MEAN_ON_PATH'] = results['MEAN'] - results['MEAN_OFF_PATH']
@@ -550,6 +577,47 @@ class CacheHitRatioCollector(DataCollector):
         return results
 
 
+@register_data_collector('CACHE_REQUESTS')
+class CacheRequestCollector(DataCollector):
+    """Collector recording the sequence of contents requested to the cache of
+    each node, i.e. the request stream each cache actually receives.
+
+    The recorded streams can be replayed with
+    `icarus.tools.per_node_lru_miss_ratio_curve` to compute the miss ratio of
+    LRU caches of any size at each node. Since one content identifier is
+    stored for each cache lookup, this collector should only be used with a
+    limited number of measured requests.
+    """
+
+    def __init__(self, view):
+        """Constructor
+
+        Parameters
+        ----------
+        view : NetworkView
+            The NetworkView instance
+        """
+        self.view = view
+        self.curr_cont = None
+        self.requests = collections.defaultdict(list)
+
+    @inheritdoc(DataCollector)
+    def start_session(self, timestamp, receiver, content):
+        self.curr_cont = content
+
+    @inheritdoc(DataCollector)
+    def cache_hit(self, node):
+        self.requests[node].append(self.curr_cont)
+
+    @inheritdoc(DataCollector)
+    def cache_miss(self, node):
+        self.requests[node].append(self.curr_cont)
+
+    @inheritdoc(DataCollector)
+    def results(self):
+        return Tree({'PER_NODE': dict(self.requests)})
+
+
 @register_data_collector('PATH_STRETCH')
 class PathStretchCollector(DataCollector):
     """Collector measuring the path stretch, i.e. the ratio between the actual
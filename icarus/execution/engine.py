@@ -5,14 +5,28 @@ experiments needs to be run, instantiates all the required classes and executes
 the experiment by iterating through the event provided by an event generator
 and providing them to a strategy instance.
 """
-from icarus.execution import NetworkModel, NetworkView, NetworkController, CollectorProxy
+import collections
+import itertools
+import logging
+
+from icarus.execution import NetworkModel, NetworkView, NetworkController, \
+                             CollectorProxy, DataCollector
+from icarus.execution.checkpoint import warmup_key
+from icarus.execution.instrumentation import Instrumentation
 from icarus.registry import DATA_COLLECTOR, STRATEGY
+from icarus.scenarios.workload import EventChunk
 
 
 __all__ = ['exec_experiment']
 
 
-def exec_experiment(topology, workload, netconf, strategy, cache_policy, collectors):
+logger = logging.getLogger('engine')
+
+
+def exec_experiment(topology, workload, netconf, strategy, cache_policy,
+                    collectors, chunk_size=None, fast_warmup=False,
+                    checkpoints=None, scenario_key=None, route_table=None,
+                    instrumentation=None):
     """Execute the simulation of a specific scenario.
 
     Parameters
@@ -24,7 +38,9 @@ def exec_experiment(topology, workload, netconf, strategy, cache_policy, collect
         An iterable object whose elements are (time, event) tuples, where time
         is a float type indicating the timestamp of the event to be executed
         and event is a dictionary storing all the attributes of the event to
-        execute
+        execute. If the workload has a *content_size* attribute, i.e. a
+        dictionary mapping contents to their size, contents are inserted in
+        caches with their size.
     netconf : dict
         Dictionary of attributes to inizialize the network model
     strategy : tree
@@ -37,25 +53,223 @@ def exec_experiment(topology, workload, netconf, strategy, cache_policy, collect
         The collectors to be used. It is a dictionary in which keys are the
         names of collectors to use and values are dictionaries of attributes
         for the collector they refer to.
+    chunk_size : int, optional
+        If specified and the workload implements the `chunks` method, events
+        are read from the workload in chunks of this size, which is faster
+        than iterating over the workload. Events are the same, but the
+        random numbers drawn by randomized strategies and cache policies are
+        not, so their results change.
+    fast_warmup : bool, optional
+        If *True* and the strategy supports it, events which are not logged
+        are executed by only applying cache state transitions, without any
+        session and data collection bookkeeping. Results are not affected.
+    checkpoints : CheckpointStore, optional
+        Store of warm network states. If specified together with
+        *scenario_key*, the state of the network at the end of the warmup is
+        restored from the store if available or saved to it otherwise. This
+        only applies to workloads with a `n_warmup` attribute, strategies
+        supporting checkpoints and non-randomized cache policies.
+    scenario_key : str, optional
+        Digest of all the parameters determining the warmup of the experiment
+    route_table : RouteTable, optional
+        A route table already compiled for the topology, which the network
+        model copies instead of computing shortest paths
+    instrumentation : Instrumentation, optional
+        If specified, the time taken to build the network model
+        (NETWORK_MODEL) and to execute the warmup (WARMUP) and the measured
+        phase (MEASURED), as well as the number of events executed in each of
+        them, are recorded in it. If the warm state is restored from a
+        checkpoint, this is recorded as WARMUP_RESTORED and no warmup events
+        are counted.
 
     Returns
     -------
     results : Tree
         A tree with the aggregated simulation results from all collectors
     """
-    model = NetworkModel(topology, cache_policy, **netconf)
+    if instrumentation is None:
+        instrumentation = Instrumentation()
+    with instrumentation.phase('NETWORK_MODEL'):
+        model = NetworkModel(topology, cache_policy, route_table=route_table,
+                             content_size=getattr(workload, 'content_size',
+                                                  None),
+                             **netconf)
     view = NetworkView(model)
     controller = NetworkController(model)
 
+    strategy_name = strategy['name']
+    strategy_args = {k: v for k, v in strategy.items() if k != 'name'}
+    strategy_inst = STRATEGY[strategy_name](view, controller, **strategy_args)
+
     collectors_inst = [DATA_COLLECTOR[name](view, **params)
                        for name, params in collectors.items()]
+
+    n_warmup = getattr(workload, 'n_warmup', 0)
+    checkpoint = checkpoints is not None and scenario_key is not None \
+        and n_warmup > 0 and strategy_inst.supports_checkpoint \
+        and not any(c.randomized for c in model.cache.values())
+    if checkpoint:
+        key = warmup_key(scenario_key, model, chunk_size)
+        state = checkpoints.get(key)
+        if state is None:
+            eviction_counter = _EvictionCounter(view)
+            collectors_inst.append(eviction_counter)
+
     collector = CollectorProxy(view, collectors_inst)
     controller.attach_collector(collector)
 
-    strategy_name = strategy['name']
-    strategy_args = {k: v for k, v in strategy.items() if k != 'name'}
-    strategy_inst = STRATEGY[strategy_name](view, controller, **strategy_args)
+    if fast_warmup and not strategy_inst.supports_warmup:
+        logger.warning('Strategy %s does not support fast warmup',
+                       strategy_name)
+    warmup = fast_warmup and strategy_inst.supports_warmup
+
+    if chunk_size is not None and hasattr(workload, 'chunks'):
+        events = workload.chunks(chunk_size)
+        split, run = _split_chunks, _run_chunks
+    else:
+        events = iter(workload)
+        split, run = _split_events, _run_events
 
-    for time, event in workload:
-        strategy_inst.process_event(time, **event)
+    if n_warmup > 0:
+        warmup_events, events = split(events, n_warmup)
+        restore = checkpoint and state is not None
+        instrumentation.attrs['WARMUP_RESTORED'] = restore
+        with instrumentation.phase('WARMUP'):
+            if restore:
+                # Events are generated anyway to advance the workload
+                for _ in warmup_events:
+                    pass
+                _restore_state(model, collector, state)
+                logger.info('Warm network state restored from checkpoint %s',
+                            key)
+            else:
+                instrumentation.count_events('WARMUP', run(
+                        strategy_inst, workload, warmup_events, warmup,
+                        model.clock))
+                if checkpoint:
+                    state = _capture_state(model, eviction_counter)
+                    try:
+                        checkpoints.put(key, state)
+                    except Exception as e:
+                        logger.warning('Could not checkpoint warm network '
+                                       'state: %s', e)
+    with instrumentation.phase('MEASURED'):
+        instrumentation.count_events('MEASURED', run(strategy_inst, workload,
+                                                     events, warmup,
+                                                     model.clock))
     return collector.results()
+
+
+class _EvictionCounter(DataCollector):
+    """Collector counting cache evictions per node, so that they can be
+    reported again when restoring a checkpointed state.
+    """
+
+    def __init__(self, view):
+        self.view = view
+        self.evictions = collections.defaultdict(int)
+
+    def cache_evict(self, node):
+        self.evictions[node] += 1
+
+
+def _capture_state(model, eviction_counter):
+    """Return the warm state of a network model"""
+    # The clock is pickled together with the caches, so that restored
+    # time-dependent caches keep sharing it
+    return {'cache': dict(model.cache),
+            'local_cache': dict(model.local_cache),
+            'clock': model.clock,
+            'evictions': dict(eviction_counter.evictions)}
+
+
+def _restore_state(model, collector, state):
+    """Restore a warm state into a network model and report the evictions
+    that occurred while reaching it.
+    """
+    model.cache.update(state['cache'])
+    model.local_cache.update(state['local_cache'])
+    if 'clock' in state:
+        model.clock = state['clock']
+    for node, n_evictions in state['evictions'].items():
+        for _ in range(n_evictions):
+            collector.cache_evict(node)
+
+
+def _split_events(events, n):
+    """Split an iterator over events into an iterator over the first *n*
+    events and an iterator over the remaining ones. The second iterator must
+    be used only after exhausting the first.
+    """
+    return itertools.islice(events, n), events
+
+
+def _split_chunks(chunks, n):
+    """Split an iterator over chunks of events into an iterator over chunks of
+    the first *n* events and an iterator over chunks of the remaining ones.
+    The second iterator must be used only after exhausting the first.
+    """
+    remainder = []
+
+    def head():
+        count = 0
+        for chunk in chunks:
+            if count + len(chunk) < n:
+                count += len(chunk)
+                yield chunk
+                continue
+            k = n - count
+            if k < len(chunk):
+                remainder.append(EventChunk(*(a if a is None else a[k:]
+                                              for a in chunk)))
+                chunk = EventChunk(*(a if a is None else a[:k] for a in chunk))
+            yield chunk
+            return
+
+    def tail():
+        for chunk in remainder:
+            yield chunk
+        for chunk in chunks:
+            yield chunk
+
+    return head(), tail()
+
+
+def _run_events(strategy, workload, events, warmup, clock):
+    """Execute events read one by one from the workload and return their
+    number
+    """
+    n_events = 0
+    for time, event in events:
+        clock.time = time
+        if warmup and not event.get('log', True):
+            strategy.warmup_event(time, event['receiver'], event['content'])
+        else:
+            # Other event attributes, e.g. content sizes, are not passed to
+            # strategies but looked up by the network model
+            strategy.process_event(time, event['receiver'], event['content'],
+                                   event.get('log', True))
+        n_events += 1
+    return n_events
+
+
+def _run_chunks(strategy, workload, chunks, warmup, clock):
+    """Execute events read in chunks from the workload and return their
+    number
+    """
+    process_event = strategy.process_event
+    warmup_event = strategy.warmup_event
+    receivers = workload.receivers
+    n_events = 0
+    for chunk in chunks:
+        n_events += len(chunk.time)
+        for time, receiver, content, log in zip(chunk.time.tolist(),
+                                                chunk.receiver.tolist(),
+                                                chunk.content.tolist(),
+                                                chunk.log.tolist()):
+            clock.time = time
+            if warmup and not log:
+                warmup_event(time, receivers[receiver], content)
+            else:
+                process_event(time, receivers[receiver], content, log)
+    return n_events
@@ -0,0 +1,135 @@
+"""Instrumentation of the execution of experiments.
+
+This module provides a recorder of performance measurements of the simulator
+itself, such as the time spent in each phase of an experiment, the event
+throughput and the memory footprint, which are useful to track performance
+regressions of the simulator across campaigns.
+"""
+import collections
+import contextlib
+import cProfile
+import pstats
+import sys
+import time
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+from icarus.util import Tree
+
+
+__all__ = [
+    'Instrumentation',
+    'peak_rss',
+           ]
+
+
+def peak_rss():
+    """Return the peak resident set size of the current process
+
+    Returns
+    -------
+    peak_rss : int
+        The peak resident set size, in bytes, or *None* if it cannot be
+        measured on this platform
+    """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on other platforms
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+class Instrumentation(object):
+    """Recorder of performance measurements of an experiment
+
+    Phases of the experiment are timed by executing them in the `phase`
+    context manager and the number of events executed in a phase is recorded
+    with `count_events`. Optionally, all phases are profiled with cProfile.
+    """
+
+    def __init__(self, profile=False, profile_limit=30):
+        """Constructor
+
+        Parameters
+        ----------
+        profile : bool, optional
+            If *True*, profile the execution of all phases
+        profile_limit : int, optional
+            The number of functions reported in the profile, in decreasing
+            order of cumulative time
+        """
+        self.timings = collections.OrderedDict()
+        self.events = collections.OrderedDict()
+        self.attrs = collections.OrderedDict()
+        self.profile_limit = profile_limit
+        self.profiler = cProfile.Profile() if profile else None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Context manager timing the execution of a phase. The times of
+        phases with the same name are summed.
+
+        Parameters
+        ----------
+        name : str
+            The name of the phase
+        """
+        if self.profiler is not None:
+            self.profiler.enable()
+        start = time.time()
+        try:
+            yield
+        finally:
+            duration = time.time() - start
+            if self.profiler is not None:
+                self.profiler.disable()
+            self.timings[name] = self.timings.get(name, 0) + duration
+
+    def count_events(self, name, n_events):
+        """Record the number of events executed in a phase
+
+        Parameters
+        ----------
+        name : str
+            The name of the phase
+        n_events : int
+            The number of events
+        """
+        self.events[name] = self.events.get(name, 0) + n_events
+
+    def results(self):
+        """Return all measurements
+
+        Returns
+        -------
+        results : Tree
+            Tree with the duration in seconds (TIMINGS), the number of events
+            (EVENTS) and the throughput in events per second
+            (EVENTS_PER_SECOND) of the phases, the peak resident set size in
+            bytes of the process (PEAK_RSS), all other recorded attributes
+            and, if enabled, the profile (PROFILE)
+        """
+        results = Tree()
+        results['TIMINGS'] = Tree(self.timings)
+        results['EVENTS'] = Tree(self.events)
+        results['EVENTS_PER_SECOND'] = Tree(
+                {name: n / self.timings[name] for name, n in self.events.items()
+                 if self.timings.get(name, 0) > 0})
+        results['PEAK_RSS'] = peak_rss()
+        for name, value in self.attrs.items():
+            results[name] = value
+        if self.profiler is not None:
+            stream = StringIO()
+            stats = pstats.Stats(self.profiler, stream=stream)
+            stats.sort_stats('cumulative').print_stats(self.profile_limit)
+            results['PROFILE'] = stream.getvalue()
+        return results
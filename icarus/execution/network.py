@@ -14,16 +14,17 @@ of all relevant events.
 """
 import logging
 
-import networkx as nx
 import fnss
 
-from icarus.registry import CACHE_POLICY
+from icarus.models.cache import build_cache
 from icarus.util import path_links, iround
+from icarus.execution.routing import build_route_table
 
 __all__ = [
     'NetworkModel',
     'NetworkView',
-    'NetworkController'
+    'NetworkController',
+    'SimulationClock',
           ]
 
 logger = logging.getLogger('orchestration')
@@ -113,6 +114,24 @@ class NetworkView(object):
         """
         return self.model.content_source.get(k, None)
 
+    def content_size(self, k):
+        """Return the size of a content, if known.
+
+        Content sizes are known if provided by the workload, in which case
+        they are used by size-aware caches and data collectors.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The content identifier
+
+        Returns
+        -------
+        size : int
+            The size of the content or None if unknown
+        """
+        return self.model.content_size.get(k, None)
+
     def shortest_path(self, s, t):
         """Return the shortest path from *s* to *t*
 
@@ -129,17 +148,18 @@ class NetworkView(object):
             List of nodes of the shortest path (origin and destination
             included)
         """
-        return self.model.shortest_path[s][t]
+        return self.model.route_table.path(s, t)
 
     def all_pairs_shortest_paths(self):
         """Return all pairs shortest paths
 
         Return
         ------
-        all_pairs_shortest_paths : dict of lists
-            Shortest paths between all pairs
+        all_pairs_shortest_paths : RouteTable
+            Shortest paths between all pairs. It can be accessed as a dict of
+            dicts of lists
         """
-        return self.model.shortest_path
+        return self.model.route_table
 
     def cluster(self, v):
         """Return cluster to which a node belongs, if any
@@ -177,7 +197,9 @@ class NetworkView(object):
         link_type : str
             The link type
         """
-        return self.model.link_type[(u, v)]
+        table = self.model.route_table
+        code = table.link_type[table.link_id[(u, v)]]
+        return table.link_types[code] if code >= 0 else None
 
     def link_delay(self, u, v):
         """Return the delay of link *(u, v)*.
@@ -194,7 +216,8 @@ class NetworkView(object):
         delay : float
             The link delay
         """
-        return self.model.link_delay[(u, v)]
+        table = self.model.route_table
+        return float(table.link_delay[table.link_id[(u, v)]])
 
     def topology(self):
         """Return the network topology
@@ -318,6 +341,20 @@ class NetworkView(object):
             return self.model.cache[node].dump()
 
 
+class SimulationClock(object):
+    """Callable returning the simulated time, i.e. the timestamp of the event
+    being processed, as required by time-dependent caches, e.g. TTL caches.
+    """
+
+    __slots__ = ('time',)
+
+    def __init__(self, time=0):
+        self.time = time
+
+    def __call__(self):
+        return self.time
+
+
 class NetworkModel(object):
     """Models the internal state of the network.
 
@@ -325,7 +362,9 @@ class NetworkModel(object):
     calls to the network controller.
     """
 
-    def __init__(self, topology, cache_policy, shortest_path=None):
+    def __init__(self, topology, cache_policy, shortest_path=None,
+                 lazy_paths=False, path_cache_size=None, route_table=None,
+                 content_size=None):
         """Constructor
 
         Parameters
@@ -335,19 +374,38 @@ class NetworkModel(object):
         cache_policy : dict or Tree
             cache policy descriptor. It has the name attribute which identify
             the cache policy name and keyworded arguments specific to the
-            policy
+            policy. It may also have *admission* and *ttl* attributes, which
+            wrap caches with an admission policy and TTL expiration, see
+            `icarus.models.cache.build_cache`
         shortest_path : dict of dict, optional
-            The all-pair shortest paths of the network
+            The all-pair shortest paths of the network. Paths are made
+            symmetric when compiled in the route table.
+        lazy_paths : bool, optional
+            If *True*, shortest paths are not computed upfront for all pairs
+            of nodes but on demand, one single-source tree at a time, only for
+            the nodes actually queried. It cannot be used together with
+            *shortest_path*.
+        path_cache_size : int, optional
+            The maximum number of single-source shortest path trees kept in
+            memory if *lazy_paths* is *True*. If not specified, all computed
+            trees are kept.
+        route_table : RouteTable, optional
+            A route table already compiled for the topology, or for an
+            identical one, e.g. shared by all experiments run on the same
+            scenario. The network model uses a copy of it, so that it is not
+            modified. If specified, *shortest_path*, *lazy_paths* and
+            *path_cache_size* are ignored, as they are assumed to have been
+            used to build it.
+        content_size : dict, optional
+            Dictionary mapping contents to their size. If specified, contents
+            are inserted in caches with their size, as required by size-aware
+            cache policies.
         """
         # Filter inputs
         if not isinstance(topology, fnss.Topology):
             raise ValueError('The topology argument must be an instance of '
                              'fnss.Topology or any of its subclasses.')
 
-        # Shortest paths of the network
-        self.shortest_path = shortest_path if shortest_path is not None \
-                             else symmetrify_paths(nx.all_pairs_dijkstra_path(topology))
-
         # Network topology
         self.topology = topology
 
@@ -356,19 +414,8 @@ class NetworkModel(object):
         self.content_source = {}
         # Dictionary mapping the reverse, i.e. nodes to set of contents stored
         self.source_node = {}
-
-        # Dictionary of link types (internal/external)
-        self.link_type = nx.get_edge_attributes(topology, 'type')
-        self.link_delay = fnss.get_delays(topology)
-        # Instead of this manual assignment, I could have converted the
-        # topology to directed before extracting type and link delay but that
-        # requires a deep copy of the topology that can take long time if
-        # many content source mappings are included in the topology
-        if not topology.is_directed():
-            for (u, v), link_type in list(self.link_type.items()):
-                self.link_type[(v, u)] = link_type
-            for (u, v), delay in list(self.link_delay.items()):
-                self.link_delay[(v, u)] = delay
+        # Dictionary mapping contents to their size, if known
+        self.content_size = content_size if content_size is not None else {}
 
         cache_size = {}
         for node in topology.nodes_iter():
@@ -388,11 +435,22 @@ class NetworkModel(object):
                 if cache_size[node] < 1:
                     cache_size[node] = 1
 
-        policy_name = cache_policy['name']
-        policy_args = {k: v for k, v in cache_policy.items() if k != 'name'}
+        # The simulated time, updated by the simulation engine at each event
+        self.clock = SimulationClock()
         # The actual cache objects storing the content
-        self.cache = {node: CACHE_POLICY[policy_name](cache_size[node], **policy_args)
-                          for node in cache_size}
+        self.cache = {node: build_cache(cache_policy, cache_size[node],
+                                        self.clock)
+                      for node in cache_size}
+
+        # Shortest paths of the network, link types (internal/external), link
+        # delays and cache locations, compiled in arrays indexed by node or
+        # link identifier
+        if route_table is not None:
+            self.route_table = route_table.copy(topology, self.cache)
+        else:
+            self.route_table = build_route_table(topology, self.cache,
+                                                 shortest_path, lazy_paths,
+                                                 path_cache_size)
 
         # This is for a local un-coordinated cache (currently used only by
         # Hashrouting with edge cache)
@@ -406,10 +464,24 @@ class NetworkModel(object):
         # restoring nodes that were removed manually before removing the node.
         self.disconnected_neighbors = {}
         self.removed_links = {}
+        # Links removed or added since shortest paths were last updated
+        self.pending_removed_links = []
+        self.pending_added_links = []
         self.removed_sources = {}
         self.removed_caches = {}
         self.removed_local_caches = {}
 
+    @property
+    def shortest_path(self):
+        """Return the all-pair shortest paths of the network
+
+        Returns
+        -------
+        shortest_path : RouteTable
+            All-pair shortest paths, accessible as a dict of dicts of lists
+        """
+        return self.route_table
+
 
 class NetworkController(object):
     """Network controller
@@ -485,7 +557,7 @@ class NetworkController(object):
             correctly in multicast cases. Default value is *True*
         """
         if path is None:
-            path = self.model.shortest_path[s][t]
+            path = self.model.route_table.path(s, t)
         for u, v in path_links(path):
             self.forward_request_hop(u, v, main_path)
 
@@ -507,7 +579,7 @@ class NetworkController(object):
             *True*
         """
         if path is None:
-            path = self.model.shortest_path[u][v]
+            path = self.model.route_table.path(u, v)
         for u, v in path_links(path):
             self.forward_content_hop(u, v, main_path)
 
@@ -546,6 +618,18 @@ class NetworkController(object):
         if self.collector is not None and self.session['log']:
             self.collector.content_hop(u, v, main_path)
 
+    def _put(self, cache, content):
+        """Insert a content in a cache, with its size if known"""
+        size = self.model.content_size.get(content)
+        if size is None:
+            return cache.put(content)
+        return cache.put(content, size=size)
+
+    def _report_evictions(self, node, evicted):
+        """Report the evictions caused by the insertion of a content"""
+        for _ in range(len(evicted) if isinstance(evicted, list) else 1):
+            self.cache_eviction(node)
+
     def put_content(self, node):
         """Store content in the specified node.
 
@@ -559,15 +643,19 @@ class NetworkController(object):
         node : any hashable type
             The node where the content is inserted
 
+        If the size of the content is known, it is inserted with its size.
+
         Returns
         -------
         evicted : any hashable type
-            The evicted object or *None* if no contents were evicted.
+            The evicted object or *None* if no contents were evicted. Size-aware
+            caches return the list of evicted objects instead.
         """
         if node in self.model.cache:
-            evicted = self.model.cache[node].put(self.session['content'])
+            evicted = self._put(self.model.cache[node],
+                                self.session['content'])
             if evicted:
-                self.cache_eviction(node)
+                self._report_evictions(node, evicted)
             return evicted
 
     def get_content(self, node):
@@ -600,6 +688,55 @@ class NetworkController(object):
         else:
             return False
 
+    def warmup_get_content(self, node, content):
+        """Get a content from a server or a cache during the warmup phase.
+
+        Differently from `get_content`, this method does not require an open
+        session and does not notify data collectors. It only applies the
+        state transitions of the cache of the node, if any.
+
+        Parameters
+        ----------
+        node : any hashable type
+            The node where the content is retrieved
+        content : any hashable type
+            The content identifier
+
+        Returns
+        -------
+        content : bool
+            True if the content is available, False otherwise
+        """
+        cache = self.model.cache.get(node)
+        if cache is not None:
+            return cache.get(content)
+        return content in self.model.source_node.get(node, ())
+
+    def warmup_put_content(self, node, content):
+        """Store content in the specified node during the warmup phase.
+
+        Differently from `put_content`, this method does not require an open
+        session. Evictions are still reported to data collectors.
+
+        Parameters
+        ----------
+        node : any hashable type
+            The node where the content is inserted
+        content : any hashable type
+            The content identifier
+
+        Returns
+        -------
+        evicted : any hashable type
+            The evicted object or *None* if no contents were evicted.
+        """
+        cache = self.model.cache.get(node)
+        if cache is not None:
+            evicted = self._put(cache, content)
+            if evicted:
+                self._report_evictions(node, evicted)
+            return evicted
+
     def remove_content(self, node):
         """Remove the content being handled from the cache
 
@@ -635,6 +772,25 @@ class NetworkController(object):
             self.collector.end_session(success)
         self.session = None
 
+    def _recompute_paths(self):
+        """Update the shortest paths of the network model after the links
+        removed or added since the last update
+
+        Only the shortest path trees affected by the changes are recomputed.
+        All paths are recomputed only if nodes not previously part of the
+        topology have been added.
+        """
+        model = self.model
+        table = model.route_table
+        removed, added = model.pending_removed_links, model.pending_added_links
+        if all(v in table for link in added for v in link):
+            table.update(removed, added)
+        else:
+            model.route_table = table.rebuild(model.topology,
+                                              cache_nodes=model.cache)
+        model.pending_removed_links = []
+        model.pending_added_links = []
+
     def rewire_link(self, u, v, up, vp, recompute_paths=True):
         """Rewire an existing link to new endpoints
 
@@ -657,9 +813,10 @@ class NetworkController(object):
         link = self.model.topology.edge[u][v]
         self.model.topology.remove_edge(u, v)
         self.model.topology.add_edge(up, vp, **link)
+        self.model.pending_removed_links.append((u, v))
+        self.model.pending_added_links.append((up, vp))
         if recompute_paths:
-            shortest_path = nx.all_pairs_dijkstra_path(self.model.topology)
-            self.model.shortest_path = symmetrify_paths(shortest_path)
+            self._recompute_paths()
 
     def remove_link(self, u, v, recompute_paths=True):
         """Remove a link from the topology and update the network model.
@@ -681,13 +838,14 @@ class NetworkController(object):
         v : any hashable type
             Destination node
         recompute_paths: bool, optional
-            If True, recompute all shortest paths
+            If True, update the shortest paths affected by this and any
+            previous change not followed by an update
         """
         self.model.removed_links[(u, v)] = self.model.topology.edge[u][v]
         self.model.topology.remove_edge(u, v)
+        self.model.pending_removed_links.append((u, v))
         if recompute_paths:
-            shortest_path = nx.all_pairs_dijkstra_path(self.model.topology)
-            self.model.shortest_path = symmetrify_paths(shortest_path)
+            self._recompute_paths()
 
     def restore_link(self, u, v, recompute_paths=True):
         """Restore a previously-removed link and update the network model
@@ -699,12 +857,13 @@ class NetworkController(object):
         v : any hashable type
             Destination node
         recompute_paths: bool, optional
-            If True, recompute all shortest paths
+            If True, update the shortest paths affected by this and any
+            previous change not followed by an update
         """
         self.model.topology.add_edge(u, v, **self.model.removed_links.pop((u, v)))
+        self.model.pending_added_links.append((u, v))
         if recompute_paths:
-            shortest_path = nx.all_pairs_dijkstra_path(self.model.topology)
-            self.model.shortest_path = symmetrify_paths(shortest_path)
+            self._recompute_paths()
 
     def remove_node(self, v, recompute_paths=True):
         """Remove a node from the topology and update the network model.
@@ -737,7 +896,8 @@ class NetworkController(object):
         v : any hashable type
             Node to remove
         recompute_paths: bool, optional
-            If True, recompute all shortest paths
+            If True, update the shortest paths affected by this and any
+            previous change not followed by an update
         """
         self.model.removed_nodes[v] = self.model.topology.node[v]
         # First need to remove all links the removed node as endpoint
@@ -748,6 +908,7 @@ class NetworkController(object):
         self.model.topology.remove_node(v)
         if v in self.model.cache:
             self.model.removed_caches[v] = self.model.cache.pop(v)
+            self.model.route_table.set_cache(v, False)
         if v in self.model.local_cache:
             self.model.removed_local_caches[v] = self.model.local_cache.pop(v)
         if v in self.model.source_node:
@@ -755,8 +916,7 @@ class NetworkController(object):
             for content in self.model.removed_sources[v]:
                 self.model.countent_source.pop(content)
         if recompute_paths:
-            shortest_path = nx.all_pairs_dijkstra_path(self.model.topology)
-            self.model.shortest_path = symmetrify_paths(shortest_path)
+            self._recompute_paths()
 
     def restore_node(self, v, recompute_paths=True):
         """Restore a previously-removed node and update the network model.
@@ -766,7 +926,8 @@ class NetworkController(object):
         v : any hashable type
             Node to restore
         recompute_paths: bool, optional
-            If True, recompute all shortest paths
+            If True, update the shortest paths affected by this and any
+            previous change not followed by an update
         """
         self.model.topology.add_node(v, **self.model.removed_nodes.pop(v))
         for u in self.model.disconnected_neighbors[v]:
@@ -775,6 +936,7 @@ class NetworkController(object):
         self.model.disconnected_neighbors.pop(v)
         if v in self.model.removed_caches:
             self.model.cache[v] = self.model.removed_caches.pop(v)
+            self.model.route_table.set_cache(v, True)
         if v in self.model.removed_local_caches:
             self.model.local_cache[v] = self.model.removed_local_caches.pop(v)
         if v in self.model.removed_sources:
@@ -782,8 +944,7 @@ class NetworkController(object):
             for content in self.model.source_node[v]:
                 self.model.countent_source[content] = v
         if recompute_paths:
-            shortest_path = nx.all_pairs_dijkstra_path(self.model.topology)
-            self.model.shortest_path = symmetrify_paths(shortest_path)
+            self._recompute_paths()
 
     def reserve_local_cache(self, ratio=0.1):
         """Reserve a fraction of cache as local.
@@ -812,6 +973,7 @@ class NetworkController(object):
                 # from that location
                 if v in self.model.cache:
                     self.model.cache.pop(v)
+                    self.model.route_table.set_cache(v, False)
             local_maxlen = iround(c.maxlen * (ratio))
             if local_maxlen > 0:
                 self.model.local_cache[v] = type(c)(local_maxlen)
@@ -850,4 +1012,5 @@ class NetworkController(object):
             The node to query
         """
         if node in self.model.local_cache:
-            return self.model.local_cache[node].put(self.session['content'])
+            return self._put(self.model.local_cache[node],
+                             self.session['content'])
@@ -0,0 +1,830 @@
+"""Compiled routing state of the network model
+
+This module contains the data structures used by the network model to store
+shortest paths and per-link and per-node attributes in a compact form.
+
+Node labels are interned to dense integer identifiers. All shortest paths are
+stored in one flat array of node identifiers, with a separate array of offsets
+locating the path of each pair of nodes. Link attributes are stored in arrays
+indexed by link identifier and node attributes in arrays indexed by node
+identifier. This layout has a much smaller memory footprint than a
+dict-of-dicts of lists of node labels and can be consumed by vectorized code.
+Paths queried as lists of node labels are memoized per origin node, so that
+repeated queries cost a dictionary lookup.
+
+Alternatively, shortest paths can be computed lazily, one single-source tree
+at a time, only for the nodes actually queried by strategies and collectors.
+
+Both route tables can be updated incrementally after links are removed or
+added, recomputing only the shortest path trees affected by the change.
+"""
+from __future__ import division
+import array
+import collections
+import copy
+
+import numpy as np
+import networkx as nx
+import fnss
+
+from icarus.util import inheritdoc
+
+__all__ = [
+    'RouteTable',
+    'LazyRouteTable',
+    'build_route_table',
+          ]
+
+
+# Relative tolerance used when comparing path lengths to detect which shortest
+# path trees may be affected by the addition of a link. It errs on the side of
+# recomputing a tree.
+_EPS = 1e-9
+
+
+def _link_weight(topology, u, v, weight):
+    """Return the weight of a link as used by Dijkstra's algorithm"""
+    return topology.edge[u][v].get(weight, 1)
+
+
+class RouteTable(object):
+    """Compiled table of all-pairs symmetric shortest paths
+
+    Paths are symmetric, i.e. path(u, v) = reversed(path(v, u)). For each pair
+    of nodes only the path computed from the node appearing later in the
+    topology node ordering is stored, which yields the same paths that
+    `symmetrify_paths` returns when applied to the output of
+    `networkx.all_pairs_dijkstra_path`.
+
+    The table can also be accessed as a dict of dicts, i.e.
+    `route_table[s][t]` returns the path from *s* to *t*, which makes it a
+    drop-in replacement for the output of `networkx.all_pairs_dijkstra_path`.
+
+    Lists of node labels returned by `path` are memoized in a dict of dicts
+    built lazily, one origin node at a time, and discarded whenever paths are
+    updated. Callers must not modify them.
+    """
+
+    def __init__(self, topology, shortest_path=None, cache_nodes=None,
+                 weight='weight'):
+        """Constructor
+
+        Parameters
+        ----------
+        topology : fnss.Topology
+            The topology object
+        shortest_path : dict of dict, optional
+            Precomputed all-pair shortest paths. If not provided, shortest
+            paths are computed with Dijkstra's algorithm
+        cache_nodes : iterable, optional
+            The nodes equipped with a cache
+        weight : str, optional
+            The edge attribute used as link weight by Dijkstra's algorithm
+        """
+        self.weight = weight
+        self.topology = topology
+        # Node interning
+        self.nodes = list(topology.nodes_iter())
+        self.node_id = {v: i for i, v in enumerate(self.nodes)}
+        self._labels = np.empty(len(self.nodes), dtype=object)
+        for i, v in enumerate(self.nodes):
+            self._labels[i] = v
+        # Node attributes
+        self.has_cache = np.zeros(len(self.nodes), dtype=bool)
+        if cache_nodes is not None:
+            for v in cache_nodes:
+                self.has_cache[self.node_id[v]] = True
+        # Link attributes
+        self._compile_links(topology)
+        # Paths, and memo of the paths returned by path() keyed by origin and
+        # destination
+        self._path_memo = {}
+        self._init_paths(topology, shortest_path)
+
+    def _init_paths(self, topology, shortest_path=None):
+        """Compute all shortest paths
+
+        Parameters
+        ----------
+        topology : fnss.Topology
+            The topology object
+        shortest_path : dict of dict, optional
+            Precomputed all-pair shortest paths
+        """
+        if shortest_path is not None:
+            self._compile_paths(lambda v: shortest_path[v])
+        else:
+            self._compile_paths(self._single_source_paths)
+
+    def _compile_links(self, topology):
+        """Build link identifiers and the arrays of link attributes
+
+        Parameters
+        ----------
+        topology : fnss.Topology
+            The topology object
+        """
+        links = list(topology.edges_iter())
+        if not topology.is_directed():
+            links += [(v, u) for u, v in links]
+        self.links = links
+        self.link_id = {link: i for i, link in enumerate(links)}
+        delays = fnss.get_delays(topology)
+        types = nx.get_edge_attributes(topology, 'type')
+        if not topology.is_directed():
+            for (u, v), delay in list(delays.items()):
+                delays[(v, u)] = delay
+            for (u, v), link_type in list(types.items()):
+                types[(v, u)] = link_type
+        # Link types are stored as indices of the link_types tuple
+        self.link_types = tuple(sorted(set(types.values())))
+        type_code = {t: i for i, t in enumerate(self.link_types)}
+        self.link_delay = np.array([delays.get(link, np.nan) for link in links],
+                                   dtype=np.float64)
+        self.link_type = np.array([type_code.get(types.get(link), -1)
+                                   for link in links], dtype=np.int8)
+
+    def _compile_paths(self, paths_from):
+        """Compile shortest paths in a flat array
+
+        Parameters
+        ----------
+        paths_from : callable
+            Function returning a dictionary of paths, keyed by destination,
+            from the node passed as argument
+        """
+        n = len(self.nodes)
+        paths = array.array('i')
+        offsets = np.zeros(n * (n - 1) // 2 + 1, dtype=np.int64)
+        for j in range(1, n):
+            block, lengths = self._root_paths(j, paths_from(self.nodes[j]))
+            base = j * (j - 1) // 2
+            offsets[base + 1:base + j + 1] = len(paths) + np.cumsum(lengths)
+            paths.extend(block)
+        self._paths = np.frombuffer(paths, dtype=np.int32) if paths \
+                      else np.zeros(0, dtype=np.int32)
+        self._offsets = offsets
+        self._path_memo = {}
+
+    def _root_paths(self, j, sp):
+        """Encode the paths stored for root *j*, i.e. the paths from *j* to
+        all nodes with lower identifier
+
+        Parameters
+        ----------
+        j : int
+            Identifier of the root node
+        sp : dict
+            Dictionary of paths from the root, keyed by destination
+
+        Returns
+        -------
+        block : array
+            The concatenated paths, as node identifiers
+        lengths : list
+            The length of each path, zero if the destination is unreachable
+        """
+        node_id = self.node_id
+        block = array.array('i')
+        lengths = []
+        for i in range(j):
+            path = sp.get(self.nodes[i])
+            if path is not None:
+                block.extend(node_id[v] for v in path)
+                lengths.append(len(path))
+            else:
+                lengths.append(0)
+        return block, lengths
+
+    def _single_source_paths(self, v):
+        """Return all shortest paths from a node of the current topology,
+        or no paths if the node has been removed from it
+        """
+        if v not in self.topology:
+            return {}
+        return nx.single_source_dijkstra_path(self.topology, v,
+                                              weight=self.weight)
+
+    def update(self, removed_links=(), added_links=()):
+        """Update shortest paths after links have been removed from or added
+        to the topology
+
+        The topology must have already been modified. Only the shortest paths
+        from the nodes whose shortest path tree may be affected by the change
+        are recomputed. The resulting paths are the same that would be obtained
+        by building a new route table on the modified topology, provided that
+        nodes are interned in the same order. The endpoints
+        of all links must be nodes of the route table, while they may have
+        been removed from the topology.
+
+        Parameters
+        ----------
+        removed_links : iterable of tuples, optional
+            The links removed from the topology
+        added_links : iterable of tuples, optional
+            The links added to the topology
+
+        Returns
+        -------
+        n_updated : int
+            The number of nodes whose shortest path tree has been updated
+        """
+        removed_links = list(removed_links)
+        added_links = list(added_links)
+        self._compile_links(self.topology)
+        roots = self._affected_roots(removed_links, added_links)
+        self._recompute_roots(roots)
+        return len(roots)
+
+    def _affected_roots(self, removed_links, added_links):
+        """Return the identifiers of the nodes whose stored shortest paths may
+        change as a result of a topology change
+
+        A removed link affects a root only if it is on one of its stored paths.
+        An added link (u, v) of weight w affects a root j only if, for a node i
+        whose path is stored by j, d(j, u) + w + d(v, i) (or d(j, v) + w +
+        d(u, i) if the topology is undirected) is not greater than the length
+        of the stored path, where distances are computed on the new topology.
+        """
+        n = len(self.nodes)
+        node_id = self.node_id
+        directed = self.topology.is_directed()
+        affected = np.zeros(n, dtype=bool)
+        paths, offsets = self._paths, self._offsets
+        if removed_links and len(paths) > 1:
+            # Look up the encoded removed links among the encoded hops of all
+            # stored paths, excluding the pseudo-hops spanning the end of a
+            # path and the start of the next one
+            hops = self._hop_codes()
+            codes = [self._link_code(node_id[u], node_id[v])
+                     for u, v in removed_links]
+            match = np.isin(hops, codes)
+            starts = offsets[1:-1]
+            match[starts[(starts > 0) & (starts < len(paths))] - 1] = False
+            pairs = np.searchsorted(offsets, np.flatnonzero(match),
+                                    side='right') - 1
+            affected[self._pair_roots(pairs)] = True
+        if added_links and directed:
+            affected[:] = True
+        elif added_links:
+            lengths = self._path_lengths()
+            pairs = np.arange(len(lengths), dtype=np.int64)
+            roots = self._pair_roots(pairs)
+            ends = pairs - roots * (roots - 1) // 2
+            for u, v in added_links:
+                w = _link_weight(self.topology, u, v, self.weight)
+                du = self._distances(u)
+                dv = self._distances(v)
+                via = np.minimum(du[roots] + dv[ends], dv[roots] + du[ends]) + w
+                hit = np.isfinite(via) & (via * (1 - _EPS) <= lengths)
+                affected[roots[hit]] = True
+        # Node 0 has no stored paths
+        affected[0] = False
+        return np.flatnonzero(affected).tolist()
+
+    def _link_code(self, i, j):
+        """Encode a link between two node identifiers as an integer"""
+        if not self.topology.is_directed():
+            i, j = min(i, j), max(i, j)
+        return i * len(self.nodes) + j
+
+    def _hop_codes(self):
+        """Encode consecutive node identifiers of the flat array of paths as
+        integers, consistently with `_link_code`
+        """
+        src = self._paths[:-1].astype(np.int64)
+        dst = self._paths[1:].astype(np.int64)
+        if not self.topology.is_directed():
+            src, dst = np.minimum(src, dst), np.maximum(src, dst)
+        return src * len(self.nodes) + dst
+
+    def _pair_roots(self, pairs):
+        """Return the identifiers of the roots storing the given pairs"""
+        n = len(self.nodes)
+        bases = np.arange(n, dtype=np.int64)
+        bases = bases * (bases - 1) // 2
+        return np.searchsorted(bases, pairs, side='right') - 1
+
+    def _path_lengths(self):
+        """Return the length of all stored paths, inf if there is no path
+
+        Paths including links no longer in the topology have length NaN.
+        """
+        paths, offsets = self._paths, self._offsets
+        n_pairs = len(offsets) - 1
+        lengths = np.full(n_pairs, np.inf)
+        if len(paths) < 2:
+            return lengths
+        weight = self.weight
+        links = self.topology.edges(data=True)
+        codes = np.array([self._link_code(self.node_id[u], self.node_id[v])
+                          for u, v, _ in links], dtype=np.int64)
+        weights = np.array([data.get(weight, 1) for _, _, data in links],
+                           dtype=np.float64)
+        order = np.argsort(codes)
+        codes, weights = codes[order], weights[order]
+        hops = self._hop_codes()
+        idx = np.minimum(np.searchsorted(codes, hops), max(len(codes) - 1, 0))
+        # Weight of the hop leading to each position of the flat array, zero
+        # at the first position of each path
+        hop_weights = np.full(len(paths), np.nan)
+        if len(codes) > 0:
+            found = codes[idx] == hops
+            hop_weights[1:][found] = weights[idx[found]]
+        starts = offsets[:-1]
+        nonempty = offsets[1:] > starts
+        hop_weights[starts[nonempty]] = 0
+        lengths[nonempty] = np.add.reduceat(hop_weights, starts[nonempty])
+        return lengths
+
+    def _distances(self, v):
+        """Return the array of distances of all nodes from *v*, inf if
+        unreachable
+        """
+        d = np.full(len(self.nodes), np.inf)
+        if v in self.topology:
+            length = nx.single_source_dijkstra_path_length(self.topology, v,
+                                                          weight=self.weight)
+            for x, l in length.items():
+                d[self.node_id[x]] = l
+        return d
+
+    def _recompute_roots(self, roots):
+        """Recompute the stored paths of the given roots and splice them in
+        the flat array of paths
+
+        Parameters
+        ----------
+        roots : list
+            Sorted list of identifiers of the roots to recompute
+        """
+        if not roots:
+            return
+        old_paths, offsets = self._paths, self._offsets
+        lengths = np.diff(offsets)
+        pieces = []
+        prev = 0
+        for j in roots:
+            base = j * (j - 1) // 2
+            block, block_lengths = self._root_paths(
+                            j, self._single_source_paths(self.nodes[j]))
+            pieces.append(old_paths[prev:offsets[base]])
+            pieces.append(np.frombuffer(block, dtype=np.int32) if block
+                          else np.zeros(0, dtype=np.int32))
+            lengths[base:base + j] = block_lengths
+            prev = offsets[base + j]
+        pieces.append(old_paths[prev:])
+        self._paths = np.concatenate(pieces).astype(np.int32, copy=False)
+        self._offsets = np.zeros_like(offsets)
+        np.cumsum(lengths, out=self._offsets[1:])
+        # The memo is replaced rather than cleared because it may be shared
+        # with copies of this route table
+        self._path_memo = {}
+
+    def rebuild(self, topology, cache_nodes=None):
+        """Return a new route table of the same type and with the same options
+        computed on a possibly modified topology
+
+        Parameters
+        ----------
+        topology : fnss.Topology
+            The topology object
+        cache_nodes : iterable, optional
+            The nodes equipped with a cache
+
+        Returns
+        -------
+        route_table : RouteTable
+            The new route table
+        """
+        return type(self)(topology, cache_nodes=cache_nodes, weight=self.weight)
+
+    def copy(self, topology=None, cache_nodes=None):
+        """Return a copy of the route table which can be updated without
+        affecting this one
+
+        Paths are not recomputed, so copying a route table is much cheaper
+        than building a new one. Arrays which are only ever replaced, and
+        never modified in place, are shared by the two tables.
+
+        Parameters
+        ----------
+        topology : fnss.Topology, optional
+            A copy of the topology of this route table, which the new route
+            table refers to when it is updated. If not specified, the new
+            route table refers to the same topology object.
+        cache_nodes : iterable, optional
+            The nodes equipped with a cache. If not specified, they are the
+            same as those of this route table.
+
+        Returns
+        -------
+        route_table : RouteTable
+            The copy of the route table
+        """
+        table = copy.copy(self)
+        if topology is not None:
+            table.topology = topology
+        if cache_nodes is None:
+            table.has_cache = self.has_cache.copy()
+        else:
+            table.has_cache = np.zeros(len(self.nodes), dtype=bool)
+            for v in cache_nodes:
+                table.has_cache[self.node_id[v]] = True
+        return table
+
+    def __getstate__(self):
+        # Memoized paths are not pickled, they are rebuilt on demand
+        state = self.__dict__.copy()
+        state['_path_memo'] = {}
+        return state
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __contains__(self, v):
+        return v in self.node_id
+
+    def __getitem__(self, s):
+        if s not in self.node_id:
+            raise KeyError(s)
+        return _RouteTableRow(self, s)
+
+    def keys(self):
+        return list(self.nodes)
+
+    def items(self):
+        return [(v, self[v]) for v in self.nodes]
+
+    def path_ids(self, i, j):
+        """Return the shortest path between two nodes as array of node
+        identifiers
+
+        Parameters
+        ----------
+        i : int
+            Identifier of the origin node
+        j : int
+            Identifier of the destination node
+
+        Returns
+        -------
+        path : array
+            Array of identifiers of the nodes of the path (origin and
+            destination included)
+        """
+        if i == j:
+            return np.array([i], dtype=np.int32)
+        if i > j:
+            k = i * (i - 1) // 2 + j
+            a, b = self._offsets[k:k + 2]
+            if a == b:
+                raise KeyError((self.nodes[i], self.nodes[j]))
+            return self._paths[a:b]
+        k = j * (j - 1) // 2 + i
+        a, b = self._offsets[k:k + 2]
+        if a == b:
+            raise KeyError((self.nodes[i], self.nodes[j]))
+        return self._paths[a:b][::-1]
+
+    def path(self, s, t):
+        """Return the shortest path from *s* to *t*
+
+        Parameters
+        ----------
+        s : any hashable type
+            Origin node
+        t : any hashable type
+            Destination node
+
+        Returns
+        -------
+        shortest_path : list
+            List of nodes of the shortest path (origin and destination
+            included)
+        """
+        try:
+            return self._path_memo[s][t]
+        except KeyError:
+            pass
+        path = self._labels[self.path_ids(self.node_id[s],
+                                          self.node_id[t])].tolist()
+        self._path_memo.setdefault(s, {})[t] = path
+        return path
+
+    def link_index(self, u, v):
+        """Return the identifier of link *(u, v)*
+
+        Parameters
+        ----------
+        u : any hashable type
+            Origin node
+        v : any hashable type
+            Destination node
+
+        Returns
+        -------
+        link_id : int
+            The link identifier
+        """
+        return self.link_id[(u, v)]
+
+    def set_cache(self, v, has_cache):
+        """Set whether a node has a cache
+
+        Parameters
+        ----------
+        v : any hashable type
+            The node
+        has_cache : bool
+            *True* if the node has a cache, *False* otherwise
+        """
+        if v in self.node_id:
+            self.has_cache[self.node_id[v]] = has_cache
+
+
+class _RouteTableRow(object):
+    """Read-only view of all shortest paths originating from one node"""
+
+    def __init__(self, table, s):
+        self._table = table
+        self._s = s
+
+    def __getitem__(self, t):
+        return self._table.path(self._s, t)
+
+    def __contains__(self, t):
+        try:
+            self._table.path_ids(self._table.node_id[self._s],
+                                 self._table.node_id[t])
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return (t for t in self._table.nodes if t in self)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        return [(t, self[t]) for t in self]
+
+    def get(self, t, default=None):
+        return self[t] if t in self else default
+
+
+class LazyRouteTable(RouteTable):
+    """Route table computing shortest paths on demand
+
+    Instead of computing all-pair shortest paths at construction time, this
+    route table runs Dijkstra's algorithm from a node only the first time a
+    path having that node as endpoint is requested. Each single-source
+    shortest path tree is stored as an array of predecessors and an array of
+    distances and memoized, optionally in a bounded LRU cache of trees.
+
+    Paths are symmetric and identical to those returned by `RouteTable`: the
+    path between two nodes is always extracted from the tree rooted at the
+    node appearing later in the topology node ordering.
+    """
+
+    def __init__(self, topology, shortest_path=None, cache_nodes=None,
+                 weight='weight', maxlen=None):
+        """Constructor
+
+        Parameters
+        ----------
+        topology : fnss.Topology
+            The topology object
+        shortest_path : dict of dict, optional
+            Not supported by this route table, must be None
+        cache_nodes : iterable, optional
+            The nodes equipped with a cache
+        weight : str, optional
+            The edge attribute used as link weight by Dijkstra's algorithm
+        maxlen : int, optional
+            The maximum number of shortest path trees kept in memory. If not
+            specified, all computed trees are kept.
+        """
+        if shortest_path is not None:
+            raise ValueError('LazyRouteTable does not accept precomputed '
+                             'shortest paths')
+        if maxlen is not None and maxlen <= 0:
+            raise ValueError('maxlen must be positive')
+        self.maxlen = maxlen
+        # Memoized trees keyed by root node identifier, in LRU order
+        self._trees = collections.OrderedDict()
+        # Number of single-source expansions, including repeated expansions
+        # of the same node after its tree has been evicted
+        self.n_expansions = 0
+        self._expanded = set()
+        super(LazyRouteTable, self).__init__(topology, cache_nodes=cache_nodes,
+                                             weight=weight)
+
+    def _init_paths(self, topology, shortest_path=None):
+        self._trees.clear()
+
+    @property
+    def n_expanded_sources(self):
+        """Return the number of distinct nodes from which a shortest path tree
+        has been computed
+
+        Returns
+        -------
+        n_expanded_sources : int
+            The number of expanded source nodes
+        """
+        return len(self._expanded)
+
+    def stats(self):
+        """Return statistics about the computation of shortest paths
+
+        Returns
+        -------
+        stats : dict
+            Dictionary with the number of nodes, of distinct expanded sources,
+            of single-source expansions and of trees currently in memory
+        """
+        return {'nodes': len(self.nodes),
+                'expanded_sources': self.n_expanded_sources,
+                'expansions': self.n_expansions,
+                'cached_trees': len(self._trees)}
+
+    def rebuild(self, topology, cache_nodes=None):
+        return type(self)(topology, cache_nodes=cache_nodes,
+                          weight=self.weight, maxlen=self.maxlen)
+
+    @inheritdoc(RouteTable)
+    def copy(self, topology=None, cache_nodes=None):
+        table = super(LazyRouteTable, self).copy(topology, cache_nodes)
+        table._trees = self._trees.copy()
+        table._expanded = set(self._expanded)
+        return table
+
+    def update(self, removed_links=(), added_links=()):
+        """Update shortest paths after links have been removed from or added
+        to the topology
+
+        The topology must have already been modified. Trees possibly affected
+        by the change are discarded and will be recomputed on demand.
+
+        A removed link affects a tree only if it is one of its links. An added
+        link (u, v) of weight w affects a tree only if d(v) >= d(u) + w (or
+        d(u) >= d(v) + w if the topology is undirected), where d is the
+        distance from the root before the change.
+
+        Parameters
+        ----------
+        removed_links : iterable of tuples, optional
+            The links removed from the topology
+        added_links : iterable of tuples, optional
+            The links added to the topology
+
+        Returns
+        -------
+        n_updated : int
+            The number of shortest path trees discarded
+        """
+        node_id = self.node_id
+        directed = self.topology.is_directed()
+        removed = [(node_id[u], node_id[v]) for u, v in removed_links]
+        added = [(node_id[u], node_id[v],
+                  _link_weight(self.topology, u, v, self.weight) * (1 - _EPS))
+                 for u, v in added_links]
+        self._compile_links(self.topology)
+        roots = []
+        for r, (pred, dist) in self._trees.items():
+            if any(pred[j] == i or (not directed and pred[i] == j)
+                   for i, j in removed) or \
+               any(dist[j] - dist[i] >= w or
+                   (not directed and dist[i] - dist[j] >= w)
+                   for i, j, w in added):
+                roots.append(r)
+        for r in roots:
+            del self._trees[r]
+        return len(roots)
+
+    def _tree(self, r):
+        """Return the shortest path tree rooted at a node, computing it if
+        needed
+
+        Parameters
+        ----------
+        r : int
+            Identifier of the root node
+
+        Returns
+        -------
+        tree : tuple
+            A (pred, dist) tuple where pred is the array of identifiers of the
+            predecessor of each node on the tree (-1 if unreachable) and dist
+            is the array of distances from the root (inf if unreachable)
+        """
+        trees = self._trees
+        if r in trees:
+            tree = trees.pop(r)
+            trees[r] = tree
+            return tree
+        tree = self._compute_tree(r)
+        trees[r] = tree
+        if self.maxlen is not None and len(trees) > self.maxlen:
+            trees.popitem(last=False)
+        return tree
+
+    def _compute_tree(self, r):
+        """Run Dijkstra's algorithm from a node
+
+        Parameters
+        ----------
+        r : int
+            Identifier of the root node
+
+        Returns
+        -------
+        tree : tuple
+            A (pred, dist) tuple, see `_tree`
+        """
+        n = len(self.nodes)
+        node_id = self.node_id
+        pred = array.array('i', [-1]) * n
+        dist = array.array('d', [np.inf]) * n
+        root = self.nodes[r]
+        if root in self.topology:
+            length, paths = nx.single_source_dijkstra(self.topology, root,
+                                                      weight=self.weight)
+            for v, path in paths.items():
+                i = node_id[v]
+                pred[i] = node_id[path[-2]] if len(path) > 1 else r
+                dist[i] = length[v]
+        self.n_expansions += 1
+        self._expanded.add(r)
+        return pred, dist
+
+    def _path_list(self, i, j):
+        """Return the shortest path between two nodes as list of node
+        identifiers
+        """
+        if i == j:
+            return [i]
+        r, x = (i, j) if i > j else (j, i)
+        pred = self._tree(r)[0]
+        if pred[x] < 0:
+            raise KeyError((self.nodes[i], self.nodes[j]))
+        path = [x]
+        while x != r:
+            x = pred[x]
+            path.append(x)
+        # path goes from the lower to the higher identifier
+        if i > j:
+            path.reverse()
+        return path
+
+    @inheritdoc(RouteTable)
+    def path_ids(self, i, j):
+        return np.array(self._path_list(i, j), dtype=np.int32)
+
+    @inheritdoc(RouteTable)
+    def path(self, s, t):
+        nodes = self.nodes
+        return [nodes[i] for i in self._path_list(self.node_id[s],
+                                                   self.node_id[t])]
+
+
+def build_route_table(topology, cache_nodes=None, shortest_path=None,
+                      lazy_paths=False, path_cache_size=None):
+    """Build the route table of a topology according to the configuration
+    of the network model
+
+    Parameters
+    ----------
+    topology : fnss.Topology
+        The topology object
+    cache_nodes : iterable, optional
+        The nodes equipped with a cache
+    shortest_path : dict of dict, optional
+        Precomputed all-pair shortest paths
+    lazy_paths : bool, optional
+        If *True*, return a `LazyRouteTable`. It cannot be used together with
+        *shortest_path*.
+    path_cache_size : int, optional
+        The maximum number of shortest path trees kept in memory by a lazy
+        route table
+
+    Returns
+    -------
+    route_table : RouteTable
+        The route table
+    """
+    if lazy_paths:
+        if shortest_path is not None:
+            raise ValueError('lazy_paths cannot be used with precomputed '
+                             'shortest paths')
+        return LazyRouteTable(topology, cache_nodes=cache_nodes,
+                              maxlen=path_cache_size)
+    return RouteTable(topology, shortest_path, cache_nodes=cache_nodes)
@@ -0,0 +1,147 @@
+import os
+import random
+import itertools
+import shutil
+import tempfile
+import unittest
+
+from icarus.execution import CheckpointStore, exec_experiment
+from icarus.orchestration import warmup_scenario_key
+from icarus.registry import TOPOLOGY_FACTORY, CACHE_PLACEMENT, \
+                            CONTENT_PLACEMENT, WORKLOAD
+from icarus.util import Tree
+
+
+class TestCheckpointStore(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_put_get(self):
+        store = CheckpointStore(os.path.join(self.path, 'store'))
+        self.assertNotIn('a', store)
+        self.assertIsNone(store.get('a'))
+        store.put('a', {'cache': [1, 2, 3]})
+        self.assertIn('a', store)
+        self.assertEqual({'cache': [1, 2, 3]}, store.get('a'))
+        store.put('a', {'cache': [4]})
+        self.assertEqual({'cache': [4]}, store.get('a'))
+        self.assertEqual(['a.pickle'], os.listdir(store.path))
+
+    def test_corrupted(self):
+        store = CheckpointStore(self.path)
+        with open(os.path.join(self.path, 'a.pickle'), 'wb') as f:
+            f.write(b'not a pickle')
+        self.assertIsNone(store.get('a'))
+
+    def test_unpicklable(self):
+        store = CheckpointStore(self.path)
+        self.assertRaises(Exception, store.put, 'a', lambda: None)
+        self.assertNotIn('a', store)
+        self.assertEqual([], os.listdir(self.path))
+
+
+class EventList(list):
+    """Events of a workload, read in advance"""
+
+    def __init__(self, workload):
+        n_events = workload.n_warmup + workload.n_measured
+        super(EventList, self).__init__(itertools.islice(workload, n_events))
+        self.n_warmup = workload.n_warmup
+
+
+class TestWarmupCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store = CheckpointStore(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def run_experiment(self, strategy='LCE', policy='LRU', chunk_size=None,
+                       checkpoint=True, n_measured=2000):
+        random.seed(0)
+        topology = TOPOLOGY_FACTORY['TREE'](k=2, h=3)
+        workload = WORKLOAD['STATIONARY'](topology, n_contents=100, alpha=0.8,
+                                          n_warmup=3000, n_measured=n_measured,
+                                          seed=1)
+        CACHE_PLACEMENT['UNIFORM'](topology, cache_budget=30)
+        CONTENT_PLACEMENT['UNIFORM'](topology, workload.contents, seed=2)
+        if chunk_size is None:
+            workload = EventList(workload)
+        collectors = {'CACHE_HIT_RATIO': {}, 'LINK_LOAD': {}, 'EVICTIONS': {}}
+        cache_policy = policy if isinstance(policy, dict) \
+                       else {'name': policy}
+        return exec_experiment(topology, workload, {}, {'name': strategy},
+                               cache_policy, collectors,
+                               chunk_size=chunk_size,
+                               checkpoints=self.store if checkpoint else None,
+                               scenario_key=strategy + repr(cache_policy))
+
+    def test_restore(self):
+        for chunk_size in (None, 700, 1000):
+            for strategy in ('LCE', 'LCD', 'NO_CACHE'):
+                expected = self.run_experiment(strategy, chunk_size=chunk_size,
+                                               checkpoint=False)
+                n_checkpoints = len(os.listdir(self.path))
+                self.assertEqual(expected, self.run_experiment(
+                                    strategy, chunk_size=chunk_size))
+                self.assertEqual(n_checkpoints + 1, len(os.listdir(self.path)))
+                # Second run restores the checkpoint written by the first one
+                self.assertEqual(expected, self.run_experiment(
+                                    strategy, chunk_size=chunk_size))
+                self.assertEqual(n_checkpoints + 1, len(os.listdir(self.path)))
+
+    def test_restore_wrapped(self):
+        policy = {'name': 'LRU', 'admission': 'K_HITS', 'ttl': 20}
+        for chunk_size in (None, 1000):
+            expected = self.run_experiment(policy=policy, chunk_size=chunk_size,
+                                           checkpoint=False)
+            self.assertNotEqual(expected['CACHE_HIT_RATIO'],
+                                self.run_experiment(
+                                    policy='LRU', chunk_size=chunk_size,
+                                    checkpoint=False)['CACHE_HIT_RATIO'])
+            self.assertEqual(expected, self.run_experiment(
+                                policy=policy, chunk_size=chunk_size))
+            self.assertEqual(expected, self.run_experiment(
+                                policy=policy, chunk_size=chunk_size))
+        self.assertEqual(2, len(os.listdir(self.path)))
+
+    def test_restored_state(self):
+        expected = self.run_experiment(chunk_size=1000)
+        key = os.path.splitext(os.listdir(self.path)[0])[0]
+        state = self.store.get(key)
+        state['evictions'] = {}
+        self.store.put(key, state)
+        results = self.run_experiment(chunk_size=1000)
+        self.assertEqual(expected['CACHE_HIT_RATIO'], results['CACHE_HIT_RATIO'])
+        self.assertLess(results['EVICTIONS']['NUMBER'],
+                        expected['EVICTIONS']['NUMBER'])
+
+    def test_different_measured_phase(self):
+        self.run_experiment(chunk_size=1000, n_measured=1000)
+        expected = self.run_experiment(chunk_size=1000, n_measured=3000,
+                                       checkpoint=False)
+        self.assertEqual(expected, self.run_experiment(chunk_size=1000,
+                                                       n_measured=3000))
+        self.assertEqual(1, len(os.listdir(self.path)))
+
+    def test_not_checkpointed(self):
+        self.run_experiment('PROB_CACHE')
+        self.run_experiment('LCE', 'RAND')
+        self.assertEqual([], os.listdir(self.path))
+
+    def test_scenario_key(self):
+        params = Tree({'desc': 'a', 'strategy': {'name': 'LCE'},
+                       'workload': {'name': 'STATIONARY', 'n_warmup': 10,
+                                    'n_measured': 10, 'seed': 1}})
+        key = warmup_scenario_key(params)
+        params['desc'] = 'b'
+        params['workload']['n_measured'] = 20
+        self.assertEqual(key, warmup_scenario_key(params))
+        params['workload']['n_warmup'] = 20
+        self.assertNotEqual(key, warmup_scenario_key(params))
@@ -14,7 +14,8 @@ class TestLinkLoadCollector(unittest.TestCase):
         link_type = {(1, 2): 'internal', (2, 3): 'external',
                      (2, 1): 'internal', (3, 2): 'external'}
 
-        view = type('MockNetworkView', (), {'link_type': lambda s, u, v: link_type[(u, v)]})()
+        view = type('MockNetworkView', (), {'link_type': lambda s, u, v: link_type[(u, v)],
+                                            'content_size': lambda s, k: None})()
 
         c = collectors.LinkLoadCollector(view, req_size=req_size, content_size=cont_size)
 
@@ -51,7 +52,8 @@ class TestLinkLoadCollector(unittest.TestCase):
         link_type = {(1, 2): 'internal', (2, 3): 'internal',
                      (2, 1): 'internal', (3, 2): 'internal'}
 
-        view = type('MockNetworkView', (), {'link_type': lambda s, u, v: link_type[(u, v)]})()
+        view = type('MockNetworkView', (), {'link_type': lambda s, u, v: link_type[(u, v)],
+                                            'content_size': lambda s, k: None})()
 
         c = collectors.LinkLoadCollector(view, req_size=req_size, content_size=cont_size)
 
@@ -81,7 +83,8 @@ class TestLinkLoadCollector(unittest.TestCase):
         link_type = {(1, 2): 'external', (2, 3): 'external',
                      (2, 1): 'external', (3, 2): 'external'}
 
-        view = type('MockNetworkView', (), {'link_type': lambda s, u, v: link_type[(u, v)]})()
+        view = type('MockNetworkView', (), {'link_type': lambda s, u, v: link_type[(u, v)],
+                                            'content_size': lambda s, k: None})()
 
         c = collectors.LinkLoadCollector(view, req_size=req_size, content_size=cont_size)
 
@@ -104,6 +107,32 @@ class TestLinkLoadCollector(unittest.TestCase):
         self.assertEqual(0, len(ext_load))
 
 
+    def test_content_size(self):
+
+        link_type = {(1, 2): 'internal', (2, 1): 'internal'}
+        content_size = {'A': 100}
+
+        view = type('MockNetworkView', (), {'link_type': lambda s, u, v: link_type[(u, v)],
+                                            'content_size': lambda s, k: content_size.get(k)})()
+
+        c = collectors.LinkLoadCollector(view, req_size=10, content_size=700)
+
+        c.start_session(3.0, 1, 'A')
+        c.request_hop(1, 2)
+        c.content_hop(2, 1)
+        c.end_session()
+
+        c.start_session(5.0, 1, 'B')
+        c.request_hop(1, 2)
+        c.content_hop(2, 1)
+        c.end_session()
+
+        res = c.results()
+        self.assertEqual(2 * 10 / 2, res['PER_LINK_INTERNAL'][(1, 2)])
+        # Contents of unknown size weigh as much as the average content
+        self.assertEqual((100 + 700) / 2, res['PER_LINK_INTERNAL'][(2, 1)])
+
+
 class TestLatencyCollector(unittest.TestCase):
 
     def test_base(self):
@@ -159,7 +188,7 @@ class TestCacheHitRatioCollector(unittest.TestCase):
 
     def test_base(self):
 
-        view = type('MockNetworkView', (), {})()
+        view = type('MockNetworkView', (), {'content_size': lambda s, k: None})()
 
         c = collectors.CacheHitRatioCollector(view)
 
@@ -176,7 +205,7 @@ class TestCacheHitRatioCollector(unittest.TestCase):
 
     def test_per_node(self):
 
-        view = type('MockNetworkView', (), {})()
+        view = type('MockNetworkView', (), {'content_size': lambda s, k: None})()
 
         c = collectors.CacheHitRatioCollector(view, per_node=True)
 
@@ -206,7 +235,7 @@ class TestCacheHitRatioCollector(unittest.TestCase):
 
     def test_per_content(self):
 
-        view = type('MockNetworkView', (), {})()
+        view = type('MockNetworkView', (), {'content_size': lambda s, k: None})()
 
         c = collectors.CacheHitRatioCollector(view, content_hits=True)
 
@@ -236,3 +265,61 @@ class TestCacheHitRatioCollector(unittest.TestCase):
 
         res = c.results()
         self.assertEqual({1: 0.5, 2: 0.25}, res['PER_CONTENT'])
+
+
+    def test_byte_hit_ratio(self):
+
+        content_size = {1: 100, 2: 300}
+
+        view = type('MockNetworkView', (), {'content_size': lambda s, k: content_size[k]})()
+
+        c = collectors.CacheHitRatioCollector(view)
+
+        c.start_session(3.0, 'RECV', 1)
+        c.cache_hit(1)
+        c.end_session()
+
+        c.start_session(4.0, 'RECV', 2)
+        c.server_hit(2)
+        c.end_session()
+
+        res = c.results()
+        self.assertEqual(0.5, res['MEAN'])
+        self.assertEqual(0.25, res['MEAN_BYTE'])
+
+    def test_no_content_size(self):
+
+        view = type('MockNetworkView', (), {'content_size': lambda s, k: None})()
+
+        c = collectors.CacheHitRatioCollector(view)
+
+        c.start_session(3.0, 'RECV', 1)
+        c.cache_hit(1)
+        c.end_session()
+
+        self.assertNotIn('MEAN_BYTE', c.results())
+
+
+class TestCacheRequestCollector(unittest.TestCase):
+
+    def test_base(self):
+
+        view = type('MockNetworkView', (), {})()
+
+        c = collectors.CacheRequestCollector(view)
+
+        c.start_session(3.0, 1, 'A')
+        c.cache_miss(1)
+        c.cache_hit(2)
+        c.end_session()
+
+        c.start_session(4.0, 1, 'B')
+        c.cache_miss(1)
+        c.cache_miss(2)
+        c.server_hit(3)
+        c.end_session()
+
+        res = c.results()
+        self.assertEqual(['A', 'B'], res['PER_NODE'][1])
+        self.assertEqual(['A', 'B'], res['PER_NODE'][2])
+        self.assertNotIn(3, res['PER_NODE'])
@@ -0,0 +1,48 @@
+import time
+import unittest
+
+from icarus.execution import Instrumentation, peak_rss
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_phase(self):
+        instrumentation = Instrumentation()
+        with instrumentation.phase('A'):
+            time.sleep(0.01)
+        with instrumentation.phase('B'):
+            pass
+        with instrumentation.phase('A'):
+            time.sleep(0.01)
+        self.assertEqual(['A', 'B'], list(instrumentation.timings))
+        self.assertGreaterEqual(instrumentation.timings['A'], 0.02)
+
+    def test_phase_exception(self):
+        instrumentation = Instrumentation()
+        with self.assertRaises(ValueError):
+            with instrumentation.phase('A'):
+                raise ValueError()
+        self.assertIn('A', instrumentation.timings)
+
+    def test_results(self):
+        instrumentation = Instrumentation()
+        with instrumentation.phase('A'):
+            time.sleep(0.01)
+        instrumentation.count_events('A', 10)
+        instrumentation.count_events('A', 5)
+        instrumentation.attrs['X'] = True
+        results = instrumentation.results()
+        self.assertEqual(15, results['EVENTS']['A'])
+        self.assertAlmostEqual(15 / instrumentation.timings['A'],
+                               results['EVENTS_PER_SECOND']['A'])
+        self.assertTrue(results['X'])
+        self.assertNotIn('PROFILE', results)
+
+    def test_profile(self):
+        instrumentation = Instrumentation(profile=True)
+        with instrumentation.phase('A'):
+            sorted(range(1000))
+        self.assertIn('sorted', instrumentation.results()['PROFILE'])
+
+    def test_peak_rss(self):
+        self.assertGreater(peak_rss(), 0)
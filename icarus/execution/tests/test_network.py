@@ -113,3 +113,66 @@ class TestNetworkMVC(unittest.TestCase):
         self.controller.rewire_link(1, 3, 1, 5, recompute_paths=True)
         self.assertEqual([0, 1, 2, 3, 4], self.view.shortest_path(0, 4))
         self.assertEqual(1, self.topology.edge[2][3]['a'])
+
+
+class TestLazyPathsNetworkMVC(TestNetworkMVC):
+
+    def setUp(self):
+        self.topology = self.build_topology()
+        model = network.NetworkModel(self.topology, cache_policy={'name': 'FIFO'},
+                                     lazy_paths=True, path_cache_size=2)
+        self.view = network.NetworkView(model)
+        self.controller = network.NetworkController(model)
+        self.collector = DummyCollector(self.view)
+        self.controller.attach_collector(self.collector)
+
+
+class EvictionCounter(DummyCollector):
+
+    def __init__(self, view):
+        super(EvictionCounter, self).__init__(view)
+        self.evictions = 0
+
+    def cache_evict(self, node):
+        self.evictions += 1
+
+
+class TestSizeAwareNetworkMVC(unittest.TestCase):
+
+    def setUp(self):
+        topology = IcnTopology()
+        topology.add_path([0, 1, 2])
+        fnss.add_stack(topology, 0, 'receiver', {})
+        fnss.add_stack(topology, 1, 'router', {'cache_size': 10})
+        fnss.add_stack(topology, 2, 'source', {'contents': [1, 2, 3]})
+        model = network.NetworkModel(topology, cache_policy={'name': 'SIZE_LRU'},
+                                     content_size={1: 4, 2: 4, 3: 8})
+        self.view = network.NetworkView(model)
+        self.controller = network.NetworkController(model)
+        self.collector = EvictionCounter(self.view)
+        self.controller.attach_collector(self.collector)
+
+    def put(self, content):
+        self.controller.start_session(0, 0, content, True)
+        evicted = self.controller.put_content(1)
+        self.controller.end_session()
+        return evicted
+
+    def test_content_size(self):
+        self.assertEqual(8, self.view.content_size(3))
+        self.assertIsNone(self.view.content_size(4))
+
+    def test_put_content(self):
+        self.assertIsNone(self.put(1))
+        self.assertIsNone(self.put(2))
+        self.assertEqual(8, self.view.model.cache[1].used)
+        # Both contents are evicted to make room for the larger one
+        self.assertEqual([1, 2], self.put(3))
+        self.assertEqual(2, self.collector.evictions)
+        self.assertEqual([3], self.view.cache_dump(1))
+
+    def test_warmup_put_content(self):
+        self.controller.warmup_put_content(1, 3)
+        self.assertEqual([3], self.controller.warmup_put_content(1, 1))
+        self.assertEqual(1, self.collector.evictions)
+        self.assertEqual(4, self.view.model.cache[1].used)
@@ -0,0 +1,272 @@
+from __future__ import division
+import pickle
+import random
+import unittest
+
+import networkx as nx
+import fnss
+
+from icarus.scenarios import IcnTopology
+from icarus.execution.network import symmetrify_paths
+from icarus.execution.routing import RouteTable, LazyRouteTable, \
+                                     build_route_table
+
+
+class TestRouteTable(unittest.TestCase):
+
+    @classmethod
+    def build_topology(cls):
+        # Topology sketch
+        #
+        # 0 ---- 1 ---- 2 ---- 3 ---- 4
+        #        |             |
+        #        |             |
+        #        5 -- 6 - 7 -- 8
+        #
+        topology = IcnTopology()
+        topology.add_path([0, 1, 2, 3, 4])
+        topology.add_path([1, 5, 6, 7, 8, 3])
+        fnss.set_delays_constant(topology, 2, 'ms', [(0, 1), (1, 2)])
+        fnss.set_delays_constant(topology, 5, 'ms', [(2, 3), (3, 4)])
+        for u, v in topology.edges_iter():
+            topology.edge[u][v]['type'] = 'internal'
+        topology.edge[3][4]['type'] = 'external'
+        return topology
+
+    def setUp(self):
+        self.topology = self.build_topology()
+        self.table = RouteTable(self.topology, cache_nodes=[1, 3])
+
+    def test_paths(self):
+        self.assertEqual([0, 1, 2, 3, 4], self.table.path(0, 4))
+        self.assertEqual([4, 3, 2, 1, 0], self.table.path(4, 0))
+        self.assertEqual([2], self.table.path(2, 2))
+        self.assertEqual([0, 1, 2, 3, 4], self.table[0][4])
+
+    def test_symmetrify_equivalence(self):
+        for topology in (self.topology, nx.grid_2d_graph(5, 5),
+                         nx.cycle_graph(10)):
+            expected = symmetrify_paths(nx.all_pairs_dijkstra_path(topology))
+            table = RouteTable(topology)
+            for u in expected:
+                for v in expected[u]:
+                    self.assertEqual(expected[u][v], table.path(u, v))
+
+    def test_precomputed_paths(self):
+        paths = symmetrify_paths(nx.all_pairs_dijkstra_path(self.topology))
+        table = RouteTable(self.topology, shortest_path=paths)
+        for u in paths:
+            for v in paths[u]:
+                self.assertEqual(paths[u][v], table.path(u, v))
+
+    def test_path_ids(self):
+        path = self.table.path_ids(self.table.node_id[0], self.table.node_id[4])
+        self.assertEqual([0, 1, 2, 3, 4], [self.table.nodes[i] for i in path])
+
+    def test_disconnected(self):
+        self.topology.add_node(9)
+        table = RouteTable(self.topology)
+        self.assertRaises(KeyError, table.path, 0, 9)
+        self.assertNotIn(9, table[0])
+        self.assertIn(4, table[0])
+
+    def test_dict_interface(self):
+        self.assertEqual(set(self.topology.nodes()), set(self.table))
+        self.assertEqual(set(self.topology.nodes()), set(self.table[0].keys()))
+        self.assertEqual(len(self.topology), len(self.table[0]))
+
+    def test_link_attributes(self):
+        link = self.table.link_id[(2, 3)]
+        self.assertEqual(5, self.table.link_delay[link])
+        link = self.table.link_id[(3, 2)]
+        self.assertEqual(5, self.table.link_delay[link])
+        link = self.table.link_id[(4, 3)]
+        self.assertEqual('external', self.table.link_types[self.table.link_type[link]])
+        link = self.table.link_id[(1, 0)]
+        self.assertEqual('internal', self.table.link_types[self.table.link_type[link]])
+
+    def test_has_cache(self):
+        self.assertTrue(self.table.has_cache[self.table.node_id[1]])
+        self.assertFalse(self.table.has_cache[self.table.node_id[2]])
+        self.table.set_cache(2, True)
+        self.assertTrue(self.table.has_cache[self.table.node_id[2]])
+
+    def test_copy(self):
+        topology = self.build_topology()
+        table = self.table.copy(topology, cache_nodes=[2])
+        self.assertEqual(self.table.path(0, 4), table.path(0, 4))
+        self.assertTrue(table.has_cache[table.node_id[2]])
+        self.assertFalse(table.has_cache[table.node_id[1]])
+        self.assertTrue(self.table.has_cache[self.table.node_id[1]])
+        topology.remove_edge(2, 3)
+        table.update(removed_links=[(2, 3)])
+        self.assertEqual([0, 1, 5, 6, 7, 8, 3, 4], table.path(0, 4))
+        self.assertEqual([0, 1, 2, 3, 4], self.table.path(0, 4))
+        self.assertIn((2, 3), self.table.link_id)
+        self.assertNotIn((2, 3), table.link_id)
+
+    def test_memoized_paths(self):
+        path = self.table.path(0, 4)
+        self.assertIs(path, self.table.path(0, 4))
+        self.assertIs(path, self.table[0][4])
+        restored = pickle.loads(pickle.dumps(self.table))
+        self.assertEqual({}, restored._path_memo)
+        self.assertEqual(path, restored.path(0, 4))
+        self.topology.remove_edge(2, 3)
+        self.table.update(removed_links=[(2, 3)])
+        self.assertEqual([0, 1, 5, 6, 7, 8, 3, 4], self.table.path(0, 4))
+
+    def test_build_route_table(self):
+        table = build_route_table(self.topology, cache_nodes=[1])
+        self.assertIs(type(table), RouteTable)
+        self.assertTrue(table.has_cache[table.node_id[1]])
+        table = build_route_table(self.topology, lazy_paths=True,
+                                  path_cache_size=2)
+        self.assertIsInstance(table, LazyRouteTable)
+        self.assertEqual(2, table.maxlen)
+        self.assertRaises(ValueError, build_route_table, self.topology,
+                          shortest_path={}, lazy_paths=True)
+
+
+class TestLazyRouteTable(unittest.TestCase):
+
+    def setUp(self):
+        self.topology = TestRouteTable.build_topology()
+        self.table = LazyRouteTable(self.topology, cache_nodes=[1, 3])
+
+    def test_paths(self):
+        self.assertEqual([0, 1, 2, 3, 4], self.table.path(0, 4))
+        self.assertEqual([4, 3, 2, 1, 0], self.table.path(4, 0))
+        self.assertEqual([2], self.table.path(2, 2))
+        self.assertEqual([0, 1, 2, 3, 4], self.table[0][4])
+
+    def test_eager_equivalence(self):
+        for topology in (self.topology, nx.grid_2d_graph(5, 5),
+                         nx.cycle_graph(10)):
+            eager = RouteTable(topology)
+            lazy = LazyRouteTable(topology)
+            for u in topology:
+                for v in topology:
+                    self.assertEqual(eager.path(u, v), lazy.path(u, v))
+
+    def test_expanded_sources(self):
+        self.assertEqual(0, self.table.n_expanded_sources)
+        self.table.path(0, 4)
+        self.table.path(4, 1)
+        self.table.path(2, 4)
+        self.assertEqual(1, self.table.n_expanded_sources)
+        self.assertEqual(1, self.table.n_expansions)
+        self.table.path(0, 1)
+        self.assertEqual(2, self.table.n_expanded_sources)
+
+    def test_bounded_cache(self):
+        table = LazyRouteTable(self.topology, maxlen=2)
+        table.path(0, 4)
+        table.path(0, 3)
+        table.path(0, 2)
+        self.assertEqual(2, table.stats()['cached_trees'])
+        table.path(0, 4)
+        self.assertEqual(3, table.n_expanded_sources)
+        self.assertEqual(4, table.n_expansions)
+        self.assertEqual([0, 1, 2, 3, 4], table.path(0, 4))
+
+    def test_disconnected(self):
+        self.topology.add_node(9)
+        table = LazyRouteTable(self.topology)
+        self.assertRaises(KeyError, table.path, 0, 9)
+        self.assertNotIn(9, table[0])
+        self.assertIn(4, table[0])
+
+    def test_precomputed_paths(self):
+        paths = nx.all_pairs_dijkstra_path(self.topology)
+        self.assertRaises(ValueError, LazyRouteTable, self.topology, paths)
+
+    def test_copy(self):
+        self.table.path(0, 4)
+        topology = TestRouteTable.build_topology()
+        table = self.table.copy(topology)
+        topology.remove_edge(2, 3)
+        self.assertEqual(1, table.update(removed_links=[(2, 3)]))
+        self.assertEqual([0, 1, 5, 6, 7, 8, 3, 4], table.path(0, 4))
+        self.assertEqual([0, 1, 2, 3, 4], self.table.path(0, 4))
+        self.assertEqual(1, self.table.n_expansions)
+
+    def test_rebuild(self):
+        table = LazyRouteTable(self.topology, maxlen=3)
+        self.topology.remove_edge(2, 3)
+        table = table.rebuild(self.topology)
+        self.assertIsInstance(table, LazyRouteTable)
+        self.assertEqual(3, table.maxlen)
+        self.assertEqual([0, 1, 5, 6, 7, 8, 3, 4], table.path(0, 4))
+
+
+class TestRouteTableUpdate(unittest.TestCase):
+
+    def assert_same_paths(self, expected, actual):
+        for u in expected.nodes:
+            for v in expected.nodes:
+                if v in expected[u]:
+                    self.assertEqual(expected.path(u, v), actual.path(u, v))
+                else:
+                    self.assertRaises(KeyError, actual.path, u, v)
+
+    def random_changes(self, table_class):
+        rand = random.Random(0)
+        topology = nx.grid_2d_graph(6, 6)
+        for u, v in topology.edges_iter():
+            topology.edge[u][v]['weight'] = rand.choice([1, 2, 3])
+        table = table_class(topology)
+        removed = []
+        for _ in range(30):
+            if removed and rand.random() < 0.4:
+                u, v, attr = removed.pop(rand.randrange(len(removed)))
+                topology.add_edge(u, v, **attr)
+                n_updated = table.update(added_links=[(u, v)])
+            else:
+                u, v = rand.choice(topology.edges())
+                removed.append((u, v, topology.edge[u][v]))
+                topology.remove_edge(u, v)
+                n_updated = table.update(removed_links=[(u, v)])
+            self.assertLessEqual(n_updated, len(topology))
+            # Query all paths to expand trees of lazy route tables
+            self.assert_same_paths(RouteTable(topology), table)
+
+    def test_random_changes(self):
+        self.random_changes(RouteTable)
+
+    def test_random_changes_lazy(self):
+        self.random_changes(LazyRouteTable)
+
+    def test_batch_changes(self):
+        topology = TestRouteTable.build_topology()
+        table = RouteTable(topology)
+        topology.remove_edge(2, 3)
+        topology.remove_edge(7, 8)
+        topology.add_edge(1, 3)
+        table.update(removed_links=[(2, 3), (7, 8)], added_links=[(1, 3)])
+        self.assert_same_paths(RouteTable(topology), table)
+        self.assertEqual([0, 1, 3, 4], table.path(0, 4))
+
+    def test_unaffected_roots(self):
+        topology = nx.path_graph(5)
+        topology.add_edge(4, 5, weight=10)
+        table = RouteTable(topology)
+        topology.remove_edge(4, 5)
+        # Only the tree rooted at node 5 stores paths using link (4, 5)
+        self.assertEqual(1, table.update(removed_links=[(4, 5)]))
+        self.assertRaises(KeyError, table.path, 0, 5)
+        # Link (0, 2) is not on any shortest path
+        topology.add_edge(0, 2, weight=5)
+        self.assertEqual(0, table.update(added_links=[(0, 2)]))
+        self.assertEqual([0, 1, 2], table.path(0, 2))
+        topology.add_edge(0, 5, weight=1)
+        self.assertGreater(table.update(added_links=[(0, 5)]), 0)
+        self.assertEqual([1, 0, 5], table.path(1, 5))
+
+    def test_link_attributes(self):
+        topology = TestRouteTable.build_topology()
+        table = RouteTable(topology)
+        topology.add_edge(0, 4, delay=1, type='external')
+        table.update(added_links=[(0, 4)])
+        link = table.link_id[(4, 0)]
+        self.assertEqual('external', table.link_types[table.link_type[link]])
@@ -7,14 +7,21 @@ configuration file.
 
 Usage:
 
-  icarus run -r RESULTS [-c CONFIG_OVERRIDE] [-v] config
+  icarus run -r RESULTS [-c CONFIG_OVERRIDE] [--resume] [-v] config
   icarus results print [--json] RESULTS
   icarus results merge -o OUTPUT INPUT_1 ... INPUT_N
+  icarus bench [-o OUTPUT] [-b BASELINE] [-t TOLERANCE] [-s SUITE] [--quick]
+               [--config CONFIG]
+  icarus worker -a ADDRESS -k AUTHKEY [-p PROCESSES] [--retry RETRY]
 
 """
+import json
+
 import click
 
 import icarus
+import icarus.benchmarks
+import icarus.backends
 
 
 CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
@@ -32,11 +39,12 @@ def main():
 @main.command(context_settings=CONTEXT_SETTINGS)
 @click.option('--results', '-r', required=True, help='The file on which results will be saved')
 @click.option('--config-override', '-c', multiple=True, help='Override specific key=value parameter of configuration file')
+@click.option('--resume', is_flag=True, help='Resume an interrupted run, skipping experiments already completed')
 @click.argument('config', nargs=1, required=True)
-def run(results, config_override, config):
+def run(results, config_override, resume, config):
     """Run a set of simulations."""
     config_override = dict(c.split("=") for c in config_override) or None
-    icarus.run(config, results, config_override)
+    icarus.run(config, results, config_override, resume)
 
 @main.group(context_settings=CONTEXT_SETTINGS)
 def results():
@@ -60,3 +68,49 @@ def print_results(json, path):
         print(rs.json(indent=4))
     else:
         print(rs.prettyprint())
+
+@main.command(context_settings=CONTEXT_SETTINGS)
+@click.option('--output', '-o', help='The file on which benchmark results will be saved in JSON format')
+@click.option('--baseline', '-b', help='A file of previous benchmark results to compare results with')
+@click.option('--tolerance', '-t', default=0.2, show_default=True, help='Relative decrease of throughput with respect to the baseline tolerated')
+@click.option('--suite', '-s', multiple=True, type=click.Choice(icarus.benchmarks.SUITES), help='Run only the benchmarks of this area')
+@click.option('--config', multiple=True, help='Configuration file run end-to-end instead of the reference ones')
+@click.option('--quick', '-q', is_flag=True, help='Run shorter benchmarks, only comparable with other quick runs')
+def bench(output, baseline, tolerance, suite, config, quick):
+    """Benchmark the performance of the simulator."""
+    results = icarus.benchmarks.run_suite(suites=list(suite) or None,
+                                          configs=list(config) or None,
+                                          scale=0.1 if quick else 1.0)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+    else:
+        print(json.dumps(results, indent=4, sort_keys=True))
+    if baseline:
+        with open(baseline) as f:
+            baseline_results = json.load(f)
+        try:
+            regressions = icarus.benchmarks.compare(results, baseline_results,
+                                                    tolerance)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        for name, expected, actual in regressions:
+            click.echo('REGRESSION | %s: %.1f -> %.1f events/s (%+.1f%%)'
+                       % (name, expected, actual,
+                          100 * (actual - expected) / expected), err=True)
+        if regressions:
+            raise click.ClickException('%d benchmark(s) regressed by more than %g%%'
+                                       % (len(regressions), 100 * tolerance))
+
+@main.command(context_settings=CONTEXT_SETTINGS)
+@click.option('--address', '-a', required=True, help='The HOST:PORT address of the broker')
+@click.option('--authkey', '-k', required=True, help='The authentication key of the broker')
+@click.option('--processes', '-p', type=int, help='The number of worker processes, by default one per CPU')
+@click.option('--retry', default=0, show_default=True, help='Seconds during which connection to the broker is attempted again')
+def worker(address, authkey, processes, retry):
+    """Run experiments distributed by a broker."""
+    host, _, port = address.rpartition(':')
+    if not host or not port.isdigit():
+        raise click.BadParameter('address must be in the HOST:PORT format',
+                                 param_hint='--address')
+    icarus.backends.run_workers((host, int(port)), authkey, processes, retry)
@@ -5,18 +5,24 @@ provided by Icarus.
 """
 from __future__ import division
 from collections import deque, defaultdict
+from array import array
+import heapq
+import numbers
 import random
 import abc
 import copy
+import zlib
 
 import numpy as np
 
 from icarus.util import inheritdoc, apportionment
-from icarus.registry import register_cache_policy
+from icarus.registry import register_cache_policy, register_cache_admission, \
+                            CACHE_POLICY, CACHE_ADMISSION
 
 
 __all__ = [
         'LinkedSet',
+        'ArrayLinkedSet',
         'Cache',
         'NullCache',
         'BeladyMinCache',
@@ -27,10 +33,27 @@ __all__ = [
         'FifoCache',
         'ClimbCache',
         'RandEvictionCache',
+        'ArcCache',
+        'LirsCache',
+        'S3FifoCache',
+        'ClockProCache',
+        'CountMinSketch',
+        'TinyLfuCache',
+        'SizeLruCache',
+        'SizeFifoCache',
+        'GdsfCache',
+        'CacheWrapper',
+        'InsertAfterKHitsCache',
+        'RandInsertCache',
+        'KeyValCache',
+        'TtlCache',
+        'TtlKeyValCache',
+        'build_cache',
         'insert_after_k_hits_cache',
         'rand_insert_cache',
         'keyval_cache',
         'ttl_cache',
+        'ttl_keyval_cache',
            ]
 
 
@@ -448,10 +471,387 @@ class LinkedSet(object):
         self._bottom = None
         self._map.clear()
 
+    def __getstate__(self):
+        """Return the state of the set for pickling and copying
+
+        The state is the list of elements from top to bottom, which is much
+        more compact than the linked nodes and does not require deep recursion
+        to be serialized.
+
+        Returns
+        -------
+        state : list
+            The elements of the set, from top to bottom
+        """
+        return list(self)
+
+    def __setstate__(self, state):
+        """Restore the state of the set from a list of elements
+
+        Parameters
+        ----------
+        state : list
+            The elements of the set, from top to bottom
+        """
+        self._top = None
+        self._bottom = None
+        self._map = {}
+        for k in state:
+            self.append_bottom(k)
+
+
+class ArrayLinkedSet(object):
+    """A doubly-linked set storing links in integer arrays.
+
+    This data structure provides the same interface and time complexity as
+    `LinkedSet`, but instead of allocating an object for each entry, it stores
+    entries in slots of preallocated arrays, in which the links of each entry
+    are the indices of the slots of the entries above and below it. Entries
+    are mapped to their slots by a dictionary. This reduces both the memory
+    footprint and the time needed to update the set.
+
+    Slots released by removed entries are reused and the arrays are extended
+    if more entries than their capacity are inserted.
+    """
+
+    def __init__(self, iterable=[], capacity=16):
+        """Constructor
+
+        Parameters
+        ----------
+        iterable : iterable type
+            An iterable type to inizialize the data structure.
+            It must contain only one instance of each element
+        capacity : int, optional
+            The number of entries for which slots are preallocated
+        """
+        self._init(max(int(capacity), 1))
+        if iterable:
+            if len(set(iterable)) < len(iterable):
+                raise ValueError('The iterable parameter contains repeated '
+                                 'elements')
+            for i in iterable:
+                self.append_bottom(i)
+
+    def _init(self, capacity):
+        """Initialize an empty set with slots for a number of entries"""
+        # Slots of entries above and below each slot, -1 if none
+        self._up = array('l', [-1]) * capacity
+        self._down = array('l', [-1]) * capacity
+        self._val = [None] * capacity
+        self._top = -1
+        self._bottom = -1
+        self._map = {}
+        # Released slots are chained through the _down array. Slots from
+        # _n_slots onwards were never used
+        self._free = -1
+        self._n_slots = 0
+
+    def _alloc(self, k):
+        """Assign a slot to an item and return it"""
+        i = self._free
+        if i >= 0:
+            self._free = self._down[i]
+        else:
+            i = self._n_slots
+            if i == len(self._val):
+                # Double the capacity
+                self._up.extend(array('l', [-1]) * i)
+                self._down.extend(array('l', [-1]) * i)
+                self._val.extend([None] * i)
+            self._n_slots += 1
+        self._val[i] = k
+        self._map[k] = i
+        return i
+
+    def _release(self, k):
+        """Release the slot of an item"""
+        i = self._map.pop(k)
+        self._val[i] = None
+        self._down[i] = self._free
+        self._free = i
+
+    @inheritdoc(LinkedSet)
+    def __len__(self):
+        return len(self._map)
+
+    @inheritdoc(LinkedSet)
+    def __iter__(self):
+        down = self._down
+        val = self._val
+        i = self._top
+        while i >= 0:
+            yield val[i]
+            i = down[i]
+
+    @inheritdoc(LinkedSet)
+    def __reversed__(self):
+        up = self._up
+        val = self._val
+        i = self._bottom
+        while i >= 0:
+            yield val[i]
+            i = up[i]
+
+    @inheritdoc(LinkedSet)
+    def __str__(self):
+        return self.__class__.__name__ + "([" + "".join("%s, " % str(i) for i in self)[:-2] + "])"
+
+    @inheritdoc(LinkedSet)
+    def __contains__(self, k):
+        return k in self._map
+
+    @property
+    @inheritdoc(LinkedSet)
+    def top(self):
+        return self._val[self._top] if self._top >= 0 else None
+
+    @property
+    @inheritdoc(LinkedSet)
+    def bottom(self):
+        return self._val[self._bottom] if self._bottom >= 0 else None
+
+    @inheritdoc(LinkedSet)
+    def pop_top(self):
+        i = self._top
+        if i < 0:
+            return None
+        k = self._val[i]
+        self._unlink(i)
+        self._release(k)
+        return k
+
+    @inheritdoc(LinkedSet)
+    def pop_bottom(self):
+        i = self._bottom
+        if i < 0:
+            return None
+        k = self._val[i]
+        # Inlined _unlink and _release, as this is on the critical path
+        up = self._up[i]
+        self._bottom = up
+        if up >= 0:
+            self._down[up] = -1
+        else:
+            self._top = -1
+        del self._map[k]
+        self._val[i] = None
+        self._down[i] = self._free
+        self._free = i
+        return k
+
+    def _unlink(self, i):
+        """Detach the entry of a slot from its neighbours"""
+        up = self._up[i]
+        down = self._down[i]
+        if up >= 0:
+            self._down[up] = down
+        else:
+            self._top = down
+        if down >= 0:
+            self._up[down] = up
+        else:
+            self._bottom = up
+
+    def _link(self, i, up, down):
+        """Attach the entry of a slot between two slots"""
+        self._up[i] = up
+        self._down[i] = down
+        if up >= 0:
+            self._down[up] = i
+        else:
+            self._top = i
+        if down >= 0:
+            self._up[down] = i
+        else:
+            self._bottom = i
+
+    @inheritdoc(LinkedSet)
+    def append_top(self, k):
+        if k in self._map:
+            raise KeyError('The item %s is already in the set' % str(k))
+        i = self._alloc(k)
+        top = self._top
+        self._up[i] = -1
+        self._down[i] = top
+        if top >= 0:
+            self._up[top] = i
+        else:
+            self._bottom = i
+        self._top = i
+
+    @inheritdoc(LinkedSet)
+    def append_bottom(self, k):
+        if k in self._map:
+            raise KeyError('The item %s is already in the set' % str(k))
+        self._link(self._alloc(k), self._bottom, -1)
+
+    @inheritdoc(LinkedSet)
+    def move_up(self, k):
+        if k not in self._map:
+            raise KeyError('Item %s not in the set' % str(k))
+        i = self._map[k]
+        up = self._up[i]
+        if up < 0:  # already on top or there is only one element
+            return
+        self._unlink(i)
+        self._link(i, self._up[up], up)
+
+    @inheritdoc(LinkedSet)
+    def move_down(self, k):
+        if k not in self._map:
+            raise KeyError('Item %s not in the set' % str(k))
+        i = self._map[k]
+        down = self._down[i]
+        if down < 0:  # already at the bottom or there is only one element
+            return
+        self._unlink(i)
+        self._link(i, down, self._down[down])
+
+    @inheritdoc(LinkedSet)
+    def move_to_top(self, k):
+        if k not in self._map:
+            raise KeyError('Item %s not in the set' % str(k))
+        i = self._map[k]
+        top = self._top
+        if i == top:
+            return
+        # Inlined _unlink and _link, as this is on the critical path. The
+        # item is not on top, hence there is an item above it
+        up_ = self._up
+        down_ = self._down
+        up = up_[i]
+        down = down_[i]
+        down_[up] = down
+        if down >= 0:
+            up_[down] = up
+        else:
+            self._bottom = up
+        up_[i] = -1
+        down_[i] = top
+        up_[top] = i
+        self._top = i
+
+    @inheritdoc(LinkedSet)
+    def move_to_bottom(self, k):
+        if k not in self._map:
+            raise KeyError('Item %s not in the set' % str(k))
+        i = self._map[k]
+        if i == self._bottom:
+            return
+        self._unlink(i)
+        self._link(i, self._bottom, -1)
+
+    @inheritdoc(LinkedSet)
+    def insert_above(self, i, k):
+        if k in self._map:
+            raise KeyError('Item %s already in the set' % str(k))
+        if i not in self._map:
+            raise KeyError('Item %s not in the set' % str(i))
+        j = self._map[i]
+        self._link(self._alloc(k), self._up[j], j)
+
+    @inheritdoc(LinkedSet)
+    def insert_below(self, i, k):
+        if k in self._map:
+            raise KeyError('Item %s already in the set' % str(k))
+        if i not in self._map:
+            raise KeyError('Item %s not in the set' % str(i))
+        j = self._map[i]
+        self._link(self._alloc(k), j, self._down[j])
+
+    @inheritdoc(LinkedSet)
+    def index(self, k):
+        if not k in self._map:
+            raise KeyError('The item %s is not in the set' % str(k))
+        target = self._map[k]
+        down = self._down
+        index = 0
+        i = self._top
+        while i != target:
+            i = down[i]
+            index += 1
+        return index
+
+    @inheritdoc(LinkedSet)
+    def remove(self, k):
+        if k not in self._map:
+            raise KeyError('Item %s not in the set' % str(k))
+        self._unlink(self._map[k])
+        self._release(k)
+
+    @inheritdoc(LinkedSet)
+    def clear(self):
+        self._init(len(self._val))
+
+    def __getstate__(self):
+        """Return the state of the set for pickling and copying
+
+        Returns
+        -------
+        state : tuple
+            The capacity of the set and its elements, from top to bottom
+        """
+        return len(self._val), list(self)
+
+    def __setstate__(self, state):
+        """Restore the state of the set
+
+        Parameters
+        ----------
+        state : tuple
+            The capacity of the set and its elements, from top to bottom
+        """
+        capacity, items = state
+        self._init(capacity)
+        for k in items:
+            self.append_bottom(k)
+
+
+def _key_list(keys):
+    """Return the items passed to a bulk cache operation as a sequence of
+    Python objects, converting numpy arrays to lists so that items are
+    stored as Python scalars
+    """
+    return keys.tolist() if isinstance(keys, np.ndarray) else keys
+
+
+def _linked_set(linked_set, capacity):
+    """Return an empty linked set of a given implementation
+
+    Parameters
+    ----------
+    linked_set : str
+        The implementation: 'NODE' for `LinkedSet` or 'ARRAY' for
+        `ArrayLinkedSet`
+    capacity : int
+        The expected maximum number of items of the set. Slots for at most
+        2^16 items are preallocated, further slots are allocated as needed
+
+    Returns
+    -------
+    linked_set : LinkedSet or ArrayLinkedSet
+        The linked set
+    """
+    if linked_set == 'NODE':
+        return LinkedSet()
+    elif linked_set == 'ARRAY':
+        return ArrayLinkedSet(capacity=min(capacity, 2 ** 16))
+    raise ValueError('linked_set must be either NODE or ARRAY')
+
 
 class Cache(object):
     """Base implementation of a cache object"""
 
+    # Subclasses not declaring __slots__ have a __dict__ anyway, while cache
+    # wrappers do not need one
+    __slots__ = ()
+
+    # Whether the replacement policy draws random numbers. Warm states of
+    # randomized caches are not checkpointed, because restoring them instead
+    # of simulating the warmup would alter the sequence of random numbers
+    randomized = False
+
     @abc.abstractmethod
     def __init__(self, maxlen, *args, **kwargs):
         """Constructor
@@ -529,6 +929,85 @@ class Cache(object):
                 }[op](k, *args, **kwargs)
         return res if res is not None else False
 
+    def has_many(self, keys):
+        """Check if several items are in the cache without changing the
+        internal state of the caching object.
+
+        Parameters
+        ----------
+        keys : iterable
+            The items looked up in the cache, e.g. a list or an array
+
+        Returns
+        -------
+        mask : array of bool
+            Array whose i-th element is *True* if the i-th item is in the cache
+            or *False* otherwise
+        """
+        has = self.has
+        return np.array([has(k) for k in _key_list(keys)], dtype=bool)
+
+    def get_many(self, keys, put_on_miss=False):
+        """Retrieve several items from the cache, one after the other.
+
+        This is equivalent to calling *get* for each item and, if
+        *put_on_miss* is *True*, *put* right after each call returning
+        *False*, but caches may implement it more efficiently.
+
+        Parameters
+        ----------
+        keys : iterable
+            The items looked up in the cache, e.g. a list or an array
+        put_on_miss : bool, optional
+            If *True*, items not in the cache are inserted, as a cache serving
+            a stream of requests does
+
+        Returns
+        -------
+        mask : array of bool
+            Array whose i-th element is *True* if the i-th item was in the
+            cache when looked up or *False* otherwise
+        """
+        get = self.get
+        if not put_on_miss:
+            return np.array([get(k) for k in _key_list(keys)], dtype=bool)
+        put = self.put
+        mask = []
+        for k in _key_list(keys):
+            hit = get(k)
+            if not hit:
+                put(k)
+            mask.append(hit)
+        return np.array(mask, dtype=bool)
+
+    def put_many(self, keys):
+        """Insert several items in the cache, one after the other.
+
+        This is equivalent to calling *put* for each item, but caches may
+        implement it more efficiently.
+
+        Parameters
+        ----------
+        keys : iterable
+            The items to be inserted, e.g. a list or an array
+
+        Returns
+        -------
+        evicted : list
+            The evicted objects, in order of eviction
+        """
+        put = self.put
+        evicted = []
+        for k in _key_list(keys):
+            e = put(k)
+            if e is not None:
+                if isinstance(e, list):
+                    # Size-aware caches may evict several items at once
+                    evicted.extend(e)
+                else:
+                    evicted.append(e)
+        return evicted
+
     @abc.abstractmethod
     def has(self, k, *args, **kwargs):
         """Check if an item is in the cache without changing the internal
@@ -758,17 +1237,75 @@ class BeladyMinCache(Cache):
         maxlen : int
             The maximum number of items the cache can store
         trace : iterable
-            Trace of requests that the cache will be subject to
+            Trace of requests that the cache will be subject to. Traces of
+            integers, preferably as numpy arrays, are processed fastest.
         """
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
             raise ValueError('maxlen must be positive')
-        self._next = defaultdict(deque)
-        for i, k in enumerate(trace):
-            self._next[k].append(i)
-        for k in self._next.values():
-            k.append(np.infty)
+        values, keys = self._encode(trace)
+        n = len(values)
+        dtype = np.int32 if n < np.iinfo(np.int32).max else np.int64
+        # Index of the next request of the item requested at each index of
+        # the trace, or n if it is not requested again. Indices of requests
+        # of the same item are consecutive once sorted by item.
+        order = np.argsort(values, kind='stable').astype(dtype)
+        sorted_values = values[order]
+        same = sorted_values[1:] == sorted_values[:-1]
+        self._next_use = np.full(n + 1, n, dtype=dtype)
+        self._next_use[order[:-1][same]] = order[1:][same]
+        # Index of the next request of each distinct item. Items are coded by
+        # their rank in the sorted distinct values
+        first = np.flatnonzero(np.concatenate(([True], ~same))) \
+                if n > 0 else np.array([], dtype=dtype)
+        self._pos = order[first]
+        if keys is None:
+            keys = sorted_values[first].tolist()
+        self._code = dict(zip(keys, range(len(keys))))
+        self._n = n
+        # Dict mapping items in cache to their code
         self._cache = {}
+        # Max-heap of (-index of next request, code, item) entries of items
+        # in cache. Entries are not removed when items are requested or
+        # evicted but are skipped if stale
+        self._heap = []
+
+    @staticmethod
+    def _encode(trace):
+        """Return an array of integers encoding the items of a trace and the
+        list of distinct items in increasing order of their encoding or
+        *None* if the items are integers encoding themselves
+        """
+        if not isinstance(trace, np.ndarray):
+            trace = list(trace)
+            try:
+                array = np.asarray(trace)
+            except ValueError:
+                array = None
+        else:
+            array = trace
+        if array is not None and array.ndim == 1 and array.dtype.kind in 'biu':
+            return array, None
+        code = {}
+        codes = np.fromiter((code.setdefault(k, len(code)) for k in trace),
+                            dtype=np.int64, count=len(trace))
+        return codes, list(code)
+
+    def _next_request(self, k):
+        """Return the index of the next request of an item"""
+        c = self._code.get(k)
+        return self._n if c is None else int(self._pos[c])
+
+    def _push(self, k):
+        """Push the index of the next request of an item in the heap"""
+        if len(self._heap) > 2 * len(self._cache) + 16:
+            # Drop stale entries to bound the memory used by the heap
+            self._heap = [(-self._next_request(x), c, x)
+                          for x, c in self._cache.items()]
+            heapq.heapify(self._heap)
+        else:
+            heapq.heappush(self._heap, (-self._next_request(k),
+                                        self._cache[k], k))
 
     @inheritdoc(Cache)
     def __len__(self):
@@ -789,18 +1326,34 @@ class BeladyMinCache(Cache):
 
     @inheritdoc(Cache)
     def get(self, k, *args, **kwargs):
-        self._next[k].popleft()
-        return k in self._cache
+        c = self._code.get(k)
+        if c is not None:
+            self._pos[c] = self._next_use[self._pos[c]]
+        if k in self._cache:
+            self._push(k)
+            return True
+        return False
 
     def put(self, k, *args, **kwargs):
+        if k in self._cache:
+            return None
         if len(self) < self.maxlen:
-            self._cache[k] = self._next[k]
+            self._cache[k] = self._code.get(k, -1)
+            self._push(k)
             return None
-        next_cache = max(self._cache, key=lambda k: self._cache[k][0])
-        if self._next[k][0] < self._next[next_cache][0]:
-            self._cache.pop(next_cache)
-            self._cache[k] = self._next[k]
-            return next_cache
+        # Drop stale entries from the top of the heap
+        while True:
+            next_evicted, _, evicted = self._heap[0]
+            if evicted in self._cache and \
+                    -next_evicted == self._next_request(evicted):
+                break
+            heapq.heappop(self._heap)
+        if self._next_request(k) < -next_evicted:
+            heapq.heappop(self._heap)
+            self._cache.pop(evicted)
+            self._cache[k] = self._code.get(k, -1)
+            self._push(k)
+            return evicted
         else:
             return None
 
@@ -814,6 +1367,7 @@ class BeladyMinCache(Cache):
     @inheritdoc(Cache)
     def clear(self):
         self._cache.clear()
+        self._heap = []
 
 
 @register_cache_policy('LRU')
@@ -831,12 +1385,21 @@ class LruCache(Cache):
     item is requested is not dependent on previous requests).
     """
 
-    @inheritdoc(Cache)
-    def __init__(self, maxlen, **kwargs):
-        self._cache = LinkedSet()
+    def __init__(self, maxlen, linked_set='NODE', **kwargs):
+        """Constructor
+
+        Parameters
+        ----------
+        maxlen : int
+            The maximum number of items the cache can store
+        linked_set : str, optional
+            The implementation of the list of items: 'NODE' for `LinkedSet`
+            or 'ARRAY' for `ArrayLinkedSet`, which is faster and more compact
+        """
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
             raise ValueError('maxlen must be positive')
+        self._cache = _linked_set(linked_set, self._maxlen + 1)
 
     @inheritdoc(Cache)
     def __len__(self):
@@ -910,6 +1473,72 @@ class LruCache(Cache):
         self._cache.append_top(k)
         return self._cache.pop_bottom() if len(self._cache) > self._maxlen else None
 
+    def victim(self, k, *args, **kwargs):
+        """Return the item that inserting an item not in the cache would
+        evict, without changing the content of the cache.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to be inserted
+
+        Returns
+        -------
+        victim : any hashable type
+            The item that would be evicted, which may be *k* itself if it
+            would not be retained, or *None* if no item would be evicted
+        """
+        return self._cache.bottom if len(self._cache) >= self._maxlen else None
+
+    @inheritdoc(Cache)
+    def has_many(self, keys):
+        cache = self._cache
+        return np.array([k in cache for k in _key_list(keys)], dtype=bool)
+
+    @inheritdoc(Cache)
+    def get_many(self, keys, put_on_miss=False):
+        cache = self._cache
+        move_to_top = cache.move_to_top
+        append_top = cache.append_top
+        pop_bottom = cache.pop_bottom
+        maxlen = self._maxlen
+        n = len(cache)
+        mask = []
+        hit = mask.append
+        for k in _key_list(keys):
+            if k in cache:
+                move_to_top(k)
+                hit(True)
+                continue
+            hit(False)
+            if put_on_miss:
+                append_top(k)
+                if n == maxlen:
+                    pop_bottom()
+                else:
+                    n += 1
+        return np.array(mask, dtype=bool)
+
+    @inheritdoc(Cache)
+    def put_many(self, keys):
+        cache = self._cache
+        move_to_top = cache.move_to_top
+        append_top = cache.append_top
+        pop_bottom = cache.pop_bottom
+        maxlen = self._maxlen
+        n = len(cache)
+        evicted = []
+        for k in _key_list(keys):
+            if k in cache:
+                move_to_top(k)
+                continue
+            append_top(k)
+            if n == maxlen:
+                evicted.append(pop_bottom())
+            else:
+                n += 1
+        return evicted
+
     @inheritdoc(Cache)
     def remove(self, k, *args, **kwargs):
         if k not in self._cache:
@@ -939,7 +1568,8 @@ class SegmentedLruCache(Cache):
     and recency of item reference.
     """
 
-    def __init__(self, maxlen, segments=2, alloc=None, *args, **kwargs):
+    def __init__(self, maxlen, segments=2, alloc=None, linked_set='NODE',
+                 *args, **kwargs):
         """Constructor
 
         Parameters
@@ -951,6 +1581,10 @@ class SegmentedLruCache(Cache):
         alloc : list
             List of floats, summing to 1. Indicates the fraction of overall
             caching space to be allocated to each segment.
+        linked_set : str, optional
+            The implementation of the lists of items of segments: 'NODE' for
+            `LinkedSet` or 'ARRAY' for `ArrayLinkedSet`, which is faster and
+            more compact
         """
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
@@ -965,7 +1599,8 @@ class SegmentedLruCache(Cache):
         else:
             alloc = [1 / segments for _ in range(segments)]
         self._segment_maxlen = apportionment(maxlen, alloc)
-        self._segment = [LinkedSet() for _ in range(segments)]
+        self._segment = [_linked_set(linked_set, n + 1)
+                         for n in self._segment_maxlen]
         # This map is a dictionary mapping each item in the cache with the
         # segment in which it is located. This is not strictly necessary to
         # locate an item as we could have used the map in each segment.
@@ -1042,6 +1677,13 @@ class SegmentedLruCache(Cache):
             self._cache.pop(evicted)
             return evicted
 
+    @inheritdoc(LruCache)
+    def victim(self, k, *args, **kwargs):
+        # New items are inserted in the bottom segment
+        segment = self._segment[-1]
+        return segment.bottom \
+               if len(segment) >= self._segment_maxlen[-1] else None
+
     @inheritdoc(Cache)
     def remove(self, k, *args, **kwargs):
         if k not in self._cache:
@@ -1102,15 +1744,21 @@ class InCacheLfuCache(Cache):
     policy in which a counter is maintained also when the content is evicted.
 
     In-cache LFU performs better than LRU under IRM demands.
-    However, its implementation is computationally expensive since it
-    cannot be implemented in such a way that both search and replacement tasks
-    can be executed in constant time. This makes it particularly unfit for
-    large caches and line speed operations.
+    However, it cannot be implemented in such a way that both search and
+    replacement tasks can be executed in constant time. In this
+    implementation, items are kept in a heap ordered by counter and, for
+    items with equal counters, by insertion time, so that replacement takes
+    logarithmic time.
     """
 
     @inheritdoc(Cache)
     def __init__(self, maxlen, *args, **kwargs):
+        # Dict mapping items in cache to their (counter, insertion time)
         self._cache = {}
+        # Heap of (counter, insertion time, item) entries. Entries are not
+        # removed when counters are increased but are skipped when popped if
+        # stale. Insertion times are unique, hence items are never compared
+        self._heap = []
         self.t = 0
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
@@ -1133,11 +1781,21 @@ class InCacheLfuCache(Cache):
     def has(self, k, *args, **kwargs):
         return k in self._cache
 
+    def _push(self, k, freq, t):
+        """Set the counter of an item in cache and push it in the heap"""
+        self._cache[k] = freq, t
+        if len(self._heap) > 2 * len(self._cache) + 16:
+            # Drop stale entries to bound the memory used by the heap
+            self._heap = [(f, t_, x) for x, (f, t_) in self._cache.items()]
+            heapq.heapify(self._heap)
+        else:
+            heapq.heappush(self._heap, (freq, t, k))
+
     @inheritdoc(Cache)
     def get(self, k, *args, **kwargs):
         if self.has(k):
             freq, t = self._cache[k]
-            self._cache[k] = freq + 1, t
+            self._push(k, freq + 1, t)
             return True
         else:
             return False
@@ -1146,13 +1804,51 @@ class InCacheLfuCache(Cache):
     def put(self, k, *args, **kwargs):
         if not self.has(k):
             self.t += 1
-            self._cache[k] = (1, self.t)
+            self._push(k, 1, self.t)
             if len(self._cache) > self._maxlen:
-                evicted = min(self._cache, key=lambda x: self._cache[x])
+                while True:
+                    freq, t, evicted = heapq.heappop(self._heap)
+                    if self._cache.get(evicted) == (freq, t):
+                        break
                 self._cache.pop(evicted)
                 return evicted
         return None
 
+    @inheritdoc(LruCache)
+    def victim(self, k, *args, **kwargs):
+        if len(self._cache) < self._maxlen:
+            return None
+        # Dropping stale entries does not change the order of eviction
+        heap = self._heap
+        while self._cache.get(heap[0][2]) != heap[0][:2]:
+            heapq.heappop(heap)
+        freq, _, victim = heap[0]
+        # The new item would have a counter of 1 and the latest insertion time
+        return victim if freq <= 1 else k
+
+    @inheritdoc(Cache)
+    def has_many(self, keys):
+        cache = self._cache
+        return np.array([k in cache for k in _key_list(keys)], dtype=bool)
+
+    @inheritdoc(Cache)
+    def get_many(self, keys, put_on_miss=False):
+        cache = self._cache
+        push = self._push
+        put = self.put
+        mask = []
+        hit = mask.append
+        for k in _key_list(keys):
+            entry = cache.get(k)
+            if entry is not None:
+                push(k, entry[0] + 1, entry[1])
+                hit(True)
+                continue
+            hit(False)
+            if put_on_miss:
+                put(k)
+        return np.array(mask, dtype=bool)
+
     @inheritdoc(Cache)
     def remove(self, k, *args, **kwargs):
         if k in self._cache:
@@ -1164,6 +1860,7 @@ class InCacheLfuCache(Cache):
     @inheritdoc(Cache)
     def clear(self):
         self._cache.clear()
+        self._heap = []
 
 
 
@@ -1181,10 +1878,12 @@ class PerfectLfuCache(Cache):
     counters for every item, even for those not in the cache.
 
     In contrast to LRU, Perfect-LFU has been shown to perform optimally under
-    IRM demands. However, its implementation is computationally expensive since
-    it cannot be implemented in such a way that both search and replacement
-    tasks can be executed in constant time. This makes it particularly unfit
-    for large caches and line speed operations.
+    IRM demands. However, it cannot be implemented in such a way that both
+    search and replacement tasks can be executed in constant time. In this
+    implementation, items in cache are kept in a heap ordered by counter and,
+    for items with equal counters, by time of first request, so that
+    replacement takes logarithmic time. Counters of all items requested are
+    kept in memory.
     """
 
     @inheritdoc(Cache)
@@ -1193,6 +1892,12 @@ class PerfectLfuCache(Cache):
         self._counter = {}
         # Set storing only items currently in cache
         self._cache = set()
+        # Heap of (counter, time of first request, sequence number, item)
+        # entries of items in cache. Entries are not removed when counters
+        # are increased or items evicted but are skipped when popped if
+        # stale. Sequence numbers are unique, hence items are never compared
+        self._heap = []
+        self._seq = 0
         self.t = 0
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
@@ -1215,6 +1920,18 @@ class PerfectLfuCache(Cache):
     def has(self, k, *args, **kwargs):
         return k in self._cache
 
+    def _push(self, k):
+        """Push the current counter of an item in cache in the heap"""
+        if len(self._heap) > 2 * len(self._cache) + 16:
+            # Drop stale entries to bound the memory used by the heap
+            self._heap = [self._counter[x] + (i, x)
+                          for i, x in enumerate(self._cache)]
+            self._seq = len(self._heap)
+            heapq.heapify(self._heap)
+        else:
+            self._seq += 1
+            heapq.heappush(self._heap, self._counter[k] + (self._seq, k))
+
     @inheritdoc(Cache)
     def get(self, k, *args, **kwargs):
         self.t += 1
@@ -1224,6 +1941,7 @@ class PerfectLfuCache(Cache):
         else:
             self._counter[k] = 1, self.t
         if self.has(k):
+            self._push(k)
             return True
         else:
             return False
@@ -1239,16 +1957,68 @@ class PerfectLfuCache(Cache):
                 # be executed
                 self._counter[k] = (1, self.t)
             self._cache.add(k)
+            self._push(k)
             if len(self._cache) > self._maxlen:
-                evicted = min(self._cache, key=lambda x: self._counter[x])
+                while True:
+                    freq, t, _, evicted = heapq.heappop(self._heap)
+                    if evicted in self._cache and \
+                            self._counter[evicted] == (freq, t):
+                        break
                 self._cache.remove(evicted)
                 return evicted
         return None
 
+    @inheritdoc(LruCache)
+    def victim(self, k, *args, **kwargs):
+        if len(self._cache) < self._maxlen:
+            return None
+        # Dropping stale entries does not change the order of eviction
+        heap = self._heap
+        while True:
+            freq, t, _, victim = heap[0]
+            if victim in self._cache and self._counter[victim] == (freq, t):
+                break
+            heapq.heappop(heap)
+        # The counter of the new item is incremented when inserted and its
+        # entry is the last pushed, hence it loses ties
+        entry = self._counter.get(k)
+        counter = (entry[0] + 1, entry[1]) if entry is not None else (1, self.t)
+        return victim if (freq, t) <= counter else k
+
+    @inheritdoc(Cache)
+    def has_many(self, keys):
+        cache = self._cache
+        return np.array([k in cache for k in _key_list(keys)], dtype=bool)
+
+    @inheritdoc(Cache)
+    def get_many(self, keys, put_on_miss=False):
+        cache = self._cache
+        counter = self._counter
+        push = self._push
+        put = self.put
+        t = self.t
+        mask = []
+        hit = mask.append
+        for k in _key_list(keys):
+            t += 1
+            entry = counter.get(k)
+            counter[k] = (entry[0] + 1, entry[1]) if entry is not None \
+                         else (1, t)
+            if k in cache:
+                push(k)
+                hit(True)
+                continue
+            hit(False)
+            if put_on_miss:
+                self.t = t
+                put(k)
+        self.t = t
+        return np.array(mask, dtype=bool)
+
     @inheritdoc(Cache)
     def remove(self, k, *args, **kwargs):
         if k in self._cache:
-            self._cache.pop(k)
+            self._cache.remove(k)
             return True
         else:
             return False
@@ -1257,6 +2027,8 @@ class PerfectLfuCache(Cache):
     def clear(self):
         self._cache.clear()
         self._counter.clear()
+        self._heap = []
+        self._seq = 0
 
 
 @register_cache_policy('FIFO')
@@ -1336,6 +2108,64 @@ class FifoCache(Cache):
             self._cache.remove(evicted)
         return evicted
 
+    @inheritdoc(LruCache)
+    def victim(self, k, *args, **kwargs):
+        return self._d[-1] if len(self._cache) >= self._maxlen else None
+
+    @inheritdoc(Cache)
+    def has_many(self, keys):
+        cache = self._cache
+        return np.array([k in cache for k in _key_list(keys)], dtype=bool)
+
+    @inheritdoc(Cache)
+    def get_many(self, keys, put_on_miss=False):
+        cache = self._cache
+        if not put_on_miss:
+            return np.array([k in cache for k in _key_list(keys)], dtype=bool)
+        add = cache.add
+        remove = cache.remove
+        appendleft = self._d.appendleft
+        pop = self._d.pop
+        maxlen = self._maxlen
+        n = len(cache)
+        mask = []
+        hit = mask.append
+        for k in _key_list(keys):
+            if k in cache:
+                hit(True)
+                continue
+            hit(False)
+            add(k)
+            appendleft(k)
+            if n == maxlen:
+                remove(pop())
+            else:
+                n += 1
+        return np.array(mask, dtype=bool)
+
+    @inheritdoc(Cache)
+    def put_many(self, keys):
+        cache = self._cache
+        add = cache.add
+        remove = cache.remove
+        appendleft = self._d.appendleft
+        pop = self._d.pop
+        maxlen = self._maxlen
+        n = len(cache)
+        evicted = []
+        for k in _key_list(keys):
+            if k in cache:
+                continue
+            add(k)
+            appendleft(k)
+            if n == maxlen:
+                e = pop()
+                remove(e)
+                evicted.append(e)
+            else:
+                n += 1
+        return evicted
+
     @inheritdoc(Cache)
     def remove(self, k, *args, **kwargs):
         if k in self._cache:
@@ -1361,12 +2191,21 @@ class ClimbCache(Cache):
     at the bottom of the list.
     """
 
-    @inheritdoc(Cache)
-    def __init__(self, maxlen, *args, **kwargs):
-        self._cache = LinkedSet()
+    def __init__(self, maxlen, linked_set='NODE', *args, **kwargs):
+        """Constructor
+
+        Parameters
+        ----------
+        maxlen : int
+            The maximum number of items the cache can store
+        linked_set : str, optional
+            The implementation of the list of items: 'NODE' for `LinkedSet`
+            or 'ARRAY' for `ArrayLinkedSet`, which is faster and more compact
+        """
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
             raise ValueError('maxlen must be positive')
+        self._cache = _linked_set(linked_set, self._maxlen)
 
     @inheritdoc(Cache)
     def __len__(self):
@@ -1448,6 +2287,10 @@ class ClimbCache(Cache):
         self._cache.append_bottom(k)
         return evicted
 
+    @inheritdoc(LruCache)
+    def victim(self, k, *args, **kwargs):
+        return self._cache.bottom if len(self._cache) == self._maxlen else None
+
     @inheritdoc(Cache)
     def remove(self, k, *args, **kwargs):
         if k not in self._cache:
@@ -1473,6 +2316,8 @@ class RandEvictionCache(Cache):
     achieves the same cache hit ratio of the FIFO replacement policy.
     """
 
+    randomized = True
+
     @inheritdoc(Cache)
     def __init__(self, maxlen, *args, **kwargs):
         self._maxlen = int(maxlen)
@@ -1480,6 +2325,8 @@ class RandEvictionCache(Cache):
             raise ValueError('maxlen must be positive')
         self._cache = set()
         self._a = [None for _ in range(self._maxlen)]
+        # Index of the next item to evict, if drawn in advance by victim
+        self._victim_index = None
 
     @inheritdoc(Cache)
     def __len__(self):
@@ -1503,188 +2350,2312 @@ class RandEvictionCache(Cache):
 
     @inheritdoc(Cache)
     def put(self, k, *args, **kwargs):
-        evicted = None
-        if not self.has(k):
-            if len(self._cache) == self._maxlen:
-                evicted_index = random.randint(0, self.maxlen - 1)
-                evicted = self._a[evicted_index]
-                self._a[evicted_index] = k
-                self._cache.remove(evicted)
+        return self._insert(k) if k not in self._cache else None
+
+    def victim(self, k, *args, **kwargs):
+        """Return the item that inserting an item not in the cache would
+        evict, without changing the content of the cache.
+
+        The item is drawn at random the first time this method is called
+        after an insertion and is then evicted by the next insertion, unless
+        an item is removed in the meantime.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to be inserted
+
+        Returns
+        -------
+        victim : any hashable type
+            The item that would be evicted or *None* if no item would be
+            evicted
+        """
+        if len(self._cache) < self._maxlen:
+            return None
+        if self._victim_index is None:
+            self._victim_index = random.randint(0, self._maxlen - 1)
+        return self._a[self._victim_index]
+
+    @inheritdoc(Cache)
+    def has_many(self, keys):
+        cache = self._cache
+        return np.array([k in cache for k in _key_list(keys)], dtype=bool)
+
+    @inheritdoc(Cache)
+    def get_many(self, keys, put_on_miss=False):
+        cache = self._cache
+        if not put_on_miss:
+            return np.array([k in cache for k in _key_list(keys)], dtype=bool)
+        mask = []
+        for k in _key_list(keys):
+            hit = k in cache
+            if not hit:
+                self._insert(k)
+            mask.append(hit)
+        return np.array(mask, dtype=bool)
+
+    def _insert(self, k):
+        """Insert an item not in the cache and return the evicted item, if
+        any
+        """
+        cache = self._cache
+        evicted = None
+        if len(cache) == self._maxlen:
+            evicted_index = self._victim_index
+            if evicted_index is None:
+                evicted_index = random.randint(0, self._maxlen - 1)
+            else:
+                self._victim_index = None
+            evicted = self._a[evicted_index]
+            self._a[evicted_index] = k
+            cache.remove(evicted)
+        else:
+            self._a[len(cache)] = k
+        cache.add(k)
+        return evicted
+
+    @inheritdoc(Cache)
+    def put_many(self, keys):
+        cache = self._cache
+        evicted = []
+        for k in _key_list(keys):
+            if k not in cache:
+                e = self._insert(k)
+                if e is not None:
+                    evicted.append(e)
+        return evicted
+
+    @inheritdoc(Cache)
+    def remove(self, k, *args, **kwargs):
+        if k not in self._cache:
+            return False
+        index = self._a.index(k)
+        self._a[index] = self._a[len(self._cache) - 1]
+        self._a[len(self._cache) - 1] = None
+        self._cache.remove(k)
+        self._victim_index = None
+        return True
+
+    @inheritdoc(Cache)
+    def clear(self):
+        self._cache.clear()
+        self._victim_index = None
+
+
+@register_cache_policy('ARC')
+class ArcCache(Cache):
+    """Adaptive Replacement Cache (ARC) eviction policy [1]_.
+
+    The cache is split in two LRU lists: T1, storing items requested once
+    since they were inserted, and T2, storing items requested at least twice.
+    The keys of items recently evicted from T1 and T2 are kept in two ghost
+    LRU lists, B1 and B2. The target size of T1 adapts to the workload: it
+    grows when an item of B1 is inserted again, because T1 was too small to
+    keep it, and shrinks when an item of B2 is inserted again. This makes ARC
+    resistant to scans while adapting between recency and frequency.
+
+    All operations take O(1) time.
+
+    References
+    ----------
+    .. [1] N. Megiddo and D. Modha, ARC: A Self-Tuning, Low Overhead
+           Replacement Cache, in Proc. of USENIX FAST'03
+    """
+
+    @inheritdoc(Cache)
+    def __init__(self, maxlen, *args, **kwargs):
+        self._maxlen = int(maxlen)
+        if self._maxlen <= 0:
+            raise ValueError('maxlen must be positive')
+        self._t1 = LinkedSet()
+        self._t2 = LinkedSet()
+        self._b1 = LinkedSet()
+        self._b2 = LinkedSet()
+        # Target size of T1
+        self._p = 0
+
+    @inheritdoc(Cache)
+    def __len__(self):
+        return len(self._t1) + len(self._t2)
+
+    @property
+    @inheritdoc(Cache)
+    def maxlen(self):
+        return self._maxlen
+
+    def dump(self):
+        """Return a dump of all the elements currently in the cache, i.e.
+        items of T2 followed by items of T1, both from the most to the least
+        recently used.
+
+        Returns
+        -------
+        cache_dump : list
+            The list of all items currently stored in the cache
+        """
+        return list(self._t2) + list(self._t1)
+
+    @inheritdoc(Cache)
+    def has(self, k, *args, **kwargs):
+        return k in self._t1 or k in self._t2
+
+    @inheritdoc(Cache)
+    def get(self, k, *args, **kwargs):
+        if k in self._t1:
+            self._t1.remove(k)
+            self._t2.append_top(k)
+            return True
+        if k in self._t2:
+            self._t2.move_to_top(k)
+            return True
+        return False
+
+    def _replace_t1(self, in_b2, p):
+        """Return whether the next item to evict is the least recently used
+        item of T1, rather than T2, given the target size of T1
+        """
+        n_t1 = len(self._t1)
+        return n_t1 > 0 and (n_t1 > p or (in_b2 and n_t1 == p)
+                             or len(self._t2) == 0)
+
+    def _adapted_p(self, k):
+        """Return the target size of T1 after inserting an item not in the
+        cache
+        """
+        if k in self._b1:
+            return min(self._maxlen,
+                       self._p + max(len(self._b2) / len(self._b1), 1))
+        if k in self._b2:
+            return max(0, self._p - max(len(self._b1) / len(self._b2), 1))
+        return self._p
+
+    def _replace(self, in_b2):
+        """Evict the least recently used item of T1 or T2, depending on the
+        target size of T1, and record it in the corresponding ghost list
+        """
+        if self._replace_t1(in_b2, self._p):
+            evicted = self._t1.pop_bottom()
+            self._b1.append_top(evicted)
+        else:
+            evicted = self._t2.pop_bottom()
+            self._b2.append_top(evicted)
+        return evicted
+
+    def put(self, k, *args, **kwargs):
+        """Insert an item in the cache if not already inserted.
+
+        If the element is already present in the cache, it is treated as a
+        hit.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to be inserted
+
+        Returns
+        -------
+        evicted : any hashable type
+            The evicted object or *None* if no contents were evicted.
+        """
+        if self.get(k):
+            return None
+        c = self._maxlen
+        full = len(self) >= c
+        evicted = None
+        if k in self._b1:
+            self._p = self._adapted_p(k)
+            self._b1.remove(k)
+            if full:
+                evicted = self._replace(False)
+            self._t2.append_top(k)
+        elif k in self._b2:
+            self._p = self._adapted_p(k)
+            self._b2.remove(k)
+            if full:
+                evicted = self._replace(True)
+            self._t2.append_top(k)
+        else:
+            n_l1 = len(self._t1) + len(self._b1)
+            if n_l1 >= c:
+                if len(self._b1) > 0:
+                    self._b1.pop_bottom()
+                    if full:
+                        evicted = self._replace(False)
+                else:
+                    evicted = self._t1.pop_bottom()
+            elif n_l1 + len(self._t2) + len(self._b2) >= c:
+                if n_l1 + len(self._t2) + len(self._b2) >= 2 * c:
+                    self._b2.pop_bottom()
+                if full:
+                    evicted = self._replace(False)
+            self._t1.append_top(k)
+        return evicted
+
+    @inheritdoc(LruCache)
+    def victim(self, k, *args, **kwargs):
+        if len(self) < self._maxlen:
+            return None
+        if k not in self._b1 and k not in self._b2 and \
+                len(self._b1) == 0 and len(self._t1) >= self._maxlen:
+            return self._t1.bottom
+        return self._t1.bottom \
+               if self._replace_t1(k in self._b2, self._adapted_p(k)) \
+               else self._t2.bottom
+
+    @inheritdoc(Cache)
+    def remove(self, k, *args, **kwargs):
+        for l in (self._t1, self._t2):
+            if k in l:
+                l.remove(k)
+                return True
+        return False
+
+    @inheritdoc(Cache)
+    def clear(self):
+        for l in (self._t1, self._t2, self._b1, self._b2):
+            l.clear()
+        self._p = 0
+
+
+@register_cache_policy('LIRS')
+class LirsCache(Cache):
+    """Low Inter-reference Recency Set (LIRS) eviction policy [1]_.
+
+    Items are classified according to their inter-reference recency, i.e. the
+    number of distinct items requested between their last two requests. Most
+    of the cache is reserved to items with low inter-reference recency (LIR),
+    while a small portion stores items with high inter-reference recency
+    (HIR), which are the only ones that can be evicted. Recency is tracked by
+    a stack storing LIR items and both resident and non-resident HIR items,
+    whose bottom is always the least recently used LIR item. A HIR item
+    requested while in the stack has a lower recency than that LIR item, so
+    it becomes LIR and the LIR item becomes HIR. This makes LIRS resistant to
+    scans and loops larger than the cache.
+
+    The number of non-resident HIR items kept in the stack is bounded by the
+    size of the cache, so that memory is bounded. All operations take O(1)
+    amortized time.
+
+    References
+    ----------
+    .. [1] S. Jiang and X. Zhang, LIRS: An Efficient Low Inter-reference
+           Recency Set Replacement Policy to Improve Buffer Cache Performance,
+           in Proc. of ACM SIGMETRICS'02
+    """
+
+    _LIR = 0
+    _HIR = 1
+    _NON_RESIDENT = 2
+
+    def __init__(self, maxlen, hir_ratio=0.01, *args, **kwargs):
+        """Constructor
+
+        Parameters
+        ----------
+        maxlen : int
+            The maximum number of items the cache can store
+        hir_ratio : float, optional
+            The fraction of the cache reserved to HIR items. At least one item
+            is reserved to them, unless the cache has size 1.
+        """
+        self._maxlen = int(maxlen)
+        if self._maxlen <= 0:
+            raise ValueError('maxlen must be positive')
+        if not 0 <= hir_ratio < 1:
+            raise ValueError('hir_ratio must be in [0, 1)')
+        n_hir = min(self._maxlen - 1, max(1, int(round(hir_ratio * maxlen))))
+        self._lir_maxlen = self._maxlen - n_hir
+        # Status of items in the stack or in the queue
+        self._status = {}
+        self._n_lir = 0
+        # Stack of recency, with the most recently used item at the top
+        self._stack = LinkedSet()
+        # Queue of resident HIR items, with the next to evict at the bottom
+        self._queue = LinkedSet()
+        # Non-resident HIR items of the stack, from newest to oldest
+        self._non_resident = LinkedSet()
+
+    @inheritdoc(Cache)
+    def __len__(self):
+        return self._n_lir + len(self._queue)
+
+    @property
+    @inheritdoc(Cache)
+    def maxlen(self):
+        return self._maxlen
+
+    def dump(self):
+        """Return a dump of all the elements currently in the cache, i.e.
+        LIR items from the most to the least recently used followed by HIR
+        items from the last to the next to be evicted.
+
+        Returns
+        -------
+        cache_dump : list
+            The list of all items currently stored in the cache
+        """
+        return [k for k in self._stack if self._status[k] == self._LIR] + \
+               list(self._queue)
+
+    @inheritdoc(Cache)
+    def has(self, k, *args, **kwargs):
+        return self._status.get(k, self._NON_RESIDENT) != self._NON_RESIDENT
+
+    def _prune(self):
+        """Remove HIR items from the bottom of the stack until the bottom is
+        a LIR item
+        """
+        stack = self._stack
+        while len(stack) > 0 and self._status[stack.bottom] != self._LIR:
+            k = stack.pop_bottom()
+            if self._status[k] == self._NON_RESIDENT:
+                self._non_resident.remove(k)
+                del self._status[k]
+
+    def _make_lir(self, k):
+        """Make an item of the top of the stack LIR and, if there are too many
+        LIR items, demote the bottom one to HIR
+        """
+        self._status[k] = self._LIR
+        self._n_lir += 1
+        if self._n_lir > self._lir_maxlen:
+            self._demote()
+
+    def _demote(self):
+        """Make the LIR item at the bottom of the stack a resident HIR item"""
+        # HIR items are at the bottom of the stack if they were requested
+        # while there were no LIR items, which happens after removals
+        self._prune()
+        k = self._stack.pop_bottom()
+        self._status[k] = self._HIR
+        self._n_lir -= 1
+        self._queue.append_top(k)
+        self._prune()
+
+    @inheritdoc(Cache)
+    def get(self, k, *args, **kwargs):
+        status = self._status.get(k, self._NON_RESIDENT)
+        if status == self._NON_RESIDENT:
+            return False
+        if status == self._LIR:
+            bottom = self._stack.bottom == k
+            self._stack.move_to_top(k)
+            if bottom:
+                self._prune()
+        elif k in self._stack:
+            # The recency of the item is lower than that of the LIR item at
+            # the bottom of the stack
+            self._stack.move_to_top(k)
+            self._queue.remove(k)
+            self._make_lir(k)
+        else:
+            self._stack.append_top(k)
+            self._queue.move_to_top(k)
+        return True
+
+    def put(self, k, *args, **kwargs):
+        """Insert an item in the cache if not already inserted.
+
+        If the element is already present in the cache, it is treated as a
+        hit.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to be inserted
+
+        Returns
+        -------
+        evicted : any hashable type
+            The evicted object or *None* if no contents were evicted.
+        """
+        if self.get(k):
+            return None
+        evicted = None
+        if len(self) >= self._maxlen:
+            if len(self._queue) == 0:
+                # All resident items are LIR, which happens after removals
+                self._demote()
+            evicted = self._queue.pop_bottom()
+            if evicted in self._stack:
+                self._status[evicted] = self._NON_RESIDENT
+                self._non_resident.append_top(evicted)
+                if len(self._non_resident) > self._maxlen:
+                    oldest = self._non_resident.pop_bottom()
+                    self._stack.remove(oldest)
+                    del self._status[oldest]
+            else:
+                del self._status[evicted]
+        if k in self._stack:
+            # A non-resident HIR item whose recency is lower than that of the
+            # LIR item at the bottom of the stack
+            self._non_resident.remove(k)
+            self._stack.move_to_top(k)
+            self._make_lir(k)
+        elif self._n_lir < self._lir_maxlen:
+            self._stack.append_top(k)
+            self._make_lir(k)
+        else:
+            self._status[k] = self._HIR
+            self._stack.append_top(k)
+            self._queue.append_top(k)
+        return evicted
+
+    @inheritdoc(LruCache)
+    def victim(self, k, *args, **kwargs):
+        if len(self) < self._maxlen:
+            return None
+        if len(self._queue) > 0:
+            return self._queue.bottom
+        # All resident items are LIR, hence the bottom one would be demoted
+        # and evicted
+        for x in reversed(self._stack):
+            if self._status[x] == self._LIR:
+                return x
+
+    @inheritdoc(Cache)
+    def remove(self, k, *args, **kwargs):
+        status = self._status.get(k, self._NON_RESIDENT)
+        if status == self._NON_RESIDENT:
+            return False
+        del self._status[k]
+        if status == self._LIR:
+            self._n_lir -= 1
+        else:
+            self._queue.remove(k)
+        if k in self._stack:
+            self._stack.remove(k)
+            self._prune()
+        return True
+
+    @inheritdoc(Cache)
+    def clear(self):
+        self._status.clear()
+        self._n_lir = 0
+        self._stack.clear()
+        self._queue.clear()
+        self._non_resident.clear()
+
+
+@register_cache_policy('S3_FIFO')
+class S3FifoCache(Cache):
+    """S3-FIFO eviction policy [1]_.
+
+    Items are inserted in a small FIFO queue, taking a fraction of the cache,
+    unless they were recently evicted from the main FIFO queue, taking the
+    rest of the cache, in which case they are inserted in the main queue.
+    Items evicted from the small queue are moved to the main queue if they
+    were requested while in the small queue, otherwise they are evicted and
+    their key is recorded in a ghost FIFO queue as large as the main queue.
+    Items reaching the tail of the main queue are reinserted at its head if
+    they were requested since their last reinsertion.
+
+    Requests only increment a counter of the item, capped at 3, without
+    moving it, hence hits take O(1) time and insertions O(1) amortized time.
+    Most items requested only once are quickly evicted from the small queue,
+    which makes S3-FIFO resistant to scans.
+
+    References
+    ----------
+    .. [1] J. Yang, Y. Zhang, Z. Qiu, Y. Yue and R. Vinayak, FIFO queues are
+           all you need for cache eviction, in Proc. of ACM SOSP'23
+    """
+
+    def __init__(self, maxlen, small_ratio=0.1, *args, **kwargs):
+        """Constructor
+
+        Parameters
+        ----------
+        maxlen : int
+            The maximum number of items the cache can store
+        small_ratio : float, optional
+            The fraction of the cache taken by the small queue. It takes at
+            least one item.
+        """
+        self._maxlen = int(maxlen)
+        if self._maxlen <= 0:
+            raise ValueError('maxlen must be positive')
+        if not 0 < small_ratio < 1:
+            raise ValueError('small_ratio must be in (0, 1)')
+        self._small_maxlen = max(1, int(round(small_ratio * self._maxlen)))
+        self._main_maxlen = self._maxlen - self._small_maxlen
+        # Access counter of each item in the cache
+        self._freq = {}
+        # Queues whose head is the top and tail is the bottom
+        self._small = LinkedSet()
+        self._main = LinkedSet()
+        self._ghost = LinkedSet()
+
+    @inheritdoc(Cache)
+    def __len__(self):
+        return len(self._freq)
+
+    @property
+    @inheritdoc(Cache)
+    def maxlen(self):
+        return self._maxlen
+
+    def dump(self):
+        """Return a dump of all the elements currently in the cache, i.e.
+        items of the main queue followed by those of the small queue, both
+        from head to tail.
+
+        Returns
+        -------
+        cache_dump : list
+            The list of all items currently stored in the cache
+        """
+        return list(self._main) + list(self._small)
+
+    @inheritdoc(Cache)
+    def has(self, k, *args, **kwargs):
+        return k in self._freq
+
+    @inheritdoc(Cache)
+    def get(self, k, *args, **kwargs):
+        freq = self._freq.get(k)
+        if freq is None:
+            return False
+        if freq < 3:
+            self._freq[k] = freq + 1
+        return True
+
+    def _evict_main(self):
+        """Evict an item from the main queue, reinserting items requested
+        since they were last inserted
+        """
+        main = self._main
+        while True:
+            k = main.pop_bottom()
+            freq = self._freq[k]
+            if freq == 0:
+                del self._freq[k]
+                return k
+            self._freq[k] = freq - 1
+            main.append_top(k)
+
+    def _evict_small(self):
+        """Evict an item from the small queue, moving items requested while in
+        it to the main queue, or from the main queue if all items of the small
+        queue are moved
+        """
+        small = self._small
+        while len(small) > 0:
+            k = small.pop_bottom()
+            if self._freq[k] > 0:
+                self._freq[k] = 0
+                self._main.append_top(k)
+                if len(self._main) > self._main_maxlen:
+                    return self._evict_main()
+            else:
+                del self._freq[k]
+                self._ghost.append_top(k)
+                if len(self._ghost) > self._main_maxlen:
+                    self._ghost.pop_bottom()
+                return k
+        return self._evict_main()
+
+    def put(self, k, *args, **kwargs):
+        """Insert an item in the cache if not already inserted.
+
+        If the element is already present in the cache, it is treated as a
+        hit.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to be inserted
+
+        Returns
+        -------
+        evicted : any hashable type
+            The evicted object or *None* if no contents were evicted.
+        """
+        if self.get(k):
+            return None
+        evicted = None
+        if len(self._freq) >= self._maxlen:
+            if len(self._small) >= self._small_maxlen or len(self._main) == 0:
+                evicted = self._evict_small()
+            else:
+                evicted = self._evict_main()
+        self._freq[k] = 0
+        if k in self._ghost:
+            self._ghost.remove(k)
+            self._main.append_top(k)
+        else:
+            self._small.append_top(k)
+        return evicted
+
+    def _main_victim(self, moved):
+        """Return the item that would be evicted from the main queue after
+        moving to it the given items of the small queue
+        """
+        # The main queue is scanned from the tail, decrementing counters, so
+        # the first item with the lowest counter is evicted
+        victim = None
+        min_freq = None
+        for x in reversed(self._main):
+            freq = self._freq[x]
+            if freq == 0:
+                return x
+            if victim is None or freq < min_freq:
+                victim, min_freq = x, freq
+        # Moved items are appended with a null counter
+        return moved[0] if moved else victim
+
+    @inheritdoc(LruCache)
+    def victim(self, k, *args, **kwargs):
+        if len(self._freq) < self._maxlen:
+            return None
+        moved = []
+        if len(self._small) >= self._small_maxlen or len(self._main) == 0:
+            for x in reversed(self._small):
+                if self._freq[x] == 0:
+                    return x
+                moved.append(x)
+                if len(self._main) + len(moved) > self._main_maxlen:
+                    break
+        return self._main_victim(moved)
+
+    @inheritdoc(Cache)
+    def remove(self, k, *args, **kwargs):
+        if k not in self._freq:
+            return False
+        del self._freq[k]
+        if k in self._small:
+            self._small.remove(k)
+        else:
+            self._main.remove(k)
+        return True
+
+    @inheritdoc(Cache)
+    def clear(self):
+        self._freq.clear()
+        self._small.clear()
+        self._main.clear()
+        self._ghost.clear()
+
+
+class _ClockProEntry(object):
+    """Entry of the clock of CLOCK-Pro"""
+
+    __slots__ = ('key', 'kind', 'ref', 'test', 'prev', 'next')
+
+    def __init__(self, key, kind):
+        self.key = key
+        self.kind = kind
+        self.ref = False
+        self.test = False
+        self.prev = self
+        self.next = self
+
+
+@register_cache_policy('CLOCK_PRO')
+class ClockProCache(Cache):
+    """CLOCK-Pro eviction policy [1]_.
+
+    CLOCK-Pro approximates LIRS with a single clock, i.e. a circular list, of
+    hot items, cold resident items and cold non-resident items, each with a
+    reference bit set by requests. Inserted items are cold and in their test
+    period. Three hands sweep the clock:
+
+     * the cold hand evicts cold items not referenced since they were last
+       moved, keeping those in their test period as non-resident items, and
+       promotes referenced items in their test period to hot;
+     * the hot hand demotes hot items not referenced since its last pass to
+       cold and terminates the test period of the cold items it passes;
+     * the test hand terminates the test period of cold items, and in
+       particular removes non-resident items, to keep at most as many
+       non-resident items as the cache size.
+
+    A non-resident item inserted again during its test period is inserted as
+    hot. The number of resident cold items adapts to the workload, growing
+    when non-resident items are inserted again and shrinking when their test
+    period terminates.
+
+    Requests only set the reference bit of the item, hence hits take O(1)
+    time and insertions O(1) amortized time.
+
+    References
+    ----------
+    .. [1] S. Jiang, F. Chen and X. Zhang, CLOCK-Pro: An Effective
+           Improvement of the CLOCK Replacement, in Proc. of USENIX ATC'05
+    """
+
+    _HOT = 0
+    _COLD = 1
+    _NON_RESIDENT = 2
+
+    @inheritdoc(Cache)
+    def __init__(self, maxlen, *args, **kwargs):
+        self._maxlen = int(maxlen)
+        if self._maxlen <= 0:
+            raise ValueError('maxlen must be positive')
+        self._init()
+
+    def _init(self):
+        """Reset the state of the cache"""
+        self._entries = {}
+        # Items are inserted behind the hot hand, i.e. at the head of the list
+        self._hand_hot = self._hand_cold = self._hand_test = None
+        self._n_hot = 0
+        self._n_cold = 0
+        self._n_non_resident = 0
+        # Target number of resident cold items
+        self._cold_maxlen = self._maxlen
+
+    @inheritdoc(Cache)
+    def __len__(self):
+        return self._n_hot + self._n_cold
+
+    @property
+    @inheritdoc(Cache)
+    def maxlen(self):
+        return self._maxlen
+
+    def dump(self):
+        """Return a dump of all the elements currently in the cache, in the
+        order of the clock starting from the hot hand.
+
+        Returns
+        -------
+        cache_dump : list
+            The list of all items currently stored in the cache
+        """
+        dump = []
+        entry = self._hand_hot
+        for _ in range(len(self._entries)):
+            if entry.kind != self._NON_RESIDENT:
+                dump.append(entry.key)
+            entry = entry.next
+        return dump
+
+    @inheritdoc(Cache)
+    def has(self, k, *args, **kwargs):
+        entry = self._entries.get(k)
+        return entry is not None and entry.kind != self._NON_RESIDENT
+
+    @inheritdoc(Cache)
+    def get(self, k, *args, **kwargs):
+        entry = self._entries.get(k)
+        if entry is None or entry.kind == self._NON_RESIDENT:
+            return False
+        entry.ref = True
+        return True
+
+    def _unlink(self, entry):
+        """Remove an entry from the clock, moving hands pointing to it to the
+        next entry
+        """
+        if entry.next is entry:
+            self._hand_hot = self._hand_cold = self._hand_test = None
+            return
+        if self._hand_hot is entry:
+            self._hand_hot = entry.next
+        if self._hand_cold is entry:
+            self._hand_cold = entry.next
+        if self._hand_test is entry:
+            self._hand_test = entry.next
+        entry.prev.next = entry.next
+        entry.next.prev = entry.prev
+
+    def _link_head(self, entry):
+        """Insert an entry at the head of the list, i.e. behind the hot hand"""
+        head = self._hand_hot
+        if head is None:
+            entry.prev = entry.next = entry
+            self._hand_hot = self._hand_cold = self._hand_test = entry
+        else:
+            entry.prev = head.prev
+            entry.next = head
+            head.prev.next = entry
+            head.prev = entry
+
+    def _terminate_test(self, entry):
+        """Terminate the test period of a cold item, removing it if it is not
+        resident
+        """
+        entry.test = False
+        if entry.kind == self._NON_RESIDENT:
+            self._unlink(entry)
+            del self._entries[entry.key]
+            self._n_non_resident -= 1
+            if self._cold_maxlen > 1:
+                self._cold_maxlen -= 1
+
+    def _run_hand_hot(self):
+        """Move the hot hand until it demotes a hot item to cold"""
+        while True:
+            entry = self._hand_hot
+            self._hand_hot = entry.next
+            if entry.kind == self._HOT:
+                if entry.ref:
+                    entry.ref = False
+                else:
+                    entry.kind = self._COLD
+                    self._n_hot -= 1
+                    self._n_cold += 1
+                    return
+            elif entry.test:
+                self._terminate_test(entry)
+
+    def _run_hand_test(self):
+        """Move the test hand until it removes a non-resident item"""
+        while True:
+            entry = self._hand_test
+            self._hand_test = entry.next
+            if entry.test:
+                non_resident = entry.kind == self._NON_RESIDENT
+                self._terminate_test(entry)
+                if non_resident:
+                    return
+
+    def _run_hand_cold(self):
+        """Move the cold hand until it evicts a resident cold item"""
+        while True:
+            if self._n_cold == 0:
+                self._run_hand_hot()
+            entry = self._hand_cold
+            if entry.kind != self._COLD:
+                self._hand_cold = entry.next
+            elif not entry.ref:
+                self._hand_cold = entry.next
+                self._n_cold -= 1
+                if entry.test:
+                    entry.kind = self._NON_RESIDENT
+                    self._n_non_resident += 1
+                    if self._n_non_resident > self._maxlen:
+                        self._run_hand_test()
+                else:
+                    self._unlink(entry)
+                    del self._entries[entry.key]
+                return entry.key
+            else:
+                entry.ref = False
+                if entry.test:
+                    # Referenced during its test period
+                    entry.kind = self._HOT
+                    entry.test = False
+                    self._n_cold -= 1
+                    self._n_hot += 1
+                else:
+                    entry.test = True
+                self._unlink(entry)
+                self._link_head(entry)
+
+    def put(self, k, *args, **kwargs):
+        """Insert an item in the cache if not already inserted.
+
+        If the element is already present in the cache, it is treated as a
+        hit.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to be inserted
+
+        Returns
+        -------
+        evicted : any hashable type
+            The evicted object or *None* if no contents were evicted.
+        """
+        if self.get(k):
+            return None
+        evicted = None
+        if len(self) >= self._maxlen:
+            evicted = self._run_hand_cold()
+        # Look the item up after eviction, which may terminate its test period
+        entry = self._entries.get(k)
+        if entry is None:
+            entry = _ClockProEntry(k, self._COLD)
+            entry.test = True
+            self._entries[k] = entry
+            self._n_cold += 1
+        else:
+            # Non-resident item inserted again during its test period
+            if self._cold_maxlen < self._maxlen:
+                self._cold_maxlen += 1
+            self._unlink(entry)
+            self._n_non_resident -= 1
+            entry.kind = self._HOT
+            entry.test = False
+            self._n_hot += 1
+        self._link_head(entry)
+        while self._n_hot > self._maxlen - self._cold_maxlen:
+            self._run_hand_hot()
+        return evicted
+
+    @inheritdoc(Cache)
+    def remove(self, k, *args, **kwargs):
+        entry = self._entries.get(k)
+        if entry is None or entry.kind == self._NON_RESIDENT:
+            return False
+        if entry.kind == self._HOT:
+            self._n_hot -= 1
+        else:
+            self._n_cold -= 1
+        self._unlink(entry)
+        del self._entries[k]
+        return True
+
+    @inheritdoc(Cache)
+    def clear(self):
+        self._init()
+
+
+class CountMinSketch(object):
+    """Count-min sketch estimating the frequency of items in constant memory.
+
+    Frequencies are stored in *depth* rows of *width* small counters, each
+    row being indexed by a different hash function. The frequency of an item
+    is estimated as the minimum of its counters, which is never lower than
+    its actual frequency, unless counters are saturated or halved. Counters
+    are incremented with conservative update, i.e. only the counters equal to
+    the minimum are incremented, which reduces overestimation.
+    """
+
+    # Translation table halving all bytes
+    _HALVE = bytes(bytearray(i >> 1 for i in range(256)))
+
+    def __init__(self, width, depth=4, max_count=15):
+        """Constructor
+
+        Parameters
+        ----------
+        width : int
+            The number of counters per row. It is rounded up to the next power
+            of 2
+        depth : int, optional
+            The number of rows, i.e. of hash functions
+        max_count : int, optional
+            The value at which counters saturate, at most 255
+        """
+        if width < 1 or depth < 1:
+            raise ValueError('width and depth must be positive')
+        if max_count < 1 or max_count > 255:
+            raise ValueError('max_count must be between 1 and 255')
+        self._width = 1 << (int(width) - 1).bit_length()
+        self._depth = int(depth)
+        self._max_count = max_count
+        self._table = bytearray(self._width * self._depth)
+
+    @property
+    def width(self):
+        """The number of counters per row"""
+        return self._width
+
+    @property
+    def depth(self):
+        """The number of rows"""
+        return self._depth
+
+    def hashes(self, k):
+        """Return the hashes of an item, from which the positions of its
+        counters are derived.
+
+        Integers are hashed by value. Other items are hashed by the CRC-32 of
+        their representation rather than by the builtin `hash`, which is
+        salted per process for strings, so that counters of the same items
+        are the same in all processes.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item
+
+        Returns
+        -------
+        hashes : tuple
+            A pair of integers
+        """
+        # Checking the exact type first avoids the slower ABC check
+        if type(k) is int or isinstance(k, numbers.Integral):
+            h = hash(k)
+        else:
+            h = zlib.crc32(repr(k).encode('utf-8')) & 0xFFFFFFFF
+        h = (h * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        return h >> 32, (h & 0xFFFFFFFF) | 1
+
+    def add(self, k, hashes=None):
+        """Increment the frequency of an item
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item
+        hashes : tuple, optional
+            The hashes of the item, as returned by `hashes`, if already
+            computed
+        """
+        h1, h2 = hashes or self.hashes(k)
+        table = self._table
+        width = self._width
+        mask = width - 1
+        indexes = [row * width + ((h1 + row * h2) & mask)
+                   for row in range(self._depth)]
+        count = min(table[i] for i in indexes)
+        if count < self._max_count:
+            for i in indexes:
+                if table[i] == count:
+                    table[i] = count + 1
+
+    def estimate(self, k, hashes=None):
+        """Return the estimated frequency of an item
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item
+        hashes : tuple, optional
+            The hashes of the item, as returned by `hashes`, if already
+            computed
+
+        Returns
+        -------
+        frequency : int
+            The estimated frequency
+        """
+        h1, h2 = hashes or self.hashes(k)
+        table = self._table
+        width = self._width
+        mask = width - 1
+        return min(table[row * width + ((h1 + row * h2) & mask)]
+                   for row in range(self._depth))
+
+    def halve(self):
+        """Halve all counters"""
+        self._table = self._table.translate(self._HALVE)
+
+    def clear(self):
+        """Reset all counters to 0"""
+        self._table = bytearray(len(self._table))
+
+
+@register_cache_policy('TINY_LFU')
+class TinyLfuCache(Cache):
+    """Cache admitting items according to the TinyLFU policy [1]_ and evicting
+    them according to any other replacement policy.
+
+    The frequency of requested items is recorded in a count-min sketch of
+    fixed size, whose counters are halved every *window* requests, so that
+    frequencies reflect recent popularity. An item is only recorded in the
+    sketch from its second request within a window, while its first request
+    is recorded in a Bloom filter, called doorkeeper, which is cleared when
+    counters are halved. This prevents items requested only once from
+    occupying counters.
+
+    Before inserting an item, the underlying cache is asked which item the
+    insertion would evict, without changing its state. The item is inserted
+    only if its estimated frequency is higher than that of the item it would
+    replace, or of all items it would replace if the policy is size-aware,
+    otherwise the underlying cache is left untouched. Hence, only policies
+    able to report the items they would evict, through a *victim* method,
+    are supported.
+
+    Frequencies are only recorded by requests (i.e. calls to *get*), hence
+    items that are only put in the cache are never admitted if the cache is
+    full.
+
+    References
+    ----------
+    .. [1] G. Einziger, R. Friedman and B. Manes, TinyLFU: A Highly Efficient
+           Cache Admission Policy, ACM Transactions on Storage, 13(4), 2017
+    """
+
+    def __init__(self, maxlen, policy='LRU', policy_attr={}, window=None,
+                 depth=4, doorkeeper=True, **kwargs):
+        """Constructor
+
+        Parameters
+        ----------
+        maxlen : int
+            The maximum number of items the cache can store
+        policy : str, optional
+            The eviction policy of the underlying cache (e.g., LRU, FIFO...).
+            It must implement the *victim* method. Default is LRU.
+        policy_attr : dict, optional
+            A set of parameters for initializing the underlying caching policy
+        window : int, optional
+            The number of requests after which frequencies are halved. If not
+            specified, it is 10 times the size of the cache
+        depth : int, optional
+            The number of hash functions of the count-min sketch
+        doorkeeper : bool, optional
+            If *True*, first requests of items within a window are recorded
+            in a doorkeeper Bloom filter instead of the count-min sketch
+
+        Notes
+        -----
+        The count-min sketch has as many 1-byte counters per row as the
+        smallest power of 2 not lower than 4 times *maxlen*, which keeps
+        collisions rare enough that items requested once are seldom estimated
+        more frequent than cached items, and the doorkeeper has at
+        least 8 bits per request of a window, so memory is proportional to the
+        cache size rather than to the number of distinct items requested.
+        """
+        maxlen = int(maxlen)
+        if maxlen <= 0:
+            raise ValueError('maxlen must be positive')
+        self._cache = CACHE_POLICY[policy](maxlen, **policy_attr)
+        if not hasattr(self._cache, 'victim'):
+            raise ValueError('The %s policy cannot be used with TinyLFU, as '
+                             'it cannot report the item it would evict'
+                             % policy)
+        self._window = int(window) if window is not None else 10 * maxlen
+        if self._window <= 0:
+            raise ValueError('window must be positive')
+        self._sketch = CountMinSketch(max(16, 4 * maxlen), depth)
+        # 8 bits per request of a window keep false positives of the
+        # doorkeeper around 2%
+        self._doorkeeper = bytearray(1 << (self._window - 1).bit_length()) \
+                           if doorkeeper else None
+        self._n_requests = 0
+
+    @property
+    def randomized(self):
+        return self._cache.randomized
+
+    @inheritdoc(Cache)
+    def __len__(self):
+        return len(self._cache)
+
+    @property
+    def maxlen(self):
+        return self._cache.maxlen
+
+    @inheritdoc(Cache)
+    def dump(self):
+        return self._cache.dump()
+
+    def _doorkeeper_has(self, hashes, add=False):
+        """Return whether all the bits of an item in the doorkeeper are set
+        and, if *add* is *True*, set them
+        """
+        h1, h2 = hashes
+        doorkeeper = self._doorkeeper
+        mask = len(doorkeeper) * 8 - 1
+        present = True
+        for i in range(self._sketch.depth):
+            b = (h1 + i * h2) & mask
+            bit = 1 << (b & 7)
+            if not doorkeeper[b >> 3] & bit:
+                if not add:
+                    return False
+                present = False
+                doorkeeper[b >> 3] |= bit
+        return present
+
+    def _record(self, k):
+        """Record a request for an item"""
+        hashes = self._sketch.hashes(k)
+        if self._doorkeeper is None or self._doorkeeper_has(hashes, add=True):
+            self._sketch.add(k, hashes)
+        self._n_requests += 1
+        if self._n_requests >= self._window:
+            self._sketch.halve()
+            if self._doorkeeper is not None:
+                self._doorkeeper = bytearray(len(self._doorkeeper))
+            self._n_requests //= 2
+
+    def frequency(self, k):
+        """Return the estimated number of recent requests for an item
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item
+
+        Returns
+        -------
+        frequency : int
+            The estimated frequency
+        """
+        hashes = self._sketch.hashes(k)
+        frequency = self._sketch.estimate(k, hashes)
+        if self._doorkeeper is not None and self._doorkeeper_has(hashes):
+            frequency += 1
+        return frequency
+
+    @inheritdoc(Cache)
+    def has(self, k, *args, **kwargs):
+        return self._cache.has(k, *args, **kwargs)
+
+    @inheritdoc(Cache)
+    def get(self, k, *args, **kwargs):
+        self._record(k)
+        return self._cache.get(k, *args, **kwargs)
+
+    def put(self, k, *args, **kwargs):
+        """Insert an item in the cache if not already inserted, unless its
+        estimated frequency is lower than that of the item it would replace.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to be inserted
+
+        Returns
+        -------
+        evicted : any hashable type
+            The evicted object or *None* if no contents were evicted, which
+            is also the case if the item is not admitted. If the underlying
+            cache is size-aware, the list of evicted objects instead.
+        """
+        if not self._cache.has(k):
+            victim = self._cache.victim(k, *args, **kwargs)
+            if victim is not None:
+                frequency = self.frequency(k)
+                for x in (victim if isinstance(victim, list) else (victim,)):
+                    if frequency <= self.frequency(x):
+                        return None
+        return self._cache.put(k, *args, **kwargs)
+
+    @inheritdoc(Cache)
+    def remove(self, k, *args, **kwargs):
+        return self._cache.remove(k, *args, **kwargs)
+
+    @inheritdoc(Cache)
+    def clear(self):
+        self._cache.clear()
+        self._sketch.clear()
+        if self._doorkeeper is not None:
+            self._doorkeeper = bytearray(len(self._doorkeeper))
+        self._n_requests = 0
+
+
+class _SizeAwareCache(Cache):
+    """Base class of caches of items of different sizes.
+
+    The capacity of these caches, *maxlen*, is the maximum total size of the
+    items they can store, e.g. in bytes, rather than their number. Items are
+    inserted with their size and as many items as necessary are evicted to
+    make room for them. Items larger than the capacity are not inserted.
+
+    Differently from other caches, `put` returns the list of items evicted,
+    since there may be more than one.
+    """
+
+    def __init__(self, maxlen, *args, **kwargs):
+        """Constructor
+
+        Parameters
+        ----------
+        maxlen : int
+            The maximum total size of the items the cache can store
+        """
+        self._maxlen = maxlen
+        if self._maxlen <= 0:
+            raise ValueError('maxlen must be positive')
+        # Dict mapping items in cache to their size
+        self._size = {}
+        self._used = 0
+
+    @inheritdoc(Cache)
+    def __len__(self):
+        return len(self._size)
+
+    @property
+    def maxlen(self):
+        """Return the maximum total size of the items the cache can store
+
+        Returns
+        -------
+        maxlen : int
+            The capacity of the cache
+        """
+        return self._maxlen
+
+    @property
+    def used(self):
+        """Return the total size of the items currently in the cache
+
+        Returns
+        -------
+        used : int
+            The occupied capacity of the cache
+        """
+        return self._used
+
+    @inheritdoc(Cache)
+    def has(self, k, *args, **kwargs):
+        return k in self._size
+
+    def _insert(self, k):
+        """Insert an item, whose size is already recorded"""
+        raise NotImplementedError('This method must be implemented')
+
+    def _evict(self):
+        """Remove the next item to evict and return it"""
+        raise NotImplementedError('This method must be implemented')
+
+    def _eviction_order(self):
+        """Return an iterator over the items in cache in order of eviction,
+        without changing the state of the cache
+        """
+        raise NotImplementedError('This method must be implemented')
+
+    def _remove(self, k):
+        """Remove an item in cache"""
+        raise NotImplementedError('This method must be implemented')
+
+    def _clear(self):
+        """Remove all items"""
+        raise NotImplementedError('This method must be implemented')
+
+    def put(self, k, size=1, *args, **kwargs):
+        """Insert an item in the cache if not already inserted.
+
+        If the element is already present in the cache, it is treated as a
+        hit and its size is not updated.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to be inserted
+        size : int, optional
+            The size of the item
+
+        Returns
+        -------
+        evicted : list
+            The list of evicted objects or *None* if no contents were evicted.
+        """
+        if self.get(k) or size > self._maxlen:
+            return None
+        evicted = []
+        while self._used + size > self._maxlen:
+            victim = self._evict()
+            self._used -= self._size.pop(victim)
+            evicted.append(victim)
+        self._size[k] = size
+        self._used += size
+        self._insert(k)
+        return evicted or None
+
+    def victim(self, k, size=1, *args, **kwargs):
+        """Return the items that inserting an item not in the cache would
+        evict, without changing the content of the cache.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to be inserted
+        size : int, optional
+            The size of the item
+
+        Returns
+        -------
+        victim : list
+            The list of items that would be evicted or *None* if no item
+            would be evicted
+        """
+        if size > self._maxlen or self._used + size <= self._maxlen:
+            return None
+        victims = []
+        used = self._used
+        for x in self._eviction_order():
+            victims.append(x)
+            used -= self._size[x]
+            if used + size <= self._maxlen:
+                break
+        return victims
+
+    @inheritdoc(Cache)
+    def remove(self, k, *args, **kwargs):
+        if k not in self._size:
+            return False
+        self._used -= self._size.pop(k)
+        self._remove(k)
+        return True
+
+    @inheritdoc(Cache)
+    def clear(self):
+        self._size.clear()
+        self._used = 0
+        self._clear()
+
+
+@register_cache_policy('SIZE_LRU')
+class SizeLruCache(_SizeAwareCache):
+    """Least Recently Used (LRU) eviction policy for items of different sizes.
+
+    When a new item is inserted, the least recently requested items are
+    evicted until the new item fits in the cache. The capacity of the cache is
+    the maximum total size of the items it stores, see `_SizeAwareCache`.
+    """
+
+    @inheritdoc(_SizeAwareCache)
+    def __init__(self, maxlen, *args, **kwargs):
+        super(SizeLruCache, self).__init__(maxlen)
+        self._cache = LinkedSet()
+
+    def dump(self):
+        """Return a dump of all the elements currently in the cache, from the
+        most to the least recently used.
+
+        Returns
+        -------
+        cache_dump : list
+            The list of all items currently stored in the cache
+        """
+        return list(iter(self._cache))
+
+    @inheritdoc(Cache)
+    def get(self, k, *args, **kwargs):
+        if k not in self._size:
+            return False
+        self._cache.move_to_top(k)
+        return True
+
+    def _insert(self, k):
+        self._cache.append_top(k)
+
+    def _evict(self):
+        return self._cache.pop_bottom()
+
+    def _eviction_order(self):
+        return reversed(self._cache)
+
+    def _remove(self, k):
+        self._cache.remove(k)
+
+    def _clear(self):
+        self._cache.clear()
+
+
+@register_cache_policy('SIZE_FIFO')
+class SizeFifoCache(_SizeAwareCache):
+    """First In First Out (FIFO) eviction policy for items of different sizes.
+
+    When a new item is inserted, the items inserted first are evicted until
+    the new item fits in the cache. The capacity of the cache is the maximum
+    total size of the items it stores, see `_SizeAwareCache`.
+    """
+
+    @inheritdoc(_SizeAwareCache)
+    def __init__(self, maxlen, *args, **kwargs):
+        super(SizeFifoCache, self).__init__(maxlen)
+        self._cache = LinkedSet()
+
+    def dump(self):
+        """Return a dump of all the elements currently in the cache, from the
+        last to the first inserted.
+
+        Returns
+        -------
+        cache_dump : list
+            The list of all items currently stored in the cache
+        """
+        return list(iter(self._cache))
+
+    @inheritdoc(Cache)
+    def get(self, k, *args, **kwargs):
+        return k in self._size
+
+    def _insert(self, k):
+        self._cache.append_top(k)
+
+    def _evict(self):
+        return self._cache.pop_bottom()
+
+    def _eviction_order(self):
+        return reversed(self._cache)
+
+    def _remove(self, k):
+        self._cache.remove(k)
+
+    def _clear(self):
+        self._cache.clear()
+
+
+@register_cache_policy('GDSF')
+class GdsfCache(_SizeAwareCache):
+    """Greedy Dual Size Frequency (GDSF) eviction policy [1]_.
+
+    Each item in cache has a priority equal to *L + f * c / s*, where *f* is
+    the number of requests of the item since it was inserted, *s* its size,
+    *c* the cost of retrieving it and *L* an inflation value, equal to the
+    priority of the last evicted item, which ages items not requested
+    recently. When a new item is inserted, the items with the lowest priority
+    are evicted until it fits in the cache.
+
+    With a unit cost, GDSF favours small and popular items and maximizes the
+    hit ratio, whereas with a cost equal to the size it maximizes the byte hit
+    ratio. The capacity of the cache is the maximum total size of the items it
+    stores, see `_SizeAwareCache`.
+
+    Priorities are stored in a heap, hence requests and evictions take
+    *O(log n)* time.
+
+    References
+    ----------
+    .. [1] L. Cherkasova, Improving WWW Proxies Performance with
+           Greedy-Dual-Size-Frequency Caching Policy, HP Labs technical report
+           HPL-98-69R1, 1998
+    """
+
+    def __init__(self, maxlen, cost='UNIT', *args, **kwargs):
+        """Constructor
+
+        Parameters
+        ----------
+        maxlen : int
+            The maximum total size of the items the cache can store
+        cost : str, optional
+            The cost of retrieving an item: 'UNIT' for a cost of 1, which
+            maximizes the hit ratio, or 'SIZE' for a cost equal to the size,
+            which maximizes the byte hit ratio
+        """
+        super(GdsfCache, self).__init__(maxlen)
+        if cost not in ('UNIT', 'SIZE'):
+            raise ValueError('cost must be either UNIT or SIZE')
+        self._size_cost = cost == 'SIZE'
+        self._init()
+
+    def _init(self):
+        """Reset the state of the cache"""
+        self._inflation = 0.0
+        # Dict mapping items in cache to their number of requests
+        self._freq = {}
+        # Dict mapping items in cache to their current priority
+        self._priority = {}
+        # Min-heap of (priority, counter, item) entries of items in cache.
+        # Entries are not removed when priorities change or items are removed
+        # but are skipped if stale
+        self._heap = []
+        self._counter = 0
+
+    def _push(self, k):
+        """Update the priority of an item and push it in the heap"""
+        freq = self._freq[k]
+        priority = self._inflation + \
+            (freq if self._size_cost else freq / self._size[k])
+        self._priority[k] = priority
+        if len(self._heap) > 2 * len(self._priority) + 16:
+            # Drop stale entries to bound the memory used by the heap
+            self._heap = [(p, i, x) for i, (x, p) in
+                          enumerate(self._priority.items())]
+            heapq.heapify(self._heap)
+            self._counter = len(self._heap)
+        else:
+            heapq.heappush(self._heap, (priority, self._counter, k))
+            self._counter += 1
+
+    def priority(self, k):
+        """Return the current priority of an item in the cache
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item looked up in the cache
+
+        Returns
+        -------
+        priority : float
+            The priority of the item
+        """
+        if k not in self._priority:
+            raise ValueError('The item %s is not in the cache' % str(k))
+        return self._priority[k]
+
+    def dump(self):
+        """Return a dump of all the elements currently in the cache, from the
+        highest to the lowest priority.
+
+        Returns
+        -------
+        cache_dump : list
+            The list of all items currently stored in the cache
+        """
+        return sorted(self._priority, key=lambda k: self._priority[k],
+                      reverse=True)
+
+    @inheritdoc(Cache)
+    def get(self, k, *args, **kwargs):
+        if k not in self._size:
+            return False
+        self._freq[k] += 1
+        self._push(k)
+        return True
+
+    def _insert(self, k):
+        self._freq[k] = 1
+        self._push(k)
+
+    def _evict(self):
+        while True:
+            priority, _, k = heapq.heappop(self._heap)
+            if self._priority.get(k) == priority:
+                break
+        self._inflation = priority
+        del self._priority[k]
+        del self._freq[k]
+        return k
+
+    def _eviction_order(self):
+        # Entries are visited in order by expanding a frontier of the heap,
+        # starting from its root, rather than popping them
+        heap = self._heap
+        frontier = [(heap[0], 0)] if heap else []
+        seen = set()
+        while frontier:
+            (priority, _, k), i = heapq.heappop(frontier)
+            if self._priority.get(k) == priority and k not in seen:
+                seen.add(k)
+                yield k
+            for j in (2 * i + 1, 2 * i + 2):
+                if j < len(heap):
+                    heapq.heappush(frontier, (heap[j], j))
+
+    def _remove(self, k):
+        del self._priority[k]
+        del self._freq[k]
+
+    def _clear(self):
+        self._init()
+
+
+class CacheWrapper(Cache):
+    """Base class of caches changing the behavior of another cache.
+
+    A wrapper holds a reference to the wrapped cache and delegates to it all
+    operations it does not override. Wrappers can be stacked, e.g. to apply
+    an admission policy and TTL expiration to the same eviction policy.
+
+    Differently from caches modified by rebinding methods of the instance,
+    wrappers are instances of regular classes, hence they can be pickled,
+    e.g. to checkpoint the state of a network, and calls to their methods do
+    not go through closures.
+
+    Extra arguments of *get*, *has* and *remove*, which cache policies
+    ignore, are not forwarded to the wrapped cache, while those of *put*, e.g.
+    the size of items, are forwarded only if present, because forwarding
+    variable arguments makes each call considerably slower.
+    """
+
+    __slots__ = ('_cache',)
+
+    def __init__(self, cache):
+        """Constructor
+
+        Parameters
+        ----------
+        cache : Cache
+            The wrapped cache. It is used, not copied, by the wrapper, hence
+            it must not be used directly afterwards.
+        """
+        if not isinstance(cache, Cache):
+            raise TypeError('cache must be an instance of Cache or its '
+                            'subclasses')
+        self._cache = cache
+
+    @property
+    def cache(self):
+        """Return the wrapped cache
+
+        Returns
+        -------
+        cache : Cache
+            The wrapped cache
+        """
+        return self._cache
+
+    @property
+    def randomized(self):
+        return self._cache.randomized
+
+    @inheritdoc(Cache)
+    def __len__(self):
+        return len(self._cache)
+
+    @property
+    def maxlen(self):
+        return self._cache.maxlen
+
+    @inheritdoc(Cache)
+    def dump(self):
+        return self._cache.dump()
+
+    @inheritdoc(Cache)
+    def has(self, k, *args, **kwargs):
+        return self._cache.has(k)
+
+    @inheritdoc(Cache)
+    def get(self, k, *args, **kwargs):
+        return self._cache.get(k)
+
+    @inheritdoc(Cache)
+    def put(self, k, *args, **kwargs):
+        if args or kwargs:
+            return self._cache.put(k, *args, **kwargs)
+        return self._cache.put(k)
+
+    @inheritdoc(Cache)
+    def remove(self, k, *args, **kwargs):
+        return self._cache.remove(k)
+
+    @inheritdoc(Cache)
+    def clear(self):
+        self._cache.clear()
+
+    @inheritdoc(Cache)
+    def has_many(self, keys):
+        return self._cache.has_many(keys)
+
+
+@register_cache_admission('K_HITS')
+class InsertAfterKHitsCache(CacheWrapper):
+    """Cache inserting items only after k requests.
+
+    This class allows to implement a variant of k-LRU and k-RANDOM policies,
+    which insert items in the main cache only at the k-th request. However,
+    proper k-LRU and k-RANDOM policies, keep a separate queue of fixed size
+    for items being hit the same number of times. For example, let's say k=3,
+    then there is a fixed size queue storing all items being hit 1 time and
+    another queue for items being hit 2 times. In this implementation there is
+    a unique FIFO queue keeping all items being hit < k times.
+    The size of this queue is equal to the value of memory parameter. If
+    memory is None, then this queue is infinite.
+
+    In the most common case of k=2, this difference of implementation does
+    not matter.
+    """
+
+    __slots__ = ('_k', '_metacache_hits', '_metacache_queue', '_memory')
+
+    def __init__(self, cache, k=2, memory=None):
+        """Constructor
+
+        Parameters
+        ----------
+        cache : Cache
+            The cache in which items are inserted
+        k : int, optional
+            The number of hits after which the item is inserted
+        memory : int, optional
+            The size of the metacache just storing the reference to the item
+            and the number of hits, without storing the item itself.
+        """
+        super(InsertAfterKHitsCache, self).__init__(cache)
+        if k < 1:
+            raise ValueError("k must be positive")
+        self._k = k
+        self._memory = memory
+        self._metacache_hits = {}
+        self._metacache_queue = LinkedSet() if memory is not None else None
+
+    def put(self, item, force_insert=False, *args, **kwargs):
+        """Insert an item in the cache if it has been requested at least k
+        times.
+
+        Parameters
+        ----------
+        item : any hashable type
+            The item to be inserted
+        force_insert : bool, optional
+            If *True*, the item is inserted regardless of the number of times
+            it has been requested
+
+        Returns
+        -------
+        evicted : any hashable type
+            The evicted object or *None* if no contents were evicted.
+        """
+        hits = self._metacache_hits
+        queue = self._metacache_queue
+        if not force_insert:
+            n_hits = hits.get(item, 0) + 1
+            if n_hits < self._k:
+                hits[item] = n_hits
+                if n_hits == 1 and queue is not None:
+                    queue.append_top(item)
+                    if len(queue) > self._memory:
+                        hits.pop(queue.pop_bottom())
+                return None
+        if item in hits:
+            # I got hit enough times, inserting in cache
+            del hits[item]
+            if queue is not None:
+                queue.remove(item)
+        if args or kwargs:
+            return self._cache.put(item, *args, **kwargs)
+        return self._cache.put(item)
+
+    @inheritdoc(Cache)
+    def clear(self):
+        self._cache.clear()
+        self._metacache_hits.clear()
+        if self._metacache_queue is not None:
+            self._metacache_queue.clear()
+
+
+@register_cache_admission('RAND')
+class RandInsertCache(CacheWrapper):
+    """Cache inserting items randomly with a given probability instead of
+    deterministically.
+    """
+
+    __slots__ = ('_p', '_rand')
+
+    randomized = True
+
+    def __init__(self, cache, p, seed=None):
+        """Constructor
+
+        Parameters
+        ----------
+        cache : Cache
+            The cache in which items are inserted
+        p : float
+            the insert probability
+        seed : any hashable type, optional
+            The seed of the random number generator
+        """
+        super(RandInsertCache, self).__init__(cache)
+        if p < 0 or p > 1:
+            raise ValueError('p must be a value between 0 and 1')
+        self._p = p
+        self._rand = random.Random(seed)
+
+    def put(self, k, *args, **kwargs):
+        """Insert an item in the cache with probability p, if not already
+        inserted.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to be inserted
+
+        Returns
+        -------
+        evicted : any hashable type
+            The evicted object or *None* if no contents were evicted.
+        """
+        if self._rand.random() < self._p:
+            if args or kwargs:
+                return self._cache.put(k, *args, **kwargs)
+            return self._cache.put(k)
+        return None
+
+
+class KeyValCache(CacheWrapper):
+    """Cache storing items together with a value instead of just a key.
+
+    This modifies the signature and/or return types of methods *get*, *put*,
+    *remove* and *dump*. The new format is documented in the docstrings of
+    these methods.
+    """
+
+    __slots__ = ('_val',)
+
+    def __init__(self, cache):
+        """Constructor
+
+        Parameters
+        ----------
+        cache : Cache
+            The cache storing the keys of items. It must be empty.
+        """
+        super(KeyValCache, self).__init__(cache)
+        if len(cache) > 0:
+            raise ValueError('the cache must be empty')
+        self._val = {}
+
+    def put(self, k, v, *args, **kwargs):
+        """Insert an item in the cache if not already inserted.
+
+        If the element is already present in the cache with the same value, it
+        will not be inserted again but the internal state of the cache object
+        may change.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The key of item to be inserted
+        v : any hashable type
+            The value of item to be inserted
+
+        Returns
+        -------
+        evicted : tuple
+            The key, value tuple of the evicted object or *None* if no contents
+            were evicted. If the underlying cache is size-aware, the list of
+            key, value tuples of the evicted objects instead.
+        """
+        evicted = self._cache.put(k, *args, **kwargs) if args or kwargs \
+                  else self._cache.put(k)
+        self._val[k] = v
+        if evicted is not None:
+            return self._pop_evicted(evicted)
+
+    def _pop_evicted(self, evicted):
+        """Remove the values of evicted items and return their key, value
+        tuples
+        """
+        if isinstance(evicted, list):
+            return [(e, self._val.pop(e)) for e in evicted]
+        return evicted, self._val.pop(evicted)
+
+    def get(self, k, *args, **kwargs):
+        """Retrieve an item from the cache.
+
+        Differently from *has(k)*, calling this method may change the internal
+        state of the caching object depending on the specific cache
+        implementation.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item looked up in the cache
+
+        Returns
+        -------
+        v : any hashable type
+            The value of the requested object or *None* if it is not in the
+            cache
+        """
+        return self._val[k] if self._cache.get(k) else None
+
+    def get_many(self, keys):
+        """Retrieve several items from the cache, one after the other.
+
+        Parameters
+        ----------
+        keys : iterable
+            The items looked up in the cache, e.g. a list or an array
+
+        Returns
+        -------
+        values : list
+            The values of the requested objects, which are *None* for objects
+            not in the cache
+        """
+        get = self.get
+        return [get(k) for k in _key_list(keys)]
+
+    def put_many(self, keys, values):
+        """Insert several items in the cache, one after the other.
+
+        Parameters
+        ----------
+        keys : iterable
+            The keys of items to be inserted, e.g. a list or an array
+        values : iterable
+            The values of items to be inserted
+
+        Returns
+        -------
+        evicted : list
+            The key, value tuples of the evicted objects, in order of eviction
+        """
+        put = self.put
+        evicted = []
+        for k, v in zip(_key_list(keys), _key_list(values)):
+            e = put(k, v)
+            if e is not None:
+                if isinstance(e, list):
+                    evicted.extend(e)
+                else:
+                    evicted.append(e)
+        return evicted
+
+    def remove(self, k, *args, **kwargs):
+        """Remove an item from the cache, if present
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item looked up in the cache
+
+        Returns
+        -------
+        v : any hashable type
+            The value of the deleted object or *None* if it was not in the
+            cache
+        """
+        return self._val.pop(k) if self._cache.remove(k) else None
+
+    def dump(self):
+        """Return a dump of all the elements currently in the cache possibly
+        sorted according to the eviction policy.
+
+        Returns
+        -------
+        cache_dump : list of tuples
+            The list of items currently stored in the cache represented as
+            key, value pairs
+        """
+        return [(k, self._val[k]) for k in self._cache.dump()]
+
+    @inheritdoc(Cache)
+    def clear(self):
+        self._cache.clear()
+        self._val.clear()
+
+    def value(self, k):
+        """Return the value of item k
+
+        Differently from *get(k)*, calling this method does not change the
+        internal state of the cache.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item looked up in the cache
+
+        Returns
+        -------
+        v : any hashable type
+            The value of the requested object or *None* if it is not in the
+            cache
+        """
+        return self._val.get(k)
+
+
+class TtlCache(CacheWrapper):
+    """TTL cache.
+
+    Items, when inserted, are (optionally) labelled with their expiration time
+    and are automatically evicted when their validity expires.
+
+    The time validity is verified against the return value of the callable
+    *f_time*, which is called whenever a purging is executed.
+
+    This implementation can be used with both real time and simulated time.
+
+    Expiration times are stored in a min-heap. Entries are not removed from
+    the heap when items are evicted, removed or have their expiration time
+    extended, but are skipped when popped. Hence purging takes a time
+    proportional to the number of expired entries, not to the size of the
+    cache, and items with infinite TTL are not stored in the heap at all.
+
+    Notes
+    -----
+    A TTL cache performs purging operations only when *has*, *get*, *put* and
+    *dump* operations are performed. This ensures correctness when normal
+    caches are used with common routing and caching strategies. However, if
+    other operations like *position* or *len* are executed, results may take
+    into account also expired items. In such cases, it is then advisable to
+    execute a *purge* first.
+    """
+
+    __slots__ = ('f_time', 'expiry', '_ttl', '_exp_heap', '_exp_counter')
+
+    def __init__(self, cache, f_time, ttl=None):
+        """Constructor
+
+        Parameters
+        ----------
+        cache : Cache
+            The cache storing items. It must be empty.
+        f_time : callable
+            A function that returns the current time (simulated or real). The
+            return type must be a numerical value, e.g. float
+        ttl : float, optional
+            The TTL of items inserted without specifying their TTL or
+            expiration time. If not specified, these items have infinite TTL.
+        """
+        super(TtlCache, self).__init__(cache)
+        if len(cache) > 0:
+            raise ValueError('the cache must be empty')
+        if not hasattr(f_time, '__call__'):
+            raise TypeError('f_time must be callable')
+        self.f_time = f_time
+        self.expiry = {}
+        self._ttl = ttl
+        # Min-heap of (expiration time, counter, item) entries. An entry is
+        # stale if the expiration time of the item is no longer the one of
+        # the entry
+        self._exp_heap = []
+        self._exp_counter = 0
+
+    def _push(self, k, expires):
+        """Push the expiration time of an item in the heap"""
+        if expires == np.inf:
+            return
+        heap = self._exp_heap
+        if len(heap) > 2 * len(self.expiry) + 16:
+            # Drop stale entries to bound the memory used by the heap
+            heap[:] = [(e, i, x) for i, (x, e) in
+                       enumerate(self.expiry.items()) if e != np.inf]
+            heapq.heapify(heap)
+            self._exp_counter = len(heap)
+        else:
+            heapq.heappush(heap, (expires, self._exp_counter, k))
+            self._exp_counter += 1
+
+    def _expire(self, k):
+        """Remove an expired item"""
+        del self.expiry[k]
+        self._cache.remove(k)
+
+    def _purge_till(self, expiry):
+        """Purge all entries expired before a certain time
+
+        Parameters
+        ----------
+        expiry : float
+            Cutoff expiration time
+        """
+        heap = self._exp_heap
+        while heap and heap[0][0] < expiry:
+            expires, _, k = heapq.heappop(heap)
+            if self.expiry.get(k) == expires:
+                self._expire(k)
+
+    def purge(self):
+        """Purge all expired items"""
+        self._purge_till(self.f_time())
+
+    @inheritdoc(Cache)
+    def get(self, k, *args, **kwargs):
+        if self._cache.get(k):
+            if self.f_time() < self.expiry[k]:
+                return True
+            self._expire(k)
+        return False
+
+    def put(self, k, ttl=None, expires=None, *args, **kwargs):
+        """Insert an item in the cache if not already inserted.
+
+        If the element is already present in the cache, it will not be inserted
+        again but the internal state of the cache object may change.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to be inserted
+        ttl : float, optional
+            The TTL of the item, i.e. its relative expiration time
+        expires : float, optional
+            The absolute expiration time of the item. It cannot be used in
+            conjunction with ttl. If both ttl and expires are None, then the
+            TTL of the cache is used, which is infinite if not specified.
+
+        Returns
+        -------
+        evicted : any hashable type
+            The evicted object or *None* if no contents were evicted.
+        """
+        now = self.f_time()
+        if ttl is None and expires is None:
+            ttl = self._ttl
+        if ttl is not None:
+            if expires is not None:
+                raise ValueError('Both expires and ttl parameters provided. '
+                                 'Only one can be provided.')
+            if ttl <= 0:
+                # if TTL is not positive, then do not cache the content at all
+                return None
+            expires = now + ttl
+        elif expires is None:
+            # If both TTL and expire are None, then TTL is infinite
+            expires = np.inf
+        elif expires <= now:
+            return None
+        cache = self._cache
+        expiry = self.expiry
+        # Expired items are purged before every insertion, so that they are
+        # evicted before valid items. This is cheap because the heap is only
+        # peeked if no item has expired. Checking whether the cache is full
+        # would not work with size-aware caches, whose capacity is not a
+        # number of items
+        self._purge_till(now)
+        evicted = cache.put(k, *args, **kwargs) if args or kwargs \
+                  else cache.put(k)
+        if evicted is not None:
+            if isinstance(evicted, list):
+                # Size-aware caches may evict several items at once
+                for e in evicted:
+                    del expiry[e]
             else:
-                self._a[len(self._cache)] = k
-            self._cache.add(k)
+                del expiry[evicted]
+        if not cache.has(k):
+            # The item was not admitted
+            return evicted
+        if k not in expiry or expiry[k] < expires:
+            expiry[k] = expires
+            self._push(k, expires)
         return evicted
 
+    @inheritdoc(Cache)
+    def has(self, k, *args, **kwargs):
+        return self._cache.has(k) and self.f_time() <= self.expiry[k]
+
+    # Expired items may still be in the wrapped cache
+    has_many = Cache.__dict__['has_many']
+
     @inheritdoc(Cache)
     def remove(self, k, *args, **kwargs):
-        if k not in self._cache:
+        if not self._cache.remove(k):
             return False
-        index = self._a.index(k)
-        self._a[index] = self._a[len(self._cache) - 1]
-        self._a[len(self._cache) - 1] = None
-        self._cache.remove(k)
+        del self.expiry[k]
         return True
 
+    def dump(self):
+        """Return a dump of all the elements currently in the cache possibly
+        sorted according to the eviction policy.
+
+        Returns
+        -------
+        cache_dump : list of tuples
+            The list of items currently stored in the cache represented as
+            (key, expiration time) pairs
+        """
+        self.purge()
+        return [(k, self.expiry[k]) for k in self._cache.dump()]
+
     @inheritdoc(Cache)
     def clear(self):
         self._cache.clear()
+        self.expiry.clear()
+        self._exp_heap = []
+        self._exp_counter = 0
 
 
-def insert_after_k_hits_cache(cache, k=2, memory=None):
-    """Return a cache inserting items only after k requests.
-
-    This methods allows to implement a variant of k-LRU and k-RANDOM policies,
-    which insert items in the main cache only at the k-th request. However,
-    proper k-LRU and k-RANDOM policies, keep a separate queue of fixed size
-    for items being hit the same number of times. For example, let's say k=3,
-    then there is a fixed size queue storing all items being hit 1 time and
-    another queue for items being hit 2 times. In this implementation there is
-    a unique FIFO queue keeping all items being hit < k times.
-    The size of this queue is equal to the value of memory parameter. If
-    memory is None, then this queue is infinite.
-
-    In the most common case of k=2, this difference of implementation does
-    not matter.
-
-    Parameters
-    ----------
-    cache : Cache
-        The instance of a cache to be applied random insertion
-    k : int, optional
-        The number of hits after which the item is inserted
-    memory : int, optional
-        The size of the metacache just storing the reference to the item and
-        the number of hits, without storing the item itself.
-
-    Returns
-    -------
-    cache : Cache
-        The modified cache instance
-    """
-    if k < 1:
-        raise ValueError("k must be positive")
-    if k == 1:
-        # This is a corner case, as I always insert at first attempt.
-        return cache
-    hits = {}
-    if memory is not None:
-        queue = LinkedSet()
-    c_put = cache.put
-
-    def put(item, force_insert=False, *args, **kwargs):
-        if force_insert:
-            if item in hits:
-                hits.pop(item)
-                if memory is not None:
-                    queue.remove(item)
-            return c_put(item)
-        if item in hits:
-            hits[item] += 1
-            if hits[item] < k:
-                return None
-            else:
-                # I got hit enough times, inserting in cache
-                hits.pop(item)
-                if memory is not None:
-                    queue.remove(item)
-                return c_put(item)
-        else:
-            hits[item] = 1
-            if memory is not None:
-                queue.append_top(item)
-                if len(queue) > memory:
-                    evicted = queue.pop_bottom()
-                    hits.pop(evicted)
-            return None
-
-    cache.put = put
-    cache.put.__doc__ = c_put.__doc__
-    cache._metacache_hits = hits
-    if memory is not None:
-        cache._metacache_queue = queue
-    return cache
-
-
-def rand_insert_cache(cache, p, seed=None):
-    """Return a random insertion cache
-
-    It modifies the instance of a cache object such that items are
-    inserted randomly instead of deterministically.
+class TtlKeyValCache(TtlCache):
+    """TTL cache storing items together with a value.
 
-    This function modifies the behavior of the *put* method of a given cache
-    instance such that it inserts contents randomly with a given probability
-
-    Parameters
-    ----------
-    cache : Cache
-        The instance of a cache to be applied random insertion
-    p : float
-        the insert probability
-    seed : any hashable type, optional
-        The seed of the random number generator
+    It combines a TTL cache, see `TtlCache`, of which it shares the expiration
+    mechanism, with a key-value cache, see `KeyValCache`. Values of expired
+    items are discarded together with the items.
 
-    Returns
-    -------
-    cache : Cache
-        The modified cache instance
+    This modifies the signature and/or return types of methods *get*, *put*,
+    *remove* and *dump*. The new format is documented in the docstrings of
+    these methods.
     """
-    if not isinstance(cache, Cache):
-        raise TypeError('cache must be an instance of Cache or its subclasses')
-    if p < 0 or p > 1:
-        raise ValueError('p must be a value between 0 and 1')
-    cache = copy.deepcopy(cache)
-    random.seed(seed)
-    c_put = cache.put
-    def put(k, *args, **kwargs):
-        if random.random() < p:
-            return c_put(k)
-    cache.put = put
-    cache.put.__doc__ = c_put.__doc__
-    return cache
-
 
-def keyval_cache(cache):
-    """It modifies the instance of a cache object such that items are saved
-    together with a value instead of just a key.
+    __slots__ = ('_val',)
 
-    This modifies the signature and/or return types of methods *get*, *put* and
-    *dump*. The new format is documented in the docstrings of the modified
-    methods of the cache instance.
+    def __init__(self, cache, f_time, ttl=None):
+        """Constructor
 
-    This function modifies the contract of methods of Cache objects, which is
-    admittedly a bad software engineering practice . It may also lead to bugs
-    in a key-value cache implementation if the base key-only cache
-    implementation from which it derives has methods calling other methods of
-    the same instance.
+        Parameters
+        ----------
+        cache : Cache
+            The cache storing the keys of items. It must be empty.
+        f_time : callable
+            A function that returns the current time (simulated or real). The
+            return type must be a numerical value, e.g. float
+        ttl : float, optional
+            The TTL of items inserted without specifying their TTL or
+            expiration time. If not specified, these items have infinite TTL.
+        """
+        super(TtlKeyValCache, self).__init__(cache, f_time, ttl)
+        self._val = {}
 
-    Parameters
-    ----------
-    cache : Cache
-        The instance of a cache to be changed to a key-value cache
+    def _expire(self, k):
+        """Remove an expired item and its value"""
+        super(TtlKeyValCache, self)._expire(k)
+        del self._val[k]
 
-    Returns
-    -------
-    cache : Cache
-        The modified cache instance
-    """
-    if not isinstance(cache, Cache):
-        raise TypeError('cache must be an instance of Cache or its subclasses')
-    if len(cache) > 0:
-        raise ValueError('the cache must be empty')
-    cache = copy.deepcopy(cache)
-    cache._val = {}
-    k_put = cache.put
-    k_get = cache.get
-    k_remove = cache.remove
-    k_dump = cache.dump
-    k_clear = cache.clear
-
-    def put(k, v, *args, **kwargs):
+    def put(self, k, v, ttl=None, expires=None, *args, **kwargs):
         """Insert an item in the cache if not already inserted.
 
-        If the element is already present in the cache with the same value, it
-        will not be inserted again but the internal state of the cache object
-        may change.
+        If the element is already present in the cache, its value is updated
+        and its expiration time is extended if the new one is later.
 
         Parameters
         ----------
@@ -1692,20 +4663,28 @@ def keyval_cache(cache):
             The key of item to be inserted
         v : any hashable type
             The value of item to be inserted
+        ttl : float, optional
+            The TTL of the item, i.e. its relative expiration time
+        expires : float, optional
+            The absolute expiration time of the item. It cannot be used in
+            conjunction with ttl. If both ttl and expires are None, then the
+            TTL of the cache is used, which is infinite if not specified.
 
         Returns
         -------
         evicted : tuple
             The key, value tuple of the evicted object or *None* if no contents
-            were evicted.
+            were evicted. If the underlying cache is size-aware, the list of
+            key, value tuples of the evicted objects instead.
         """
-        evicted = k_put(k)
-        cache._val[k] = v
+        evicted = TtlCache.put(self, k, ttl, expires, *args, **kwargs) \
+                  if args or kwargs else TtlCache.put(self, k, ttl, expires)
+        if k in self.expiry:
+            self._val[k] = v
         if evicted is not None:
-            val = cache._val.pop(evicted)
-            return evicted, val
+            return self._pop_evicted(evicted)
 
-    def get(k, *args, **kwargs):
+    def get(self, k, *args, **kwargs):
         """Retrieve an item from the cache.
 
         Differently from *has(k)*, calling this method may change the internal
@@ -1721,11 +4700,19 @@ def keyval_cache(cache):
         -------
         v : any hashable type
             The value of the requested object or *None* if it is not in the
-            cache
+            cache or expired
         """
-        return cache._val[k] if k_get(k) else None
+        return self._val[k] if TtlCache.get(self, k) else None
 
-    def remove(k, *args, **kwargs):
+    # Functions are taken from the class dictionary, because in Python 2
+    # attributes of the class are methods unbound to its instances
+    get_many = KeyValCache.__dict__['get_many']
+
+    put_many = KeyValCache.__dict__['put_many']
+
+    _pop_evicted = KeyValCache.__dict__['_pop_evicted']
+
+    def remove(self, k, *args, **kwargs):
         """Remove an item from the cache, if present
 
         Parameters
@@ -1739,9 +4726,9 @@ def keyval_cache(cache):
             The value of the deleted object or *None* if it was not in the
             cache
         """
-        return cache._val.pop(k) if k_remove(k) else None
+        return self._val.pop(k) if TtlCache.remove(self, k) else None
 
-    def dump(*args, **kwargs):
+    def dump(self):
         """Return a dump of all the elements currently in the cache possibly
         sorted according to the eviction policy.
 
@@ -1749,16 +4736,17 @@ def keyval_cache(cache):
         -------
         cache_dump : list of tuples
             The list of items currently stored in the cache represented as
-            key, value pairs
+            (key, value, expiration time) tuples
         """
-        dump = k_dump()
-        return [(k, cache._val[k]) for k in dump]
+        return [(k, self._val[k], expires)
+                for k, expires in super(TtlKeyValCache, self).dump()]
 
-    def clear():
-        k_clear()
-        cache._val.clear()
+    @inheritdoc(Cache)
+    def clear(self):
+        super(TtlKeyValCache, self).clear()
+        self._val.clear()
 
-    def value(k, *args, **kwargs):
+    def value(self, k):
         """Return the value of item k
 
         Differently from *get(k)*, calling this method does not change the
@@ -1775,197 +4763,168 @@ def keyval_cache(cache):
             The value of the requested object or *None* if it is not in the
             cache
         """
-        return cache._val[k] if k in cache._val else None
+        return self._val.get(k)
 
-    cache.put = put
-    cache.get = get
-    cache.remove = remove
-    cache.dump = dump
-    cache.clear = clear
-    cache.clear.__doc__ = k_clear.__doc__
-    cache.value = value
 
-    return cache
+def build_cache(cache_policy, maxlen, f_time=None):
+    """Build a cache from its descriptor, possibly wrapping the cache
+    implementing the replacement policy with an admission policy and TTL
+    expiration.
 
+    Parameters
+    ----------
+    cache_policy : dict or Tree
+        The descriptor of the cache. Its *name* attribute identifies the
+        replacement policy and all other attributes are arguments of the
+        policy, except for:
+         * *admission*: the name of the admission policy (e.g. K_HITS, RAND)
+           or a descriptor with its name and arguments (e.g.
+           ``{'name': 'K_HITS', 'k': 2}``)
+         * *ttl*: the TTL of items
+    maxlen : int
+        The maximum number of items the cache can store
+    f_time : callable, optional
+        A function returning the current time. It is required if a TTL is
+        specified.
 
-def ttl_cache(cache, f_time):
-    """Return a TTL cache.
+    Returns
+    -------
+    cache : Cache
+        The cache
+    """
+    args = dict(cache_policy)
+    name = args.pop('name')
+    admission = args.pop('admission', None)
+    ttl = args.pop('ttl', None)
+    cache = CACHE_POLICY[name](maxlen, **args)
+    if admission is not None:
+        if not isinstance(admission, dict):
+            admission = {'name': admission}
+        admission_args = {k: v for k, v in admission.items() if k != 'name'}
+        cache = CACHE_ADMISSION[admission['name']](cache, **admission_args)
+    if ttl is not None:
+        if f_time is None:
+            raise ValueError('f_time is required by caches with a TTL')
+        cache = TtlCache(cache, f_time, ttl)
+    return cache
 
-    This function takes as a input a cache policy and returns a new policy
-    where items, when inserted, are (optionally) labelled with their expiration
-    time and are automatically evicted when their validity expires.
 
-    The time validity is verified against the return value of the callable
-    argument *f_time*, which is called whenever a purging is executed.
+def insert_after_k_hits_cache(cache, k=2, memory=None):
+    """Return a cache inserting items only after k requests.
 
-    This implementation can be used with both real time and simulated time.
+    See `InsertAfterKHitsCache` for details.
 
     Parameters
     ----------
     cache : Cache
-        The instance of a cache to be changed to a TTL cache
-    f_time : callable
-        A function that returns the current time (simulated or real). The
-        return type must be a numerical value, e.g. float
+        The instance of a cache to be applied insertion after k hits
+    k : int, optional
+        The number of hits after which the item is inserted
+    memory : int, optional
+        The size of the metacache just storing the reference to the item and
+        the number of hits, without storing the item itself.
 
     Returns
     -------
     cache : Cache
-        The modified cache instance
-
-    Notes
-    -----
-    The returned TTL cache performs purging operations only when *has*, *get*,
-    *put* and *dump* operations are performed. This ensures correctness when
-    normal caches are used with common routing and caching strategies.
-    However, if other operations like *position* or *len* are executed,
-    results may take into account also expired items. In such cases, it is then
-    advisable to execute a *purge* first.
+        A cache wrapping a copy of the cache instance, or the cache instance
+        itself if k is 1
     """
-    if not isinstance(cache, Cache):
-        raise TypeError('cache must be an instance of Cache or its subclasses')
-    if len(cache) > 0:
-        raise ValueError('the cache must be empty')
-    if not hasattr(f_time, '__call__'):
-        raise TypeError('f_time must be callable')
-    cache = copy.deepcopy(cache)
+    if k < 1:
+        raise ValueError("k must be positive")
+    if k == 1:
+        # This is a corner case, as I always insert at first attempt.
+        return cache
+    return InsertAfterKHitsCache(copy.deepcopy(cache), k, memory)
 
-    cache.f_time = f_time
-    cache.expiry = {}
 
-    cache._exp_list = LinkedSet()
+def rand_insert_cache(cache, p, seed=None):
+    """Return a random insertion cache
 
-    c_put = cache.put
-    c_get = cache.get
-    c_has = cache.has
-    c_remove = cache.remove
-    c_dump = cache.dump
-    c_clear = cache.clear
+    Items are inserted randomly with a given probability instead of
+    deterministically. See `RandInsertCache` for details.
 
-    def _purge_till(expiry):
-        """Purge all entries expired before a certain time
+    Parameters
+    ----------
+    cache : Cache
+        The instance of a cache to be applied random insertion
+    p : float
+        the insert probability
+    seed : any hashable type, optional
+        The seed of the random number generator
 
-        Parameters
-        ----------
-        expiry : float
-            Cutoff expiration time
-        """
-        while cache._exp_list.bottom is not None and \
-              cache.expiry[cache._exp_list.bottom] < expiry:
-            expired = cache._exp_list.pop_bottom()
-            cache.expiry.pop(expired)
-            c_remove(expired)
+    Returns
+    -------
+    cache : Cache
+        A cache wrapping a copy of the cache instance
+    """
+    if not isinstance(cache, Cache):
+        raise TypeError('cache must be an instance of Cache or its subclasses')
+    return RandInsertCache(copy.deepcopy(cache), p, seed)
 
-    def purge():
-        """Purge all expired items"""
-        cache._purge_till(cache.f_time())
 
-    def get(k, *args, **kwargs):
-        if c_get(k):
-            if cache.f_time() < cache.expiry[k]:
-                return True
-            else:
-                remove(k)
-        return False
+def keyval_cache(cache):
+    """Return a cache storing items together with a value instead of just a
+    key.
 
-    def put(k, ttl=None, expires=None, *args, **kwargs):
-        """Insert an item in the cache if not already inserted.
+    See `KeyValCache` for details.
 
-        If the element is already present in the cache, it will not be inserted
-        again but the internal state of the cache object may change.
+    Parameters
+    ----------
+    cache : Cache
+        The instance of a cache to be changed to a key-value cache
 
-        Parameters
-        ----------
-        k : any hashable type
-            The item to be inserted
-        ttl : float, optional
-            The TTL of the item, i.e. its relative expiration time
-        expires : float, optional
-            The absolute expiration time of the item. It cannot be used in
-            conjunction with ttl. If both ttl and expires are None, then the
-            inserted content has infinite TTL.
+    Returns
+    -------
+    cache : Cache
+        A cache wrapping a copy of the cache instance
+    """
+    if not isinstance(cache, Cache):
+        raise TypeError('cache must be an instance of Cache or its subclasses')
+    return KeyValCache(copy.deepcopy(cache))
 
-        Returns
-        -------
-        evicted : any hashable type
-            The evicted object or *None* if no contents were evicted.
-        """
-        now = cache.f_time()
-        if ttl is not None:
-            if expires is not None:
-                raise ValueError('Both expires and ttl parameters provided. '
-                             'Only one can be provided.')
-            if ttl <= 0:
-                # if TTL is not positive, then do not cache the content at all
-                return None
-            expires = now + ttl
-        else:  # case where TTL is None
-            if expires is None:
-                # If both TTL and expire are None, then TTL is infinite
-                expires = np.infty
-            elif expires <= now:
-                return None
-        # Purge expired items only if cache is full for performance reasons
-        if len(cache) == cache.maxlen:
-            cache._purge_till(now)
-        evicted = c_put(k)
-        if evicted is not None:
-            cache.expiry.pop(evicted)
-            cache._exp_list.remove(evicted)
-        if k not in cache.expiry or cache.expiry[k] < expires:
-            cache.expiry[k] = expires
-            if k in cache._exp_list:
-                cache._exp_list.remove(k)
-            if len(cache._exp_list) == 0:
-                cache._exp_list.append_top(k)
-            else:
-                for i in cache._exp_list:
-                    if expires >= cache.expiry[i]:
-                        cache._exp_list.insert_above(i, k)
-                        break
-                else:
-                    cache._exp_list.append_bottom(k)
-        return evicted
 
-    def has(k, *args, **kwargs):
-        return c_has(k) and cache.f_time() <= cache.expiry[k]
+def ttl_cache(cache, f_time):
+    """Return a TTL cache.
 
-    def remove(k, *args, **kwargs):
-        c_remove(k)
-        cache.expiry.pop(k)
-        cache._exp_list.remove(k)
+    See `TtlCache` for details.
 
-    def dump():
-        """Return a dump of all the elements currently in the cache possibly
-        sorted according to the eviction policy.
+    Parameters
+    ----------
+    cache : Cache
+        The instance of a cache to be changed to a TTL cache
+    f_time : callable
+        A function that returns the current time (simulated or real). The
+        return type must be a numerical value, e.g. float
 
-        Return
-        ------
-        cache_dump : list of tuples
-            The list of items currently stored in the cache represented as
-            (key, expiration time) pairs
-        """
-        cache.purge()
-        dump = c_dump()
-        return [(k, cache.expiry[k]) for k in dump]
+    Returns
+    -------
+    cache : Cache
+        A cache wrapping a copy of the cache instance
+    """
+    if not isinstance(cache, Cache):
+        raise TypeError('cache must be an instance of Cache or its subclasses')
+    return TtlCache(copy.deepcopy(cache), f_time)
 
-    def clear():
-        c_clear()
-        cache.expiry.clear()
-        cache._exp_list.clear()
 
-    cache._purge_till = _purge_till
+def ttl_keyval_cache(cache, f_time):
+    """Return a TTL cache storing items together with a value.
 
-    cache.get = get
-    cache.put = put
-    cache.has = has
-    cache.remove = remove
-    cache.dump = dump
-    cache.clear = clear
-    cache.purge = purge
-    cache.clear.__doc__ = c_clear.__doc__
+    See `TtlKeyValCache` for details.
 
-    return cache
+    Parameters
+    ----------
+    cache : Cache
+        The instance of a cache to be changed to a TTL key-value cache
+    f_time : callable
+        A function that returns the current time (simulated or real). The
+        return type must be a numerical value, e.g. float
 
-def ttl_keyval_cache():
-    pass
+    Returns
+    -------
+    cache : Cache
+        A cache wrapping a copy of the cache instance
+    """
+    if not isinstance(cache, Cache):
+        raise TypeError('cache must be an instance of Cache or its subclasses')
+    return TtlKeyValCache(copy.deepcopy(cache), f_time)
@@ -355,8 +355,8 @@ class ShardedCache(Cache):
         return self._node[self.f_map(k)].get(k)
 
     @inheritdoc(Cache)
-    def put(self, k):
-        return self._node[self.f_map(k)].put(k)
+    def put(self, k, *args, **kwargs):
+        return self._node[self.f_map(k)].put(k, *args, **kwargs)
 
     @inheritdoc(Cache)
     def dump(self, serialized=True):
@@ -1,13 +1,19 @@
 from __future__ import division
 import unittest
 import collections
+import pickle
+import random
 
 import numpy as np
 
 import icarus.models as cache
+from icarus.registry import CACHE_POLICY
+from icarus.tools import TruncatedZipfDist
 
 class TestLinkedSet(unittest.TestCase):
 
+    linked_set = cache.LinkedSet
+
     def link_consistency(self, linked_set):
         """Checks that links of a linked set are consistent iterating from top
         or from bottom.
@@ -31,7 +37,7 @@ class TestLinkedSet(unittest.TestCase):
         return list(reversed(list(linked_set))) == list(reversed(linked_set))
 
     def test_append_top(self):
-        c = cache.LinkedSet()
+        c = self.linked_set()
         c.append_top(1)
         self.assertEqual(len(c), 1)
         self.assertEqual(list(c), [1])
@@ -45,7 +51,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertRaises(KeyError, c.append_top, 2)
 
     def test_append_bottom(self):
-        c = cache.LinkedSet()
+        c = self.linked_set()
         c.append_bottom(1)
         self.assertEqual(len(c), 1)
         self.assertEqual(list(c), [1])
@@ -59,7 +65,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertRaises(KeyError, c.append_top, 2)
 
     def test_move_to_top(self):
-        c = cache.LinkedSet()
+        c = self.linked_set()
         c.append_top(1)
         c.move_to_top(1)
         self.assertEqual(list(c), [1])
@@ -74,7 +80,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertTrue(self.link_consistency(c))
 
     def test_move_to_bottom(self):
-        c = cache.LinkedSet()
+        c = self.linked_set()
         c.append_top(1)
         c.move_to_bottom(1)
         self.assertEqual(list(c), [1])
@@ -89,7 +95,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertTrue(self.link_consistency(c))
 
     def test_move_up(self):
-        c = cache.LinkedSet()
+        c = self.linked_set()
         c.append_bottom(1)
         c.move_up(1)
         self.assertEqual(list(c), [1])
@@ -107,7 +113,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertRaises(KeyError, c.move_up, 4)
 
     def test_move_down(self):
-        c = cache.LinkedSet()
+        c = self.linked_set()
         c.append_top(1)
         c.move_down(1)
         self.assertEqual(list(c), [1])
@@ -128,7 +134,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertRaises(KeyError, c.move_down, 4)
 
     def test_pop_top(self):
-        c = cache.LinkedSet([1, 2, 3])
+        c = self.linked_set([1, 2, 3])
         evicted = c.pop_top()
         self.assertEqual(evicted, 1)
         self.assertEqual(list(c), [2, 3])
@@ -145,7 +151,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertEqual(list(c), [])
 
     def test_pop_bottom(self):
-        c = cache.LinkedSet([1, 2, 3])
+        c = self.linked_set([1, 2, 3])
         evicted = c.pop_bottom()
         self.assertEqual(evicted, 3)
         self.assertEqual(list(c), [1, 2])
@@ -162,7 +168,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertEqual(list(c), [])
 
     def test_insert_above(self):
-        c = cache.LinkedSet([3])
+        c = self.linked_set([3])
         c.insert_above(3, 2)
         self.assertEqual(list(c), [2, 3])
         self.assertTrue(self.link_consistency(c))
@@ -180,7 +186,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertTrue(self.link_consistency(c))
 
     def test_insert_below(self):
-        c = cache.LinkedSet([1])
+        c = self.linked_set([1])
         c.insert_below(1, 2)
         self.assertEqual(list(c), [1, 2])
         self.assertTrue(self.link_consistency(c))
@@ -198,7 +204,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertTrue(self.link_consistency(c))
 
     def test_clear(self):
-        c = cache.LinkedSet()
+        c = self.linked_set()
         c.append_top(1)
         c.append_top(2)
         self.assertEqual(len(c), 2)
@@ -208,9 +214,113 @@ class TestLinkedSet(unittest.TestCase):
         c.clear()
 
     def test_duplicated_elements(self):
-        self.assertRaises(ValueError, cache.LinkedSet, iterable=[1, 1, 2])
-        self.assertRaises(ValueError, cache.LinkedSet, iterable=[1, None, None])
-        self.assertIsNotNone(cache.LinkedSet(iterable=[1, 0, None]))
+        self.assertRaises(ValueError, self.linked_set, iterable=[1, 1, 2])
+        self.assertRaises(ValueError, self.linked_set, iterable=[1, None, None])
+        self.assertIsNotNone(self.linked_set(iterable=[1, 0, None]))
+
+    def test_pickle(self):
+        c = self.linked_set(range(100000))
+        c.move_to_top(500)
+        d = pickle.loads(pickle.dumps(c))
+        self.assertEqual(list(c), list(d))
+        self.assertTrue(self.link_consistency(d))
+        d.move_to_bottom(500)
+        self.assertEqual(500, c.top)
+        self.assertEqual(500, d.bottom)
+
+
+class TestArrayLinkedSet(TestLinkedSet):
+
+    linked_set = cache.ArrayLinkedSet
+
+    def link_consistency(self, linked_set):
+        """Checks that links of an array linked set are consistent iterating
+        from top or from bottom.
+
+        This method depends on the internal implementation of the
+        ArrayLinkedSet class
+        """
+        topdown = collections.deque()
+        bottomup = collections.deque()
+        cur = linked_set._top
+        while cur >= 0:
+            topdown.append(linked_set._val[cur])
+            cur = linked_set._down[cur]
+        cur = linked_set._bottom
+        while cur >= 0:
+            bottomup.append(linked_set._val[cur])
+            cur = linked_set._up[cur]
+        bottomup.reverse()
+        if topdown != bottomup:
+            return False
+        return list(reversed(list(linked_set))) == list(reversed(linked_set))
+
+    def test_slot_reuse(self):
+        c = cache.ArrayLinkedSet(capacity=2)
+        c.append_top(1)
+        c.append_top(2)
+        c.pop_bottom()
+        c.append_top(3)
+        self.assertEqual(2, len(c._val))
+        c.append_bottom(4)
+        self.assertEqual(4, len(c._val))
+        self.assertEqual([3, 2, 4], list(c))
+        self.assertTrue(self.link_consistency(c))
+
+    def test_same_as_linked_set(self):
+        rand = random.Random(0)
+        a = cache.LinkedSet()
+        b = cache.ArrayLinkedSet(capacity=1)
+        for _ in range(2000):
+            k = rand.randint(0, 20)
+            if k in a:
+                op = rand.choice(['move_up', 'move_down', 'move_to_top',
+                                  'move_to_bottom', 'remove'])
+                getattr(a, op)(k)
+                getattr(b, op)(k)
+            elif len(a) > 0 and rand.random() < 0.5:
+                op = rand.choice(['insert_above', 'insert_below'])
+                i = rand.choice(list(a))
+                getattr(a, op)(i, k)
+                getattr(b, op)(i, k)
+            elif rand.random() < 0.8:
+                op = rand.choice(['append_top', 'append_bottom'])
+                getattr(a, op)(k)
+                getattr(b, op)(k)
+            else:
+                op = rand.choice(['pop_top', 'pop_bottom'])
+                self.assertEqual(getattr(a, op)(), getattr(b, op)())
+            self.assertEqual(list(a), list(b))
+        self.assertTrue(self.link_consistency(b))
+
+
+class TestArrayLinkedSetPolicies(unittest.TestCase):
+
+    def test_same_as_linked_set(self):
+        rand = random.Random(0)
+        trace = [int(rand.paretovariate(0.8)) % 100 for _ in range(5000)]
+        for policy in (cache.LruCache, cache.SegmentedLruCache,
+                       cache.ClimbCache):
+            a = policy(20, linked_set='NODE')
+            b = policy(20, linked_set='ARRAY')
+            for k in trace:
+                self.assertEqual(a.get(k), b.get(k))
+                self.assertEqual(a.put(k), b.put(k))
+                if k % 17 == 0:
+                    self.assertEqual(a.remove(k), b.remove(k))
+            self.assertEqual(a.dump(), b.dump())
+
+    def test_pickle(self):
+        c = cache.LruCache(5, linked_set='ARRAY')
+        for k in range(8):
+            c.put(k)
+        d = pickle.loads(pickle.dumps(c))
+        self.assertEqual(c.dump(), d.dump())
+        self.assertEqual(c.put(8), d.put(8))
+        self.assertEqual(c.dump(), d.dump())
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, cache.LruCache, 5, linked_set='LIST')
 
 
 class TestCache(unittest.TestCase):
@@ -240,6 +350,26 @@ class TestCache(unittest.TestCase):
         self.assertFalse(c.do('GET', 2))
         self.assertEquals(c.dump(), [])
 
+    def test_pickle(self):
+        rand = random.Random(0)
+        trace = [rand.randint(0, 30) for _ in range(400)]
+        for policy in (cache.NullCache, cache.LruCache,
+                       cache.SegmentedLruCache, cache.InCacheLfuCache,
+                       cache.PerfectLfuCache, cache.FifoCache,
+                       cache.ClimbCache, cache.RandEvictionCache):
+            c = policy(5)
+            for k in trace[:200]:
+                if not c.get(k):
+                    c.put(k)
+            d = pickle.loads(pickle.dumps(c))
+            self.assertEqual(c.dump(), d.dump())
+            if c.randomized:
+                continue
+            for k in trace[200:]:
+                self.assertEqual(c.get(k), d.get(k))
+                self.assertEqual(c.put(k), d.put(k))
+            self.assertEqual(c.dump(), d.dump())
+
 
 class TestMinCache(unittest.TestCase):
 
@@ -275,6 +405,36 @@ class TestMinCache(unittest.TestCase):
             self.assertIsNone(c.put(i))
             self.assertEqual(set(range(min(i + 1, size))), set(c.dump()))
 
+    def test_trace_types(self):
+        trace = [1, 2, 3, 4, 4, 2, 1]
+        for requests in (np.array(trace), [str(i) for i in trace],
+                         [(i, 'a') for i in trace]):
+            c = cache.BeladyMinCache(2, iter(requests))
+            hits = []
+            for k in requests:
+                hits.append(c.get(k))
+                if not hits[-1]:
+                    c.put(k)
+            self.assertEqual([False] * 4 + [True] * 2 + [False], hits)
+
+    def test_optimal(self):
+        rand = random.Random(0)
+        trace = [int(rand.paretovariate(0.8)) % 50 for _ in range(3000)]
+        hits = {}
+        for policy in (cache.LruCache, cache.InCacheLfuCache,
+                       cache.BeladyMinCache):
+            c = policy(10, trace=trace)
+            hits[policy] = 0
+            for k in trace:
+                if c.get(k):
+                    hits[policy] += 1
+                else:
+                    c.put(k)
+                self.assertLessEqual(len(c), 10)
+        self.assertGreater(hits[cache.BeladyMinCache], hits[cache.LruCache])
+        self.assertGreater(hits[cache.BeladyMinCache],
+                           hits[cache.InCacheLfuCache])
+
 
 class TestLruCache(unittest.TestCase):
 
@@ -331,6 +491,7 @@ class TestLruCache(unittest.TestCase):
         self.assertEqual(c.position(3), 2)
         self.assertEqual(c.position(4), 3)
 
+
 class TestSlruCache(unittest.TestCase):
 
     def test_alloc(self):
@@ -609,6 +770,17 @@ class TestRandCache(unittest.TestCase):
         for v in (4, 3, 1):
             self.assertTrue(c.has(v))
 
+    def test_victim(self):
+        c = cache.RandEvictionCache(4)
+        c.put_many([1, 2, 3])
+        self.assertIsNone(c.victim(5))
+        c.put(4)
+        victim = c.victim(5)
+        self.assertIn(victim, (1, 2, 3, 4))
+        self.assertEqual(victim, c.victim(6))
+        self.assertEqual(4, len(c))
+        self.assertEqual(victim, c.put(5))
+
 
 class TestInCacheLfuCache(unittest.TestCase):
 
@@ -640,6 +812,40 @@ class TestInCacheLfuCache(unittest.TestCase):
         self.assertEquals(len(c), 0)
         self.assertEquals(c.dump(), [])
 
+    def test_tie_break_insertion_time(self):
+        c = cache.InCacheLfuCache(3)
+        for v in (1, 2, 3):
+            c.put(v)
+        # 2 and 1 have the same counter, 1 was inserted first
+        c.get(2)
+        c.get(1)
+        self.assertEqual(3, c.put(4))
+        self.assertEqual(4, c.put(5))
+        c.get(5)
+        # The item inserted is evicted if all others were requested more
+        self.assertEqual(6, c.put(6))
+        self.assertEqual([1, 2, 5], sorted(c.dump()))
+
+    def test_remove(self):
+        c = cache.InCacheLfuCache(2)
+        c.put(1)
+        c.put(2)
+        self.assertTrue(c.remove(1))
+        self.assertFalse(c.remove(1))
+        self.assertIsNone(c.put(3))
+        self.assertEqual(2, c.put(4))
+        self.assertEqual([3, 4], sorted(c.dump()))
+
+    def test_many_hits(self):
+        c = cache.InCacheLfuCache(2)
+        c.put(1)
+        c.put(2)
+        for _ in range(100):
+            c.get(1)
+        self.assertEqual(2, c.put(3))
+        self.assertEqual(3, c.put(4))
+        self.assertEqual([1, 4], sorted(c.dump()))
+
 
 class TestPerfectLfuCache(unittest.TestCase):
 
@@ -693,6 +899,638 @@ class TestPerfectLfuCache(unittest.TestCase):
         self.assertEquals(len(c), 0)
         self.assertEquals(c.dump(), [])
 
+    def test_tie_break_first_request(self):
+        c = cache.PerfectLfuCache(2)
+        for v in (1, 2, 3):
+            c.get(v)
+        c.put(2)
+        c.put(1)
+        # 1 and 3 have the same counter, 1 was requested first
+        self.assertEqual(1, c.put(3))
+        self.assertEqual([2, 3], sorted(c.dump()))
+
+    def test_remove(self):
+        c = cache.PerfectLfuCache(2)
+        c.put(1)
+        c.put(2)
+        self.assertTrue(c.remove(1))
+        self.assertFalse(c.has(1))
+        self.assertFalse(c.remove(1))
+        self.assertIsNone(c.put(3))
+        self.assertEqual([2, 3], sorted(c.dump()))
+
+
+def check_cache_contract(test, c, n_contents=20, n_operations=3000, seed=0):
+    """Check that a cache behaves as a set of at most maxlen items under a
+    random sequence of operations
+    """
+    rand = random.Random(seed)
+    items = set()
+    for _ in range(n_operations):
+        k = rand.randint(1, n_contents)
+        op = rand.random()
+        if op < 0.4:
+            test.assertEqual(k in items, c.get(k))
+        elif op < 0.9:
+            evicted = c.put(k)
+            if k in items:
+                test.assertIsNone(evicted)
+            else:
+                items.add(k)
+                if evicted is not None:
+                    test.assertIn(evicted, items)
+                    items.remove(evicted)
+        else:
+            test.assertEqual(k in items, c.remove(k))
+            items.discard(k)
+        test.assertLessEqual(len(c), c.maxlen)
+        test.assertEqual(items, set(c.dump()))
+        test.assertEqual(len(items), len(c))
+        test.assertEqual(k in items, c.has(k))
+
+
+def scan_hit_ratio(policy, maxlen=50, n_contents=1000, n_requests=20000,
+                   seed=0):
+    """Return the hit ratio of a cache serving Zipf requests interleaved
+    with scans of contents requested only once
+    """
+    rand = np.random.RandomState(seed)
+    cdf = TruncatedZipfDist(0.8, n_contents).cdf
+    requests = np.searchsorted(cdf, rand.random_sample(n_requests)) + 1
+    for start in range(100, n_requests, 1000):
+        requests[start:start + 100] = -np.arange(start, start + 100)
+    c = CACHE_POLICY[policy](maxlen)
+    hits = 0
+    for k in requests.tolist():
+        if c.get(k):
+            hits += 1
+        else:
+            c.put(k)
+    return hits / n_requests
+
+
+class TestArcCache(unittest.TestCase):
+
+    def test_put_get(self):
+        c = cache.ArcCache(2)
+        self.assertIsNone(c.put(1))
+        self.assertIsNone(c.put(2))
+        self.assertTrue(c.get(1))
+        self.assertFalse(c.get(3))
+        # Items requested once are evicted before items requested twice
+        self.assertEqual(2, c.put(3))
+        self.assertEqual([1, 3], c.dump())
+        self.assertEqual(2, c.maxlen)
+
+    def test_adaptation(self):
+        c = cache.ArcCache(2)
+        c.put(1)
+        c.put(2)
+        c.get(1)
+        c.put(3)
+        self.assertEqual(0, c._p)
+        # A hit in the ghost list of items requested once makes room for them
+        self.assertEqual(1, c.put(2))
+        self.assertEqual(1, c._p)
+        self.assertEqual([2, 3], c.dump())
+
+    def test_remove(self):
+        c = cache.ArcCache(3)
+        c.put(1)
+        c.put(2)
+        c.get(2)
+        self.assertTrue(c.remove(2))
+        self.assertFalse(c.remove(2))
+        self.assertEqual([1], c.dump())
+
+    def test_clear(self):
+        c = cache.ArcCache(2)
+        c.put(1)
+        c.put(2)
+        c.put(3)
+        c.clear()
+        self.assertEqual(0, len(c))
+        self.assertEqual([], c.dump())
+        self.assertEqual(0, c._p)
+
+    def test_contract(self):
+        for maxlen in (1, 2, 5):
+            check_cache_contract(self, cache.ArcCache(maxlen))
+
+    def test_scan_resistance(self):
+        self.assertGreater(scan_hit_ratio('ARC'), scan_hit_ratio('LRU'))
+
+
+class TestLirsCache(unittest.TestCase):
+
+    def test_put_get(self):
+        c = cache.LirsCache(3, hir_ratio=0.34)
+        for k in (1, 2, 3):
+            self.assertIsNone(c.put(k))
+        self.assertEqual([2, 1, 3], c.dump())
+        self.assertTrue(c.get(1))
+        # The HIR item is evicted
+        self.assertEqual(3, c.put(4))
+        self.assertEqual([1, 2, 4], c.dump())
+        # A non-resident item whose recency is lower than the least recent
+        # LIR item becomes LIR on insertion
+        self.assertEqual(4, c.put(3))
+        self.assertEqual([3, 1, 2], c.dump())
+
+    def test_remove(self):
+        c = cache.LirsCache(3, hir_ratio=0.34)
+        for k in (1, 2, 3):
+            c.put(k)
+        self.assertTrue(c.remove(1))
+        self.assertFalse(c.remove(1))
+        self.assertFalse(c.has(1))
+        self.assertEqual(2, len(c))
+        self.assertIsNone(c.put(4))
+        self.assertEqual(3, len(c))
+
+    def test_clear(self):
+        c = cache.LirsCache(4)
+        for k in range(10):
+            c.put(k)
+        c.clear()
+        self.assertEqual(0, len(c))
+        self.assertEqual([], c.dump())
+
+    def test_contract(self):
+        for maxlen in (1, 2, 5):
+            check_cache_contract(self, cache.LirsCache(maxlen))
+            check_cache_contract(self, cache.LirsCache(maxlen, hir_ratio=0.5))
+
+    def test_scan_resistance(self):
+        self.assertGreater(scan_hit_ratio('LIRS'), scan_hit_ratio('LRU'))
+
+
+class TestS3FifoCache(unittest.TestCase):
+
+    def test_put_get(self):
+        c = cache.S3FifoCache(10)
+        for k in range(10):
+            self.assertIsNone(c.put(k))
+        # Items not requested again are evicted from the small queue
+        self.assertEqual(0, c.put(10))
+        self.assertTrue(c.get(2))
+        self.assertEqual(1, c.put(11))
+        # Requested items are moved to the main queue instead of being evicted
+        self.assertEqual(3, c.put(12))
+        self.assertEqual(2, c.dump()[0])
+
+    def test_ghost(self):
+        c = cache.S3FifoCache(10)
+        for k in range(11):
+            c.put(k)
+        self.assertFalse(c.has(0))
+        # Items evicted recently are inserted in the main queue
+        c.put(0)
+        self.assertEqual(0, c.dump()[0])
+
+    def test_remove(self):
+        c = cache.S3FifoCache(10)
+        for k in range(5):
+            c.put(k)
+        self.assertTrue(c.remove(3))
+        self.assertFalse(c.remove(3))
+        self.assertEqual(4, len(c))
+
+    def test_clear(self):
+        c = cache.S3FifoCache(10)
+        for k in range(20):
+            c.put(k)
+        c.clear()
+        self.assertEqual(0, len(c))
+        self.assertEqual([], c.dump())
+
+    def test_contract(self):
+        for maxlen in (1, 2, 5, 20):
+            check_cache_contract(self, cache.S3FifoCache(maxlen))
+
+    def test_scan_resistance(self):
+        self.assertGreater(scan_hit_ratio('S3_FIFO'), scan_hit_ratio('LRU'))
+
+
+class TestClockProCache(unittest.TestCase):
+
+    def test_put_get(self):
+        c = cache.ClockProCache(3)
+        for k in range(3):
+            self.assertIsNone(c.put(k))
+        self.assertEqual(0, c.put(3))
+        self.assertTrue(c.get(1))
+        self.assertFalse(c.get(0))
+        # Referenced items are spared by the cold hand
+        self.assertEqual(2, c.put(4))
+        self.assertEqual(3, len(c))
+        self.assertTrue(c.has(1))
+
+    def test_non_resident(self):
+        c = cache.ClockProCache(3)
+        for k in range(4):
+            c.put(k)
+        self.assertFalse(c.has(0))
+        # An evicted item in its test period is inserted again as hot and
+        # increases the target number of cold items, initially the cache size
+        c._cold_maxlen = 1
+        c.put(0)
+        self.assertEqual(2, c._cold_maxlen)
+        self.assertEqual(c._HOT, c._entries[0].kind)
+        self.assertTrue(c.has(0))
+
+    def test_remove(self):
+        c = cache.ClockProCache(3)
+        for k in range(3):
+            c.put(k)
+        self.assertTrue(c.remove(1))
+        self.assertFalse(c.remove(1))
+        self.assertEqual([0, 2], sorted(c.dump()))
+        self.assertIsNone(c.put(3))
+
+    def test_clear(self):
+        c = cache.ClockProCache(3)
+        for k in range(10):
+            c.put(k)
+        c.clear()
+        self.assertEqual(0, len(c))
+        self.assertEqual([], c.dump())
+
+    def test_contract(self):
+        for maxlen in (1, 2, 5, 20):
+            check_cache_contract(self, cache.ClockProCache(maxlen))
+
+    def test_scan_resistance(self):
+        self.assertGreater(scan_hit_ratio('CLOCK_PRO'), scan_hit_ratio('LRU'))
+
+
+class TestCountMinSketch(unittest.TestCase):
+
+    def test_estimate(self):
+        s = cache.CountMinSketch(64)
+        self.assertEqual(64, s.width)
+        for _ in range(3):
+            s.add('a')
+        s.add('b')
+        self.assertEqual(3, s.estimate('a'))
+        self.assertEqual(1, s.estimate('b'))
+        self.assertEqual(0, s.estimate('c'))
+
+    def test_never_underestimates(self):
+        s = cache.CountMinSketch(16, depth=2)
+        counts = collections.Counter(random.randint(1, 200) for _ in range(500))
+        for k, n in counts.items():
+            for _ in range(n):
+                s.add(k)
+        for k, n in counts.items():
+            self.assertGreaterEqual(s.estimate(k), min(n, 15))
+
+    def test_saturation(self):
+        s = cache.CountMinSketch(16, max_count=3)
+        for _ in range(10):
+            s.add(1)
+        self.assertEqual(3, s.estimate(1))
+
+    def test_halve_clear(self):
+        s = cache.CountMinSketch(16)
+        for _ in range(7):
+            s.add(1)
+        s.halve()
+        self.assertEqual(3, s.estimate(1))
+        s.clear()
+        self.assertEqual(0, s.estimate(1))
+
+    def test_stable_hashes(self):
+        s = cache.CountMinSketch(16)
+        # Strings are not hashed with the builtin hash, salted per process
+        self.assertEqual((3440521776, 680683111), s.hashes('/index.html\n'))
+        self.assertEqual(s.hashes(5), s.hashes(np.int64(5)))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, cache.CountMinSketch, 0)
+        self.assertRaises(ValueError, cache.CountMinSketch, 16, 4, 256)
+
+
+class TestTinyLfuCache(unittest.TestCase):
+
+    def test_admission(self):
+        c = cache.TinyLfuCache(2)
+        for k in (1, 2):
+            for _ in range(3):
+                c.get(k)
+            c.put(k)
+        self.assertEqual([2, 1], c.dump())
+        # An item requested once does not replace a frequently requested one
+        self.assertFalse(c.get(3))
+        self.assertIsNone(c.put(3))
+        self.assertFalse(c.has(3))
+        self.assertEqual(2, len(c))
+        # The rejection does not change the state of the underlying cache
+        self.assertEqual([2, 1], c.dump())
+        # An item requested more often than the victim replaces it
+        for _ in range(5):
+            c.get(4)
+        self.assertEqual(1, c.put(4))
+        self.assertTrue(c.has(4))
+        self.assertFalse(c.has(1))
+
+    def test_arc(self):
+        c = cache.TinyLfuCache(2, policy='ARC')
+        for k in (1, 2):
+            c.get(k)
+            c.get(k)
+            c.put(k)
+        c.get(1)
+        self.assertEqual([1, 2], c.dump())
+        self.assertEqual(2, c._cache.victim(3))
+        # A rejected item does not move the victim to the ghost list B1,
+        # hence inserting the victim again is not a ghost hit
+        self.assertIsNone(c.put(3))
+        self.assertEqual([1, 2], c.dump())
+        self.assertEqual(0, len(c._cache._b1))
+        self.assertEqual(0, c._cache._p)
+        for _ in range(3):
+            c.get(3)
+        self.assertEqual(2, c.put(3))
+        self.assertEqual([1, 3], c.dump())
+
+    def test_lirs(self):
+        c = cache.TinyLfuCache(3, policy='LIRS')
+        for k in (1, 2, 3):
+            c.get(k)
+            c.get(k)
+            c.put(k)
+        self.assertEqual(3, c._cache.victim(4))
+        # The victim, a HIR item, is not made non-resident by a rejected
+        # insertion, hence it is not promoted to LIR when requested again
+        self.assertIsNone(c.put(4))
+        self.assertEqual([2, 1, 3], c.dump())
+        self.assertEqual(cache.LirsCache._HIR, c._cache._status[3])
+        for _ in range(3):
+            c.get(4)
+        self.assertEqual(3, c.put(4))
+        self.assertEqual([2, 1, 4], c.dump())
+
+    def test_victim_unchanged(self):
+        for policy in ('LRU', 'SLRU', 'FIFO', 'IN_CACHE_LFU', 'PERFECT_LFU',
+                       'ARC', 'LIRS', 'S3_FIFO'):
+            c = cache.TinyLfuCache(4, policy=policy)
+            for k in range(4):
+                for _ in range(k + 2):
+                    c.get(k)
+                c.put(k)
+            dump = c.dump()
+            for k in range(10, 20):
+                c.get(k)
+                self.assertIsNone(c.put(k))
+                self.assertEqual(dump, c.dump())
+
+    def test_size_lru(self):
+        c = cache.TinyLfuCache(10, policy='SIZE_LRU')
+        for k in (1, 2, 3):
+            for _ in range(k + 1):
+                c.get(k)
+            c.put(k, size=3)
+        self.assertEqual([3, 2, 1], c.dump())
+        for _ in range(3):
+            c.get(4)
+        # Item 4 is requested more often than 1 but not than 2, which would
+        # also be evicted to make room for it
+        self.assertIsNone(c.put(4, size=5))
+        self.assertEqual([3, 2, 1], c.dump())
+        self.assertEqual([1], c.put(4, size=2))
+        self.assertEqual([4, 3, 2], c.dump())
+        self.assertEqual(8, c._cache.used)
+
+    def test_gdsf(self):
+        c = cache.TinyLfuCache(10, policy='GDSF')
+        for k in (1, 2):
+            c.get(k)
+            c.get(k)
+            c.put(k, size=5)
+        self.assertIsNone(c.put(3, size=5))
+        for _ in range(3):
+            c.get(3)
+        self.assertEqual([1], c.put(3, size=5))
+
+    def test_unsupported_policy(self):
+        for policy in ('CLOCK_PRO', 'NULL'):
+            self.assertRaises(ValueError, cache.TinyLfuCache, 4,
+                              policy=policy)
+
+    def test_not_full(self):
+        c = cache.TinyLfuCache(3)
+        for k in (1, 2, 3):
+            self.assertIsNone(c.put(k))
+        self.assertEqual(3, len(c))
+        self.assertEqual(3, c.maxlen)
+
+    def test_doorkeeper(self):
+        c = cache.TinyLfuCache(16)
+        c.get(1)
+        self.assertEqual(1, c.frequency(1))
+        self.assertEqual(0, c._sketch.estimate(1))
+        c.get(1)
+        self.assertEqual(2, c.frequency(1))
+        c = cache.TinyLfuCache(16, doorkeeper=False)
+        c.get(1)
+        self.assertEqual(1, c._sketch.estimate(1))
+
+    def test_aging(self):
+        c = cache.TinyLfuCache(2, window=10, doorkeeper=False)
+        for _ in range(9):
+            c.get(1)
+        self.assertEqual(9, c.frequency(1))
+        c.get(2)
+        self.assertEqual(4, c.frequency(1))
+        self.assertEqual(0, c.frequency(2))
+
+    def test_policy(self):
+        c = cache.TinyLfuCache(4, policy='SLRU',
+                               policy_attr={'segments': 2})
+        self.assertIsInstance(c._cache, cache.SegmentedLruCache)
+        c = cache.TinyLfuCache(4, policy='RAND')
+        self.assertTrue(c.randomized)
+        self.assertFalse(cache.TinyLfuCache(4).randomized)
+
+    def test_scan_resistance(self):
+        popular = list(range(10))
+        for policy in ('LRU', 'FIFO', 'RAND'):
+            c = cache.TinyLfuCache(10, policy=policy)
+            for _ in range(5):
+                for k in popular:
+                    if not c.get(k):
+                        c.put(k)
+            # A scan of items requested once does not pollute the cache
+            for k in range(100, 200):
+                if not c.get(k):
+                    c.put(k)
+            self.assertEqual(set(popular), set(c.dump()))
+
+    def test_remove_clear(self):
+        c = cache.TinyLfuCache(4)
+        c.put(1)
+        c.put(2)
+        self.assertTrue(c.remove(1))
+        self.assertEqual([2], c.dump())
+        c.get(2)
+        c.clear()
+        self.assertEqual(0, len(c))
+        self.assertEqual(0, c.frequency(2))
+
+
+class TestSizeLruCache(unittest.TestCase):
+
+    def test_put_get(self):
+        c = cache.SizeLruCache(10)
+        self.assertIsNone(c.put(1, size=4))
+        self.assertIsNone(c.put(2, size=4))
+        self.assertTrue(c.get(1))
+        self.assertEqual(8, c.used)
+        self.assertEqual(10, c.maxlen)
+        # The least recently used items are evicted until the new one fits
+        self.assertEqual([2], c.put(3, size=4))
+        self.assertEqual([3, 1], c.dump())
+        self.assertEqual([1, 3], c.put(4, size=10))
+        self.assertEqual([4], c.dump())
+        self.assertEqual(1, len(c))
+
+    def test_hit(self):
+        c = cache.SizeLruCache(10)
+        c.put(1, size=4)
+        c.put(2, size=4)
+        self.assertIsNone(c.put(1, size=8))
+        self.assertEqual([1, 2], c.dump())
+        self.assertEqual(8, c.used)
+
+    def test_too_large(self):
+        c = cache.SizeLruCache(10)
+        c.put(1, size=4)
+        self.assertIsNone(c.put(2, size=11))
+        self.assertFalse(c.has(2))
+        self.assertEqual([1], c.dump())
+
+    def test_default_size(self):
+        c = cache.SizeLruCache(2)
+        c.put(1)
+        c.put(2)
+        self.assertEqual([1], c.put(3))
+
+    def test_victim(self):
+        c = cache.SizeLruCache(10)
+        c.put(1, size=4)
+        c.put(2, size=4)
+        self.assertIsNone(c.victim(3, size=2))
+        self.assertIsNone(c.victim(3, size=11))
+        self.assertEqual([1], c.victim(3, size=3))
+        self.assertEqual([1, 2], c.victim(3, size=7))
+        self.assertEqual([2, 1], c.dump())
+        self.assertEqual([1, 2], c.put(3, size=7))
+
+    def test_remove_clear(self):
+        c = cache.SizeLruCache(10)
+        c.put(1, size=4)
+        c.put(2, size=4)
+        self.assertTrue(c.remove(1))
+        self.assertFalse(c.remove(1))
+        self.assertEqual(4, c.used)
+        c.clear()
+        self.assertEqual(0, c.used)
+        self.assertEqual([], c.dump())
+
+
+class TestSizeFifoCache(unittest.TestCase):
+
+    def test_put_get(self):
+        c = cache.SizeFifoCache(10)
+        c.put(1, size=4)
+        c.put(2, size=4)
+        self.assertTrue(c.get(1))
+        self.assertFalse(c.get(3))
+        # Requests do not change the order of eviction
+        self.assertEqual([1], c.put(3, size=4))
+        self.assertEqual([3, 2], c.dump())
+        self.assertEqual([2, 3], c.put(4, size=9))
+        self.assertEqual(9, c.used)
+
+    def test_remove_clear(self):
+        c = cache.SizeFifoCache(10)
+        c.put(1, size=4)
+        self.assertTrue(c.remove(1))
+        self.assertEqual(0, c.used)
+        c.put(2, size=4)
+        c.clear()
+        self.assertEqual(0, len(c))
+
+
+class TestGdsfCache(unittest.TestCase):
+
+    def test_put_get(self):
+        c = cache.GdsfCache(10)
+        c.put(1, size=5)
+        c.put(2, size=5)
+        self.assertTrue(c.get(1))
+        self.assertEqual(0.4, c.priority(1))
+        self.assertEqual(0.2, c.priority(2))
+        # The item with the lowest frequency per unit size is evicted
+        self.assertEqual([2], c.put(3, size=2))
+        # Priorities of items inserted later are inflated
+        self.assertEqual(0.2 + 0.5, c.priority(3))
+        self.assertEqual([3, 1], c.dump())
+
+    def test_small_items(self):
+        c = cache.GdsfCache(10)
+        c.put(1, size=8)
+        c.get(1)
+        c.put(2, size=1)
+        # A small item is preferred over a large one requested more often
+        self.assertEqual([1], c.put(3, size=2))
+        self.assertEqual([2, 3], sorted(c.dump()))
+
+    def test_size_cost(self):
+        c = cache.GdsfCache(10, cost='SIZE')
+        c.put(1, size=8)
+        c.get(1)
+        c.put(2, size=1)
+        self.assertEqual(2, c.priority(1))
+        self.assertEqual([2], c.put(3, size=2))
+        self.assertRaises(ValueError, cache.GdsfCache, 10, cost='INVALID')
+
+    def test_remove_clear(self):
+        c = cache.GdsfCache(10)
+        c.put(1, size=5)
+        c.put(2, size=5)
+        self.assertTrue(c.remove(2))
+        self.assertFalse(c.remove(2))
+        self.assertIsNone(c.put(3, size=5))
+        self.assertEqual([1, 3], sorted(c.dump()))
+        c.clear()
+        self.assertEqual(0, c.used)
+        self.assertEqual([], c.dump())
+        self.assertRaises(ValueError, c.priority, 1)
+
+    def test_stale_entries(self):
+        c = cache.GdsfCache(100)
+        for k in range(10):
+            c.put(k, size=10)
+        for _ in range(100):
+            for k in range(9):
+                c.get(k)
+        self.assertLessEqual(len(c._heap), 2 * len(c) + 17)
+        self.assertEqual([9], c.put(10, size=10))
+
+    def test_victim(self):
+        c = cache.GdsfCache(10)
+        for k, size in ((1, 2), (2, 4), (3, 4)):
+            c.put(k, size=size)
+        c.get(3)
+        c.remove(2)
+        c.put(2, size=4)
+        self.assertEqual([2], c.victim(4, size=4))
+        self.assertEqual([2, 1, 3], c.victim(4, size=10))
+        self.assertEqual(10, c.used)
+        self.assertEqual([2, 1], c.put(4, size=6))
+
 
 class TestInsertAfterKHits(unittest.TestCase):
 
@@ -913,6 +1751,16 @@ class TestKeyValCache(unittest.TestCase):
             c.put(k, v)
 
 
+    def test_size_lru(self):
+        c = cache.KeyValCache(cache.SizeLruCache(10))
+        self.assertIsNone(c.put(1, 11, size=4))
+        self.assertIsNone(c.put(2, 22, size=4))
+        self.assertEqual([(1, 11), (2, 22)], c.put(3, 33, size=8))
+        self.assertEqual(33, c.get(3))
+        self.assertIsNone(c.get(1))
+        self.assertEqual([(3, 33)], c.put_many([4, 5, 6], [44, 55, 66]))
+
+
 class TestTtlCache(unittest.TestCase):
 
     def test_put_dump(self):
@@ -987,29 +1835,29 @@ class TestTtlCache(unittest.TestCase):
         c.put(3)
         curr_time = 1000
         dump = c.dump()
-        self.assertIn((1, np.infty), dump)
-        self.assertIn((2, np.infty), dump)
-        self.assertIn((3, np.infty), dump)
+        self.assertIn((1, np.inf), dump)
+        self.assertIn((2, np.inf), dump)
+        self.assertIn((3, np.inf), dump)
         c.put(1, ttl=100)
         curr_time = 2000
         dump = c.dump()
         self.assertEqual(len(dump), 3)
-        self.assertIn((1, np.infty), dump)
-        self.assertIn((2, np.infty), dump)
-        self.assertIn((3, np.infty), dump)
+        self.assertIn((1, np.inf), dump)
+        self.assertIn((2, np.inf), dump)
+        self.assertIn((3, np.inf), dump)
         c.put(4, ttl=200)
         dump = c.dump()
         self.assertEqual(len(dump), 4)
         self.assertEqual(dump[0], (4, 2200))
-        self.assertIn((1, np.infty), dump)
-        self.assertIn((2, np.infty), dump)
-        self.assertIn((3, np.infty), dump)
+        self.assertIn((1, np.inf), dump)
+        self.assertIn((2, np.inf), dump)
+        self.assertIn((3, np.inf), dump)
         curr_time = 3000
         dump = c.dump()
         self.assertEqual(len(dump), 3)
-        self.assertIn((1, np.infty), dump)
-        self.assertIn((2, np.infty), dump)
-        self.assertIn((3, np.infty), dump)
+        self.assertIn((1, np.inf), dump)
+        self.assertIn((2, np.inf), dump)
+        self.assertIn((3, np.inf), dump)
 
     def test_clear(self):
         curr_time = 1
@@ -1039,3 +1887,335 @@ class TestTtlCache(unittest.TestCase):
         self.assertFalse(c.has(1))
         c.put(3)
         self.assertFalse(ttl_c.has(3))
+
+    def test_remove(self):
+        c = cache.ttl_cache(cache.LruCache(3), lambda: 0)
+        c.put(1, ttl=5)
+        self.assertTrue(c.remove(1))
+        self.assertFalse(c.remove(1))
+        self.assertEqual([], c.dump())
+        # A stale heap entry does not expire an item inserted again
+        c.put(1, ttl=10)
+        c.put(2, ttl=1)
+        c.put(3, ttl=1)
+        c._purge_till(6)
+        self.assertEqual([(1, 10)], c.dump())
+
+    def test_purge_expired_only(self):
+        curr_time = 0
+        f_time = lambda: curr_time
+        expired = []
+
+        class RecordingLruCache(cache.LruCache):
+
+            def remove(self, k):
+                expired.append(k)
+                return super(RecordingLruCache, self).remove(k)
+
+        c = cache.TtlCache(RecordingLruCache(1000), f_time)
+        for k in range(1000):
+            c.put(k, ttl=k + 1)
+        curr_time = 10.5
+        c.put(1000, ttl=1)
+        self.assertEqual(list(range(10)), expired)
+        self.assertEqual(991, len(c))
+
+    def test_purge_size_aware(self):
+        curr_time = 0
+        f_time = lambda: curr_time
+        c = cache.TtlCache(cache.SizeLruCache(10), f_time)
+        c.put(2, ttl=100, size=5)
+        c.put(1, ttl=1, size=5)
+        curr_time = 10
+        # The expired item is purged instead of evicting the valid one
+        self.assertIsNone(c.put(3, ttl=100, size=5))
+        self.assertEqual([(3, 110), (2, 100)], c.dump())
+
+    def test_heap_size(self):
+        curr_time = 0
+        f_time = lambda: curr_time
+        c = cache.ttl_cache(cache.LruCache(10), f_time)
+        for i in range(1000):
+            c.put(i % 20, ttl=i + 1)
+        self.assertLessEqual(len(c._exp_heap), 2 * len(c.expiry) + 17)
+        c.put(1000)
+        self.assertLessEqual(len(c._exp_heap), 2 * len(c.expiry) + 17)
+        self.assertEqual(10, len(c.dump()))
+
+    def test_not_admitted(self):
+        c = cache.ttl_cache(cache.TinyLfuCache(1), lambda: 0)
+        for _ in range(5):
+            c.get(1)
+        c.put(1, ttl=10)
+        self.assertIsNone(c.put(2, ttl=10))
+        self.assertNotIn(2, c.expiry)
+        self.assertEqual([(1, 10)], c.dump())
+
+
+class TestTtlKeyValCache(unittest.TestCase):
+
+    def test_put_get(self):
+        curr_time = 0
+        f_time = lambda: curr_time
+        c = cache.ttl_keyval_cache(cache.FifoCache(2), f_time)
+        self.assertIsNone(c.put(1, 11, ttl=5))
+        self.assertIsNone(c.put(2, 21))
+        self.assertEqual(11, c.get(1))
+        self.assertIsNone(c.get(3))
+        self.assertEqual([(2, 21, np.inf), (1, 11, 5)], c.dump())
+        c.put(1, 12, ttl=3)
+        self.assertEqual(12, c.value(1))
+        self.assertEqual(5, c.expiry[1])
+        self.assertEqual((1, 12), c.put(3, 31))
+        curr_time = 10
+        self.assertEqual(21, c.get(2))
+
+    def test_expiry(self):
+        curr_time = 0
+        f_time = lambda: curr_time
+        c = cache.ttl_keyval_cache(cache.LruCache(2), f_time)
+        c.put(1, 11, ttl=5)
+        c.put(2, 21, expires=8)
+        curr_time = 6
+        self.assertIsNone(c.get(1))
+        self.assertIsNone(c.value(1))
+        c.put(3, 31, ttl=1)
+        curr_time = 9
+        # Expired items are purged with their value when the cache is full
+        self.assertIsNone(c.put(4, 41, ttl=1))
+        self.assertEqual([(4, 41, 10)], c.dump())
+        self.assertEqual({4: 41}, c._val)
+
+    def test_remove_clear(self):
+        c = cache.ttl_keyval_cache(cache.LruCache(2), lambda: 0)
+        c.put(1, 11, ttl=5)
+        self.assertEqual(11, c.remove(1))
+        self.assertIsNone(c.remove(1))
+        c.put(2, 21, ttl=-1)
+        self.assertIsNone(c.value(2))
+        c.put(3, 31)
+        c.clear()
+        self.assertEqual(0, len(c))
+        self.assertEqual([], c.dump())
+
+    def test_naming(self):
+        c = cache.ttl_keyval_cache(cache.FifoCache(3), lambda: 0)
+        for name in ('get', 'put', 'dump', 'clear', 'remove'):
+            self.assertEqual(name, getattr(c, name).__name__)
+            self.assertGreater(len(getattr(c, name).__doc__), 0)
+
+    def test_size_lru(self):
+        c = cache.TtlKeyValCache(cache.SizeLruCache(10), zero_time)
+        c.put(1, 11, ttl=5, size=4)
+        c.put(2, 22, size=4)
+        self.assertEqual([(1, 11), (2, 22)], c.put(3, 33, size=8))
+        self.assertEqual([(3, 33, np.inf)], c.dump())
+
+
+def zero_time():
+    return 0
+
+
+class TestCacheWrapper(unittest.TestCase):
+
+    def test_no_dict(self):
+        for c in (cache.InsertAfterKHitsCache(cache.LruCache(2)),
+                  cache.RandInsertCache(cache.LruCache(2), 0.5),
+                  cache.KeyValCache(cache.LruCache(2)),
+                  cache.TtlCache(cache.LruCache(2), zero_time),
+                  cache.TtlKeyValCache(cache.LruCache(2), zero_time)):
+            self.assertFalse(hasattr(c, '__dict__'))
+            self.assertIsInstance(c, cache.CacheWrapper)
+
+    def test_stacked(self):
+        c = cache.TtlCache(cache.InsertAfterKHitsCache(
+                cache.LruCache(2), k=2), zero_time, ttl=10)
+        self.assertIsNone(c.put(1))
+        self.assertFalse(c.has(1))
+        self.assertNotIn(1, c.expiry)
+        c.put(1)
+        self.assertEqual([(1, 10)], c.dump())
+        c.put(2)
+        c.put(2)
+        c.put(3)
+        self.assertEqual(1, c.put(3))
+        self.assertEqual({2: 10, 3: 10}, c.expiry)
+        self.assertEqual(2, len(c))
+        self.assertEqual(2, c.maxlen)
+        self.assertTrue(c.remove(3))
+        self.assertEqual([2], c.cache.dump())
+
+    def test_pickle(self):
+        c = cache.TtlKeyValCache(cache.InsertAfterKHitsCache(
+                cache.LruCache(3), k=2, memory=5), zero_time)
+        for k in (1, 2, 1, 3, 3):
+            c.put(k, k * 10, ttl=k)
+        c2 = pickle.loads(pickle.dumps(c, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(c.dump(), c2.dump())
+        self.assertEqual(c.cache._metacache_hits, c2.cache._metacache_hits)
+        c2.put(2, 20, ttl=5)
+        self.assertEqual([(2, 20, 5), (3, 30, 3), (1, 10, 1)], c2.dump())
+        self.assertEqual([(3, 30, 3), (1, 10, 1)], c.dump())
+
+    def test_randomized(self):
+        self.assertFalse(cache.InsertAfterKHitsCache(cache.LruCache(2)).randomized)
+        self.assertTrue(cache.RandInsertCache(cache.LruCache(2), 0.5).randomized)
+        self.assertTrue(cache.KeyValCache(cache.RandEvictionCache(2)).randomized)
+
+    def test_k_hits_clear(self):
+        c = cache.InsertAfterKHitsCache(cache.LruCache(2), k=2, memory=2)
+        c.put(1)
+        c.put(2)
+        c.put(2)
+        c.clear()
+        self.assertEqual(0, len(c))
+        self.assertEqual(0, len(c._metacache_hits))
+        self.assertEqual(0, len(c._metacache_queue))
+        self.assertIsNone(c.put(1))
+        self.assertFalse(c.has(1))
+
+    def test_invalid_cache(self):
+        self.assertRaises(TypeError, cache.CacheWrapper, 'cache')
+        self.assertRaises(ValueError, cache.InsertAfterKHitsCache,
+                          cache.LruCache(2), k=0)
+        self.assertRaises(ValueError, cache.RandInsertCache,
+                          cache.LruCache(2), 2)
+
+
+class TestBuildCache(unittest.TestCase):
+
+    def test_policy(self):
+        c = cache.build_cache({'name': 'SLRU', 'segments': 3}, 6)
+        self.assertIsInstance(c, cache.SegmentedLruCache)
+        self.assertEqual(6, c.maxlen)
+
+    def test_admission(self):
+        c = cache.build_cache({'name': 'FIFO', 'admission': 'K_HITS'}, 4)
+        self.assertIsInstance(c, cache.InsertAfterKHitsCache)
+        self.assertIsInstance(c.cache, cache.FifoCache)
+        c = cache.build_cache({'name': 'LRU', 'admission': {'name': 'K_HITS',
+                                                            'k': 3}}, 4)
+        c.put(1)
+        c.put(1)
+        self.assertFalse(c.has(1))
+        c.put(1)
+        self.assertTrue(c.has(1))
+        c = cache.build_cache({'name': 'LRU', 'admission': {'name': 'RAND',
+                                                            'p': 0}}, 4)
+        c.put(1)
+        self.assertFalse(c.has(1))
+
+    def test_ttl(self):
+        curr_time = 0
+        f_time = lambda: curr_time
+        c = cache.build_cache({'name': 'LRU', 'admission': 'K_HITS',
+                               'ttl': 5}, 4, f_time)
+        self.assertIsInstance(c, cache.TtlCache)
+        self.assertIsInstance(c.cache, cache.InsertAfterKHitsCache)
+        c.put(1)
+        c.put(1)
+        self.assertTrue(c.get(1))
+        curr_time = 6
+        self.assertFalse(c.get(1))
+        self.assertRaises(ValueError, cache.build_cache,
+                          {'name': 'LRU', 'ttl': 5}, 4)
+
+
+class TestBulkOperations(unittest.TestCase):
+
+    def workload(self, n=2000, seed=0):
+        rand = random.Random(seed)
+        return [rand.randint(1, 40) for _ in range(n)]
+
+    def scalar_get(self, c, keys, put_on_miss):
+        hits = []
+        for k in keys:
+            hit = c.get(k)
+            if not hit and put_on_miss:
+                c.put(k)
+            hits.append(hit)
+        return hits
+
+    def assert_equivalent(self, name, **params):
+        keys = self.workload()
+        c_scalar = CACHE_POLICY[name](10, **params)
+        c_bulk = CACHE_POLICY[name](10, **params)
+        # Both caches draw the same random numbers, if randomized
+        for put_on_miss in (True, False):
+            random.seed(put_on_miss)
+            hits = self.scalar_get(c_scalar, keys, put_on_miss)
+            random.seed(put_on_miss)
+            mask = c_bulk.get_many(keys, put_on_miss=put_on_miss)
+            self.assertEqual(bool, mask.dtype)
+            self.assertEqual(hits, mask.tolist())
+            self.assertEqual(c_scalar.dump(), c_bulk.dump())
+        self.assertEqual([c_scalar.has(k) for k in keys],
+                         c_bulk.has_many(keys).tolist())
+        random.seed(2)
+        evicted = [c_scalar.put(k) for k in keys[::-1]]
+        random.seed(2)
+        self.assertEqual([e for e in evicted if e is not None],
+                         c_bulk.put_many(keys[::-1]))
+        self.assertEqual(c_scalar.dump(), c_bulk.dump())
+
+    def test_lru(self):
+        self.assert_equivalent('LRU')
+
+    def test_fifo(self):
+        self.assert_equivalent('FIFO')
+
+    def test_rand(self):
+        self.assert_equivalent('RAND')
+
+    def test_in_cache_lfu(self):
+        self.assert_equivalent('IN_CACHE_LFU')
+
+    def test_perfect_lfu(self):
+        self.assert_equivalent('PERFECT_LFU')
+
+    def test_generic(self):
+        self.assert_equivalent('SLRU', segments=2)
+        self.assert_equivalent('ARC')
+
+    def test_array_keys(self):
+        c = cache.LruCache(4)
+        self.assertEqual([], c.put_many(np.arange(1, 4)))
+        self.assertEqual([3, 2, 1], c.dump())
+        self.assertIs(int, type(c.dump()[0]))
+        self.assertEqual([True, False], c.get_many(np.array([2, 5])).tolist())
+        self.assertEqual([2, 3, 1], c.dump())
+
+    def test_put_many_evicted(self):
+        c = cache.FifoCache(2)
+        self.assertEqual([1, 2], c.put_many([1, 2, 3, 3, 4]))
+        self.assertEqual([4, 3], c.dump())
+        c = cache.SizeLruCache(4)
+        c.put(1, size=2)
+        c.put(2, size=2)
+        self.assertEqual([1], c.put_many([3]))
+
+    def test_empty(self):
+        c = cache.LruCache(2)
+        self.assertEqual(0, len(c.get_many([])))
+        self.assertEqual(0, len(c.has_many(np.array([], dtype=int))))
+        self.assertEqual([], c.put_many([]))
+
+    def test_key_val(self):
+        c = cache.KeyValCache(cache.LruCache(2))
+        self.assertEqual([(1, 'a')], c.put_many([1, 2, 3], ['a', 'b', 'c']))
+        self.assertEqual(['c', None, 'b'], c.get_many([3, 1, 2]))
+        self.assertEqual([True, True], c.has_many([2, 3]).tolist())
+
+    def test_ttl(self):
+        curr_time = 0
+        f_time = lambda: curr_time
+        c = cache.TtlCache(cache.LruCache(4), f_time)
+        c.put(1, ttl=5)
+        c.put(2, ttl=15)
+        c.put(3)
+        curr_time = 10
+        self.assertEqual([False, True, True, False],
+                         c.has_many([1, 2, 3, 4]).tolist())
+        self.assertEqual([False, True],
+                         c.get_many([1, 2], put_on_miss=True).tolist())
+        self.assertTrue(c.has(1))
@@ -12,10 +12,23 @@ __all__ = [
 
 
 class Strategy(object):
-    """Base strategy imported by all other strategy classes"""
+    """Base strategy imported by all other strategy classes
+
+    Strategies supporting the fast execution of warmup events set the
+    `supports_warmup` attribute to *True* and implement the `warmup_event`
+    method.
+
+    Strategies which do not draw random numbers and whose only state evolving
+    over time is the content of caches set the `supports_checkpoint` attribute
+    to *True*. The warmup of these strategies can be replaced by restoring
+    previously checkpointed cache states.
+    """
 
     __metaclass__ = abc.ABCMeta
 
+    supports_warmup = False
+    supports_checkpoint = False
+
     def __init__(self, view, controller, **kwargs):
         """Constructor
 
@@ -54,6 +67,51 @@ class Strategy(object):
         raise NotImplementedError('The selected strategy must implement '
                                   'a process_event method')
 
+    def warmup_event(self, time, receiver, content):
+        """Process an event of the warmup phase, i.e. an event which is not
+        logged.
+
+        This method must only apply the cache state transitions that
+        `process_event` would apply to an event with *log* set to *False*,
+        leaving caches in exactly the same state, without opening a session
+        or reporting hops to data collectors.
+
+        Parameters
+        ----------
+        time : int
+            The timestamp of the event
+        receiver : any hashable type
+            The receiver node requesting a content
+        content : any hashable type
+            The content identifier requested by the receiver
+        """
+        raise NotImplementedError('The selected strategy does not support '
+                                  'fast warmup')
+
+    def _warmup_request(self, path, content):
+        """Forward a request along a path during the warmup phase, looking up
+        all caches until a hit or the end of the path.
+
+        Parameters
+        ----------
+        path : list
+            The request path, from receiver to source
+        content : any hashable type
+            The content identifier
+
+        Returns
+        -------
+        serving_node : any hashable type
+            The node serving the content
+        """
+        get_content = self.controller.warmup_get_content
+        has_cache = self.view.has_cache
+        for v in path[1:]:
+            if has_cache(v) and get_content(v, content):
+                return v
+        get_content(v, content)
+        return v
+
 
 
 @register_strategy('NO_CACHE')
@@ -65,6 +123,9 @@ class NoCache(Strategy):
     original source.
     """
 
+    supports_warmup = True
+    supports_checkpoint = True
+
     @inheritdoc(Strategy)
     def __init__(self, view, controller, **kwargs):
         super(NoCache, self).__init__(view, controller)
@@ -82,3 +143,8 @@ class NoCache(Strategy):
         path = list(reversed(path))
         self.controller.forward_content_path(source, receiver, path)
         self.controller.end_session()
+
+    @inheritdoc(Strategy)
+    def warmup_event(self, time, receiver, content):
+        # No caches, hence no state transitions
+        pass
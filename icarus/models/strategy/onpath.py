@@ -41,6 +41,9 @@ class Partition(Strategy):
     Cache (GGC) operates this way.
     """
 
+    supports_warmup = True
+    supports_checkpoint = True
+
     @inheritdoc(Strategy)
     def __init__(self, view, controller):
         super(Partition, self).__init__(view, controller)
@@ -64,6 +67,14 @@ class Partition(Strategy):
         self.controller.forward_content_path(cache, receiver)
         self.controller.end_session()
 
+    @inheritdoc(Strategy)
+    def warmup_event(self, time, receiver, content):
+        source = self.view.content_source(content)
+        cache = self.cache_assignment[receiver]
+        if not self.controller.warmup_get_content(cache, content):
+            self.controller.warmup_get_content(source, content)
+            self.controller.warmup_put_content(cache, content)
+
 
 @register_strategy('EDGE')
 class Edge(Strategy):
@@ -79,6 +90,9 @@ class Edge(Strategy):
     through the PoP but only for PoP-originated requests.
     """
 
+    supports_warmup = True
+    supports_checkpoint = True
+
     @inheritdoc(Strategy)
     def __init__(self, view, controller):
         super(Edge, self).__init__(view, controller)
@@ -115,6 +129,27 @@ class Edge(Strategy):
             self.controller.put_content(edge_cache)
         self.controller.end_session()
 
+    @inheritdoc(Strategy)
+    def warmup_event(self, time, receiver, content):
+        source = self.view.content_source(content)
+        path = self.view.shortest_path(receiver, source)
+        get_content = self.controller.warmup_get_content
+        edge_cache = None
+        for v in path[1:]:
+            if self.view.has_cache(v):
+                edge_cache = v
+                if get_content(v, content):
+                    serving_node = v
+                else:
+                    get_content(source, content)
+                    serving_node = source
+                break
+        else:
+            get_content(v, content)
+            serving_node = v
+        if serving_node == source:
+            self.controller.warmup_put_content(edge_cache, content)
+
 
 @register_strategy('LCE')
 class LeaveCopyEverywhere(Strategy):
@@ -124,6 +159,9 @@ class LeaveCopyEverywhere(Strategy):
     path between serving node and receiver.
     """
 
+    supports_warmup = True
+    supports_checkpoint = True
+
     @inheritdoc(Strategy)
     def __init__(self, view, controller, **kwargs):
         super(LeaveCopyEverywhere, self).__init__(view, controller)
@@ -153,6 +191,26 @@ class LeaveCopyEverywhere(Strategy):
                 self.controller.put_content(v)
         self.controller.end_session()
 
+    @inheritdoc(Strategy)
+    def warmup_event(self, time, receiver, content):
+        source = self.view.content_source(content)
+        path = self.view.shortest_path(receiver, source)
+        get_content = self.controller.warmup_get_content
+        has_cache = self.view.has_cache
+        # Mirror process_event, which looks up caches missing the content
+        # twice
+        for v in path[1:]:
+            if has_cache(v):
+                if get_content(v, content):
+                    serving_node = v
+                    break
+            get_content(v, content)
+            serving_node = v
+        path = self.view.shortest_path(receiver, serving_node)
+        for v in reversed(path[:-1]):
+            if has_cache(v):
+                self.controller.warmup_put_content(v, content)
+
 
 @register_strategy('LCD')
 class LeaveCopyDown(Strategy):
@@ -169,6 +227,9 @@ class LeaveCopyDown(Strategy):
           Available: http://cs-people.bu.edu/nlaout/analysis_PEVA.pdf
     """
 
+    supports_warmup = True
+    supports_checkpoint = True
+
     @inheritdoc(Strategy)
     def __init__(self, view, controller, **kwargs):
         super(LeaveCopyDown, self).__init__(view, controller)
@@ -202,10 +263,24 @@ class LeaveCopyDown(Strategy):
                 copied = True
         self.controller.end_session()
 
+    @inheritdoc(Strategy)
+    def warmup_event(self, time, receiver, content):
+        source = self.view.content_source(content)
+        serving_node = self._warmup_request(
+                            self.view.shortest_path(receiver, source), content)
+        path = self.view.shortest_path(receiver, serving_node)
+        for v in reversed(path[:-1]):
+            if v != receiver and self.view.has_cache(v):
+                self.controller.warmup_put_content(v, content)
+                break
+
 
 @register_strategy('TEST')
 class TestCache(Strategy):
 
+    supports_warmup = True
+    supports_checkpoint = True
+
     @inheritdoc(Strategy)
     def __init__(self, view, controller, **kwargs):
         super(TestCache, self).__init__(view, controller)
@@ -238,19 +313,40 @@ class TestCache(Strategy):
             if not copied and v != receiver and self.view.has_cache(v):
                 evicted = self.controller.put_content(v)
                 copied = True
-        # If data is evicted, copy it one level up the path
+        # If data is evicted, copy it one level up the path. Size-aware caches
+        # may evict several contents. The link load collector charges these
+        # hops at the size of the requested content
         if evicted and serving_node != source:
-        	evictedSource = self.view.content_source(evicted)
-        	path = self.view.shortest_path(serving_node, evictedSource)
-        	u, v = path_links(path)[0]
-        	temp = self.controller.session['content']
-        	if self.view.has_cache(v):
-        		self.controller.session['content'] = evicted
-        		self.controller.forward_content_hop(u, v)
-        		self.controller.put_content(v)
-        		self.controller.session['content'] = temp
+            temp = self.controller.session['content']
+            for e in (evicted if isinstance(evicted, list) else [evicted]):
+                evictedSource = self.view.content_source(e)
+                path = self.view.shortest_path(serving_node, evictedSource)
+                u, v = path_links(path)[0]
+                if self.view.has_cache(v):
+                    self.controller.session['content'] = e
+                    self.controller.forward_content_hop(u, v)
+                    self.controller.put_content(v)
+            self.controller.session['content'] = temp
         self.controller.end_session()
 
+    @inheritdoc(Strategy)
+    def warmup_event(self, time, receiver, content):
+        source = self.view.content_source(content)
+        serving_node = self._warmup_request(
+                            self.view.shortest_path(receiver, source), content)
+        path = self.view.shortest_path(receiver, serving_node)
+        evicted = None
+        for v in reversed(path[:-1]):
+            if v != receiver and self.view.has_cache(v):
+                evicted = self.controller.warmup_put_content(v, content)
+                break
+        if evicted and serving_node != source:
+            for e in (evicted if isinstance(evicted, list) else [evicted]):
+                path = self.view.shortest_path(serving_node,
+                                               self.view.content_source(e))
+                u, v = path_links(path)[0]
+                if self.view.has_cache(v):
+                    self.controller.warmup_put_content(v, e)
 
 
 @register_strategy('PROB_CACHE')
@@ -277,6 +373,8 @@ class ProbCache(Strategy):
           Available: http://doi.ieeecomputersociety.org/10.1109/TPDS.2013.304
     """
 
+    supports_warmup = True
+
     @inheritdoc(Strategy)
     def __init__(self, view, controller, t_tw=10):
         super(ProbCache, self).__init__(view, controller)
@@ -322,6 +420,25 @@ class ProbCache(Strategy):
                     self.controller.put_content(v)
         self.controller.end_session()
 
+    @inheritdoc(Strategy)
+    def warmup_event(self, time, receiver, content):
+        source = self.view.content_source(content)
+        serving_node = self._warmup_request(
+                            self.view.shortest_path(receiver, source), content)
+        path = list(reversed(self.view.shortest_path(receiver, serving_node)))
+        c = len([v for v in path if self.view.has_cache(v)])
+        x = 0.0
+        for hop in range(1, len(path)):
+            v = path[hop]
+            N = sum([self.cache_size[n] for n in path[hop - 1:]
+                     if n in self.cache_size])
+            if v in self.cache_size:
+                x += 1
+            if v != receiver and v in self.cache_size:
+                prob_cache = float(N) / (self.t_tw * self.cache_size[v]) * (x / c) ** c
+                if random.random() < prob_cache:
+                    self.controller.warmup_put_content(v, content)
+
 
 @register_strategy('CL4M')
 class CacheLessForMore(Strategy):
@@ -340,6 +457,9 @@ class CacheLessForMore(Strategy):
           Available: http://www.ee.ucl.ac.uk/~uceeips/centrality-networking12.pdf
     """
 
+    supports_warmup = True
+    supports_checkpoint = True
+
     @inheritdoc(Strategy)
     def __init__(self, view, controller, use_ego_betw=False, **kwargs):
         super(CacheLessForMore, self).__init__(view, controller)
@@ -386,6 +506,22 @@ class CacheLessForMore(Strategy):
                 self.controller.put_content(v)
         self.controller.end_session()
 
+    @inheritdoc(Strategy)
+    def warmup_event(self, time, receiver, content):
+        source = self.view.content_source(content)
+        serving_node = self._warmup_request(
+                            self.view.shortest_path(receiver, source), content)
+        path = list(reversed(self.view.shortest_path(receiver, serving_node)))
+        max_betw = -1
+        designated_cache = None
+        for v in path[1:]:
+            if self.view.has_cache(v):
+                if self.betw[v] >= max_betw:
+                    max_betw = self.betw[v]
+                    designated_cache = v
+        if designated_cache is not None:
+            self.controller.warmup_put_content(designated_cache, content)
+
 
 @register_strategy('RAND_BERNOULLI')
 class RandomBernoulli(Strategy):
@@ -395,6 +531,8 @@ class RandomBernoulli(Strategy):
     from serving node to receiver with probability *p*.
     """
 
+    supports_warmup = True
+
     @inheritdoc(Strategy)
     def __init__(self, view, controller, p=0.2, **kwargs):
         super(RandomBernoulli, self).__init__(view, controller)
@@ -426,6 +564,18 @@ class RandomBernoulli(Strategy):
                     self.controller.put_content(v)
         self.controller.end_session()
 
+    @inheritdoc(Strategy)
+    def warmup_event(self, time, receiver, content):
+        source = self.view.content_source(content)
+        serving_node = self._warmup_request(
+                            self.view.shortest_path(receiver, source), content)
+        path = self.view.shortest_path(receiver, serving_node)
+        for v in reversed(path[:-1]):
+            if v != receiver and self.view.has_cache(v):
+                if random.random() < self.p:
+                    self.controller.warmup_put_content(v, content)
+
+
 @register_strategy('RAND_CHOICE')
 class RandomChoice(Strategy):
     """Random choice strategy
@@ -434,6 +584,8 @@ class RandomChoice(Strategy):
     path from serving node to receiver selected randomly.
     """
 
+    supports_warmup = True
+
     @inheritdoc(Strategy)
     def __init__(self, view, controller, **kwargs):
         super(RandomChoice, self).__init__(view, controller)
@@ -464,3 +616,13 @@ class RandomChoice(Strategy):
             if v == designated_cache:
                 self.controller.put_content(v)
         self.controller.end_session()
+
+    @inheritdoc(Strategy)
+    def warmup_event(self, time, receiver, content):
+        source = self.view.content_source(content)
+        serving_node = self._warmup_request(
+                            self.view.shortest_path(receiver, source), content)
+        path = list(reversed(self.view.shortest_path(receiver, serving_node)))
+        caches = [v for v in path[1:-1] if self.view.has_cache(v)]
+        if len(caches) > 0:
+            self.controller.warmup_put_content(random.choice(caches), content)
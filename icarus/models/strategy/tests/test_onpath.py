@@ -1,3 +1,4 @@
+import random
 import unittest
 
 import fnss
@@ -466,3 +467,73 @@ class TestPartition(unittest.TestCase):
         self.assertSetEqual(set(exp_req_hops), set(summary['request_hops']))
         self.assertSetEqual(set(exp_cont_hops), set(summary['content_hops']))
         self.assertEqual("c2", summary['serving_node'])
+
+
+class TestWarmup(unittest.TestCase):
+
+    def build(self, topology, cache_policy):
+        model = NetworkModel(topology, cache_policy=cache_policy)
+        view = NetworkView(model)
+        controller = NetworkController(model)
+        collector = DummyCollector(view)
+        controller.attach_collector(collector)
+        return view, controller, collector
+
+    def assert_same_cache_state(self, topology, strategy_class, events,
+                                cache_policy={'name': 'LRU'}, **kwargs):
+        view, controller, _ = self.build(topology, cache_policy)
+        strategy_inst = strategy_class(view, controller, **kwargs)
+        random.seed(1)
+        for receiver, content in events:
+            strategy_inst.process_event(0, receiver, content, False)
+        fast_view, fast_controller, fast_collector = self.build(topology,
+                                                                cache_policy)
+        fast_strategy_inst = strategy_class(fast_view, fast_controller, **kwargs)
+        self.assertTrue(fast_strategy_inst.supports_warmup)
+        random.seed(1)
+        for receiver, content in events:
+            fast_strategy_inst.warmup_event(0, receiver, content)
+        self.assertIsNone(fast_controller.session)
+        self.assertEqual(view.cache_nodes(), fast_view.cache_nodes())
+        for v in view.cache_nodes():
+            self.assertEqual(view.cache_dump(v), fast_view.cache_dump(v))
+
+    def on_path_events(self):
+        rand = random.Random(0)
+        return [(rand.choice((0, 5)), rand.choice((1, 2, 3)))
+                for _ in range(50)]
+
+    def test_on_path(self):
+        topology = TestOnPath.on_path_topology()
+        events = self.on_path_events()
+        for strategy_class in (strategy.NoCache,
+                               strategy.LeaveCopyEverywhere,
+                               strategy.LeaveCopyDown,
+                               strategy.TestCache,
+                               strategy.Edge,
+                               strategy.ProbCache,
+                               strategy.CacheLessForMore,
+                               strategy.RandomBernoulli,
+                               strategy.RandomChoice):
+            self.assert_same_cache_state(topology, strategy_class, events)
+
+    def test_lce_double_lookup(self):
+        # Perfect LFU counts all lookups, including those missing the content
+        topology = TestOnPath.on_path_topology()
+        self.assert_same_cache_state(topology, strategy.LeaveCopyEverywhere,
+                                     self.on_path_events(),
+                                     cache_policy={'name': 'PERFECT_LFU'})
+
+    def test_size_aware(self):
+        # Size-aware caches return the list of evicted contents
+        topology = TestOnPath.on_path_topology()
+        self.assert_same_cache_state(topology, strategy.TestCache,
+                                     self.on_path_events(),
+                                     cache_policy={'name': 'SIZE_LRU'})
+
+    def test_partition(self):
+        topology = TestPartition.partition_topology()
+        rand = random.Random(0)
+        events = [(rand.choice(("r1", "r2")), rand.choice((1, 2, 3, 4)))
+                  for _ in range(50)]
+        self.assert_same_cache_state(topology, strategy.Partition, events)
@@ -12,19 +12,57 @@ import copy
 import sys
 import signal
 import traceback
+import random
+import inspect
+import os
+import shutil
+import tempfile
+import threading
+import json
+import math
+import functools
 
-from icarus.execution import exec_experiment
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+import numpy as np
+import networkx as nx
+
+from icarus.execution import exec_experiment, build_route_table, \
+                             CheckpointStore, Instrumentation
+from icarus.scenarios import PackedWorkload
 from icarus.registry import TOPOLOGY_FACTORY, CACHE_PLACEMENT, CONTENT_PLACEMENT, \
-                            CACHE_POLICY, WORKLOAD, DATA_COLLECTOR, STRATEGY
+                            CACHE_POLICY, CACHE_ADMISSION, WORKLOAD, \
+                            DATA_COLLECTOR, STRATEGY, EXECUTION_BACKEND
 from icarus.results import ResultSet
-from icarus.util import SequenceNumber, timestr
+from icarus.tools import means_confidence_interval
+from icarus.util import SequenceNumber, timestr, tree_hash
 
 
-__all__ = ['Orchestrator', 'run_scenario']
+__all__ = [
+    'Orchestrator',
+    'ResultsLog',
+    'DurationHistory',
+    'run_scenario',
+    'warmup_scenario_key',
+    'workload_key',
+    'Scenario',
+    'ScenarioCache',
+    'build_scenario',
+    'build_workload',
+           ]
 
 
 logger = logging.getLogger('orchestration')
 
+# Key of the results under which instrumentation measurements are stored
+INSTRUMENTATION_KEY = 'INSTRUMENTATION'
+
+# Scenarios built by this process, reused by all the experiments it runs
+_scenario_cache = None
+
 
 class Orchestrator(object):
     """Orchestrator.
@@ -33,7 +71,8 @@ class Orchestrator(object):
     aggregate results.
     """
 
-    def __init__(self, settings, summary_freq=4):
+    def __init__(self, settings, summary_freq=4, results_log=None,
+                 resume=False):
         """Constructor
 
         Parameters
@@ -43,93 +82,385 @@ class Orchestrator(object):
         summary_freq : int
             Frequency (in number of experiment) at which summary messages
             are displayed
+        results_log : str, optional
+            The file of the log to which the results of each experiment are
+            appended as soon as it finishes
+        resume : bool, optional
+            If *True*, the results already in the log are loaded and the
+            experiments they belong to are not run again. Otherwise, the log
+            is cleared.
         """
         self.settings = settings
         self.results = ResultSet()
+        self.results_log = ResultsLog(results_log) \
+                           if results_log is not None else None
+        self.resume = resume
         self.seq = SequenceNumber()
         self.exp_durations = collections.deque(maxlen=30)
         self.n_success = 0
         self.n_fail = 0
         self.summary_freq = summary_freq
         self._stop = False
-        if self.settings.PARALLEL_EXECUTION:
-            self.pool = mp.Pool(settings.N_PROCESSES)
+        # Directory of the workloads shared by all experiments
+        self.workload_dir = None
+        # Durations of experiments run in this and previous campaigns
+        self.durations = DurationHistory(settings.JOB_DURATIONS_FILE
+                                         if 'JOB_DURATIONS_FILE' in settings
+                                         else None)
+        # Expected durations and number of replications of the experiments
+        # not completed yet, keyed by the digest of their parameters
+        self._expected = {}
+        self._pending = collections.Counter()
+        # Sums of actual and expected durations of completed experiments
+        # whose duration was expected, to calibrate expected durations
+        self._actual_cost = 0
+        self._expected_cost = 0
+        # Metrics whose confidence intervals determine the number of
+        # replications of experiments, if replications are adaptive
+        self.adaptive_metrics = [tuple(metric) for metric in
+                                 settings.ADAPTIVE_REPLICATION_METRICS] \
+                                if 'ADAPTIVE_REPLICATION_METRICS' in settings \
+                                else []
+        if self.adaptive_metrics and \
+                'ADAPTIVE_REPLICATION_CI_WIDTH' not in settings:
+            raise ValueError('ADAPTIVE_REPLICATION_CI_WIDTH setting is '
+                             'required by adaptive replication')
+        for metric in self.adaptive_metrics:
+            if metric[0] not in settings.DATA_COLLECTORS:
+                raise ValueError('Metric %s of adaptive replication is not '
+                                 'measured by any data collector'
+                                 % '.'.join(metric))
+        # Values of adaptive replication metrics and number of replications
+        # run, keyed by the digest of the parameters of experiments
+        self._samples = collections.defaultdict(
+                                lambda: collections.defaultdict(list))
+        self._attempts = collections.Counter()
+        # Number of replications of each experiment running in the backend
+        # and experiments all of whose running replications finished, whose
+        # confidence intervals are still to be checked
+        self._running = collections.Counter()
+        self._to_check = collections.deque()
+        # Notified whenever an experiment run by the backend finishes
+        self._finished = threading.Condition()
+        if 'EXECUTION_BACKEND' in settings:
+            backend = settings.EXECUTION_BACKEND
+        else:
+            backend = 'POOL' if settings.PARALLEL_EXECUTION else 'SERIAL'
+        if backend not in EXECUTION_BACKEND:
+            raise ValueError('Execution backend %s not supported' % backend)
+        self.backend = EXECUTION_BACKEND[backend](settings)
 
     def stop(self):
         """Stop the execution of the orchestrator
         """
         logger.info('Orchestrator is stopping')
         self._stop = True
-        if self.settings.PARALLEL_EXECUTION:
-            self.pool.terminate()
-            self.pool.join()
+        self.backend.terminate()
+        self.backend.join()
 
     def run(self):
         """Run the orchestrator.
 
-        This call is blocking, whether multiple processes are used or not. This
-        methods returns only after all experiments are executed.
+        This call is blocking, whatever the execution backend. This methods
+        returns only after all experiments are executed.
         """
-        # Create queue of experiment configurations
-        queue = collections.deque(self.settings.EXPERIMENT_QUEUE)
+        # Create queue of experiment configurations and of the number of
+        # replications of each to run
+        queue = collections.deque((experiment, self.settings.N_REPLICATIONS)
+                                  for experiment in
+                                  self.settings.EXPERIMENT_QUEUE)
+        if self.results_log is not None:
+            if self.resume:
+                queue = self.load_completed(queue)
+            else:
+                self.results_log.clear()
         # Calculate number of experiments and number of processes
-        self.n_exp = len(queue) * self.settings.N_REPLICATIONS
-        self.n_proc = self.settings.N_PROCESSES \
-                      if self.settings.PARALLEL_EXECUTION \
-                      else 1
-        logger.info('Starting simulations: %d experiments, %d process(es)'
-                    % (self.n_exp, self.n_proc))
-
-        if self.settings.PARALLEL_EXECUTION:
-            # Starting from Python 3.2, multiprocessing.Pool.apply_async
-            # accepts a new error_callback argument that is a callable for
-            # returning a message when uncaught errors are thrown.
-            # The following lines ensure compatibility with Python < 3.2
-            callbacks = {"callback": self.experiment_callback}
-            if sys.version_info > (3, 2):
-                callbacks["error_callback"] = self.error_callback
-            # This job queue is used only to keep track of which jobs have
-            # finished and which are still running. Currently this information
-            # is used only to handle keyboard interrupts correctly
-            job_queue = collections.deque()
-            # Schedule experiments from the queue
-            while queue:
-                experiment = queue.popleft()
-                for _ in range(self.settings.N_REPLICATIONS):
-                    job_queue.append(self.pool.apply_async(run_scenario,
-                            args=(self.settings, experiment,
-                                  self.seq.assign(), self.n_exp),
-                            **callbacks))
-            self.pool.close()
-            # This solution is probably not optimal, but at least makes
-            # KeyboardInterrupt work fine, which is crucial if launching the
-            # simulation remotely via screen.
-            # What happens here is that we keep waiting for possible
-            # KeyboardInterrupts till the last process terminates successfully.
-            # We may have to wait up to 5 seconds after the last process
-            # terminates before exiting, which is really negligible
+        self.n_exp = sum(n_replications for _, n_replications in queue)
+        scheduled = self.schedule(queue)
+        logger.info('Starting simulations: %d experiments, %d worker(s)'
+                    % (self.n_exp, self.backend.n_workers))
+
+        if 'SHARE_WORKLOADS' in self.settings and self.settings.SHARE_WORKLOADS:
+            self.workload_dir = tempfile.mkdtemp(prefix='icarus-workloads-')
             try:
-                while job_queue:
-                    job = job_queue.popleft()
-                    while not job.ready():
-                        time.sleep(5)
-            except KeyboardInterrupt:
-                self.pool.terminate()
-            self.pool.join()
-
-        else:  # Single-process execution
-            while queue:
-                experiment = queue.popleft()
-                for _ in range(self.settings.N_REPLICATIONS):
-                    self.experiment_callback(run_scenario(self.settings,
-                                            experiment, self.seq.assign(),
-                                            self.n_exp))
-                    if self._stop:
-                        self.stop()
+                self.pack_workloads([experiment for experiment, _ in queue])
+            except Exception:
+                self.remove_workloads()
+                raise
+
+        self._n_running = 0
+        # Callbacks of the serial backend run while submitting, hence the
+        # lock of the condition must be reentrant
+        with self._finished:
+            # Schedule longest experiments first, so that they do not delay
+            # the end of the campaign
+            for experiment, n_replications in scheduled:
+                if self._stop:
+                    break
+                if n_replications > 0:
+                    self._submit(experiment, n_replications)
+                elif self.adaptive_metrics:
+                    self._to_check.append(experiment)
+        # Wait until callbacks report that all experiments finished,
+        # scheduling more replications of those whose confidence intervals
+        # are too wide. The wait is woken up by each completion and is
+        # bounded only so that KeyboardInterrupt is handled, which is crucial
+        # if launching the simulation remotely via screen.
+        try:
+            with self._finished:
+                while not self._stop:
+                    while self._to_check:
+                        experiment = self._to_check.popleft()
+                        self._submit(experiment,
+                                     self.extra_replications(experiment))
+                    if self._n_running == 0:
+                        break
+                    self._finished.wait(1)
+        except KeyboardInterrupt:
+            self.backend.terminate()
+        self.backend.close()
+        self.backend.join()
 
+        self.remove_workloads()
+        try:
+            self.durations.save()
+        except (IOError, OSError) as e:
+            logger.warning('Could not save durations of experiments: %s', e)
         logger.info('END | Planned: %d, Completed: %d, Succeeded: %d, Failed: %d',
                     self.n_exp, self.n_fail + self.n_success, self.n_success, self.n_fail)
 
+    def schedule(self, queue):
+        """Record the expected durations of the experiments of a queue and
+        return them in decreasing order of expected duration
+
+        Experiments are expected to last as long as in previous campaigns.
+        Experiments never run before are considered the longest and keep
+        their order.
+
+        Parameters
+        ----------
+        queue : iterable
+            Queue of (experiment parameters, number of replications) tuples
+
+        Returns
+        -------
+        queue : deque
+            The queue sorted by decreasing expected duration
+        """
+        for experiment, n_replications in queue:
+            key = tree_hash(experiment)
+            self._expected[key] = self.durations.get(key)
+            self._pending[key] += n_replications
+
+        def expected_duration(item):
+            duration = self._expected[tree_hash(item[0])]
+            return float('inf') if duration is None else duration
+
+        return collections.deque(sorted(queue, key=expected_duration,
+                                        reverse=True))
+
+    def eta(self):
+        """Return the expected time needed to complete all experiments not
+        completed yet
+
+        The duration of each experiment is expected to be the one recorded
+        in previous campaigns, scaled by the ratio between actual and expected
+        durations of the experiments completed so far, or, for experiments
+        never run before, the mean duration of the latest experiments.
+
+        Returns
+        -------
+        eta : float
+            The expected time in seconds
+        """
+        ratio = self._actual_cost / self._expected_cost \
+                if self._expected_cost > 0 else 1
+        mean_duration = sum(self.exp_durations) / len(self.exp_durations) \
+                        if self.exp_durations else 0
+        cost = 0
+        for key, n_pending in self._pending.items():
+            expected = self._expected[key]
+            cost += n_pending * (mean_duration if expected is None
+                                 else ratio * expected)
+        return cost / self.backend.n_workers
+
+    def _submit(self, experiment, n_replications):
+        """Submit replications of an experiment to the execution backend"""
+        key = tree_hash(experiment)
+        callback = functools.partial(self._job_finished, experiment,
+                                     self.experiment_callback)
+        error_callback = functools.partial(self._job_finished, experiment,
+                                           self.error_callback)
+        for _ in range(n_replications):
+            if self._stop:
+                break
+            self._running[key] += 1
+            self._attempts[key] += 1
+            self._n_running += 1
+            self.backend.submit(run_scenario,
+                                (self.settings, experiment, self.seq.assign(),
+                                 self.n_exp, self.workload_dir),
+                                callback, error_callback)
+
+    def _job_finished(self, experiment, callback, arg):
+        """Handle the outcome of an experiment run by the backend and wake up
+        the wait for the experiments"""
+        try:
+            callback(arg)
+        finally:
+            with self._finished:
+                key = tree_hash(experiment)
+                self._n_running -= 1
+                self._running[key] -= 1
+                if self._running[key] == 0 and self.adaptive_metrics:
+                    self._to_check.append(experiment)
+                self._finished.notify()
+
+    def extra_replications(self, experiment):
+        """Return the number of further replications of an experiment needed
+        for the confidence intervals of all adaptive replication metrics to
+        be narrower than the target width, and add them to the planned ones
+
+        The number of replications is estimated assuming that the width of
+        confidence intervals is inversely proportional to the square root of
+        the number of replications. At least two replications are run and
+        at most *MAX_REPLICATIONS*, including failed ones.
+
+        Parameters
+        ----------
+        experiment : Tree
+            The parameters of the experiment
+
+        Returns
+        -------
+        n_replications : int
+            The number of further replications, 0 if the intervals are narrow
+            enough, the maximum number of replications is reached or
+            replications are not adaptive
+        """
+        if not self.adaptive_metrics:
+            return 0
+        key = tree_hash(experiment)
+        max_replications = self.settings.MAX_REPLICATIONS \
+                           if 'MAX_REPLICATIONS' in self.settings else 20
+        budget = max_replications - self._attempts[key]
+        if budget <= 0:
+            return 0
+        samples = self._samples[key]
+        n = min(len(samples[metric]) for metric in self.adaptive_metrics)
+        if n < 2:
+            n_replications = 2 - n
+        else:
+            confidence = self.settings.ADAPTIVE_REPLICATION_CONFIDENCE \
+                         if 'ADAPTIVE_REPLICATION_CONFIDENCE' in self.settings \
+                         else 0.95
+            ratio = max(2 * means_confidence_interval(samples[metric],
+                                                      confidence)[1]
+                        for metric in self.adaptive_metrics) \
+                    / self.settings.ADAPTIVE_REPLICATION_CI_WIDTH
+            if ratio <= 1:
+                return 0
+            n_replications = max(1, int(math.ceil(n * ratio ** 2)) - n)
+        n_replications = min(n_replications, budget)
+        self.n_exp += n_replications
+        self._pending[key] += n_replications
+        logger.info('Scheduling %d more replications of experiment: %s',
+                    n_replications, experiment.get('desc', key))
+        return n_replications
+
+    def _record_samples(self, params, results):
+        """Record the values of adaptive replication metrics of an experiment
+        """
+        samples = self._samples[tree_hash(params)]
+        for metric in self.adaptive_metrics:
+            value = results.getval(metric)
+            if value is not None:
+                samples[metric].append(value)
+
+    def load_completed(self, queue):
+        """Load the results stored in the results log and remove the
+        experiments they belong to from a queue
+
+        Experiments are identified by the digest of their parameters, so
+        that an experiment is considered completed only if it was run with
+        exactly the same parameters.
+
+        Parameters
+        ----------
+        queue : iterable
+            Queue of (experiment parameters, number of replications) tuples
+
+        Returns
+        -------
+        queue : deque
+            Queue of the experiments still to run and of the number of their
+            replications still to run
+        """
+        completed = collections.Counter()
+        for params, results, duration in self.results_log.read():
+            self.results.add(params, results)
+            self._record_samples(params, results)
+            completed[tree_hash(params)] += 1
+        logger.info('Loaded results of %d completed experiments from %s',
+                    sum(completed.values()), self.results_log.path)
+        remaining = collections.deque()
+        for experiment, n_replications in queue:
+            key = tree_hash(experiment)
+            n_completed = min(completed[key], n_replications)
+            completed[key] -= n_completed
+            self._attempts[key] += n_completed
+            if n_replications > n_completed:
+                remaining.append((experiment, n_replications - n_completed))
+            elif self.adaptive_metrics:
+                # Replications may still be needed to narrow its confidence
+                # intervals
+                remaining.append((experiment, 0))
+        return remaining
+
+    def pack_workloads(self, experiments):
+        """Generate the events of all the distinct workloads of a list of
+        experiments and save them in the workload directory, from which they
+        are memory-mapped by the experiments running them.
+
+        All experiments sharing a workload then receive the same sequence of
+        requests, regardless of the random numbers drawn by strategies and
+        cache policies, which draw them from the state of the random
+        generators saved after generating the events. Only reproducible workloads (see `workload_key`)
+        implementing the `chunks` method and having numeric content
+        identifiers are packed. Each distinct workload is generated once,
+        without placing caches or building routes.
+
+        Parameters
+        ----------
+        experiments : iterable
+            The parameter trees of the experiments
+        """
+        chunk_size = self.settings.EVENT_CHUNK_SIZE \
+                     if 'EVENT_CHUNK_SIZE' in self.settings else 10000
+        # Keys of workloads already packed or that cannot be packed
+        done = set()
+        for params in experiments:
+            key = workload_key(params)
+            if key is None or key in done:
+                continue
+            done.add(key)
+            workload = build_workload(params)
+            if not hasattr(workload, 'chunks'):
+                continue
+            try:
+                packed = PackedWorkload.from_workload(workload, chunk_size)
+            except ValueError as e:
+                logger.warning('Workload not shared: %s', e)
+                continue
+            packed.save(os.path.join(self.workload_dir, key))
+            logger.info('Packed workload %s: %d events', key, len(packed))
+
+    def remove_workloads(self):
+        """Remove the workloads shared by experiments"""
+        if self.workload_dir is not None:
+            shutil.rmtree(self.workload_dir, ignore_errors=True)
+            self.workload_dir = None
+
     def error_callback(self, msg):
         """Callback method called in case of error in Python > 3.2
 
@@ -157,21 +488,178 @@ class Orchestrator(object):
         # Extract parameters
         params, results, duration = args
         self.n_success += 1
+        key = tree_hash(params)
+        self.durations.add(key, duration)
+        if self._pending[key] > 0:
+            self._pending[key] -= 1
+            if self._expected.get(key) is not None:
+                self._actual_cost += duration
+                self._expected_cost += self._expected[key]
         # Store results
         self.results.add(params, results)
+        self._record_samples(params, results)
+        if self.results_log is not None:
+            try:
+                self.results_log.append(params, results, duration)
+            except (IOError, OSError) as e:
+                logger.error('Could not append results to log: %s', e)
         self.exp_durations.append(duration)
         if self.n_success % self.summary_freq == 0:
             # Number of experiments scheduled to be executed
             n_scheduled = self.n_exp - (self.n_fail + self.n_success)
-            # Compute ETA
-            n_cores = min(mp.cpu_count(), self.n_proc)
-            mean_duration = sum(self.exp_durations) / len(self.exp_durations)
-            eta = timestr(n_scheduled * mean_duration / n_cores, False)
+            eta = timestr(self.eta(), False)
             # Print summary
-            logger.info('SUMMARY | Completed: %d, Failed: %d, Scheduled: %d, ETA: %s',
-                        self.n_success, self.n_fail, n_scheduled, eta)
+            logger.info('SUMMARY | Completed: %d (%.1f%%), Failed: %d, Scheduled: %d, ETA: %s',
+                        self.n_success, 100 * (self.n_success + self.n_fail) / self.n_exp,
+                        self.n_fail, n_scheduled, eta)
+
+
+class DurationHistory(object):
+    """Mean durations of experiments, recorded across campaigns.
+
+    Durations are keyed by the digest of the parameters of the experiments
+    and stored in a JSON file.
+    """
+
+    def __init__(self, path=None):
+        """Constructor
+
+        Parameters
+        ----------
+        path : str, optional
+            The file where durations are stored. If not specified, durations
+            are only recorded in memory.
+        """
+        self.path = path
+        # Map each key to a [mean duration, number of experiments] list
+        self._durations = {}
+        if path is not None and os.path.isfile(path):
+            try:
+                with open(path) as f:
+                    self._durations = json.load(f)
+            except ValueError:
+                logger.warning('Durations file %s is corrupted and is ignored',
+                               path)
+
+    def __len__(self):
+        return len(self._durations)
+
+    def get(self, key):
+        """Return the mean duration of the experiments with a given key
+
+        Parameters
+        ----------
+        key : str
+            The digest of the parameters of the experiments
+
+        Returns
+        -------
+        duration : float
+            The mean duration in seconds or *None* if no experiment with the
+            key was recorded
+        """
+        return self._durations[key][0] if key in self._durations else None
+
+    def add(self, key, duration):
+        """Record the duration of an experiment
+
+        Parameters
+        ----------
+        key : str
+            The digest of the parameters of the experiment
+        duration : float
+            The duration in seconds
+        """
+        mean, n = self._durations.get(key, (0.0, 0))
+        self._durations[key] = [(mean * n + duration) / (n + 1), n + 1]
 
-def run_scenario(settings, params, curr_exp, n_exp):
+    def save(self):
+        """Write the durations to the file, if any"""
+        if self.path is None:
+            return
+        path = os.path.abspath(self.path)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                        suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self._durations, f)
+        os.rename(tmp_path, path)
+
+
+class ResultsLog(object):
+    """Durable log of the results of the experiments of a campaign.
+
+    The results of each experiment are appended to the log and flushed to
+    disk as soon as the experiment finishes, so that they survive a crash of
+    the simulator. A record left incomplete by a crash while it was written
+    is discarded when the log is read.
+    """
+
+    def __init__(self, path):
+        """Constructor
+
+        Parameters
+        ----------
+        path : str
+            The file of the log. It is created if it does not exist.
+        """
+        self.path = path
+
+    def append(self, params, results, duration):
+        """Append the results of an experiment to the log
+
+        Parameters
+        ----------
+        params : Tree
+            The parameters of the experiment
+        results : Tree
+            The results of the experiment
+        duration : float
+            The duration of the experiment in seconds
+        """
+        with open(self.path, 'ab') as f:
+            pickle.dump((params, results, duration), f,
+                        pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self):
+        """Return all the records of the log
+
+        An incomplete record at the end of the log is discarded and removed
+        from it, so that further records can be appended.
+
+        Returns
+        -------
+        records : list
+            List of (params, results, duration) tuples, in the order in which
+            they were appended
+        """
+        records = []
+        if not os.path.isfile(self.path):
+            return records
+        with open(self.path, 'rb') as f:
+            offset = 0
+            while True:
+                try:
+                    records.append(pickle.load(f))
+                except EOFError:
+                    break
+                except Exception:
+                    logger.warning('Discarding incomplete record at the end '
+                                   'of results log %s', self.path)
+                    break
+                offset = f.tell()
+        if offset < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(offset)
+        return records
+
+    def clear(self):
+        """Remove all records from the log"""
+        open(self.path, 'wb').close()
+
+
+def run_scenario(settings, params, curr_exp, n_exp, workload_dir=None):
     """Run a single scenario experiment
 
     Parameters
@@ -184,6 +672,10 @@ def run_scenario(settings, params, curr_exp, n_exp):
         sequence number of the experiment
     n_exp : int
         Number of scheduled experiments
+    workload_dir : str, optional
+        Directory of the workloads packed by the orchestrator. If the
+        workload of the experiment is there, it is used instead of generating
+        events.
 
     Returns
     -------
@@ -193,6 +685,12 @@ def run_scenario(settings, params, curr_exp, n_exp):
         is a dictionary which stores the results. The third element is an
         integer expressing the wall-clock duration of the experiment (in
         seconds)
+
+    Notes
+    -----
+    If the *INSTRUMENTATION* setting is enabled, the performance measurements
+    of the simulator collected during the experiment (see `Instrumentation`)
+    are stored in the results under the reserved *INSTRUMENTATION* key.
     """
     try:
         start_time = time.time()
@@ -205,48 +703,51 @@ def run_scenario(settings, params, curr_exp, n_exp):
         # Copy parameters so that they can be manipulated
         tree = copy.deepcopy(params)
 
-        # Set topology
-        topology_spec = tree['topology']
-        topology_name = topology_spec.pop('name')
+        topology_name = tree['topology']['name']
         if topology_name not in TOPOLOGY_FACTORY:
             logger.error('No topology factory implementation for %s was found.'
                          % topology_name)
             return None
-        topology = TOPOLOGY_FACTORY[topology_name](**topology_spec)
 
-        workload_spec = tree['workload']
-        workload_name = workload_spec.pop('name')
+        workload_name = tree['workload']['name']
         if workload_name not in WORKLOAD:
             logger.error('No workload implementation named %s was found.'
                          % workload_name)
             return None
-        workload = WORKLOAD[workload_name](topology, **workload_spec)
 
-        # Assign caches to nodes
         if 'cache_placement' in tree:
-            cachepl_spec = tree['cache_placement']
-            cachepl_name = cachepl_spec.pop('name')
+            cachepl_name = tree['cache_placement']['name']
             if cachepl_name not in CACHE_PLACEMENT:
                 logger.error('No cache placement named %s was found.'
                              % cachepl_name)
                 return None
-            network_cache = cachepl_spec.pop('network_cache')
-            # Cache budget is the cumulative number of cache entries across
-            # the whole network
-            cachepl_spec['cache_budget'] = workload.n_contents * network_cache
-            CACHE_PLACEMENT[cachepl_name](topology, **cachepl_spec)
 
-        # Assign contents to sources
-        # If there are many contents, after doing this, performing operations
-        # requiring a topology deep copy, i.e. to_directed/undirected, will
-        # take long.
-        contpl_spec = tree['content_placement']
-        contpl_name = contpl_spec.pop('name')
+        contpl_name = tree['content_placement']['name']
         if contpl_name not in CONTENT_PLACEMENT:
             logger.error('No content placement implementation named %s was found.'
                          % contpl_name)
             return None
-        CONTENT_PLACEMENT[contpl_name](topology, workload.contents, **contpl_spec)
+
+        instrumentation = None
+        if 'INSTRUMENTATION' in settings and settings.INSTRUMENTATION:
+            profile = settings.INSTRUMENTATION_PROFILE \
+                      if 'INSTRUMENTATION_PROFILE' in settings else False
+            instrumentation = Instrumentation(profile)
+
+        # Build topology, workload, cache and content placement and routes or
+        # reuse them if already built for a previous experiment
+        setup = _get_scenario_cache(settings).get(tree, instrumentation)
+        # The topology may be modified during the experiment
+        topology = type(setup.topology)(setup.topology)
+        workload = setup.workload
+        if workload_dir is not None:
+            key = workload_key(tree)
+            path = os.path.join(workload_dir, key) if key is not None else None
+            if path is not None and os.path.isdir(path):
+                workload = PackedWorkload.load(path)
+                # Otherwise strategies would draw the random numbers from
+                # which the events of the workload were generated
+                workload.restore_random_state()
 
         # caching and routing strategy definition
         strategy = tree['strategy']
@@ -259,6 +760,12 @@ def run_scenario(settings, params, curr_exp, n_exp):
         if cache_policy['name'] not in CACHE_POLICY:
             logger.error('No implementation of cache policy %s was found.' % cache_policy['name'])
             return None
+        admission = cache_policy.get('admission')
+        if isinstance(admission, dict):
+            admission = admission.get('name')
+        if admission is not None and admission not in CACHE_ADMISSION:
+            logger.error('No implementation of cache admission policy %s was found.' % admission)
+            return None
 
         # Configuration parameters of network model
         netconf = tree['netconf']
@@ -275,7 +782,20 @@ def run_scenario(settings, params, curr_exp, n_exp):
         collectors = {m: {} for m in metrics}
 
         logger.info('Experiment %d/%d | Start simulation', curr_exp, n_exp)
-        results = exec_experiment(topology, workload, netconf, strategy, cache_policy, collectors)
+        chunk_size = settings.EVENT_CHUNK_SIZE if 'EVENT_CHUNK_SIZE' in settings else None
+        fast_warmup = settings.FAST_WARMUP if 'FAST_WARMUP' in settings else False
+        checkpoints = scenario_key = None
+        if 'WARMUP_CHECKPOINT_DIR' in settings and \
+                params['workload'].get('seed') is not None:
+            checkpoints = CheckpointStore(settings.WARMUP_CHECKPOINT_DIR)
+            scenario_key = warmup_scenario_key(params)
+        results = exec_experiment(topology, workload, netconf,
+                                  strategy, cache_policy, collectors,
+                                  chunk_size, fast_warmup, checkpoints,
+                                  scenario_key, setup.route_table,
+                                  instrumentation)
+        if instrumentation is not None:
+            results[INSTRUMENTATION_KEY] = instrumentation.results()
 
         duration = time.time() - start_time
         logger.info('Experiment %d/%d | End simulation | Duration %s.',
@@ -290,3 +810,347 @@ def run_scenario(settings, params, curr_exp, n_exp):
         logger.error('Experiment %d/%d | Failed | %s: %s\n%s',
                      curr_exp, n_exp, err_type, err_message,
                      traceback.format_exc())
+
+
+def warmup_scenario_key(params):
+    """Return a digest of the parameters determining the warmup of an
+    experiment.
+
+    All parameters are considered except the description of the experiment
+    and the number of measured requests of the workload.
+
+    Parameters
+    ----------
+    params : Tree
+        experiment parameters tree
+
+    Returns
+    -------
+    key : str
+        The digest of the parameters
+    """
+    tree = copy.deepcopy(params)
+    tree.pop('desc', None)
+    tree['workload'].pop('n_measured', None)
+    return tree_hash(tree)
+
+
+def workload_key(params):
+    """Return the key of the workload of an experiment, shared by all the
+    experiments generating the same sequence of requests.
+
+    Only the topology, workload and content placement parameters are
+    considered. The content placement must be seeded because the workload
+    draws its events from the random state it leaves, which otherwise
+    depends on the random numbers drawn by the cache placement.
+
+    Parameters
+    ----------
+    params : Tree
+        experiment parameters tree
+
+    Returns
+    -------
+    key : str
+        The key of the workload or *None* if its generation is not
+        reproducible, i.e. if the topology factory or the workload accept a
+        seed but are not given one or if the content placement is not seeded
+    """
+    components = ('topology', 'workload', 'content_placement')
+    if not _reproducible(params, components) or \
+            params['content_placement'].get('seed') is None:
+        return None
+    return tree_hash({name: params[name] for name in components})
+
+
+class Scenario(collections.namedtuple('Scenario',
+                                      ['topology', 'workload', 'route_table',
+                                       'random_state'])):
+    """Ready-built scenario, shared by all the experiments run on it.
+
+    Scenario objects must not be modified. Their topology is frozen and
+    experiments work on copies of it and of the route table.
+
+    Attributes
+    ----------
+    topology : Topology
+        The topology, with caches and contents placed
+    workload : iterable
+        The workload
+    route_table : RouteTable
+        The route table of the topology
+    random_state : tuple
+        The states of the random number generators of the *random* and
+        *numpy.random* modules after building the scenario
+    """
+    __slots__ = ()
+
+    def restore_random_state(self):
+        """Reset the random number generators to the state they were in after
+        building the scenario, so that experiments run on a reused scenario
+        draw the same numbers as if they had built it
+        """
+        random.setstate(self.random_state[0])
+        np.random.set_state(self.random_state[1])
+
+
+def build_scenario(params, instrumentation=None):
+    """Build the scenario of an experiment, i.e. its topology, workload, cache
+    and content placement and route table
+
+    Parameters
+    ----------
+    params : Tree
+        experiment parameters tree. Only the *topology*, *workload*,
+        *cache_placement*, *content_placement* and *netconf* subtrees are
+        used.
+    instrumentation : Instrumentation, optional
+        If specified, the time taken by each step of the construction is
+        recorded in it
+
+    Returns
+    -------
+    scenario : Scenario
+        The scenario
+    """
+    if instrumentation is None:
+        instrumentation = Instrumentation()
+    tree = copy.deepcopy(params)
+    topology, workload = _build_topology_workload(tree, instrumentation)
+
+    # Assign caches to nodes
+    if 'cache_placement' in tree:
+        with instrumentation.phase('CACHE_PLACEMENT'):
+            cachepl_spec = tree['cache_placement']
+            cachepl_name = cachepl_spec.pop('name')
+            network_cache = cachepl_spec.pop('network_cache')
+            # Cache budget is the cumulative number of cache entries across
+            # the whole network or, for size-aware caches, their cumulative
+            # capacity in the unit of content sizes
+            if cachepl_spec.pop('bytes', False):
+                if not getattr(workload, 'content_size', None):
+                    raise ValueError('Cache placement in bytes requires a '
+                                     'workload providing content sizes')
+                cachepl_spec['cache_budget'] = \
+                    sum(workload.content_size.values()) * network_cache
+            else:
+                cachepl_spec['cache_budget'] = \
+                    workload.n_contents * network_cache
+            CACHE_PLACEMENT[cachepl_name](topology, **cachepl_spec)
+
+    # Assign contents to sources
+    _place_contents(topology, workload, tree, instrumentation)
+
+    nx.freeze(topology)
+    with instrumentation.phase('PATHS'):
+        route_table = build_route_table(topology, **tree['netconf'])
+    return Scenario(topology, workload, route_table,
+                    (random.getstate(), np.random.get_state()))
+
+
+def build_workload(params):
+    """Build the workload of an experiment, without placing caches or
+    building routes
+
+    The topology is built and contents are placed on it because workloads
+    draw their events from the random number generators as left by the
+    content placement, which reseeds them. The events generated by the
+    returned workload are therefore the same as those generated by the
+    workload of the scenario built by `build_scenario`.
+
+    Parameters
+    ----------
+    params : Tree
+        experiment parameters tree. Only the *topology*, *workload* and
+        *content_placement* subtrees are used.
+
+    Returns
+    -------
+    workload : iterable
+        The workload
+    """
+    instrumentation = Instrumentation()
+    tree = copy.deepcopy(params)
+    topology, workload = _build_topology_workload(tree, instrumentation)
+    _place_contents(topology, workload, tree, instrumentation)
+    return workload
+
+
+def _build_topology_workload(tree, instrumentation):
+    """Build the topology and the workload of an experiment, consuming their
+    subtrees of the given parameters tree
+    """
+    with instrumentation.phase('TOPOLOGY'):
+        topology_spec = tree['topology']
+        topology_name = topology_spec.pop('name')
+        topology = TOPOLOGY_FACTORY[topology_name](**topology_spec)
+
+    with instrumentation.phase('WORKLOAD'):
+        workload_spec = tree['workload']
+        workload_name = workload_spec.pop('name')
+        workload = WORKLOAD[workload_name](topology, **workload_spec)
+    return topology, workload
+
+
+def _place_contents(topology, workload, tree, instrumentation):
+    """Assign the contents of a workload to the sources of a topology,
+    consuming the content placement subtree of the given parameters tree
+    """
+    # If there are many contents, after doing this, performing operations
+    # requiring a topology deep copy, i.e. to_directed/undirected, will
+    # take long.
+    with instrumentation.phase('CONTENT_PLACEMENT'):
+        contpl_spec = tree['content_placement']
+        contpl_name = contpl_spec.pop('name')
+        CONTENT_PLACEMENT[contpl_name](topology, workload.contents,
+                                       **contpl_spec)
+
+
+def _accepts_seed(function):
+    """Return whether a function or class constructor takes a seed argument"""
+    if hasattr(inspect, 'signature'):
+        return 'seed' in inspect.signature(function).parameters
+    if inspect.isclass(function):
+        function = function.__init__
+    return 'seed' in inspect.getargspec(function).args
+
+
+# Registries of the components of scenarios
+_COMPONENT_REGISTRY = {
+    'topology': TOPOLOGY_FACTORY,
+    'workload': WORKLOAD,
+    'cache_placement': CACHE_PLACEMENT,
+    'content_placement': CONTENT_PLACEMENT,
+    }
+
+
+def _reproducible(params, components):
+    """Return whether the given components of a scenario are built
+    reproducibly, i.e. given a seed if they accept one
+    """
+    for name in components:
+        spec = params[name]
+        if spec.get('seed') is None and \
+                _accepts_seed(_COMPONENT_REGISTRY[name][spec['name']]):
+            return False
+    return True
+
+
+class ScenarioCache(object):
+    """Cache of ready-built scenarios.
+
+    Scenarios are kept in memory, in LRU order, and optionally persisted to
+    disk, keyed by the parameters from which they are built. Only scenarios
+    whose construction is reproducible are cached, i.e. those in which the
+    topology factory, the workload and the cache and content placements are
+    given a seed if they accept one. Other scenarios are built every time.
+
+    Scenarios persisted to disk are not invalidated if the resource files
+    they are built from change.
+    """
+
+    def __init__(self, maxlen=None, path=None):
+        """Constructor
+
+        Parameters
+        ----------
+        maxlen : int, optional
+            The maximum number of scenarios kept in memory. If not specified,
+            all scenarios are kept.
+        path : str, optional
+            The directory where scenarios are persisted. If not specified,
+            scenarios are only kept in memory.
+        """
+        if maxlen is not None and maxlen < 0:
+            raise ValueError('maxlen must not be negative')
+        self.maxlen = maxlen
+        self.path = path
+        self._store = CheckpointStore(path) if path is not None else None
+        self._scenarios = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._scenarios)
+
+    @staticmethod
+    def key(params):
+        """Return the key of the scenario of an experiment
+
+        Parameters
+        ----------
+        params : Tree
+            experiment parameters tree
+
+        Returns
+        -------
+        key : str
+            The key of the scenario or *None* if its construction is not
+            reproducible
+        """
+        components = ['topology', 'workload', 'content_placement']
+        if 'cache_placement' in params:
+            components.append('cache_placement')
+        if not _reproducible(params, components):
+            return None
+        return tree_hash({name: params[name] for name in
+                          ('topology', 'workload', 'cache_placement',
+                           'content_placement', 'netconf') if name in params})
+
+    def get(self, params, instrumentation=None):
+        """Return the scenario of an experiment, building it if needed
+
+        The random number generators are set to the state they would be in if
+        the scenario was built now.
+
+        Parameters
+        ----------
+        params : Tree
+            experiment parameters tree
+        instrumentation : Instrumentation, optional
+            If specified, whether the scenario is reused (SCENARIO_REUSED)
+            and the time taken to build it are recorded in it
+
+        Returns
+        -------
+        scenario : Scenario
+            The scenario
+        """
+        if instrumentation is None:
+            instrumentation = Instrumentation()
+        instrumentation.attrs['SCENARIO_REUSED'] = False
+        key = self.key(params)
+        if key is None:
+            return build_scenario(params, instrumentation)
+        if key in self._scenarios:
+            scenario = self._scenarios.pop(key)
+            instrumentation.attrs['SCENARIO_REUSED'] = True
+        else:
+            scenario = self._store.get(key) if self._store is not None \
+                       else None
+            if scenario is not None:
+                instrumentation.attrs['SCENARIO_REUSED'] = True
+            else:
+                scenario = build_scenario(params, instrumentation)
+                if self._store is not None:
+                    try:
+                        self._store.put(key, scenario)
+                    except Exception as e:
+                        logger.warning('Could not store scenario: %s', e)
+        if self.maxlen != 0:
+            self._scenarios[key] = scenario
+            if self.maxlen is not None and len(self._scenarios) > self.maxlen:
+                self._scenarios.popitem(last=False)
+        scenario.restore_random_state()
+        return scenario
+
+
+def _get_scenario_cache(settings):
+    """Return the scenario cache of this process configured by the settings"""
+    global _scenario_cache
+    maxlen = settings.SCENARIO_CACHE_SIZE \
+             if 'SCENARIO_CACHE_SIZE' in settings else 0
+    path = settings.SCENARIO_CACHE_DIR \
+           if 'SCENARIO_CACHE_DIR' in settings else None
+    if _scenario_cache is None or _scenario_cache.maxlen != maxlen or \
+            _scenario_cache.path != path:
+        _scenario_cache = ScenarioCache(maxlen, path)
+    return _scenario_cache
@@ -3,6 +3,8 @@
 # Dictionary storying all cache policy implementations keyed by ID
 CACHE_POLICY = {}
 
+# Dictionary storying all cache admission policy wrappers keyed by ID
+CACHE_ADMISSION = {}
 # Dictionary storying all strategy implementations keyed by ID
 STRATEGY = {}
 
@@ -27,6 +29,9 @@ RESULTS_READER = {}
 # Dictionary storying all results writer functions keyed by ID
 RESULTS_WRITER = {}
 
+# Dictionary storying all execution backend classes keyed by ID
+EXECUTION_BACKEND = {}
+
 def register_decorator(register):
     """Returns a decorator that register a class or function to a specified
     register
@@ -58,6 +63,7 @@ def register_decorator(register):
 
 
 register_cache_policy = register_decorator(CACHE_POLICY)
+register_cache_admission = register_decorator(CACHE_ADMISSION)
 register_strategy = register_decorator(STRATEGY)
 register_topology_factory = register_decorator(TOPOLOGY_FACTORY)
 register_cache_placement = register_decorator(CACHE_PLACEMENT)
@@ -66,3 +72,4 @@ register_workload = register_decorator(WORKLOAD)
 register_data_collector = register_decorator(DATA_COLLECTOR)
 register_results_reader = register_decorator(RESULTS_READER)
 register_results_writer = register_decorator(RESULTS_WRITER)
+register_execution_backend = register_decorator(EXECUTION_BACKEND)
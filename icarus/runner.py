@@ -76,7 +76,7 @@ def _validate_settings(settings, freeze=True):
         settings.freeze()
 
 
-def run(config_file, output, config_override):
+def run(config_file, output, config_override, resume=False):
     """
     Run function. It starts the simulator.
     experiments
@@ -89,6 +89,12 @@ def run(config_file, output, config_override):
         The file name where results will be saved
     config_override : dict, optional
         Configuration parameters overriding parameters in the file
+    resume : bool, optional
+        If *True*, resume a previous run of the same campaign which did not
+        complete, without running again the experiments whose results are
+        already in its results log. The results log of a campaign is the
+        file named as the output file with the *.log* suffix, to which the
+        results of each experiment are appended as soon as it finishes.
     """
     # Read settings from file and save them in icarus.conf.settings
     settings = Settings()
@@ -105,7 +111,7 @@ def run(config_file, output, config_override):
     # Validate settings
     _validate_settings(settings, freeze=True)
     # set up orchestration
-    orch = Orchestrator(settings)
+    orch = Orchestrator(settings, results_log=output + '.log', resume=resume)
     for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGQUIT, signal.SIGABRT):
         signal.signal(sig, functools.partial(handler, settings, orch, output))
     logger.info('Launching orchestrator')
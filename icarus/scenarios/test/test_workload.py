@@ -1,5 +1,13 @@
+import os
+import random
+import shutil
+import tempfile
+import itertools
 import unittest
 
+import fnss
+
+from icarus.scenarios import IcnTopology
 import icarus.scenarios as workload
 
 
@@ -69,3 +77,191 @@ class TestYCBS(unittest.TestCase):
         self.assertTrue(ev_3['log'])
         self.assertIn(ev_3['item'], range(1, n_items + 1))
         self.assertEqual(ev_3['op'], "READ")
+
+
+class TestEventChunks(unittest.TestCase):
+
+    @classmethod
+    def build_topology(cls):
+        topology = IcnTopology(fnss.star_topology(4))
+        for v in topology.nodes_iter():
+            fnss.add_stack(topology, v, 'receiver' if v > 0 else 'router')
+        return topology
+
+    def setUp(self):
+        self.topology = self.build_topology()
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_file(self, name, lines):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w') as f:
+            f.write(''.join(lines))
+        return path
+
+    def flatten(self, workload, chunks):
+        events = []
+        for chunk in chunks:
+            for t, r, c, l in zip(chunk.time, chunk.receiver, chunk.content,
+                                  chunk.log):
+                event = {'receiver': workload.receivers[r], 'content': c,
+                         'log': l}
+                events.append((t, event))
+        return events
+
+    def test_stationary(self):
+        w = workload.StationaryWorkload(self.topology, 20, 0.8, n_warmup=7,
+                                        n_measured=18, seed=1)
+        expected = list(itertools.islice(iter(w), 25))
+        w = workload.StationaryWorkload(self.topology, 20, 0.8, n_warmup=7,
+                                        n_measured=18, seed=1)
+        chunks = list(w.chunks(10))
+        self.assertEqual([10, 10, 5], [len(c) for c in chunks])
+        self.assertEqual(expected, self.flatten(w, chunks))
+
+    def test_stationary_iter(self):
+        w = workload.StationaryWorkload(self.topology, 20, 0.8, n_warmup=7,
+                                        n_measured=18, seed=1)
+        events = list(w)
+        self.assertEqual(25, len(events))
+        self.assertEqual(18, sum(event['log'] for _, event in events))
+
+    def test_stationary_invalid_chunk_size(self):
+        w = workload.StationaryWorkload(self.topology, 20, 0.8, n_warmup=7,
+                                        n_measured=18)
+        self.assertRaises(ValueError, next, w.chunks(0))
+
+    def test_trace_driven(self):
+        contents = ['a\n', 'b\n', 'c\n']
+        reqs = [contents[i % 3] for i in range(12)]
+        reqs_file = self.write_file('reqs.txt', reqs)
+        contents_file = self.write_file('contents.txt', contents)
+        random.seed(2)
+        w = workload.TraceDrivenWorkload(self.topology, reqs_file,
+                                         contents_file, 3, 4, 6)
+        expected = list(itertools.islice(iter(w), 10))
+        random.seed(2)
+        chunks = list(w.chunks(4))
+        self.assertEqual([4, 4, 2], [len(c) for c in chunks])
+        self.assertEqual(expected, self.flatten(w, chunks))
+
+    def test_trace_driven_short_trace(self):
+        reqs_file = self.write_file('reqs.txt', ['a\n'] * 5)
+        contents_file = self.write_file('contents.txt', ['a\n'])
+        w = workload.TraceDrivenWorkload(self.topology, reqs_file,
+                                         contents_file, 1, 4, 6)
+        self.assertRaises(ValueError, list, w.chunks(4))
+
+    def test_globetraff(self):
+        contents_file = self.write_file('contents.txt',
+                                        ['%d\t0.1\t%d\tweb\n' % (i, 10 * i)
+                                         for i in range(5)])
+        reqs_file = self.write_file('reqs.txt',
+                                    ['%d.5\t%d\t%d\n' % (i, i % 5, 10 * (i % 5))
+                                     for i in range(7)])
+        w = workload.GlobetraffWorkload(self.topology, reqs_file, contents_file)
+        self.assertEqual(5, w.n_contents)
+        chunks = list(w.chunks(5))
+        self.assertEqual([5, 2], [len(c) for c in chunks])
+        self.assertEqual([5.5, 6.5], chunks[1].time.tolist())
+        self.assertEqual([0, 1], chunks[1].content.tolist())
+        self.assertEqual([0, 10], chunks[1].size.tolist())
+        self.assertTrue(all(chunks[0].log))
+        for chunk in chunks:
+            self.assertTrue(all(0 <= r < 4 for r in chunk.receiver))
+        self.assertEqual({i: 10 * i for i in range(5)}, w.content_size)
+        random.seed(1)
+        events = list(w)
+        random.seed(1)
+        self.assertEqual([(t, {k: v for k, v in e.items() if k != 'size'})
+                          for t, e in events], self.flatten(w, w.chunks(5)))
+        self.assertEqual({'receiver': events[6][1]['receiver'], 'content': 1,
+                          'size': 10, 'log': True}, events[6][1])
+
+
+class TestPackedWorkload(unittest.TestCase):
+
+    def setUp(self):
+        self.topology = TestEventChunks.build_topology()
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_file(self, name, lines):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w') as f:
+            f.write(''.join(lines))
+        return path
+
+    def stationary(self):
+        return workload.StationaryWorkload(self.topology, 20, 0.8, n_warmup=7,
+                                           n_measured=18, seed=1)
+
+    def test_from_workload(self):
+        expected = list(itertools.islice(iter(self.stationary()), 25))
+        w = workload.PackedWorkload.from_workload(self.stationary(), 10)
+        self.assertEqual(25, len(w))
+        self.assertEqual(7, w.n_warmup)
+        self.assertEqual(18, w.n_measured)
+        self.assertEqual(20, w.n_contents)
+        self.assertEqual(expected, list(w))
+        # Events are replayed identically, regardless of random numbers
+        random.seed(2)
+        self.assertEqual(expected, list(w))
+        chunks = list(w.chunks(7))
+        self.assertEqual([7, 7, 7, 4], [len(c) for c in chunks])
+        self.assertEqual(expected[21:],
+                         [(t, {'receiver': w.receivers[r], 'content': c,
+                               'log': l})
+                          for t, r, c, l in zip(*[a.tolist() for a in
+                                                  chunks[-1][:4]])])
+
+    def test_save_load(self):
+        w = workload.PackedWorkload.from_workload(self.stationary())
+        path = os.path.join(self.tmp_dir, 'packed')
+        w.save(path)
+        loaded = workload.PackedWorkload.load(path)
+        self.assertEqual(list(w), list(loaded))
+        self.assertEqual(w.receivers, loaded.receivers)
+        self.assertEqual(7, loaded.n_warmup)
+        self.assertIsNone(loaded.events.size)
+        self.assertRaises(ValueError, loaded.events.time.__setitem__, 0, 1.0)
+
+    def test_random_state(self):
+        w = self.stationary()
+        state = random.getstate()
+        packed = workload.PackedWorkload.from_workload(w, 10)
+        expected = random.random()
+        path = os.path.join(self.tmp_dir, 'packed')
+        packed.save(path)
+        loaded = workload.PackedWorkload.load(path)
+        # Numbers drawn after restoring the state are not those from which
+        # events were generated
+        random.setstate(state)
+        loaded.restore_random_state()
+        self.assertEqual(expected, random.random())
+
+    def test_sizes(self):
+        contents_file = self.write_file('contents.txt',
+                                        ['%d\t0.1\t%d\tweb\n' % (i, 10 * i)
+                                         for i in range(5)])
+        reqs_file = self.write_file('reqs.txt',
+                                    ['%d.5\t%d\t%d\n' % (i, i % 5, 10 * (i % 5))
+                                     for i in range(7)])
+        w = workload.GlobetraffWorkload(self.topology, reqs_file, contents_file)
+        w = workload.PackedWorkload.from_workload(w, 3)
+        path = os.path.join(self.tmp_dir, 'packed')
+        w.save(path)
+        loaded = workload.PackedWorkload.load(path, mmap=False)
+        self.assertEqual([0, 10, 20, 30, 40, 0, 10], loaded.events.size.tolist())
+        self.assertEqual({i: 10 * i for i in range(5)}, loaded.content_size)
+
+    def test_non_numeric_contents(self):
+        contents_file = self.write_file('contents.txt', ['a\n', 'b\n'])
+        reqs_file = self.write_file('reqs.txt', ['a\n', 'b\n', 'a\n'])
+        w = workload.TraceDrivenWorkload(self.topology, reqs_file,
+                                         contents_file, 2, 1, 2)
+        self.assertRaises(ValueError, workload.PackedWorkload.from_workload, w)
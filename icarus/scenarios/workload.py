@@ -16,16 +16,38 @@ following attributes:
 
 Each workload must expose the `contents` attribute which is an iterable of
 all content identifiers. This is needed for content placement.
+
+Workloads can optionally implement a `chunks` method, taking a chunk size as
+argument and returning an iterator over `EventChunk` objects, each storing the
+attributes of a fixed number of consecutive events in arrays. This makes it
+possible to execute experiments without building an event dictionary for
+each request.
+
+The events of workloads implementing the `chunks` method can be generated once
+and stored in a `PackedWorkload`, which can be saved to files and
+memory-mapped by several processes, so that experiments comparing different
+strategies share the same request stream.
 """
+import os
 import random
 import csv
+import collections
+import itertools
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
 
+import numpy as np
 import networkx as nx
 
 from icarus.tools import TruncatedZipfDist
 from icarus.registry import register_workload
 
 __all__ = [
+        'EventChunk',
+        'PackedWorkload',
         'StationaryWorkload',
         'GlobetraffWorkload',
         'TraceDrivenWorkload',
@@ -33,6 +55,213 @@ __all__ = [
            ]
 
 
+class EventChunk(collections.namedtuple('EventChunk',
+                                        ['time', 'receiver', 'content', 'log',
+                                         'size'])):
+    """Chunk of consecutive events, stored as arrays of equal length
+
+    Attributes
+    ----------
+    time : array
+        The timestamps of the events
+    receiver : array
+        The indices, in the `receivers` list of the workload, of the nodes
+        issuing the requests
+    content : array
+        The identifiers of the requested contents
+    log : array
+        Boolean values indicating whether the events should be logged
+    size : array, optional
+        The sizes of the requested contents, if provided by the workload
+    """
+    __slots__ = ()
+
+    def __new__(cls, time, receiver, content, log, size=None):
+        return super(EventChunk, cls).__new__(cls, time, receiver, content,
+                                              log, size)
+
+    def __len__(self):
+        return len(self.time)
+
+
+class PackedWorkload(object):
+    """Workload replaying events stored in arrays
+
+    Events are generated once from another workload and then read from arrays
+    any number of times, always in the same order. Saved workloads are loaded
+    as memory-mapped arrays, which are shared without copies by all the
+    processes loading the same files.
+
+    Only workloads with numeric content identifiers can be packed.
+
+    Replaying events draws no random numbers. To prevent strategies and cache
+    policies from drawing the same random numbers used to generate the
+    events, a packed workload records the state of the random generators
+    after generating them, which should be restored before replaying them.
+    """
+
+    # Event attributes, stored as one array each
+    _fields = EventChunk._fields
+
+    def __init__(self, receivers, time, receiver, content, log, size=None,
+                 n_warmup=0, n_contents=None, contents=None,
+                 content_size=None, random_state=None):
+        """Constructor
+
+        Parameters
+        ----------
+        receivers : list
+            The nodes issuing requests, indexed by the *receiver* array
+        time, receiver, content, log, size : arrays
+            The attributes of the events, as in `EventChunk`
+        n_warmup : int, optional
+            The number of warmup events at the beginning of the workload
+        n_contents : int, optional
+            The number of contents
+        contents : iterable, optional
+            All content identifiers
+        content_size : dict, optional
+            Dictionary mapping contents to their size
+        random_state : tuple, optional
+            The states of the *random* and *numpy.random* generators after
+            generating the events
+        """
+        if any(len(a) != len(time) for a in (receiver, content, log, size)
+               if a is not None):
+            raise ValueError('All arrays must have the same length')
+        self.receivers = receivers
+        self.events = EventChunk(time, receiver, content, log, size)
+        self.n_warmup = n_warmup
+        self.n_measured = len(time) - n_warmup
+        self.n_contents = n_contents
+        self.contents = contents
+        self.content_size = content_size
+        self.random_state = random_state
+
+    @classmethod
+    def from_workload(cls, workload, chunk_size=10000):
+        """Generate all events of a workload and pack them, recording the
+        state of the random generators after generating them
+
+        Parameters
+        ----------
+        workload : iterable
+            A workload implementing the `chunks` method
+        chunk_size : int, optional
+            The number of events generated at once
+
+        Returns
+        -------
+        workload : PackedWorkload
+            The packed workload
+        """
+        chunks = list(workload.chunks(chunk_size))
+        if not chunks:
+            raise ValueError('The workload has no events')
+        arrays = [None if chunks[0][k] is None else
+                  np.concatenate([c[k] for c in chunks])
+                  for k in range(len(cls._fields))]
+        if arrays[2].dtype == object:
+            raise ValueError('Only numeric content identifiers can be packed')
+        return cls(list(workload.receivers), *arrays,
+                   n_warmup=getattr(workload, 'n_warmup', 0),
+                   n_contents=getattr(workload, 'n_contents', None),
+                   contents=getattr(workload, 'contents', None),
+                   content_size=getattr(workload, 'content_size', None),
+                   random_state=(random.getstate(), np.random.get_state()))
+
+    def save(self, path):
+        """Save the workload to a directory
+
+        Parameters
+        ----------
+        path : str
+            The directory, which is created if it does not exist
+        """
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        for name, array in zip(self._fields, self.events):
+            if array is not None:
+                np.save(os.path.join(path, name + '.npy'), array)
+        meta = {'receivers': self.receivers, 'n_warmup': self.n_warmup,
+                'n_contents': self.n_contents, 'contents': self.contents,
+                'content_size': self.content_size,
+                'random_state': self.random_state}
+        with open(os.path.join(path, 'meta.pickle'), 'wb') as f:
+            pickle.dump(meta, f, pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load a workload saved to a directory
+
+        Parameters
+        ----------
+        path : str
+            The directory
+        mmap : bool, optional
+            If *True*, arrays are memory-mapped read-only instead of being
+            read into memory
+
+        Returns
+        -------
+        workload : PackedWorkload
+            The loaded workload
+        """
+        with open(os.path.join(path, 'meta.pickle'), 'rb') as f:
+            meta = pickle.load(f)
+        arrays = []
+        for name in cls._fields:
+            filename = os.path.join(path, name + '.npy')
+            arrays.append(np.load(filename, mmap_mode='r' if mmap else None)
+                          if os.path.isfile(filename) else None)
+        return cls(meta['receivers'], *arrays, n_warmup=meta['n_warmup'],
+                   n_contents=meta['n_contents'], contents=meta['contents'],
+                   content_size=meta.get('content_size'),
+                   random_state=meta.get('random_state'))
+
+    def restore_random_state(self):
+        """Restore the state of the random generators recorded after
+        generating the events, if any
+        """
+        if self.random_state is not None:
+            random.setstate(self.random_state[0])
+            np.random.set_state(self.random_state[1])
+
+    def __len__(self):
+        return len(self.events)
+
+    def __iter__(self):
+        receivers = self.receivers
+        for chunk in self.chunks(10000):
+            for time, receiver, content, log in zip(chunk.time.tolist(),
+                                                    chunk.receiver.tolist(),
+                                                    chunk.content.tolist(),
+                                                    chunk.log.tolist()):
+                yield (time, {'receiver': receivers[receiver],
+                              'content': content, 'log': log})
+
+    def chunks(self, chunk_size):
+        """Return an iterator over chunks of events
+
+        Chunks are views of the arrays of the workload, not copies.
+
+        Parameters
+        ----------
+        chunk_size : int
+            The number of events per chunk. The last chunk may be smaller.
+
+        Returns
+        -------
+        chunks : iterator
+            Iterator of EventChunk objects
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive')
+        for start in range(0, len(self), chunk_size):
+            yield EventChunk(*(None if a is None else a[start:start + chunk_size]
+                               for a in self.events))
+
+
 @register_workload('STATIONARY')
 class StationaryWorkload(object):
     """This function generates events on the fly, i.e. instead of creating an
@@ -118,7 +347,55 @@ class StationaryWorkload(object):
             event = {'receiver': receiver, 'content': content, 'log': log}
             yield (t_event, event)
             req_counter += 1
-        raise StopIteration()
+        return
+
+    def chunks(self, chunk_size):
+        """Return an iterator over chunks of events
+
+        Events are the same, for the same random generator state, as those
+        returned by iterating over the workload.
+
+        Parameters
+        ----------
+        chunk_size : int
+            The number of events per chunk. The last chunk may be smaller.
+
+        Returns
+        -------
+        chunks : iterator
+            Iterator of EventChunk objects
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive')
+        n_events = self.n_warmup + self.n_measured
+        receiver_ids = range(len(self.receivers))
+        rand = random.random
+        choice = random.choice
+        expovariate = random.expovariate
+        rate = self.rate
+        uniform_receivers = self.beta == 0
+        req_counter = 0
+        t_event = 0.0
+        while req_counter < n_events:
+            n = min(chunk_size, n_events - req_counter)
+            times = [0.0] * n
+            receivers = [0] * n
+            contents = [0.0] * n
+            for k in range(n):
+                t_event += expovariate(rate)
+                times[k] = t_event
+                receivers[k] = choice(receiver_ids) if uniform_receivers \
+                               else rand()
+                contents[k] = rand()
+            # Zipf-distributed values are drawn by binary search over the CDF
+            # of the uniform values drawn above, as done by DiscreteDist.rv
+            if not uniform_receivers:
+                receivers = np.searchsorted(self.receiver_dist.cdf, receivers)
+            yield EventChunk(np.array(times),
+                             np.asarray(receivers, dtype=np.int64),
+                             np.searchsorted(self.zipf.cdf, contents) + 1,
+                             np.arange(req_counter, req_counter + n) >= self.n_warmup)
+            req_counter += n
 
 
 @register_workload('GLOBETRAFF')
@@ -128,6 +405,11 @@ class GlobetraffWorkload(object):
     All requests are mapped to receivers uniformly unless a positive *beta*
     parameter is specified.
 
+    The sizes of the contents, read from the contents file, are stored in the
+    *content_size* attribute, a dictionary mapping contents to their size, so
+    that they are inserted in caches with their size. They can be used with
+    size-aware cache policies and byte-weighted metrics.
+
     If a *beta* parameter is specified, then receivers issue requests at
     different rates. The algorithm used to determine the requests rates for
     each receiver is the following:
@@ -163,10 +445,12 @@ class GlobetraffWorkload(object):
         self.receivers = [v for v in topology.nodes_iter()
                      if topology.node[v]['stack'][0] == 'receiver']
         self.n_contents = 0
+        self.content_size = {}
         with open(contents_file, 'r') as f:
             reader = csv.reader(f, delimiter='\t')
             for content, popularity, size, app_type in reader:
-                self.n_contents = max(self.n_contents, content)
+                self.n_contents = max(self.n_contents, int(content))
+                self.content_size[int(content)] = int(size)
         self.n_contents += 1
         self.contents = range(self.n_contents)
         self.request_file = reqs_file
@@ -186,9 +470,46 @@ class GlobetraffWorkload(object):
                     receiver = random.choice(self.receivers)
                 else:
                     receiver = self.receivers[self.receiver_dist.rv() - 1]
-                event = {'receiver': receiver, 'content': content, 'size': size}
-                yield (timestamp, event)
-        raise StopIteration()
+                event = {'receiver': receiver, 'content': int(content),
+                         'size': int(size), 'log': True}
+                yield (float(timestamp), event)
+
+    def chunks(self, chunk_size):
+        """Return an iterator over chunks of events
+
+        Events are the same, for the same random generator state, as those
+        returned by iterating over the workload.
+
+        Parameters
+        ----------
+        chunk_size : int
+            The number of events per chunk. The last chunk may be smaller.
+
+        Returns
+        -------
+        chunks : iterator
+            Iterator of EventChunk objects
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive')
+        receiver_ids = range(len(self.receivers))
+        with open(self.request_file, 'r') as f:
+            reader = csv.reader(f, delimiter='\t')
+            while True:
+                rows = list(itertools.islice(reader, chunk_size))
+                if not rows:
+                    break
+                n = len(rows)
+                if self.beta == 0:
+                    receivers = [random.choice(receiver_ids) for _ in range(n)]
+                else:
+                    receivers = [self.receiver_dist.rv() - 1 for _ in range(n)]
+                timestamps, contents, sizes = zip(*rows)
+                yield EventChunk(np.array(timestamps, dtype=np.float64),
+                                 np.array(receivers, dtype=np.int64),
+                                 np.array(contents, dtype=np.int64),
+                                 np.ones(n, dtype=bool),
+                                 np.array(sizes, dtype=np.int64))
 
 
 @register_workload('TRACE_DRIVEN')
@@ -283,9 +604,57 @@ class TraceDrivenWorkload(object):
                 yield (t_event, event)
                 req_counter += 1
                 if(req_counter >= self.n_warmup + self.n_measured):
-                    raise StopIteration()
+                    return
             raise ValueError("Trace did not contain enough requests")
 
+    def chunks(self, chunk_size):
+        """Return an iterator over chunks of events
+
+        Events are the same, for the same random generator state, as those
+        returned by iterating over the workload. Contents are stored in arrays
+        of objects.
+
+        Parameters
+        ----------
+        chunk_size : int
+            The number of events per chunk. The last chunk may be smaller.
+
+        Returns
+        -------
+        chunks : iterator
+            Iterator of EventChunk objects
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive')
+        n_events = self.n_warmup + self.n_measured
+        receiver_ids = range(len(self.receivers))
+        choice = random.choice
+        expovariate = random.expovariate
+        rate = self.rate
+        req_counter = 0
+        t_event = 0.0
+        with open(self.reqs_file, 'r', buffering=self.buffering) as f:
+            while req_counter < n_events:
+                n = min(chunk_size, n_events - req_counter)
+                contents = np.empty(n, dtype=object)
+                times = [0.0] * n
+                receivers = [0] * n
+                k = 0
+                for content in itertools.islice(f, n):
+                    t_event += expovariate(rate)
+                    times[k] = t_event
+                    receivers[k] = choice(receiver_ids) if self.beta == 0 \
+                                   else self.receiver_dist.rv() - 1
+                    contents[k] = content
+                    k += 1
+                if k < n:
+                    raise ValueError("Trace did not contain enough requests")
+                yield EventChunk(np.array(times),
+                                 np.array(receivers, dtype=np.int64),
+                                 contents,
+                                 np.arange(req_counter, req_counter + n) >= self.n_warmup)
+                req_counter += n
+
 
 @register_workload('YCSB')
 class YCSBWorkload(object):
@@ -356,4 +725,4 @@ class YCSBWorkload(object):
             event = {'op': op, 'item': item, 'log': log}
             yield event
             req_counter += 1
-        raise StopIteration()
+        return
@@ -0,0 +1,144 @@
+import multiprocessing as mp
+import threading
+import time
+import unittest
+
+from icarus.backends import BrokerBackend, PoolBackend, SerialBackend, \
+                            run_worker
+from icarus.util import Settings
+
+
+def square(x):
+    return x * x
+
+
+def fail(x):
+    raise ValueError(x)
+
+
+def broker_settings():
+    settings = Settings()
+    settings.BROKER_ADDRESS = ('localhost', 0)
+    settings.BROKER_AUTHKEY = 'test'
+    return settings
+
+
+class Outcomes(object):
+    """Collect the outcomes of jobs"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.results = []
+        self.errors = []
+
+    def callback(self, value):
+        with self.lock:
+            self.results.append(value)
+
+    def error_callback(self, error):
+        with self.lock:
+            self.errors.append(error)
+
+
+class TestSerialBackend(unittest.TestCase):
+
+    def test_submit(self):
+        backend = SerialBackend(Settings())
+        outcomes = Outcomes()
+        backend.submit(square, (3,), outcomes.callback, outcomes.error_callback)
+        backend.submit(fail, (3,), outcomes.callback, outcomes.error_callback)
+        self.assertEqual([9], outcomes.results)
+        self.assertEqual(1, len(outcomes.errors))
+        self.assertEqual(1, backend.n_workers)
+
+    def test_terminate(self):
+        backend = SerialBackend(Settings())
+        outcomes = Outcomes()
+        backend.terminate()
+        backend.submit(square, (3,), outcomes.callback, outcomes.error_callback)
+        self.assertEqual([], outcomes.results)
+
+
+class TestPoolBackend(unittest.TestCase):
+
+    def test_submit(self):
+        settings = Settings()
+        settings.N_PROCESSES = 2
+        backend = PoolBackend(settings)
+        outcomes = Outcomes()
+        for i in range(5):
+            backend.submit(square, (i,), outcomes.callback,
+                           outcomes.error_callback)
+        backend.submit(fail, (0,), outcomes.callback, outcomes.error_callback)
+        backend.close()
+        backend.join()
+        self.assertEqual([0, 1, 4, 9, 16], sorted(outcomes.results))
+        self.assertEqual(1, len(outcomes.errors))
+
+
+class TestBrokerBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = BrokerBackend(broker_settings())
+        self.workers = []
+
+    def tearDown(self):
+        for worker in self.workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+
+    def start_workers(self, n_workers):
+        for _ in range(n_workers):
+            worker = mp.Process(target=run_worker,
+                                args=(self.backend.address, 'test'))
+            worker.start()
+            self.workers.append(worker)
+
+    def test_workers(self):
+        outcomes = Outcomes()
+        for i in range(20):
+            self.backend.submit(square, (i,), outcomes.callback,
+                                outcomes.error_callback)
+        self.backend.submit(fail, (0,), outcomes.callback,
+                            outcomes.error_callback)
+        self.start_workers(3)
+        self.backend.close()
+        self.backend.join()
+        for worker in self.workers:
+            worker.join()
+        self.assertEqual([i * i for i in range(20)], sorted(outcomes.results))
+        self.assertEqual(1, len(outcomes.errors))
+        self.assertIn('ValueError', outcomes.errors[0])
+
+    def test_worker_disconnected(self):
+        outcomes = Outcomes()
+        self.backend.submit(time.sleep, (60,), outcomes.callback,
+                            outcomes.error_callback)
+        self.start_workers(1)
+        # Wait until the worker receives the job, then kill it
+        deadline = time.time() + 10
+        while self.backend._jobs.qsize() > 0 and time.time() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.2)
+        self.workers[0].terminate()
+        self.workers[0].join()
+        deadline = time.time() + 10
+        while self.backend._jobs.qsize() == 0 and time.time() < deadline:
+            time.sleep(0.05)
+        # The job of the killed worker is submitted again
+        self.assertEqual(1, self.backend._jobs.qsize())
+        self.backend.terminate()
+        self.backend.join()
+        self.assertEqual([], outcomes.results)
+
+    def test_wrong_authkey(self):
+        self.assertRaises(Exception, run_worker, self.backend.address, 'wrong')
+        self.backend.close()
+        self.backend.join()
+
+    def test_authkey_required(self):
+        settings = Settings()
+        self.assertRaises(ValueError, BrokerBackend, settings)
+        self.backend.close()
+        self.backend.join()
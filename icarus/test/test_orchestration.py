@@ -0,0 +1,445 @@
+import multiprocessing as mp
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import networkx as nx
+
+from icarus.backends import run_worker
+import icarus.orchestration as orchestration
+from icarus.orchestration import DurationHistory, Orchestrator, ResultsLog, \
+                                ScenarioCache, build_scenario, run_scenario, \
+                                workload_key
+from icarus.scenarios import PackedWorkload
+from icarus.util import Settings, Tree, tree_hash
+
+
+def scenario_params():
+    return Tree({
+        'topology': {'name': 'TREE', 'k': 2, 'h': 3},
+        'workload': {'name': 'STATIONARY', 'n_contents': 100,
+                     'alpha': 0.8, 'n_warmup': 100, 'n_measured': 100,
+                     'seed': 1},
+        'cache_placement': {'name': 'UNIFORM', 'network_cache': 0.1},
+        'content_placement': {'name': 'UNIFORM', 'seed': 2},
+        'strategy': {'name': 'LCE'},
+        'netconf': {}})
+
+
+class TestScenarioCache(unittest.TestCase):
+
+    def setUp(self):
+        self.params = scenario_params()
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_build_scenario(self):
+        scenario = build_scenario(self.params)
+        self.assertTrue(nx.is_frozen(scenario.topology))
+        self.assertEqual(sorted(scenario.topology.nodes()),
+                         sorted(scenario.route_table.nodes))
+        self.assertEqual(100, scenario.workload.n_contents)
+        self.assertEqual(random.getstate(), scenario.random_state[0])
+
+    def test_key(self):
+        key = ScenarioCache.key(self.params)
+        self.params['strategy']['name'] = 'LCD'
+        self.assertEqual(key, ScenarioCache.key(self.params))
+        self.params['workload']['seed'] = 3
+        self.assertNotEqual(key, ScenarioCache.key(self.params))
+        self.params['content_placement']['seed'] = None
+        self.assertIsNone(ScenarioCache.key(self.params))
+
+    def test_get(self):
+        cache = ScenarioCache(maxlen=1)
+        scenario = cache.get(self.params)
+        state = random.getstate()
+        random.random()
+        self.assertIs(scenario, cache.get(self.params))
+        self.assertEqual(state, random.getstate())
+        self.params['workload']['seed'] = 3
+        self.assertIsNot(scenario, cache.get(self.params))
+        self.assertEqual(1, len(cache))
+
+    def test_not_reproducible(self):
+        cache = ScenarioCache()
+        del self.params['workload']['seed']
+        self.assertIsNot(cache.get(self.params), cache.get(self.params))
+        self.assertEqual(0, len(cache))
+
+    def test_disabled(self):
+        cache = ScenarioCache(maxlen=0)
+        self.assertIsNot(cache.get(self.params), cache.get(self.params))
+        self.assertEqual(0, len(cache))
+
+    def test_persistence(self):
+        scenario = ScenarioCache(path=self.path).get(self.params)
+        state = random.getstate()
+        random.random()
+        restored = ScenarioCache(path=self.path).get(self.params)
+        self.assertIsNot(scenario, restored)
+        self.assertEqual(state, random.getstate())
+        self.assertEqual(scenario.route_table.path(0, 6),
+                         restored.route_table.path(0, 6))
+        self.assertEqual(sorted(scenario.topology.edges()),
+                         sorted(restored.topology.edges()))
+
+
+class TestPackWorkloads(unittest.TestCase):
+
+    def setUp(self):
+        settings = Settings()
+        settings.PARALLEL_EXECUTION = False
+        settings.EVENT_CHUNK_SIZE = 30
+        self.orchestrator = Orchestrator(settings)
+        self.orchestrator.workload_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.orchestrator.remove_workloads()
+
+    def test_pack_workloads(self):
+        lce = scenario_params()
+        lcd = scenario_params()
+        lcd['strategy']['name'] = 'LCD'
+        unseeded = scenario_params()
+        del unseeded['content_placement']['seed']
+        large_cache = scenario_params()
+        large_cache['cache_placement']['network_cache'] = 0.2
+        self.orchestrator.pack_workloads([lce, lcd, unseeded, large_cache])
+        workload_dir = self.orchestrator.workload_dir
+        # Experiments differing only in caches share their workload
+        self.assertEqual(workload_key(lce), workload_key(large_cache))
+        self.assertEqual([workload_key(lce)], os.listdir(workload_dir))
+        packed = PackedWorkload.load(os.path.join(workload_dir,
+                                                  workload_key(lcd)))
+        workload = build_scenario(lce).workload
+        for expected, chunk in zip(workload.chunks(200), packed.chunks(200)):
+            for a, b in zip(expected, chunk):
+                if a is not None:
+                    self.assertEqual(a.tolist(), b.tolist())
+        self.orchestrator.remove_workloads()
+        self.assertFalse(os.path.exists(workload_dir))
+
+    def test_not_packed_built_once(self):
+        built = []
+
+        def build_workload(params):
+            built.append(params)
+            return object()
+
+        original = orchestration.build_workload
+        orchestration.build_workload = build_workload
+        try:
+            self.orchestrator.pack_workloads([scenario_params(),
+                                              scenario_params()])
+        finally:
+            orchestration.build_workload = original
+        self.assertEqual(1, len(built))
+        self.assertEqual([], os.listdir(self.orchestrator.workload_dir))
+
+    def test_workload_key(self):
+        params = scenario_params()
+        key = workload_key(params)
+        del params['cache_placement']['network_cache']
+        self.assertEqual(key, workload_key(params))
+        params['content_placement']['seed'] = 3
+        self.assertNotEqual(key, workload_key(params))
+        params['workload']['seed'] = None
+        self.assertIsNone(workload_key(params))
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def run_experiment(self, **settings):
+        params = scenario_params()
+        params['cache_policy'] = {'name': 'LRU'}
+        params['strategy'] = {'name': 'LCE'}
+        config = Settings()
+        config.DATA_COLLECTORS = ['CACHE_HIT_RATIO']
+        config.EVENT_CHUNK_SIZE = 30
+        for name, value in settings.items():
+            setattr(config, name, value)
+        return run_scenario(config, params, 1, 1)[1]
+
+    def test_instrumentation(self):
+        expected = self.run_experiment()
+        self.assertNotIn('INSTRUMENTATION', expected)
+        results = self.run_experiment(INSTRUMENTATION=True)
+        self.assertEqual(expected['CACHE_HIT_RATIO'],
+                         results['CACHE_HIT_RATIO'])
+        instrumentation = results['INSTRUMENTATION']
+        self.assertEqual(['TOPOLOGY', 'WORKLOAD', 'CACHE_PLACEMENT',
+                          'CONTENT_PLACEMENT', 'PATHS', 'NETWORK_MODEL',
+                          'WARMUP', 'MEASURED'],
+                         list(instrumentation['TIMINGS'].keys()))
+        self.assertEqual({'WARMUP': 100, 'MEASURED': 100},
+                         dict(instrumentation['EVENTS']))
+        self.assertFalse(instrumentation['SCENARIO_REUSED'])
+        self.assertFalse(instrumentation['WARMUP_RESTORED'])
+        self.assertNotIn('PROFILE', instrumentation)
+
+    def test_profile(self):
+        results = self.run_experiment(INSTRUMENTATION=True,
+                                      INSTRUMENTATION_PROFILE=True)
+        self.assertIn('process_event', results['INSTRUMENTATION']['PROFILE'])
+
+
+class TestResultsLog(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.log = ResultsLog(os.path.join(self.path, 'results.log'))
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_append_read(self):
+        self.assertEqual([], self.log.read())
+        self.log.append(Tree({'a': 1}), Tree({'b': 2}), 3.0)
+        self.log.append(Tree({'a': 2}), Tree({'b': 3}), 4.0)
+        self.assertEqual([({'a': 1}, {'b': 2}, 3.0), ({'a': 2}, {'b': 3}, 4.0)],
+                         self.log.read())
+        self.log.clear()
+        self.assertEqual([], self.log.read())
+
+    def test_incomplete_record(self):
+        self.log.append(Tree({'a': 1}), Tree({'b': 2}), 3.0)
+        size = os.path.getsize(self.log.path)
+        self.log.append(Tree({'a': 2}), Tree({'b': 3}), 4.0)
+        with open(self.log.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.log.path) - 5)
+        self.assertEqual([({'a': 1}, {'b': 2}, 3.0)], self.log.read())
+        self.assertEqual(size, os.path.getsize(self.log.path))
+        self.log.append(Tree({'a': 3}), Tree({'b': 4}), 5.0)
+        self.assertEqual(2, len(self.log.read()))
+
+
+class TestResume(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.log = os.path.join(self.path, 'results.log')
+        self.settings = Settings()
+        self.settings.PARALLEL_EXECUTION = False
+        self.settings.N_REPLICATIONS = 2
+        self.settings.EVENT_CHUNK_SIZE = 30
+        self.settings.DATA_COLLECTORS = ['CACHE_HIT_RATIO']
+        self.settings.EXPERIMENT_QUEUE = []
+        for strategy in ('LCE', 'LCD'):
+            params = scenario_params()
+            params['cache_policy'] = {'name': 'LRU'}
+            params['strategy'] = {'name': strategy}
+            self.settings.EXPERIMENT_QUEUE.append(params)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_resume(self):
+        orchestrator = Orchestrator(self.settings, results_log=self.log)
+        orchestrator.run()
+        self.assertEqual(4, len(ResultsLog(self.log).read()))
+        # Drop the last replication of LCD, as if the run was interrupted
+        records = ResultsLog(self.log).read()
+        ResultsLog(self.log).clear()
+        for record in records[:3]:
+            ResultsLog(self.log).append(*record)
+        orchestrator = Orchestrator(self.settings, results_log=self.log,
+                                    resume=True)
+        orchestrator.run()
+        self.assertEqual(1, orchestrator.n_exp)
+        self.assertEqual(4, len(orchestrator.results))
+        self.assertEqual(4, len(ResultsLog(self.log).read()))
+        strategies = [params['strategy']['name']
+                      for params, _, _ in ResultsLog(self.log).read()]
+        self.assertEqual(['LCE', 'LCE', 'LCD', 'LCD'], strategies)
+
+    def test_no_resume(self):
+        Orchestrator(self.settings, results_log=self.log).run()
+        orchestrator = Orchestrator(self.settings, results_log=self.log)
+        orchestrator.run()
+        self.assertEqual(4, orchestrator.n_exp)
+        self.assertEqual(4, len(ResultsLog(self.log).read()))
+
+
+class TestDurationHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.file = os.path.join(self.path, 'durations.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_add_get(self):
+        durations = DurationHistory()
+        self.assertIsNone(durations.get('a'))
+        durations.add('a', 1.0)
+        durations.add('a', 3.0)
+        durations.add('b', 5.0)
+        self.assertEqual(2.0, durations.get('a'))
+        self.assertEqual(5.0, durations.get('b'))
+        durations.save()
+
+    def test_save(self):
+        durations = DurationHistory(self.file)
+        durations.add('a', 1.0)
+        durations.save()
+        durations = DurationHistory(self.file)
+        durations.add('a', 3.0)
+        self.assertEqual(2.0, durations.get('a'))
+        self.assertEqual(['durations.json'], os.listdir(self.path))
+
+    def test_corrupted(self):
+        with open(self.file, 'w') as f:
+            f.write('{')
+        self.assertEqual(0, len(DurationHistory(self.file)))
+
+
+class TestScheduling(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.settings = Settings()
+        self.settings.N_REPLICATIONS = 1
+        self.settings.EVENT_CHUNK_SIZE = 30
+        self.settings.DATA_COLLECTORS = ['CACHE_HIT_RATIO']
+        self.settings.JOB_DURATIONS_FILE = os.path.join(self.path, 'd.json')
+        self.settings.EXPERIMENT_QUEUE = []
+        for strategy in ('LCE', 'LCD', 'NO_CACHE'):
+            params = scenario_params()
+            params['cache_policy'] = {'name': 'LRU'}
+            params['strategy'] = {'name': strategy}
+            self.settings.EXPERIMENT_QUEUE.append(params)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_parallel(self):
+        self.settings.PARALLEL_EXECUTION = True
+        self.settings.N_PROCESSES = 2
+        self.settings.MAX_TASKS_PER_CHILD = 1
+        orchestrator = Orchestrator(self.settings)
+        orchestrator.run()
+        self.assertEqual(3, orchestrator.n_success)
+        self.assertEqual(3, len(orchestrator.results))
+        self.assertEqual(3, len(DurationHistory(
+                                    self.settings.JOB_DURATIONS_FILE)))
+
+    def test_broker(self):
+        self.settings.PARALLEL_EXECUTION = False
+        self.settings.EXECUTION_BACKEND = 'BROKER'
+        self.settings.BROKER_ADDRESS = ('localhost', 0)
+        self.settings.BROKER_AUTHKEY = 'test'
+        orchestrator = Orchestrator(self.settings)
+        workers = [mp.Process(target=run_worker,
+                              args=(orchestrator.backend.address, 'test'))
+                   for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        orchestrator.run()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(3, orchestrator.n_success)
+        self.assertEqual(3, len(orchestrator.results))
+
+    def test_longest_first(self):
+        self.settings.PARALLEL_EXECUTION = False
+        durations = DurationHistory(self.settings.JOB_DURATIONS_FILE)
+        lce, lcd, no_cache = self.settings.EXPERIMENT_QUEUE
+        durations.add(tree_hash(lce), 1.0)
+        durations.add(tree_hash(lcd), 3.0)
+        durations.save()
+        orchestrator = Orchestrator(self.settings)
+        queue = orchestrator.schedule([(lce, 1), (lcd, 2), (no_cache, 1)])
+        self.assertEqual([(no_cache, 1), (lcd, 2), (lce, 1)], list(queue))
+
+    def test_eta(self):
+        self.settings.PARALLEL_EXECUTION = False
+        durations = DurationHistory(self.settings.JOB_DURATIONS_FILE)
+        lce, lcd, no_cache = self.settings.EXPERIMENT_QUEUE
+        durations.add(tree_hash(lce), 10.0)
+        durations.add(tree_hash(lcd), 20.0)
+        durations.save()
+        orchestrator = Orchestrator(self.settings)
+        orchestrator.n_exp = 3
+        orchestrator.schedule([(lce, 1), (lcd, 1), (no_cache, 1)])
+        # LCE took half the expected time and NO_CACHE is never run before
+        orchestrator.experiment_callback((lce, Tree(), 5.0))
+        self.assertAlmostEqual(10.0 + 5.0, orchestrator.eta())
+
+
+class VaryingOrchestrator(Orchestrator):
+    """Orchestrator recording a different value of adaptive replication
+    metrics for each replication, so that they never converge"""
+
+    def _record_samples(self, params, results):
+        samples = self._samples[tree_hash(params)]
+        for metric in self.adaptive_metrics:
+            samples[metric].append(len(samples[metric]))
+
+
+class TestAdaptiveReplication(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = Settings()
+        self.settings.PARALLEL_EXECUTION = False
+        self.settings.N_REPLICATIONS = 2
+        self.settings.MAX_REPLICATIONS = 5
+        self.settings.EVENT_CHUNK_SIZE = 30
+        self.settings.DATA_COLLECTORS = ['CACHE_HIT_RATIO']
+        self.settings.ADAPTIVE_REPLICATION_METRICS = [('CACHE_HIT_RATIO',
+                                                       'MEAN')]
+        self.settings.ADAPTIVE_REPLICATION_CI_WIDTH = 1e-9
+        self.params = scenario_params()
+        self.params['cache_policy'] = {'name': 'LRU'}
+        # Replications of unseeded experiments generally have different results
+        del self.params['workload']['seed']
+        del self.params['content_placement']['seed']
+        self.settings.EXPERIMENT_QUEUE = [self.params]
+
+    def run_orchestrator(self, orchestrator_class=Orchestrator):
+        orchestrator = orchestrator_class(self.settings)
+        orchestrator.run()
+        return orchestrator
+
+    def test_max_replications(self):
+        orchestrator = self.run_orchestrator(VaryingOrchestrator)
+        self.assertEqual(5, orchestrator.n_exp)
+        self.assertEqual(5, len(orchestrator.results))
+
+    def test_converged(self):
+        self.settings.ADAPTIVE_REPLICATION_CI_WIDTH = 1
+        self.assertEqual(2, len(self.run_orchestrator().results))
+
+    def test_no_variance(self):
+        self.settings.EXPERIMENT_QUEUE = [scenario_params()]
+        self.settings.EXPERIMENT_QUEUE[0]['cache_policy'] = {'name': 'LRU'}
+        self.assertEqual(2, len(self.run_orchestrator().results))
+
+    def test_parallel(self):
+        self.settings.PARALLEL_EXECUTION = True
+        self.settings.N_PROCESSES = 2
+        orchestrator = self.run_orchestrator(VaryingOrchestrator)
+        self.assertEqual(5, orchestrator.n_success)
+        self.assertEqual(5, len(orchestrator.results))
+
+    def test_extra_replications(self):
+        self.settings.ADAPTIVE_REPLICATION_CI_WIDTH = 0.1
+        orchestrator = Orchestrator(self.settings)
+        orchestrator.n_exp = 2
+        self.assertEqual(2, orchestrator.extra_replications(self.params))
+        for value in (0.2, 0.3):
+            orchestrator._record_samples(self.params, Tree(
+                        {'CACHE_HIT_RATIO': {'MEAN': value}}))
+        # The interval is 2 * 1.96 * 0.05 / sqrt(2) wide, so that 4
+        # replications are needed
+        self.assertEqual(2, orchestrator.extra_replications(self.params))
+        self.assertEqual(6, orchestrator.n_exp)
+
+    def test_invalid_metric(self):
+        self.settings.ADAPTIVE_REPLICATION_METRICS = [('LATENCY', 'MEAN')]
+        self.assertRaises(ValueError, Orchestrator, self.settings)
@@ -55,6 +55,20 @@ class TestUtil(unittest.TestCase):
         self.assertEqual(util.apportionment(100, [0.4, 0.21, 0.39]), [40, 21, 39])
         self.assertEqual(util.apportionment(99, [0.2, 0.7, 0.1]), [20, 69, 10])
 
+    def test_tree_hash(self):
+        a = util.Tree({'topology': {'name': 'PATH', 'n': 5},
+                       'strategy': {'name': 'LCE'}})
+        b = util.Tree()
+        b['strategy']['name'] = 'LCE'
+        b['topology']['n'] = 5
+        b['topology']['name'] = 'PATH'
+        self.assertEqual(util.tree_hash(a), util.tree_hash(b))
+        self.assertEqual(util.tree_hash(a), util.tree_hash(a.dict()))
+        b['topology']['n'] = 6
+        self.assertNotEqual(util.tree_hash(a), util.tree_hash(b))
+        self.assertEqual(util.tree_hash({'x': set([1, 'a', (2, 3)])}),
+                         util.tree_hash({'x': set([(2, 3), 'a', 1])}))
+
 class TestSettings(unittest.TestCase):
 
     def test_get_set(self):
@@ -44,6 +44,21 @@ class TestNumericCacheHitRatio(unittest.TestCase):
         h = cacheperf.numeric_cache_hit_ratio(self.pdf, cache.RandEvictionCache(r * self.n))
         self.assertLess(np.abs(h - r), 0.01)
 
+    def test_per_content(self):
+        r = 0.1
+        h = cacheperf.numeric_per_content_cache_hit_ratio(
+                self.pdf, cache.LruCache(r * self.n), seed=1)
+        self.assertEqual((self.n,), h.shape)
+        self.assertLess(np.abs(np.mean(h) - r), 0.01)
+
+    def test_2_layers(self):
+        h = cacheperf.numeric_cache_hit_ratio_2_layers(
+                self.pdf, cache.LruCache(0.1 * self.n),
+                cache.LruCache(0.2 * self.n), seed=1)
+        self.assertLess(np.abs(h['l1_hits'] - 0.1), 0.01)
+        self.assertLess(np.abs(h['total_hits'] - 0.2), 0.02)
+        self.assertAlmostEqual(h['l1_hits'] + h['l2_hits'], h['total_hits'])
+
 
 class TestLaoutarisPerContentCacheHitRatio(unittest.TestCase):
 
@@ -114,3 +129,141 @@ class TestOptimalCacheHitRatio(unittest.TestCase):
     def test_unsorted_pdf(self):
         h = cacheperf.optimal_cache_hit_ratio([0.1, 0.5, 0.4], 2)
         self.assertAlmostEqual(0.9, h)
+
+
+class TestLruMissRatioCurve(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        z = stats.TruncatedZipfDist(0.8, 300, seed=1)
+        cls.workload = [z.rv() for _ in range(5000)]
+
+    def test_stack_distances(self):
+        d = cacheperf.lru_stack_distances(['a', 'b', 'a', 'c', 'b', 'b', 'a'])
+        self.assertEqual([0, 0, 2, 0, 3, 1, 3], list(d))
+
+    def test_same_as_lru_cache(self):
+        mrc = cacheperf.lru_miss_ratio_curve(self.workload)
+        for size in (1, 2, 5, 17, 50, 120, 299, 400):
+            h = cacheperf.trace_driven_cache_hit_ratio(self.workload,
+                                                       cache.LruCache(size))
+            expected = 1 - h
+            m = mrc[size] if size < len(mrc) else mrc[-1]
+            self.assertAlmostEqual(expected, m)
+
+    def test_cache_sizes(self):
+        mrc = cacheperf.lru_miss_ratio_curve(self.workload)
+        sizes = [0, 3, 30, 10 ** 6]
+        m = cacheperf.lru_miss_ratio_curve(self.workload, sizes, 0.25)
+        self.assertEqual(1, m[0])
+        self.assertEqual([mrc[3], mrc[30], mrc[-1]], list(m[1:]))
+        self.assertTrue(np.all(np.diff(mrc) <= 0))
+
+    def test_array_workload(self):
+        mrc = cacheperf.lru_miss_ratio_curve(self.workload, warmup_ratio=0)
+        mrc_array = cacheperf.lru_miss_ratio_curve(np.array(self.workload),
+                                                   warmup_ratio=0)
+        np.testing.assert_array_equal(mrc, mrc_array)
+        self.assertAlmostEqual(len(set(self.workload)) / len(self.workload),
+                               mrc[-1])
+
+    def test_invalid_warmup_ratio(self):
+        self.assertRaises(ValueError, cacheperf.lru_miss_ratio_curve,
+                          self.workload, None, 1.5)
+
+    def test_no_measured_requests(self):
+        self.assertRaises(ValueError, cacheperf.lru_miss_ratio_curve, [])
+        self.assertRaises(ValueError, cacheperf.lru_miss_ratio_curve,
+                          self.workload, None, 1)
+
+    def test_numeric(self):
+        n = 200
+        pdf = np.ones(n) / n
+        m = cacheperf.numeric_lru_miss_ratio_curve(pdf, [20, 100], seed=1)
+        self.assertLess(np.abs(m[0] - 0.9), 0.02)
+        self.assertLess(np.abs(m[1] - 0.5), 0.02)
+
+    def test_per_node(self):
+        workloads = {1: self.workload, 2: self.workload[::2], 3: []}
+        mrc = cacheperf.per_node_lru_miss_ratio_curve(workloads, [10, 100])
+        self.assertEqual({1, 2}, set(mrc))
+        for v in mrc:
+            for i, size in enumerate([10, 100]):
+                h = cacheperf.trace_driven_cache_hit_ratio(
+                        workloads[v], cache.LruCache(size))
+                self.assertAlmostEqual(1 - h, mrc[v][i])
+
+
+class TestShardsMissRatioCurve(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.n = 5000
+        z = stats.TruncatedZipfDist(0.8, cls.n, seed=1)
+        cls.workload = [z.rv() for _ in range(100000)]
+        cls.exact = cacheperf.lru_miss_ratio_curve(cls.workload,
+                                                   warmup_ratio=0.25)
+        cls.sizes = np.arange(0, cls.n, 100)
+        cls.warmup = len(cls.workload) // 4
+
+    def error(self, estimate):
+        exact = self.exact[np.minimum(self.sizes, len(self.exact) - 1)]
+        return np.mean(np.abs(estimate - exact))
+
+    def test_full_rate(self):
+        mrc = cacheperf.shards_miss_ratio_curve(self.workload, rate=1,
+                                                warmup=self.warmup)
+        np.testing.assert_allclose(self.exact, mrc)
+
+    def test_fixed_rate(self):
+        mrc = cacheperf.shards_miss_ratio_curve(self.workload, self.sizes,
+                                                rate=0.3, warmup=self.warmup)
+        self.assertLess(self.error(mrc), 0.02)
+
+    def test_fixed_size(self):
+        mrc = cacheperf.shards_miss_ratio_curve(self.workload, self.sizes,
+                                                rate=1, max_keys=2000,
+                                                warmup=self.warmup)
+        self.assertLess(self.error(mrc), 0.02)
+
+    def test_iterator(self):
+        mrc = cacheperf.shards_miss_ratio_curve(iter(self.workload),
+                                                self.sizes, rate=0.1)
+        mrc_list = cacheperf.shards_miss_ratio_curve(self.workload,
+                                                     self.sizes, rate=0.1)
+        np.testing.assert_array_equal(mrc, mrc_list)
+
+    def test_mini_simulation_full_rate(self):
+        for size in (10, 100, 1000):
+            h = cacheperf.trace_driven_cache_hit_ratio(self.workload,
+                                                       cache.FifoCache(size))
+            m = cacheperf.shards_miss_ratio_curve(self.workload, [0, size],
+                                                  rate=1, warmup=self.warmup,
+                                                  policy='FIFO')
+            self.assertEqual(1, m[0])
+            self.assertAlmostEqual(1 - h, m[1])
+
+    def test_mini_simulation(self):
+        sizes = [100, 1000]
+        m = cacheperf.shards_miss_ratio_curve(self.workload, sizes, rate=0.3,
+                                              warmup=self.warmup,
+                                              policy='FIFO')
+        for size, estimate in zip(sizes, m):
+            h = cacheperf.trace_driven_cache_hit_ratio(self.workload,
+                                                       cache.FifoCache(size))
+            self.assertLess(np.abs(1 - h - estimate), 0.05)
+
+    def test_invalid_params(self):
+        self.assertRaises(ValueError, cacheperf.shards_miss_ratio_curve,
+                          self.workload, rate=0)
+        self.assertRaises(ValueError, cacheperf.shards_miss_ratio_curve,
+                          self.workload, policy='FIFO')
+        self.assertRaises(ValueError, cacheperf.shards_miss_ratio_curve,
+                          self.workload, [10], max_keys=10, policy='FIFO')
+
+    def test_none_sampled(self):
+        content = next(c for c in self.workload
+                       if cacheperf._spatial_hash(c) >= 0.5)
+        for policy in ('LRU', 'FIFO'):
+            self.assertRaises(ValueError, cacheperf.shards_miss_ratio_curve,
+                              [content] * 10, [1], rate=0.5, policy=policy)
@@ -1,6 +1,8 @@
 import unittest
 
+import os
 import random
+import tempfile
 
 import numpy as np
 
@@ -60,3 +62,23 @@ class TestZipfFit(unittest.TestCase):
         self.assertLessEqual(p, p_max)
 
 
+class TestParseSquid(unittest.TestCase):
+
+    def test_parse(self):
+        lines = ['1157689312.049 5006 10.105.21.199 TCP_MISS/200 19763 '
+                 'CONNECT login.yahoo.com:443 badeyek DIRECT/209.73.177.115 -',
+                 '1157689320.327 2864 10.105.21.199 TCP_HIT/200 10182 '
+                 'GET http://www.goonernews.com/ - NONE/- text/html']
+        fd, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write('\n'.join(lines) + '\n')
+            entries = list(traces.parse_squid(path))
+        finally:
+            os.remove(path)
+        self.assertEqual(2, len(entries))
+        self.assertEqual('login.yahoo.com:443', entries[0]['url'])
+        self.assertEqual('badeyek', entries[0]['client_ident'])
+        self.assertEqual('TCP_HIT', entries[1]['log_tag'])
+        self.assertEqual(200, entries[1]['http_code'])
+        self.assertIsNone(entries[1]['client_ident'])
@@ -170,7 +170,6 @@ def parse_url_list(path):
     with open(path) as f:
         for line in f:
             yield line
-    raise StopIteration()
 
 
 def parse_wikibench(path):
@@ -195,7 +194,6 @@ def parse_wikibench(path):
                 timestamp=entry[1],
                 url=entry[2]
                       )
-    raise StopIteration()
 
 
 def parse_squid(path):
@@ -250,7 +248,6 @@ def parse_squid(path):
                 hostname=hostname,
                 content_type=content_type
                       )
-    raise StopIteration()
 
 
 def parse_youtube_umass(path):
@@ -304,7 +301,6 @@ def parse_youtube_umass(path):
                 video_id=video_id,
                 content_server_addr=content_server_addr,
                       )
-    raise StopIteration()
 
 
 def parse_common_log_format(path):
@@ -347,4 +343,3 @@ def parse_common_log_format(path):
                 bytes=n_bytes
                         )
             yield t, event
-    raise StopIteration()
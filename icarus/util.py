@@ -6,6 +6,7 @@ import logging
 import collections
 import copy
 import heapq
+import hashlib
 
 import numpy as np
 import networkx as nx
@@ -24,7 +25,8 @@ __all__ = [
         'overlay_betweenness_centrality',
         'path_links',
         'multicast_tree',
-        'apportionment'
+        'apportionment',
+        'tree_hash'
            ]
 
 class Tree(collections.defaultdict):
@@ -755,3 +757,39 @@ def apportionment(n, fracs):
     for i in idx:
         ints[i] += 1
     return ints
+
+
+def _canonical_repr(obj):
+    """Return a string representation of an object which does not depend on
+    the iteration order of its dictionaries and sets.
+    """
+    if isinstance(obj, dict):
+        items = sorted((_canonical_repr(k), _canonical_repr(v))
+                       for k, v in obj.items())
+        return '{%s}' % ', '.join('%s: %s' % kv for kv in items)
+    if isinstance(obj, (set, frozenset)):
+        return 'set([%s])' % ', '.join(sorted(_canonical_repr(v) for v in obj))
+    if isinstance(obj, (list, tuple)):
+        return '%s([%s])' % (type(obj).__name__,
+                             ', '.join(_canonical_repr(v) for v in obj))
+    return repr(obj)
+
+
+def tree_hash(tree):
+    """Return a digest identifying the content of a tree.
+
+    Two trees storing the same values at the same paths have the same digest,
+    regardless of the order in which their items were inserted. This is
+    useful to key stored data by the parameters which generated it.
+
+    Parameters
+    ----------
+    tree : Tree or dict
+        The tree
+
+    Returns
+    -------
+    digest : str
+        The hexadecimal SHA-1 digest of the tree
+    """
+    return hashlib.sha1(_canonical_repr(tree).encode('utf-8')).hexdigest()